@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Fehlertolerante Adress-Autovervollstaendigung fuer das "Ort"-Feld (Einsatz anlegen).
+
+Eintraege sind die eindeutigen Adressen (Strasse + Hausnummer, PLZ, Ort) des
+Adressspeichers sowie je Strasse ein Eintrag ohne Hausnummer. Der Index besteht aus
+  - einem sortierten Token-Vokabular: ein Praefix entspricht einem zusammenhaengenden
+    Bereich (Trie in Array-Form), dessen Postings ebenfalls zusammenhaengend liegen,
+  - Trigramm-Postings ueber dem Vokabular fuer Tippfehler,
+  - Eintragsgewichten (Anzahl Datensaetze) fuer das Ranking.
+Normalisiert werden Umlaute, ß und Abkuerzungen wie "u.", "o.", "St.", "Str.".
+
+Aufruf:  python3 scripts/address_autocomplete.py [--out DATEI] [--query "u. Tiebelg"]
+"""
+
+import argparse
+import os
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import address_store
+from address_store import StringTable, read_sections, write_sections
+
+INDEX_PATH = os.path.join(address_store.INDEX_DIR, "adressen.acidx")
+MAGIC = b"EINFOACP"
+
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", "é": "e", "è": "e"})
+# Abkuerzungen, die nur mit abschliessendem Punkt ersetzt werden ("u. Tiebelgasse")
+ABBREVIATIONS = {
+    "u": "untere",
+    "o": "obere",
+    "st": "sankt",
+    "str": "strasse",
+    "hl": "heilige",
+    "prof": "professor",
+    "dr": "doktor",
+}
+# Grundwoerter, die in Zusammensetzungen zusaetzlich als Stamm indexiert werden
+COMPOUND_SUFFIXES = ("strasse", "gasse", "weg", "platz", "allee", "ring", "siedlung")
+TOKEN_RE = re.compile(r"[0-9a-z]+\.?")
+
+
+def normalize(text, final_prefix=False):
+    """Text -> Liste normalisierter Tokens.
+
+    Mit final_prefix=True bleibt das letzte Token unveraendert (es wird gerade getippt).
+    """
+    text = (text or "").lower().translate(UMLAUTS)
+    raw = TOKEN_RE.findall(text)
+    tokens = []
+    for i, tok in enumerate(raw):
+        dotted = tok.endswith(".")
+        tok = tok.rstrip(".")
+        if dotted and not (final_prefix and i == len(raw) - 1 and not text.rstrip().endswith(".")):
+            if tok in ABBREVIATIONS:
+                tok = ABBREVIATIONS[tok]
+            elif tok.endswith("str"):
+                tok += "asse"
+        tokens.append(tok)
+    return [t for t in tokens if t]
+
+
+def index_tokens(text):
+    """Tokens fuer die Indexierung inkl. Stamm von Zusammensetzungen (oremusstrasse -> oremus)."""
+    out = []
+    for tok in normalize(text):
+        out.append(tok)
+        for suffix in COMPOUND_SUFFIXES:
+            if tok.endswith(suffix) and len(tok) > len(suffix) + 2:
+                out.append(tok[:-len(suffix)])
+                out.append(suffix)
+                break
+    return out
+
+
+def trigrams(token):
+    padded = "$" + token
+    return {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+
+
+def format_address(street, housenumber, postcode, place):
+    first = " ".join(p for p in (street, housenumber) if p)
+    second = " ".join(p for p in (postcode, place) if p)
+    return ", ".join(p for p in (first, second) if p)
+
+
+def _csr(pairs, n_rows, dtype=np.int32):
+    """(zeile, wert)-Paare -> (ptr, werte) sortiert nach Zeile."""
+    if not pairs:
+        return np.zeros(n_rows + 1, dtype=np.int64), np.array([], dtype=dtype)
+    arr = np.array(pairs, dtype=np.int64)
+    arr = np.unique(arr, axis=0)
+    ptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(arr[:, 0], minlength=n_rows), out=ptr[1:])
+    return ptr, arr[:, 1].astype(dtype)
+
+
+class AutocompleteIndex:
+    def __init__(self, vocab, tok_ptr, tok_post, tri, tri_ptr, tri_post, tok_ntri, labels, weight, street_level):
+        self.vocab = vocab
+        self.tok_ptr = tok_ptr
+        self.tok_post = tok_post
+        self.tri = tri
+        self.tri_ptr = tri_ptr
+        self.tri_post = tri_post
+        self.tok_ntri = tok_ntri
+        self.labels = labels
+        self.weight = weight
+        self.street_level = street_level
+        self._prior = 0.05 * np.log1p(weight) + 0.1 * street_level
+        self._token_hits = lru_cache(maxsize=4096)(self._token_hits_uncached)
+
+    def __len__(self):
+        return len(self.weight)
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, store):
+        entries = {}
+        for i in range(len(store)):
+            street, nr = store.get("street", i), store.get("housenumber", i)
+            plz, place = store.get("postcode", i), store.get("place", i)
+            if not (street or place):
+                continue
+            for key in {(street, nr, plz, place), (street, "", plz, place)}:
+                entries[key] = entries.get(key, 0) + 1
+
+        keys = sorted(entries)
+        token_pairs = [(tok, e) for e, key in enumerate(keys) for tok in set(index_tokens(" ".join(key)))]
+        vocab = np.array(sorted({tok for tok, _ in token_pairs}), dtype=str)
+        tok_id = {tok: i for i, tok in enumerate(vocab.tolist())}
+        tok_ptr, tok_post = _csr([(tok_id[tok], e) for tok, e in token_pairs], len(vocab))
+
+        gram_pairs = [(g, t) for t, tok in enumerate(vocab.tolist()) for g in trigrams(tok)]
+        tri = np.array(sorted({g for g, _ in gram_pairs}), dtype=str)
+        tri_id = {g: i for i, g in enumerate(tri.tolist())}
+        tri_ptr, tri_post = _csr([(tri_id[g], t) for g, t in gram_pairs], len(tri))
+        tok_ntri = np.array([min(len(trigrams(tok)), 255) for tok in vocab.tolist()], dtype=np.uint8)
+
+        interner = address_store._Interner()
+        codes = np.array([interner(format_address(*k)) for k in keys], dtype=np.uint32)
+        offsets, blob = interner.encode()
+        labels = (codes, StringTable(offsets, np.frombuffer(blob, dtype=np.uint8)))
+        weight = np.array([entries[k] for k in keys], dtype=np.float32)
+        street_level = np.array([1 if not k[1] else 0 for k in keys], dtype=np.uint8)
+        return cls(vocab, tok_ptr, tok_post, tri, tri_ptr, tri_post, tok_ntri, labels, weight, street_level)
+
+    def save(self, path=INDEX_PATH):
+        codes, table = self.labels
+        write_sections(path, {
+            "vocab": self.vocab, "tok_ptr": self.tok_ptr, "tok_post": self.tok_post,
+            "tri": self.tri, "tri_ptr": self.tri_ptr, "tri_post": self.tri_post, "tok_ntri": self.tok_ntri,
+            "label": codes, "label.offsets": table.offsets, "label.blob": table.blob,
+            "weight": self.weight, "street_level": self.street_level,
+        }, {"count": len(self)}, magic=MAGIC)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        _, c = read_sections(path, magic=MAGIC)
+        labels = (c["label"], StringTable(c["label.offsets"], c["label.blob"]))
+        return cls(c["vocab"], c["tok_ptr"], c["tok_post"], c["tri"], c["tri_ptr"], c["tri_post"],
+                   c["tok_ntri"], labels, c["weight"], c["street_level"])
+
+    def label(self, entry):
+        codes, table = self.labels
+        return table[int(codes[entry])]
+
+    # ------------------------------------------------------------------
+    def _prefix_range(self, token):
+        lo = int(np.searchsorted(self.vocab, token, side="left"))
+        hi = int(np.searchsorted(self.vocab, token + "￿", side="left"))
+        return lo, hi
+
+    def _fuzzy_tokens(self, token, min_sim=0.5, limit=8):
+        """Vokabular-Tokens mit aehnlichen Trigrammen -> (token_ids, aehnlichkeit)."""
+        grams = trigrams(token)
+        pos = np.searchsorted(self.tri, list(grams))
+        pos = pos[(pos < len(self.tri))]
+        pos = pos[np.isin(self.tri[pos], list(grams))]
+        if not len(pos):
+            return np.array([], dtype=np.int64), np.array([])
+        hits = np.concatenate([self.tri_post[self.tri_ptr[p]:self.tri_ptr[p + 1]] for p in pos])
+        shared = np.bincount(hits, minlength=len(self.vocab))
+        cand = np.flatnonzero(shared)
+        # Anteil der Abfrage-Trigramme im Token, leicht bestraft fuer viel laengere Tokens
+        sim = shared[cand] / len(grams) - 0.02 * np.maximum(self.tok_ntri[cand].astype(np.int64) - len(grams), 0)
+        keep = sim >= min_sim
+        cand, sim = cand[keep], sim[keep]
+        top = np.argsort(-sim, kind="stable")[:limit]
+        return cand[top], sim[top]
+
+    def _token_hits_uncached(self, token):
+        """Eintraege, die ein Abfrage-Token abdecken -> (entry_ids, punkte), entry_ids eindeutig.
+
+        Exakte Tokens zaehlen mehr als Praefixtreffer, diese mehr als Tippfehlertreffer;
+        je Eintrag zaehlt die beste Trefferart. Tippfehler werden auch gesucht, wenn es
+        Praefixtreffer gibt ("feldkirchn" ist Praefix von "feldkirchner", gemeint ist
+        meist "feldkirchen").
+        """
+        lo, hi = self._prefix_range(token)
+        exact = int(np.searchsorted(self.vocab, token))
+        parts, scores = [], []
+        if exact < len(self.vocab) and self.vocab[exact] == token:
+            parts.append(self.tok_post[self.tok_ptr[exact]:self.tok_ptr[exact + 1]])
+            scores.append(np.full(len(parts[-1]), 1.0))
+        if hi > lo:
+            # Postings eines Praefixbereichs liegen zusammenhaengend
+            post = self.tok_post[self.tok_ptr[lo]:self.tok_ptr[hi]]
+            parts.append(post)
+            scores.append(np.full(len(post), 0.7 + 0.2 * min(len(token) / 8.0, 1.0)))
+        if len(token) >= 3:
+            toks, sims = self._fuzzy_tokens(token)
+            for t, s in zip(toks, sims):
+                post = self.tok_post[self.tok_ptr[t]:self.tok_ptr[t + 1]]
+                parts.append(post)
+                scores.append(np.full(len(post), 0.6 * s))
+        if not parts:
+            return np.array([], dtype=np.int32), np.array([])
+        ids = np.concatenate(parts)
+        sc = np.concatenate(scores)
+        order = np.argsort(-sc, kind="stable")
+        ids, first = np.unique(ids[order], return_index=True)
+        return ids, sc[order][first]
+
+    def suggest(self, text, limit=10):
+        """Vorschlaege fuer eine (Teil-)Eingabe -> [(adresse, punkte), ...]"""
+        tokens = normalize(text, final_prefix=True)
+        if not tokens:
+            return []
+        hits = [self._token_hits(tok) for tok in tokens]
+        ids = np.concatenate([h[0] for h in hits])
+        if not len(ids):
+            return []
+        # Tokens nach Seltenheit gewichten (quadratisch): ein seltener Strassenname zaehlt
+        # deutlich mehr als "untere" oder eine Hausnummer, die viele Eintraege treffen.
+        # Gezaehlt werden nur Treffer nahe der besten Trefferart, schwache Tippfehler nicht.
+        n = len(self.weight)
+        idf = [(np.log1p(n / max(np.count_nonzero(h[1] >= 0.7 * h[1].max()), 1)) / np.log1p(n)) ** 2
+               if len(h[1]) else 0.0 for h in hits]
+        sc = np.concatenate([h[1] * w for h, w in zip(hits, idf)])
+        total = np.bincount(ids, weights=sc, minlength=n)
+        cand = np.flatnonzero(total)
+        score = total[cand] + self._prior[cand]
+        # Strasseneintraege zuerst, ausser es wurde schon eine Hausnummer getippt
+        score = score + (-0.3 if any(t.isdigit() for t in tokens) else 0.3) * self.street_level[cand]
+        k = min(limit, len(cand))
+        top = np.argpartition(-score, k - 1)[:k] if k < len(cand) else np.arange(len(cand))
+        top = top[np.argsort(-score[top], kind="stable")]
+        return [(self.label(cand[i]), float(score[i])) for i in top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adress-Autocomplete-Index bauen und abfragen")
+    parser.add_argument("--store", default=address_store.STORE_PATH)
+    parser.add_argument("--out", default=INDEX_PATH)
+    parser.add_argument("--query", action="append", default=[])
+    args = parser.parse_args()
+
+    if not os.path.exists(args.out) or not args.query:
+        if not os.path.exists(args.store):
+            address_store.build_store(out_path=args.store)
+        started = time.perf_counter()
+        idx = AutocompleteIndex.build(address_store.open_store(args.store))
+        idx.save(args.out)
+        print(f"  ✓ {args.out}: {len(idx)} Einträge, {len(idx.vocab)} Tokens, "
+              f"{os.path.getsize(args.out) / 1e6:.2f} MB ({time.perf_counter() - started:.2f} s)")
+    idx = AutocompleteIndex.load(args.out)
+    for q in args.query:
+        # jede Teileingabe wie beim Tippen abfragen
+        started = time.perf_counter()
+        for n in range(1, len(q) + 1):
+            result = idx.suggest(q[:n])
+        per_key = (time.perf_counter() - started) * 1000 / max(len(q), 1)
+        print(f"  {q!r} ({per_key:.2f} ms/Taste):")
+        for label, score in result:
+            print(f"    {score:5.2f}  {label}")
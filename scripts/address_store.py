@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Kompakter, spaltenorientierter Binaerspeicher fuer den Kaernten-Adresskorpus
+(chatbot/knowledge/Adressen/gemeinden/gemeinde_*.jsonl).
+
+Der Build-Schritt liest die JSONL-Dateien einmal zeilenweise und schreibt eine
+einzige Datei mit
+  - Koordinaten als float64-Arrays (lat, lon),
+  - internierten String-Tabellen (Strasse, Hausnummer, PLZ, Ort, Kategorie, Name, ...),
+  - Byte-Offsets in die Original-JSONL je Datensatz.
+Der Loader oeffnet die Datei per mmap; Spalten sind NumPy-Views ohne Kopie.
+
+Aufruf:  python3 scripts/address_store.py [--src DIR] [--out DATEI]
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+GEMEINDE_DIR = os.path.join(ROOT_DIR, "chatbot", "knowledge", "Adressen", "gemeinden")
+INDEX_DIR = os.path.join(ROOT_DIR, "chatbot", "knowledge_index")
+STORE_PATH = os.path.join(INDEX_DIR, "adressen.store")
+
+MAGIC = b"EINFOADR"
+VERSION = 1
+ALIGN = 8
+
+# Textfelder, die als internierte String-Tabellen abgelegt werden
+STRING_FIELDS = ("street", "housenumber", "postcode", "place", "category", "name", "osm_type", "doc_type")
+
+
+def _pad(n):
+    return (-n) % ALIGN
+
+
+class _Interner:
+    def __init__(self):
+        self.lookup = {"": 0}
+        self.values = [""]
+
+    def __call__(self, value):
+        value = "" if value is None else str(value)
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self):
+        """Strings als UTF-8-Blob plus uint32-Offsets (n+1)."""
+        blobs = [v.encode("utf-8") for v in self.values]
+        offsets = np.zeros(len(blobs) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        return offsets, b"".join(blobs)
+
+
+def gemeinde_files(src_dir=GEMEINDE_DIR):
+    return sorted(glob.glob(os.path.join(src_dir, "gemeinde_*.jsonl")))
+
+
+def iter_records(paths):
+    """Liefert (datei_index, byte_offset, laenge, record) fuer jede Adress-/POI-Zeile."""
+    for file_idx, path in enumerate(paths):
+        with open(path, "rb") as fh:
+            offset = 0
+            for raw in fh:
+                length = len(raw)
+                line = raw.strip()
+                if line:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        rec = None
+                    if rec and rec.get("osm_id") is not None:
+                        yield file_idx, offset, length, rec
+                offset += length
+
+
+def build_store(src_dir=GEMEINDE_DIR, out_path=STORE_PATH, paths=None):
+    """Kompiliert die JSONL-Dateien in einen Binaerspeicher. Gibt die Anzahl Datensaetze zurueck."""
+    paths = paths if paths is not None else gemeinde_files(src_dir)
+    interners = {f: _Interner() for f in STRING_FIELDS}
+    lat, lon, osm_id, file_idx, rec_off, rec_len = [], [], [], [], [], []
+    codes = {f: [] for f in STRING_FIELDS}
+
+    for fi, off, length, rec in iter_records(paths):
+        lat.append(rec.get("lat") if rec.get("lat") is not None else np.nan)
+        lon.append(rec.get("lon") if rec.get("lon") is not None else np.nan)
+        osm_id.append(int(rec["osm_id"]))
+        file_idx.append(fi)
+        rec_off.append(off)
+        rec_len.append(length)
+        for f in STRING_FIELDS:
+            codes[f].append(interners[f](rec.get(f)))
+
+    columns = {
+        "lat": np.asarray(lat, dtype=np.float64),
+        "lon": np.asarray(lon, dtype=np.float64),
+        "osm_id": np.asarray(osm_id, dtype=np.int64),
+        "file": np.asarray(file_idx, dtype=np.uint16),
+        "offset": np.asarray(rec_off, dtype=np.uint64),
+        "length": np.asarray(rec_len, dtype=np.uint32),
+    }
+    for f in STRING_FIELDS:
+        columns[f] = np.asarray(codes[f], dtype=np.uint32)
+        columns[f + ".offsets"], blob = interners[f].encode()
+        columns[f + ".blob"] = np.frombuffer(blob, dtype=np.uint8)
+
+    write_sections(out_path, columns, {
+        "count": len(lat),
+        "files": [os.path.relpath(p, os.path.dirname(os.path.abspath(out_path))) for p in paths],
+        "strings": list(STRING_FIELDS),
+    })
+    return len(lat)
+
+
+def write_sections(out_path, columns, meta, magic=MAGIC, version=VERSION):
+    """Schreibt Arrays als ausgerichtete Sektionen hinter einen JSON-Header.
+
+    Layout: MAGIC | uint32 version | uint32 header_len | header(JSON) | pad | sections...
+    """
+    sections = {}
+    pos = 0
+    for name, arr in columns.items():
+        arr = np.ascontiguousarray(arr)
+        sections[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": pos, "nbytes": arr.nbytes}
+        pos += arr.nbytes + _pad(arr.nbytes)
+    header = json.dumps(dict(meta, version=version, sections=sections), ensure_ascii=False).encode("utf-8")
+    prefix = len(magic) + 8 + len(header)
+    prefix += _pad(prefix)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(magic + struct.pack("<II", version, len(header)) + header)
+        fh.write(b"\0" * (prefix - fh.tell()))
+        for name, arr in columns.items():
+            data = np.ascontiguousarray(arr).tobytes()
+            fh.write(data + b"\0" * _pad(len(data)))
+    os.replace(tmp, out_path)
+
+
+def read_sections(path, magic=MAGIC):
+    """Oeffnet eine mit write_sections geschriebene Datei per mmap -> (meta, {name: array})."""
+    with open(path, "rb") as fh:
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(magic)] != magic:
+        raise ValueError(f"{path}: unbekanntes Dateiformat")
+    version, header_len = struct.unpack_from("<II", mm, len(magic))
+    start = len(magic) + 8
+    meta = json.loads(mm[start:start + header_len].decode("utf-8"))
+    base = start + header_len
+    base += _pad(base)
+    arrays = {}
+    for name, sec in meta["sections"].items():
+        dtype = np.dtype(sec["dtype"])
+        count = sec["nbytes"] // dtype.itemsize if dtype.itemsize else 0
+        arr = np.frombuffer(mm, dtype=dtype, count=count, offset=base + sec["offset"])
+        arrays[name] = arr.reshape(sec["shape"])
+    meta["_mmap"] = mm
+    return meta, arrays
+
+
+def varint_lengths(values):
+    """Bytes je Wert in der Varint-Kodierung (7 Bit je Byte) -> int64-Array."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for g in range(1, 10):
+        lengths += values >= np.uint64(1 << (7 * g))
+    return lengths
+
+
+def encode_varints(values):
+    """Vektorisiert: nicht-negative Ganzzahlen -> LEB128-Bytes als uint8-Array."""
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = varint_lengths(values)
+    owner = np.repeat(np.arange(len(values)), lengths)
+    pos = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    out = ((values[owner] >> (7 * pos).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    out[pos < lengths[owner] - 1] |= 0x80
+    return out
+
+
+def decode_varints(buf):
+    """Dekodiert einen kompletten Varint-Strom vektorisiert -> int64-Array."""
+    b = np.frombuffer(buf, dtype=np.uint8).astype(np.int64)
+    if not len(b):
+        return b
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    group = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    shift = 7 * (np.arange(len(b)) - starts[group])
+    return np.add.reduceat((b & 0x7F) << shift, starts)
+
+
+class StringTable:
+    """Internierte Strings: uint32-Offsets in einen UTF-8-Blob."""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self._decoded = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code):
+        a, b = int(self.offsets[code]), int(self.offsets[code + 1])
+        return self.blob[a:b].tobytes().decode("utf-8")
+
+    def values(self):
+        """Alle Strings als NumPy-Array (einmalig dekodiert, dann gecacht)."""
+        if self._decoded is None:
+            self._decoded = np.array([self[i] for i in range(len(self))], dtype=object)
+        return self._decoded
+
+    def find(self, value):
+        vals = self.values()
+        hits = np.flatnonzero(vals == value)
+        return int(hits[0]) if len(hits) else -1
+
+
+class AddressStore:
+    """Lesezugriff auf den Binaerspeicher; alle Spalten sind mmap-Views."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.meta, self.columns = read_sections(path)
+        self.lat = self.columns["lat"]
+        self.lon = self.columns["lon"]
+        self.osm_id = self.columns["osm_id"]
+        self.strings = {
+            f: StringTable(self.columns[f + ".offsets"], self.columns[f + ".blob"])
+            for f in self.meta["strings"]
+        }
+        base = os.path.dirname(os.path.abspath(path))
+        self.files = [os.path.normpath(os.path.join(base, p)) for p in self.meta["files"]]
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def codes(self, field):
+        return self.columns[field]
+
+    def column(self, field):
+        """Dekodierte Textspalte (Objekt-Array) fuer alle Datensaetze."""
+        return self.strings[field].values()[self.columns[field]]
+
+    def get(self, field, i):
+        return self.strings[field][int(self.columns[field][i])]
+
+    def address(self, i):
+        street = " ".join(p for p in (self.get("street", i), self.get("housenumber", i)) if p)
+        town = " ".join(p for p in (self.get("postcode", i), self.get("place", i)) if p)
+        return ", ".join(p for p in (street, town) if p) or self.get("name", i)
+
+    def row(self, i):
+        out = {f: self.get(f, i) for f in self.strings}
+        out.update(osm_id=int(self.osm_id[i]), lat=float(self.lat[i]), lon=float(self.lon[i]))
+        return out
+
+    def record(self, i):
+        """Vollstaendiger Original-Datensatz (liest genau eine Zeile aus der JSONL)."""
+        path = self.files[int(self.columns["file"][i])]
+        with open(path, "rb") as fh:
+            fh.seek(int(self.columns["offset"][i]))
+            return json.loads(fh.read(int(self.columns["length"][i])))
+
+
+def open_store(path=STORE_PATH):
+    return AddressStore(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adresskorpus in Binaerspeicher kompilieren")
+    parser.add_argument("--src", default=GEMEINDE_DIR)
+    parser.add_argument("--out", default=STORE_PATH)
+    args = parser.parse_args()
+    print("Kompiliere Adressspeicher ...")
+    started = time.perf_counter()
+    n = build_store(args.src, args.out)
+    print(f"  ✓ {args.out}: {n} Datensätze, {os.path.getsize(args.out) / 1e6:.1f} MB "
+          f"({time.perf_counter() - started:.2f} s)")
+    started = time.perf_counter()
+    open_store(args.out)
+    print(f"  ✓ Laden per mmap: {(time.perf_counter() - started) * 1000:.1f} ms")
+    print("Fertig.")
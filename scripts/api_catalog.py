@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Maschinenlesbarer Katalog der EINFO-HTTP-API.
+
+Quelle fuer Kapitel 17 (API-Referenz) im Admin-Handbuch (generate_help_pdfs.py)
+und fuer den Lastgenerator (load_test.py). Jeder Endpunkt ist ein Tupel
+(Methode, Pfad, Beschreibung[, Optionen]) mit den Optionen
+  limit   Rate-Limit in Anfragen je Minute (chatbot/server/middleware/rate-limit.js),
+  admin   nur fuer Admins,
+  public  ohne Benutzer-Session erreichbar,
+  stream  Antwort ist ein offener Stream (SSE) und eignet sich nicht fuer Lasttests.
+Abschnitte ohne "server" gehoeren zum Hauptserver (server/server.js).
+
+Aufruf:  python3 scripts/api_catalog.py [--json] [--server einfo|chatbot]
+"""
+
+import argparse
+import json
+import re
+import urllib.parse
+
+SERVERS = {"einfo": 4040, "chatbot": 3100}
+RATE_WINDOW_S = 60
+
+SECTIONS = (
+    {
+        "nr": "17.1", "title": "Einsatzboard & Fahrzeuge",
+        "endpoints": (
+            ("GET", "/api/board", "Gibt das komplette Einsatzboard mit allen Spalten zurueck"),
+            ("GET", "/api/vehicles", "Listet alle Fahrzeuge (Basis + Zusatz) auf"),
+            ("POST", "/api/vehicles", "Legt ein neues Fahrzeug an oder klont ein bestehendes"),
+            ("PATCH", "/api/vehicles/:id/availability", "Aendert die Verfuegbarkeit eines Fahrzeugs"),
+            ("PATCH", "/api/vehicles/:id/position", "Aktualisiert die GPS-Position eines Fahrzeugs"),
+            ("DELETE", "/api/vehicles/:id/position", "Loescht eine manuelle Positions-Ueberschreibung"),
+            ("GET", "/api/groups/availability", "Gibt den Verfuegbarkeitsstatus aller Gruppen zurueck"),
+            ("GET", "/api/groups/alerted", "Listet alarmierte Gruppen auf"),
+            ("PATCH", "/api/groups/:name/availability", "Aendert die Verfuegbarkeit einer Gruppe"),
+            ("GET", "/api/gps", "Gibt GPS-Daten zurueck"),
+            ("GET", "/api/types", "Gibt verfuegbare Einsatztypen zurueck"),
+            ("GET", "/api/nearby", "Sucht naechstgelegene Einheiten/Ressourcen"),
+        ),
+    },
+    {
+        "nr": "17.2", "title": "Einsatzkarten (Cards)",
+        "endpoints": (
+            ("POST", "/api/cards", "Legt eine neue Einsatzkarte an"),
+            ("POST", "/api/cards/:id/move", "Verschiebt eine Karte in eine andere Spalte"),
+            ("POST", "/api/cards/:id/assign", "Weist ein Fahrzeug einer Karte zu"),
+            ("POST", "/api/cards/:id/unassign", "Entfernt ein Fahrzeug von einer Karte"),
+            ("PATCH", "/api/cards/:id/personnel", "Aktualisiert die Personalstaerke einer Karte"),
+            ("PATCH", "/api/cards/:id",
+             "Aktualisiert Karten-Eigenschaften (Titel, Ort, Typ, Koordinaten, Abschnitt usw.)"),
+        ),
+    },
+    {
+        "nr": "17.3", "title": "Protokoll (Meldestelle)", "page": True,
+        "endpoints": (
+            ("GET", "/api/protocol", "Listet alle Protokolleintraege auf"),
+            ("POST", "/api/protocol", "Erstellt einen neuen Protokolleintrag"),
+            ("GET", "/api/protocol/:nr", "Gibt einen bestimmten Eintrag zurueck"),
+            ("PUT", "/api/protocol/:nr", "Aktualisiert einen Protokolleintrag"),
+            ("POST", "/api/protocol/:nr/lock", "Sperrt einen Eintrag zur Bearbeitung"),
+            ("DELETE", "/api/protocol/:nr/lock", "Gibt die Sperre eines Eintrags frei"),
+            ("GET", "/api/protocol/csv/file", "Exportiert das Protokoll als CSV-Datei"),
+            ("GET", "/api/protocol/auto-print-config", "Gibt die Auto-Druck-Konfiguration zurueck", {"admin": True}),
+            ("POST", "/api/protocol/auto-print-config", "Aktualisiert die Auto-Druck-Konfiguration", {"admin": True}),
+        ),
+    },
+    {
+        "nr": "17.4", "title": "Aufgaben",
+        "endpoints": (
+            ("GET", "/api/aufgaben", "Listet alle Aufgaben fuer die aktuelle Rolle auf"),
+            ("POST", "/api/aufgaben", "Erstellt eine neue Aufgabe"),
+            ("POST", "/api/aufgaben/:id/edit", "Bearbeitet eine bestehende Aufgabe"),
+            ("POST", "/api/aufgaben/:id/status", "Aendert den Status einer Aufgabe"),
+            ("POST", "/api/aufgaben/reorder", "Sortiert Aufgaben um"),
+            ("GET", "/api/aufgaben/config", "Gibt die Aufgabenkonfiguration zurueck"),
+            ("GET", "/api/aufgaben/protocols", "Gibt Protokolle fuer die aktuelle Rolle zurueck"),
+        ),
+    },
+    {
+        "nr": "17.5", "title": "Mail",
+        "endpoints": (
+            ("GET", "/api/mail/status", "Gibt den Mail-Konfigurationsstatus zurueck"),
+            ("POST", "/api/mail/send", "Versendet eine E-Mail"),
+            ("GET", "/api/mail/inbox/status", "Prueft den Inbox-Status"),
+            ("GET", "/api/mail/inbox", "Listet Inbox-Nachrichten auf (mit optionalem limit-Parameter)"),
+            ("GET", "/api/mail/schedule", "Listet alle Mail-Zeitplaene auf", {"admin": True}),
+            ("POST", "/api/mail/schedule", "Erstellt einen neuen Mail-Zeitplan", {"admin": True}),
+            ("PUT", "/api/mail/schedule/:id", "Aktualisiert einen Mail-Zeitplan", {"admin": True}),
+            ("DELETE", "/api/mail/schedule/:id", "Loescht einen Mail-Zeitplan", {"admin": True}),
+        ),
+    },
+    {
+        "nr": "17.6", "title": "HTTP-API-Zeitplaene", "page": True,
+        "endpoints": (
+            ("GET", "/api/http/schedule", "Listet alle HTTP-Zeitplaene auf", {"admin": True}),
+            ("POST", "/api/http/schedule", "Erstellt einen neuen HTTP-Zeitplan", {"admin": True}),
+            ("PUT", "/api/http/schedule/:id", "Aktualisiert einen HTTP-Zeitplan", {"admin": True}),
+            ("DELETE", "/api/http/schedule/:id", "Loescht einen HTTP-Zeitplan", {"admin": True}),
+        ),
+    },
+    {
+        "nr": "17.7", "title": "Import & Export",
+        "endpoints": (
+            ("GET", "/api/import/auto-config", "Gibt die Auto-Import-Konfiguration zurueck"),
+            ("POST", "/api/import/auto-config", "Aktualisiert die Auto-Import-Konfiguration"),
+            ("POST", "/api/import/trigger", "Loest einen sofortigen Import aus"),
+            ("GET", "/api/export/pdf", "Exportiert das Board als PDF"),
+            ("GET", "/api/log.csv", "Laedt das Aktivitaetsprotokoll als CSV herunter"),
+        ),
+    },
+    {
+        "nr": "17.8", "title": "Feuerwehr-Fetcher",
+        "endpoints": (
+            ("GET", "/api/ff/status", "Gibt den Fetcher-Status zurueck"),
+            ("GET", "/api/ff/status/details", "Gibt detaillierten Fetcher-Status zurueck"),
+            ("GET", "/api/ff/creds", "Prueft, ob Fetcher-Zugangsdaten vorhanden sind"),
+            ("POST", "/api/ff/creds", "Speichert Fetcher-Zugangsdaten"),
+            ("POST", "/api/ff/start", "Startet den Fetcher-Dienst"),
+            ("POST", "/api/ff/stop", "Stoppt den Fetcher-Dienst"),
+        ),
+    },
+    {
+        "nr": "17.9", "title": "Drucken",
+        "endpoints": (
+            ("POST", "/api/print/server", "Druckt ein PDF ueber den Systemdrucker"),
+            ("GET", "/api/print/server/info", "Gibt Drucker-Informationen zurueck"),
+            ("POST", "/api/print/:nr/print", "Druckt einen Protokolleintrag"),
+            ("POST", "/api/print/blank/print", "Druckt ein leeres Protokollformular"),
+            ("GET", "/api/print/:nr/print/file/:file", "Gibt eine gedruckte Protokolldatei zurueck"),
+            ("GET", "/api/print/blank/print/file/:file", "Gibt eine leere Protokolldatei zurueck"),
+            ("POST", "/api/incident-print/:incidentId/print", "Speichert einen Einsatz als PDF"),
+            ("POST", "/api/incident-print/:incidentId/mail", "Versendet einen Einsatz per E-Mail"),
+        ),
+    },
+    {
+        "nr": "17.10", "title": "KI-Analyse & Situationsanalyse", "page": True,
+        "endpoints": (
+            ("GET", "/api/situation/status", "Gibt den Analyse-Status zurueck"),
+            ("POST", "/api/situation/analysis-loop/sync", "Synchronisiert den Analyse-Zyklus"),
+            ("GET", "/api/situation/analysis", "Gibt das Analyse-Ergebnis zurueck"),
+            ("POST", "/api/situation/question", "Stellt eine Situations-Frage", {"limit": 60}),
+            ("POST", "/api/situation/suggestion/feedback", "Gibt Feedback zu einem Vorschlag"),
+            ("POST", "/api/situation/question/feedback", "Gibt Feedback zu einer Antwort"),
+            ("GET", "/api/situation/analysis-config", "Gibt die Analyse-Konfiguration zurueck"),
+            ("POST", "/api/situation/analysis-config", "Aktualisiert die Analyse-Konfiguration"),
+        ),
+    },
+    {
+        "nr": "17.11", "title": "Admin-Filterregeln",
+        "endpoints": (
+            ("GET", "/api/admin/filtering-rules/status", "Gibt den Filterstatus zurueck"),
+            ("GET", "/api/admin/filtering-rules", "Listet alle Filterregeln auf"),
+            ("PUT", "/api/admin/filtering-rules", "Aktualisiert die Filterregeln"),
+            ("GET", "/api/admin/filtering-rules/learned", "Gibt gelernte Filtergewichte zurueck"),
+            ("POST", "/api/admin/filtering-rules/reset-learned", "Setzt gelernte Gewichte zurueck"),
+            ("GET", "/api/admin/filtering-rules/ai-analysis-config", "Gibt die KI-Analyse-Konfiguration zurueck"),
+            ("PUT", "/api/admin/filtering-rules/ai-analysis-config", "Aktualisiert die KI-Analyse-Konfiguration"),
+            ("GET", "/api/admin/filtering-rules/scenario", "Gibt die Szenario-Konfiguration zurueck"),
+            ("PUT", "/api/admin/filtering-rules/scenario", "Aktualisiert die Szenario-Konfiguration"),
+        ),
+    },
+    {
+        "nr": "17.12", "title": "Benutzer & Rollen",
+        "endpoints": (
+            ("GET", "/api/user/roles", "Gibt alle Rollen zurueck"),
+            ("PUT", "/api/user/roles", "Aktualisiert die Rollen", {"admin": True}),
+            ("GET", "/api/user/online-roles", "Gibt online-aktive Rollen zurueck"),
+        ),
+    },
+    {
+        "nr": "17.13", "title": "Admin-Verwaltung", "page": True,
+        "endpoints": (
+            ("POST", "/api/user/admin/initialsetup", "Erststart: Initialisiert das System mit Standarddaten"),
+            ("POST", "/api/user/admin/archive", "Erstellt ein ZIP-Archiv aller Daten"),
+            ("GET", "/api/user/admin/archive/create-download",
+             "Erstellt ein Archiv und gibt es zum Download zurueck"),
+            ("GET", "/api/user/admin/archive/download/:file", "Laedt eine bestimmte Archivdatei herunter"),
+            ("GET", "/api/user/admin/archive/testlist", "Listet Test-Archive auf"),
+            ("GET", "/api/user/admin/logs/download", "Laedt Logdateien herunter"),
+            ("GET", "/api/user/admin/chatbot/status", "Gibt den Chatbot-Service-Status zurueck"),
+            ("POST", "/api/user/admin/chatbot/start", "Startet den Chatbot-Service"),
+            ("POST", "/api/user/admin/chatbot/stop", "Stoppt den Chatbot-Service"),
+            ("POST", "/api/user/admin/chatbot/server/start", "Startet den Chatbot-Server"),
+            ("POST", "/api/user/admin/chatbot/server/stop", "Stoppt den Chatbot-Server"),
+            ("POST", "/api/user/admin/chatbot/worker/start", "Startet den Chatbot-Worker"),
+            ("POST", "/api/user/admin/chatbot/worker/stop", "Stoppt den Chatbot-Worker"),
+            ("GET", "/api/user/admin/worker/config", "Gibt die Worker-Konfiguration zurueck"),
+            ("PATCH", "/api/user/admin/worker/config", "Aktualisiert die Worker-Konfiguration"),
+        ),
+    },
+    {
+        "nr": "17.14", "title": "Knowledge-Basis (RAG)",
+        "endpoints": (
+            ("GET", "/api/user/admin/knowledge/files", "Listet Knowledge-Dateien auf"),
+            ("POST", "/api/user/admin/knowledge/upload", "Laedt eine einzelne Knowledge-Datei hoch"),
+            ("POST", "/api/user/admin/knowledge/upload-multiple", "Laedt mehrere Dateien hoch (max. 20)"),
+            ("DELETE", "/api/user/admin/knowledge/files/:filename", "Loescht eine Knowledge-Datei"),
+            ("POST", "/api/user/admin/knowledge/ingest", "Startet die Indizierung der Knowledge-Basis"),
+        ),
+    },
+    {
+        "nr": "17.15", "title": "Aktivitaet & Status",
+        "endpoints": (
+            ("GET", "/api/activity/status", "Gibt den Systemaktivitaetsstatus zurueck", {"public": True}),
+        ),
+    },
+    {
+        "nr": "17.16", "title": "Chatbot-Server API (Port 3100)", "page": True,
+        "server": "chatbot",
+        "intro": ("Die folgenden Endpunkte sind auf dem separaten Chatbot-Server "
+                  "verfuegbar und werden vom Hauptserver teilweise als Proxy "
+                  "weitergeleitet."),
+        "groups": (
+            {"title": "Szenarien & Simulation", "endpoints": (
+                ("GET", "/api/scenarios", "Listet alle verfuegbaren Szenarien auf"),
+                ("GET", "/api/scenarios/:scenarioId", "Gibt Details eines Szenarios zurueck"),
+                ("POST", "/api/sim/start", "Startet eine Simulation (mit optionalem Szenario)"),
+                ("GET", "/api/sim/status", "Gibt den Simulations-Status zurueck"),
+                ("GET", "/api/sim/scenario", "Gibt das aktive Szenario zurueck"),
+                ("POST", "/api/sim/pause", "Pausiert die Simulation"),
+                ("POST", "/api/sim/step", "Fuehrt einen einzelnen Simulationsschritt aus"),
+                ("POST", "/api/sim/waiting-for-roles", "Signalisiert Warten auf Rollen"),
+            )},
+            {"title": "Chat & LLM", "endpoints": (
+                ("POST", "/api/chat", "Sendet eine Chat-Nachricht", {"limit": 60}),
+                ("GET", "/api/llm/models", "Listet verfuegbare LLM-Modelle auf"),
+                ("GET", "/api/llm/gpu", "Gibt den GPU-Status zurueck"),
+                ("GET", "/api/llm/system", "Gibt den Systemstatus zurueck"),
+                ("POST", "/api/llm/test", "Testet das LLM mit einer Frage", {"limit": 10}),
+                ("GET", "/api/llm/config", "Gibt die LLM-Konfiguration zurueck"),
+                ("POST", "/api/llm/global-model", "Setzt das globale LLM-Modell"),
+                ("POST", "/api/llm/task-config", "Konfiguriert aufgabenspezifische LLM-Einstellungen"),
+                ("GET", "/api/llm/model/:taskType", "Gibt das Modell fuer einen Aufgabentyp zurueck"),
+                ("POST", "/api/llm/test-model", "Testet ein bestimmtes Modell", {"limit": 10}),
+                ("POST", "/api/llm/test-with-metrics", "Testet mit Metriken", {"limit": 10}),
+                ("POST", "/api/llm/test-with-metrics-stream",
+                 "Testet mit Metriken als Stream", {"limit": 10, "stream": True}),
+                ("GET", "/api/llm/profiles", "Gibt verfuegbare LLM-Profile zurueck"),
+                ("GET", "/api/llm/prompt-templates", "Listet Prompt-Templates auf", {"limit": 30}),
+                ("GET", "/api/llm/prompt-templates/:name", "Gibt ein bestimmtes Prompt-Template zurueck",
+                 {"limit": 30}),
+                ("PUT", "/api/llm/prompt-templates/:name", "Aktualisiert ein Prompt-Template", {"limit": 10}),
+                ("GET", "/api/llm/action-history", "Gibt die LLM-Aktionshistorie zurueck"),
+                ("GET", "/api/llm/ops-verworfen", "Gibt verworfene Operationen zurueck"),
+                ("GET", "/api/llm/exchange/:exchangeId", "Gibt einen bestimmten LLM-Austausch zurueck"),
+            )},
+            {"title": "Metriken & Monitoring", "page": True, "endpoints": (
+                ("GET", "/api/metrics", "Gibt Simulations-Metriken zurueck"),
+                ("GET", "/api/metrics/stats", "Gibt Metrik-Statistiken zurueck"),
+                ("GET", "/api/events", "Event-Stream (Server-Sent Events)", {"stream": True}),
+            )},
+            {"title": "Audit", "endpoints": (
+                ("GET", "/api/audit/status", "Gibt den Audit-Status zurueck"),
+                ("POST", "/api/audit/start", "Startet eine Audit-Aufzeichnung"),
+                ("POST", "/api/audit/end", "Beendet eine Audit-Aufzeichnung"),
+                ("GET", "/api/audit/list", "Listet alle Audit-Sessions auf"),
+                ("GET", "/api/audit/:exerciseId", "Gibt Audit-Daten fuer eine Uebung zurueck"),
+                ("DELETE", "/api/audit/:exerciseId", "Loescht Audit-Daten"),
+                ("POST", "/api/audit/pause", "Pausiert die Audit-Aufzeichnung"),
+                ("POST", "/api/audit/resume", "Setzt die Audit-Aufzeichnung fort"),
+                ("POST", "/api/audit/events", "Zeichnet Audit-Ereignisse auf"),
+            )},
+            {"title": "Templates & Uebungen", "endpoints": (
+                ("GET", "/api/templates", "Listet alle Templates auf"),
+                ("GET", "/api/templates/:templateId", "Gibt ein bestimmtes Template zurueck"),
+                ("POST", "/api/templates", "Erstellt ein neues Template"),
+                ("DELETE", "/api/templates/:templateId", "Loescht ein Template"),
+                ("POST", "/api/templates/:templateId/create-exercise", "Erstellt eine Uebung aus einem Template"),
+            )},
+            {"title": "Katastrophen-Kontext", "endpoints": (
+                ("GET", "/api/disaster/current", "Gibt den aktuellen Katastrophen-Kontext zurueck"),
+                ("GET", "/api/disaster/summary", "Gibt eine gefilterte Zusammenfassung zurueck"),
+                ("POST", "/api/disaster/init", "Initialisiert einen Katastrophen-Kontext"),
+                ("POST", "/api/disaster/update", "Aktualisiert den Kontext aus EINFO-Daten"),
+                ("GET", "/api/disaster/list", "Listet alle Katastrophen auf"),
+                ("GET", "/api/disaster/:disasterId", "Gibt eine bestimmte Katastrophe zurueck"),
+                ("POST", "/api/disaster/finalize", "Schliesst einen Katastrophen-Kontext ab"),
+                ("POST", "/api/disaster/record-suggestion", "Zeichnet einen Vorschlag auf"),
+            )},
+            {"title": "Feedback & Lernen", "endpoints": (
+                ("POST", "/api/feedback", "Gibt Feedback ab"),
+                ("GET", "/api/feedback/list", "Listet Feedback-Eintraege auf"),
+                ("GET", "/api/feedback/stats", "Gibt Feedback-Statistiken zurueck"),
+                ("POST", "/api/feedback/similar", "Sucht aehnliches Feedback"),
+                ("POST", "/api/feedback/learned-context", "Zeichnet gelernten Kontext auf"),
+            )},
+        ),
+    },
+)
+
+
+def endpoints(server=None):
+    """Flache Liste aller Endpunkte als dicts; optional nur die eines Servers."""
+    result = []
+    for section in SECTIONS:
+        groups = section.get("groups") or ({"title": "", "endpoints": section["endpoints"]},)
+        for group in groups:
+            for method, path, text, *opts in group["endpoints"]:
+                opts = opts[0] if opts else {}
+                ep = {"key": f"{method} {path}", "method": method, "path": path, "text": text,
+                      "section": f"{section['nr']} {section['title']}", "group": group["title"],
+                      "server": section.get("server", "einfo"), "limit": opts.get("limit"),
+                      "admin": bool(opts.get("admin")), "public": bool(opts.get("public")),
+                      "stream": bool(opts.get("stream"))}
+                if server is None or ep["server"] == server:
+                    result.append(ep)
+    return result
+
+
+def bullet_text(method, path, text, opts=None):
+    """Aufzaehlungspunkt fuer Kapitel 17 im Format "POST /api/chat - Beschreibung (Hinweise)."."""
+    opts = opts or {}
+    notes = []
+    if opts.get("admin"):
+        notes.append("nur Admin")
+    if opts.get("public"):
+        notes.append("oeffentlich, keine Authentifizierung erforderlich")
+    if opts.get("limit"):
+        notes.append(f"Rate-Limit: {opts['limit']}/min")
+    suffix = f" ({', '.join(notes)})" if notes else ""
+    return f"{method:<4} {path} \u2013 {text}{suffix}."
+
+
+def path_pattern(path):
+    """Regex fuer einen Katalogpfad; :name-Platzhalter passen auf ein Pfadsegment."""
+    return re.compile("^" + re.sub(r":(\w+)", r"(?P<\1>[^/]+)", re.escape(path)) + "$")
+
+
+def fill_path(path, params, default=None):
+    """Setzt Platzhalter ein: fill_path("/api/cards/:id/move", {"id": "abc"}).
+
+    Fehlende Namen ergeben `default` oder, ohne default, einen KeyError.
+    """
+    def value(m):
+        if m.group(1) in params or default is None:
+            return urllib.parse.quote(str(params[m.group(1)]), safe="")
+        return default
+    return re.sub(r":(\w+)", value, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EINFO-API-Katalog ausgeben")
+    parser.add_argument("--json", action="store_true", help="als JSON (eine Liste von Endpunkten)")
+    parser.add_argument("--server", choices=sorted(SERVERS))
+    args = parser.parse_args()
+
+    eps = endpoints(args.server)
+    if args.json:
+        print(json.dumps(eps, ensure_ascii=False, indent=2))
+    else:
+        for ep in eps:
+            flags = " ".join(f for f in ("admin", "public", "stream") if ep[f])
+            limit = f"{ep['limit']}/min" if ep["limit"] else ""
+            print(f"{ep['method']:<6} {ep['path']:<52} {ep['server']:<8} {limit:<7} {flags}")
+        print(f"{len(eps)} Endpunkte")
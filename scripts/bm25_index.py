@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+BM25-Index fuer die Knowledge- und Adress-Chunks (knowledge_chunks.jsonl) und
+hybride Suche (BM25 + vector_index.py) per Reciprocal-Rank-Fusion.
+
+Analyse (Index und Anfrage identisch):
+  - Kleinschreibung, Umlaute/ß gefaltet (ä -> ae), "§ 12" -> "§12"
+  - Bindestrich-Woerter ("K-KHG") als Ganzes und in Teilen
+  - Komposita gegen das Korpusvokabular zerlegt ("katastrophenhilfsdienst" ->
+    katastroph + hilf + dienst), Fugen-s beruecksichtigt
+  - leichtes Stemming (Endungen -ern/-en/-er/-es/-em/-e/-s/-n)
+Postings je Term: Dokumentnummern als Delta-Varints in einem uint8-Array,
+Termfrequenzen als uint8-Array (Format wie address_store.write_sections, MAGIC "EINFOBM2").
+Je Chunk zusaetzlich doc/municipality/doc_type als Filterspalten (wie vector_index.py).
+
+Aufruf:  python3 scripts/bm25_index.py [--chunks DATEI] [--out DATEI] [--query TEXT] [--hybrid]
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import re
+import time
+
+import numpy as np
+
+import address_store
+from address_store import (StringTable, _Interner, decode_varints, encode_varints, read_sections,
+                           varint_lengths, write_sections)
+from gemeinde_dedup import UMLAUTS
+from knowledge_chunker import OUT_PATH as CHUNKS_PATH
+
+INDEX_PATH = os.path.join(address_store.INDEX_DIR, "knowledge.bm25")
+MAGIC = b"EINFOBM2"
+VERSION = 2
+
+K1 = 1.2
+B = 0.75
+RRF_K = 60
+TOKEN = re.compile(r"§\s*\d+[a-z]?|\w+(?:[-/]\w+)*")
+SUFFIXES = ("ern", "en", "er", "es", "em", "e", "s", "n")
+MIN_STEM = 4
+MIN_PART = 4
+COMPOUND_MIN = 9
+VOCAB_MIN_COUNT = 2
+
+
+def fold(text):
+    return text.lower().translate(UMLAUTS)
+
+
+def stem(word):
+    if len(word) <= MIN_STEM or not word.isalpha():
+        return word
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+class Analyzer:
+    """Tokenisierung mit Kompositazerlegung gegen ein Vokabular (Menge gefalteter Woerter)."""
+
+    def __init__(self, vocabulary=()):
+        self.vocabulary = set(vocabulary)
+        self._splits = {}
+
+    def _head(self, head):
+        """Vokabularform eines Kompositum-Kopfs (mit/ohne Fugen-s) oder None."""
+        if head in self.vocabulary:
+            return head
+        if head.endswith("s"):
+            for cand in (head[:-1], head[:-1] + "e"):
+                if len(cand) >= MIN_PART and cand in self.vocabulary:
+                    return cand
+        return None
+
+    def split(self, word):
+        """Teile eines Kompositums (laengster bekannter Kopf zuerst), sonst []."""
+        hit = self._splits.get(word)
+        if hit is not None:
+            return hit
+        parts = []
+        if len(word) >= COMPOUND_MIN and word.isalpha():
+            for i in range(len(word) - MIN_PART, MIN_PART - 1, -1):
+                head = self._head(word[:i])
+                if not head:
+                    continue
+                tail = word[i:]
+                rest = [tail] if tail in self.vocabulary else self.split(tail)
+                if rest:
+                    parts = [head] + rest
+                    break
+        self._splits[word] = parts
+        return parts
+
+    def terms(self, text):
+        """Indexterme eines Textes (mit Wiederholungen)."""
+        out = []
+        for token in TOKEN.findall(fold(text or "")):
+            if token.startswith("§"):
+                out.append("§" + token[1:].strip())
+                continue
+            pieces = re.split(r"[-/]", token)
+            if len(pieces) > 1:
+                out.append(token)
+            for piece in pieces:
+                if not piece:
+                    continue
+                out.append(stem(piece))
+                out.extend(stem(p) for p in self.split(piece))
+        return out
+
+
+def _chunk_texts(path):
+    """(offset, laenge, record, text) je Zeile der Chunk-JSONL."""
+    with open(path, "rb") as fh:
+        offset = 0
+        for raw in fh:
+            if raw.strip():
+                rec = json.loads(raw)
+                yield offset, len(raw), rec, f"{rec.get('title') or ''}\n{rec.get('content') or ''}"
+            offset += len(raw)
+
+
+def build_vocabulary(chunks_path=CHUNKS_PATH, min_count=VOCAB_MIN_COUNT):
+    """Gefaltete Woerter (>= MIN_PART Zeichen), die mindestens min_count mal vorkommen."""
+    counts = collections.Counter()
+    for _, _, _, text in _chunk_texts(chunks_path):
+        counts.update(w for w in re.findall(r"[^\W\d_]+", fold(text)) if len(w) >= MIN_PART)
+    return {w for w, n in counts.items() if n >= min_count}
+
+
+def build_index(chunks_path=CHUNKS_PATH, out_path=INDEX_PATH):
+    """Zwei Durchlaeufe: Vokabular fuer die Kompositazerlegung, dann Postings. Gibt die Anzahl Chunks zurueck."""
+    vocabulary = build_vocabulary(chunks_path)
+    analyzer = Analyzer(vocabulary)
+    terms, doc_ids = _Interner(), _Interner()
+    filters = {name: _Interner() for name in BM25Index.FILTERS}
+    filter_codes = {name: [] for name in BM25Index.FILTERS}
+    post_term, post_doc, post_tf = [], [], []
+    lengths, offsets, sizes, id_codes = [], [], [], []
+
+    for doc, (offset, length, rec, text) in enumerate(_chunk_texts(chunks_path)):
+        counts = collections.Counter(analyzer.terms(text))
+        lengths.append(sum(counts.values()))
+        offsets.append(offset)
+        sizes.append(length)
+        id_codes.append(doc_ids(rec.get("doc_id")))
+        address = rec.get("address") if isinstance(rec.get("address"), dict) else {}
+        filter_codes["doc"].append(filters["doc"](rec.get("file") or rec.get("source")))
+        filter_codes["municipality"].append(filters["municipality"](address.get("municipality")))
+        filter_codes["doc_type"].append(filters["doc_type"](rec.get("doc_type")))
+        for term, tf in counts.items():
+            post_term.append(terms(term))
+            post_doc.append(doc)
+            post_tf.append(min(tf, 255))
+
+    post_term = np.asarray(post_term, dtype=np.int64)
+    post_doc = np.asarray(post_doc, dtype=np.int64)
+    order = np.lexsort((post_doc, post_term))
+    post_term, post_doc = post_term[order], post_doc[order]
+    post_tf = np.asarray(post_tf, dtype=np.uint8)[order]
+
+    n_terms = len(terms.values)
+    df = np.bincount(post_term, minlength=n_terms)
+    first = np.ones(len(post_doc), dtype=bool)
+    first[1:] = post_term[1:] != post_term[:-1]
+    deltas = post_doc - np.concatenate(([0], post_doc[:-1]))
+    deltas[first] = post_doc[first]
+    encoded = encode_varints(deltas)
+    byte_offsets = np.zeros(n_terms + 1, dtype=np.uint64)
+    byte_offsets[1:] = np.cumsum(np.bincount(post_term, weights=varint_lengths(deltas), minlength=n_terms)).astype(np.uint64)
+    tf_offsets = np.zeros(n_terms + 1, dtype=np.uint64)
+    np.cumsum(df, out=tf_offsets[1:])
+
+    columns = {
+        "postings": encoded,
+        "postings.offsets": byte_offsets,
+        "tf": post_tf,
+        "tf.offsets": tf_offsets,
+        "doc_length": np.asarray(lengths, dtype=np.uint32),
+        "offset": np.asarray(offsets, dtype=np.uint64),
+        "length": np.asarray(sizes, dtype=np.uint32),
+        "doc_id": np.asarray(id_codes, dtype=np.uint32),
+    }
+    for name in BM25Index.FILTERS:
+        columns[name] = np.asarray(filter_codes[name], dtype=np.uint32)
+    for name, interner in (("term", terms), ("doc_id", doc_ids)) + tuple(filters.items()):
+        columns[name + ".offsets"], blob = interner.encode()
+        columns[name + ".blob"] = np.frombuffer(blob, dtype=np.uint8)
+    vocab = _Interner()
+    for word in sorted(vocabulary):
+        vocab(word)
+    columns["vocabulary.offsets"], blob = vocab.encode()
+    columns["vocabulary.blob"] = np.frombuffer(blob, dtype=np.uint8)
+
+    write_sections(out_path, columns, {
+        "count": len(lengths),
+        "terms": n_terms,
+        "postings": len(post_doc),
+        "avg_length": float(np.mean(lengths)) if lengths else 0.0,
+        "k1": K1,
+        "b": B,
+        "chunks": os.path.relpath(chunks_path, os.path.dirname(os.path.abspath(out_path))),
+    }, magic=MAGIC, version=VERSION)
+    return len(lengths)
+
+
+class BM25Index:
+    """Lesezugriff auf den BM25-Index; Postings werden je Anfrageterm dekodiert."""
+
+    FILTERS = ("doc", "municipality", "doc_type")
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.meta, self.columns = read_sections(path, MAGIC)
+        cols = self.columns
+        self.postings, self.post_offsets = cols["postings"], cols["postings.offsets"]
+        self.tf, self.tf_offsets = cols["tf"], cols["tf.offsets"]
+        self.doc_length = cols["doc_length"]
+        self.terms = {t: i for i, t in enumerate(StringTable(cols["term.offsets"], cols["term.blob"]).values())}
+        self.doc_ids = StringTable(cols["doc_id.offsets"], cols["doc_id.blob"])
+        vocabulary = StringTable(cols["vocabulary.offsets"], cols["vocabulary.blob"]).values()
+        self.analyzer = Analyzer(vocabulary)
+        self._norm = None
+        self._rows = None
+        base = os.path.dirname(os.path.abspath(path))
+        self.chunks_path = os.path.normpath(os.path.join(base, self.meta["chunks"]))
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _length_norm(self, avg=None):
+        avg = avg or self.meta["avg_length"] or 1.0
+        if self._norm is None or self._norm[0] != avg:
+            k1, b = self.meta["k1"], self.meta["b"]
+            self._norm = (avg, (k1 * (1 - b + b * self.doc_length / avg)).astype(np.float32))
+        return self._norm[1]
+
+    def postings_for(self, term):
+        """(dokumente, tf) eines Terms, leere Arrays wenn unbekannt."""
+        tid = self.terms.get(term)
+        if tid is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+        a, b = int(self.post_offsets[tid]), int(self.post_offsets[tid + 1])
+        docs = np.cumsum(decode_varints(self.postings[a:b]))
+        return docs, self.tf[int(self.tf_offsets[tid]):int(self.tf_offsets[tid + 1])]
+
+    def _filter_mask(self, filters):
+        """Bool-Maske der Zeilen, die alle Filter erfuellen (None = kein Filter)."""
+        mask = None
+        for field in self.FILTERS:
+            values = filters.get(field)
+            if values is None:
+                continue
+            if field not in self.columns:
+                raise ValueError(f"{self.path}: Index ohne Filterspalte {field!r}, bitte neu bauen")
+            values = [values] if isinstance(values, str) else values
+            strings = StringTable(self.columns[field + ".offsets"], self.columns[field + ".blob"])
+            wanted = [c for c in (strings.find(v) for v in values) if c >= 0]
+            hit = np.isin(self.columns[field], wanted)
+            mask = hit if mask is None else mask & hit
+        return mask
+
+    def search(self, query, k=10, stats=None, **filters):
+        """Top-k Chunks fuer einen Anfragetext -> [(zeile, score)] absteigend.
+
+        stats: gemeinsame Statistik mehrerer Indizes (collection_stats), damit die Scores
+        verschiedener Segmente vergleichbar sind; ohne Angabe die dieses Index.
+        Filter wie in vector_index: doc=, municipality=, doc_type= (Wert oder Liste).
+        """
+        n, avg, df = stats if stats is not None else (len(self), None, {})
+        scores = np.zeros(len(self), dtype=np.float32)
+        norm = self._length_norm(avg)
+        k1 = self.meta["k1"]
+        for term in set(self.analyzer.terms(query)):
+            docs, tf = self.postings_for(term)
+            if not len(docs):
+                continue
+            d = df.get(term, len(docs))
+            idf = math.log(1 + (n - d + 0.5) / (d + 0.5))
+            tf = tf.astype(np.float32)
+            scores[docs] += idf * tf * (k1 + 1) / (tf + norm[docs])
+        mask = self._filter_mask(filters)
+        if mask is not None:
+            scores[~mask] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(int(i), float(scores[i])) for i in hits]
+
+    def doc_id(self, row):
+        return self.doc_ids[int(self.columns["doc_id"][row])]
+
+    def row_for(self, doc_id):
+        if self._rows is None:
+            values = self.doc_ids.values()
+            self._rows = {values[c]: i for i, c in enumerate(self.columns["doc_id"])}
+        return self._rows.get(doc_id)
+
+    def record(self, row):
+        """Chunk-Record aus knowledge_chunks.jsonl (liest genau eine Zeile)."""
+        with open(self.chunks_path, "rb") as fh:
+            fh.seek(int(self.columns["offset"][row]))
+            return json.loads(fh.read(int(self.columns["length"][row])))
+
+
+def open_index(path=INDEX_PATH):
+    return BM25Index(path)
+
+
+def collection_stats(indexes, query):
+    """(Anzahl, mittlere Laenge, {term: df}) ueber mehrere Indizes fuer die Anfrageterme.
+
+    Jedes Segment analysiert die Anfrage mit seinem eigenen Vokabular; df summiert sich
+    ueber alle Segmente, in denen der Term vorkommt.
+    """
+    n = sum(len(index) for index in indexes)
+    length = sum(index.meta["avg_length"] * len(index) for index in indexes)
+    df = collections.Counter()
+    for index in indexes:
+        for term in set(index.analyzer.terms(query)):
+            tid = index.terms.get(term)
+            if tid is not None:
+                df[term] += int(index.tf_offsets[tid + 1] - index.tf_offsets[tid])
+    return n, (length / n if n else 0.0) or 1.0, dict(df)
+
+
+def rrf_fuse(rankings, k=RRF_K, weights=None):
+    """Reciprocal-Rank-Fusion: {name: [doc_id, ...]} -> [(doc_id, score, {name: rang})] absteigend."""
+    scores, ranks = collections.defaultdict(float), collections.defaultdict(dict)
+    for name, ids in rankings.items():
+        w = (weights or {}).get(name, 1.0)
+        for rank, doc_id in enumerate(ids, 1):
+            scores[doc_id] += w / (k + rank)
+            ranks[doc_id][name] = rank
+    return [(d, s, ranks[d]) for d, s in sorted(scores.items(), key=lambda kv: -kv[1])]
+
+
+def hybrid_search(query, bm25, vectors=None, k=10, depth=50, weights=None, **filters):
+    """BM25 und (optional) Vektorsuche getrennt bis `depth`, dann RRF -> Top-k [(doc_id, score, raenge)].
+
+    Filter (doc=, municipality=, doc_type=) gelten fuer beide Suchen, vor der Fusion.
+    """
+    rankings = {"bm25": [bm25.doc_id(row) for row, _ in bm25.search(query, depth, **filters)]}
+    if vectors is not None:
+        rankings["vector"] = [vectors.doc_id(row) for row, _ in vectors.search(query, depth, **filters)[0]]
+    return rrf_fuse(rankings, weights=weights)[:k]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BM25-Index fuer Knowledge-Chunks bauen")
+    parser.add_argument("--chunks", default=CHUNKS_PATH)
+    parser.add_argument("--out", default=INDEX_PATH)
+    parser.add_argument("--query", default=None)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--hybrid", default=None, metavar="VEC", help="Vektorindex fuer RRF-Fusion")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.chunks):
+        import knowledge_chunker
+        knowledge_chunker.chunk_all(out_path=args.chunks)
+    print("Generiere BM25-Index ...")
+    started = time.perf_counter()
+    n = build_index(args.chunks, args.out)
+    index = open_index(args.out)
+    print(f"  ✓ {args.out}: {n} Chunks, {index.meta['terms']} Terme, {index.meta['postings']} Postings, "
+          f"{os.path.getsize(args.out) / 1e6:.1f} MB (JSONL {os.path.getsize(args.chunks) / 1e6:.1f} MB, "
+          f"{time.perf_counter() - started:.2f} s)")
+    if args.query:
+        started = time.perf_counter()
+        if args.hybrid:
+            import vector_index
+            hits = hybrid_search(args.query, index, vector_index.open_index(args.hybrid), args.k)
+            rows = [(index.row_for(d), s, r) for d, s, r in hits]
+        else:
+            rows = [(row, s, None) for row, s in index.search(args.query, args.k)]
+        print(f"  Anfrage \"{args.query}\" ({(time.perf_counter() - started) * 1000:.1f} ms):")
+        for row, score, ranks in rows:
+            suffix = f"  {ranks}" if ranks else ""
+            print(f"    {score:.3f}  {index.record(row).get('title')}{suffix}")
+    print("Fertig.")
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+"""
+Strukturvergleich von Board-Schnappschuessen (board.json, Aufg_board_<Rolle>.json)
+und kompaktes Patch-Format fuer eine Delta-Historie.
+
+Snapshot zerlegt ein Dokument in Gruppen (Spalten von board.json bzw. die eine
+Liste "items" der Aufgabenboards) mit der Reihenfolge ihrer ids und haelt je
+Karte einen Hash des kanonischen JSON. diff() vergleicht nur Karten, deren Hash
+oder Spalte sich geaendert hat - Aufwand linear in der Zahl der Karten.
+
+Patch (JSON):
+  {"v": 1, "from": <digest>, "to": <digest>,
+   "add":   {id: karte},
+   "del":   [id, ...],
+   "upd":   {id: {"g": [alt, neu],                 # Spaltenwechsel
+                  "s": [[pfad, wert], ...],         # Feld gesetzt
+                  "u": [pfad, ...],                 # Feld entfernt
+                  "l": [[pfad, [+...], [-...]], ...]}},   # Liste: Werte dazu/weg
+   "order": {gruppe: [[start, laenge] | id, ...]},  # nur geaenderte Gruppen
+   "groups": {gruppe: {...}}, "keys": [...], "doc": {...}}   # Spalten-/Dokumentdaten
+Die Reihenfolge wird als Folge von Bloecken der alten Reihenfolge plus neuen ids
+codiert; eine oben eingefuegte Karte kostet so [id, [0, n]].
+
+changes() liefert daraus lesbare Aenderungen (Spalte gewechselt, Fahrzeuge
+zu-/abgezogen, Personal geaendert, Feldwerte). SnapshotHistory speichert je
+Board eine JSONL-Datei mit Vollstaenden alle KEYFRAME_EVERY Eintraege und
+dazwischen nur Patches.
+
+Aufruf:  python3 scripts/board_diff.py --diff ALT.json NEU.json
+         python3 scripts/board_diff.py --record [--watch SEKUNDEN]
+"""
+
+import argparse
+import copy
+import datetime
+import glob
+import hashlib
+import json
+import os
+import time
+
+from einfo_logs import DATA_DIR
+
+HISTORY_DIR = os.path.join(DATA_DIR, "board_history")
+BOARD_PATH = os.path.join(DATA_DIR, "board.json")
+PATCH_VERSION = 1
+KEYFRAME_EVERY = 50
+
+# Felder, die changes() als eigene Aenderungsart meldet
+SEMANTIC_FIELDS = {
+    "assignedVehicles": "vehicles",
+    "everPersonnel": "personnel",
+    "status": "status",
+}
+
+
+def canonical(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def digest(value):
+    return hashlib.blake2b(canonical(value).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def board_paths(data_dir=DATA_DIR):
+    return [os.path.join(data_dir, "board.json")] + sorted(
+        glob.glob(os.path.join(data_dir, "Aufg_board_*.json")))
+
+
+def load_json(path, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return default
+
+
+def _item_id(item, group, pos):
+    item_id = item.get("id") if isinstance(item, dict) else None
+    return str(item_id) if item_id not in (None, "") else f"#{group}:{pos}"
+
+
+def _group_lists(doc):
+    """(art, {gruppe: Kartenliste}) - die Listen sind die des Dokuments selbst."""
+    if isinstance(doc, dict) and isinstance(doc.get("columns"), dict):
+        return "board", {key: column.setdefault("items", []) for key, column in doc["columns"].items()}
+    if isinstance(doc, list):
+        return "list", {"items": doc}
+    return "items", {"items": doc.setdefault("items", [])}
+
+
+def item_index(doc):
+    """{id: (gruppe, karte)} ueber alle Gruppen eines Dokuments."""
+    _kind, groups = _group_lists(doc)
+    return {_item_id(item, key, pos): (key, item)
+            for key, items in groups.items() for pos, item in enumerate(items)}
+
+
+class Snapshot:
+    """Zerlegter Board-Stand: Gruppen mit id-Reihenfolge, Karten und Karten-Hashes."""
+
+    def __init__(self, doc, known=None):
+        """known: {id: hash} von Karten, deren Inhalt bekanntermassen gleich ist
+        (unveraenderte Karten beim Patchen, gespeicherte Checkpoints)."""
+        known = known or {}
+        self.items, self.hashes, self.group_of = {}, {}, {}
+        self.groups, self.group_meta = {}, {}
+        if isinstance(doc, dict) and isinstance(doc.get("columns"), dict):
+            self.kind = "board"
+            self.extra = {k: v for k, v in doc.items() if k != "columns"}
+            for key, column in doc["columns"].items():
+                self.group_meta[key] = {k: v for k, v in column.items() if k != "items"}
+                self._add_group(key, column.get("items") or [], known)
+        else:
+            # Aufgabenboard: {"items": [...]} bzw. leere Liste/leeres Objekt
+            self.kind = "list" if isinstance(doc, list) else "items"
+            items = doc if isinstance(doc, list) else (doc or {}).get("items") or []
+            self.extra = {k: v for k, v in (doc or {}).items() if k != "items"} if isinstance(doc, dict) else {}
+            self._add_group("items", items, known)
+        self.digest = digest([self.kind, self.extra, self.group_meta,
+                              list(self.groups.items()), sorted(self.hashes.items())])
+
+    def _add_group(self, key, items, known):
+        ids = []
+        for pos, item in enumerate(items):
+            item_id = _item_id(item, key, pos)
+            ids.append(item_id)
+            self.items[item_id] = item
+            h = known.get(item_id) if item_id[0] != "#" else None
+            self.hashes[item_id] = h or digest(item)
+            self.group_of[item_id] = key
+        self.groups[key] = ids
+
+    def document(self):
+        """Setzt den Stand wieder zu board.json- bzw. Aufg_board-Form zusammen."""
+        if self.kind == "board":
+            columns = {key: dict(self.group_meta.get(key, {}), items=[self.items[i] for i in ids])
+                       for key, ids in self.groups.items()}
+            return dict(self.extra, columns=columns)
+        items = [self.items[i] for i in self.groups.get("items", [])]
+        return items if self.kind == "list" else dict(self.extra, items=items)
+
+
+# ---------------------------------------------------------------------- Diff
+
+def _scalar_list(value):
+    if not isinstance(value, list):
+        return False
+    seen = set()
+    for v in value:
+        if isinstance(v, (dict, list)) or v in seen:
+            return False
+        seen.add(v)
+    return True
+
+
+def _diff_value(old, new, path, out):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key not in old:
+                out["s"].append([path + [key], value])
+            elif old[key] != value:
+                _diff_value(old[key], value, path + [key], out)
+        out["u"].extend(path + [key] for key in old if key not in new)
+    elif _scalar_list(old) and _scalar_list(new) and path:
+        old_set, new_set = set(old), set(new)
+        plus = [v for v in new if v not in old_set]
+        minus = [v for v in old if v not in new_set]
+        if [v for v in old if v in new_set] + plus == new:
+            out["l"].append([path, plus, minus])
+        else:
+            out["s"].append([path, new])
+    else:
+        out["s"].append([path, new])
+
+
+def _encode_order(old_ids, new_ids):
+    pos = {item_id: i for i, item_id in enumerate(old_ids)}
+    tokens = []
+    for item_id in new_ids:
+        j = pos.get(item_id)
+        if j is None:
+            tokens.append(item_id)
+        elif tokens and isinstance(tokens[-1], list) and sum(tokens[-1]) == j:
+            tokens[-1][1] += 1
+        else:
+            tokens.append([j, 1])
+    return tokens
+
+
+def _decode_order(old_ids, tokens):
+    out = []
+    for token in tokens:
+        if isinstance(token, list):
+            out.extend(old_ids[token[0]:token[0] + token[1]])
+        else:
+            out.append(token)
+    return out
+
+
+def diff(old, new):
+    """Patch von Snapshot `old` nach Snapshot `new` (leere Teile entfallen)."""
+    patch = {"v": PATCH_VERSION, "from": old.digest, "to": new.digest}
+    if old.digest == new.digest:
+        return patch
+    add = {i: new.items[i] for i in new.items if i not in old.items}
+    delete = [i for i in old.items if i not in new.items]
+    upd = {}
+    for item_id, h in new.hashes.items():
+        if item_id not in old.hashes:
+            continue
+        moved = old.group_of[item_id] != new.group_of[item_id]
+        if h == old.hashes[item_id] and not moved:
+            continue
+        entry = {}
+        if moved:
+            entry["g"] = [old.group_of[item_id], new.group_of[item_id]]
+        if h != old.hashes[item_id]:
+            ops = {"s": [], "u": [], "l": []}
+            _diff_value(old.items[item_id], new.items[item_id], [], ops)
+            entry.update((k, v) for k, v in ops.items() if v)
+        upd[item_id] = entry
+    order = {g: _encode_order(old.groups.get(g, []), ids)
+             for g, ids in new.groups.items() if ids != old.groups.get(g)}
+    groups = {g: m for g, m in new.group_meta.items() if old.group_meta.get(g) != m}
+
+    for key, value in (("add", add), ("del", delete), ("upd", upd), ("order", order), ("groups", groups)):
+        if value:
+            patch[key] = value
+    if list(new.groups) != list(old.groups):
+        patch["keys"] = list(new.groups)
+    if new.extra != old.extra or new.kind != old.kind:
+        patch["doc"] = {"kind": new.kind, "extra": new.extra}
+    return patch
+
+
+def is_empty(patch):
+    return patch["from"] == patch["to"]
+
+
+def _resolve(item, path):
+    for key in path[:-1]:
+        item = item.setdefault(key, {}) if isinstance(item, dict) else item[key]
+    return item
+
+
+def _apply_ops(item, entry):
+    """Feldoperationen eines "upd"-Eintrags auf eine Karte (in place, Identitaet bleibt)."""
+    for path, value in entry.get("s", []):
+        if not path:
+            item.clear()
+            item.update(copy.deepcopy(value))
+        else:
+            _resolve(item, path)[path[-1]] = copy.deepcopy(value)
+    for path in entry.get("u", []):
+        _resolve(item, path).pop(path[-1], None)
+    for path, plus, minus in entry.get("l", []):
+        parent = _resolve(item, path)
+        drop = set(minus)
+        parent[path[-1]] = [v for v in parent[path[-1]] if v not in drop] + list(plus)
+    return item
+
+
+def patch_document(doc, patch, index=None):
+    """Wendet einen (bereits geprueften) Patch direkt auf ein Dokument an, ohne Snapshot.
+
+    Aendert `doc` in place und fuehrt `index` (item_index) mit; Aufwand je Patch
+    proportional zu den geaenderten Karten und Gruppen. Fuer das Nachspielen
+    gespeicherter Historien. -> Dokument (neu nur bei Wechsel der Dokumentform).
+    """
+    if is_empty(patch):
+        return doc
+    if index is None:
+        index = item_index(doc)
+    kind, groups = _group_lists(doc)
+    for item_id in patch.get("del", []):
+        index.pop(item_id, None)
+    for item_id, entry in patch.get("upd", {}).items():
+        group, item = index[item_id]
+        _apply_ops(item, entry)
+        if "g" in entry:
+            index[item_id] = (entry["g"][1], item)
+    for item_id, item in patch.get("add", {}).items():
+        index[item_id] = (None, copy.deepcopy(item))
+
+    order = patch.get("order", {})
+    keys = patch.get("keys", list(groups))
+    lists = {}
+    for g in keys:
+        if g in order:
+            old_ids = [_item_id(item, g, pos) for pos, item in enumerate(groups.get(g, []))]
+            ids = _decode_order(old_ids, order[g])
+            lists[g] = [index[i][1] for i in ids]
+            for i in ids:
+                index[i] = (g, index[i][1])
+        else:
+            lists[g] = groups.get(g, [])
+
+    info = patch.get("doc", {"kind": kind, "extra": None})
+    if info["kind"] == "board":
+        old_columns = doc.get("columns", {}) if kind == "board" else {}
+        meta = patch.get("groups", {})
+        columns = {}
+        for g in keys:
+            column = dict(meta[g]) if g in meta else {k: v for k, v in old_columns.get(g, {}).items() if k != "items"}
+            column["items"] = lists[g]
+            columns[g] = column
+        extra = info["extra"] if info["extra"] is not None else {k: v for k, v in doc.items() if k != "columns"}
+        return dict(extra, columns=columns)
+    listed = lists.get("items", [])
+    if info["kind"] == "list":
+        return listed
+    extra = info["extra"] if info["extra"] is not None else \
+        {k: v for k, v in doc.items() if k != "items"} if isinstance(doc, dict) else {}
+    return dict(extra, items=listed)
+
+
+def apply_patch(old, patch):
+    """Wendet einen Patch auf einen Snapshot an -> neuer Snapshot (alter bleibt unveraendert)."""
+    if patch["from"] != old.digest:
+        raise ValueError(f"Patch passt nicht zum Stand {old.digest} (erwartet {patch['from']})")
+    if is_empty(patch):
+        return old
+    items = dict(old.items)
+    for item_id in patch.get("del", []):
+        items.pop(item_id, None)
+    for item_id, entry in patch.get("upd", {}).items():
+        items[item_id] = _apply_ops(copy.deepcopy(items[item_id]), entry)
+    items.update(copy.deepcopy(patch.get("add", {})))
+
+    keys = patch.get("keys", list(old.groups))
+    order = patch.get("order", {})
+    groups = {g: _decode_order(old.groups.get(g, []), order[g]) if g in order else old.groups.get(g, [])
+              for g in keys}
+    meta = {g: patch.get("groups", {}).get(g, old.group_meta.get(g, {})) for g in keys}
+    doc_info = patch.get("doc", {"kind": old.kind, "extra": old.extra})
+
+    if doc_info["kind"] == "board":
+        doc = dict(doc_info["extra"], columns={
+            g: dict(meta[g], items=[items[i] for i in groups[g]]) for g in keys})
+    else:
+        listed = [items[i] for i in groups.get("items", [])]
+        doc = listed if doc_info["kind"] == "list" else dict(doc_info["extra"], items=listed)
+    touched = set(patch.get("upd", {})) | set(patch.get("add", {}))
+    new = Snapshot(doc, known={i: h for i, h in old.hashes.items() if i not in touched})
+    if new.digest != patch["to"]:
+        raise ValueError(f"Patch-Ergebnis {new.digest} weicht von {patch['to']} ab")
+    return new
+
+
+# ---------------------------------------------------------------------- Auswertung
+
+def _get(item, path):
+    for key in path:
+        if not isinstance(item, dict):
+            return None
+        item = item.get(key)
+    return item
+
+
+def changes(old, patch):
+    """Lesbare Aenderungen eines Patches relativ zum alten Snapshot.
+
+    -> [{"id", "type": added|removed|moved|vehicles|personnel|status|field, ...}]
+    """
+    out = []
+    for item_id, item in patch.get("add", {}).items():
+        out.append({"id": item_id, "type": "added", "title": item.get("content") or item.get("title")})
+    for item_id in patch.get("del", []):
+        item = old.items.get(item_id, {})
+        out.append({"id": item_id, "type": "removed", "title": item.get("content") or item.get("title")})
+    for item_id, entry in patch.get("upd", {}).items():
+        before = old.items.get(item_id, {})
+        if "g" in entry:
+            out.append({"id": item_id, "type": "moved", "from": entry["g"][0], "to": entry["g"][1]})
+        for path, plus, minus in entry.get("l", []):
+            kind = SEMANTIC_FIELDS.get(path[0], "field") if len(path) == 1 else "field"
+            out.append({"id": item_id, "type": kind, "field": ".".join(map(str, path)),
+                        "added": plus, "removed": minus})
+        for path, value in entry.get("s", []):
+            kind = SEMANTIC_FIELDS.get(path[0], "field") if len(path) == 1 else "field"
+            out.append({"id": item_id, "type": kind, "field": ".".join(map(str, path)),
+                        "old": _get(before, path), "new": value})
+        for path in entry.get("u", []):
+            out.append({"id": item_id, "type": "field", "field": ".".join(map(str, path)),
+                        "old": _get(before, path), "new": None})
+    return out
+
+
+# ---------------------------------------------------------------------- Historie
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class SnapshotHistory:
+    """Delta-Historie eines Boards als JSONL.
+
+    Zeilen: {"kind": "full", "ts": ms, "doc": ...} bzw. {"kind": "patch", "ts": ms, "patch": ...}.
+    Alle KEYFRAME_EVERY Patches folgt wieder ein Vollstand.
+    """
+
+    def __init__(self, path, keyframe_every=KEYFRAME_EVERY):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self._last = None
+        self._since_keyframe = 0
+
+    @classmethod
+    def for_board(cls, board_path, history_dir=HISTORY_DIR, **kwargs):
+        name = os.path.splitext(os.path.basename(board_path))[0]
+        return cls(os.path.join(history_dir, name + ".history.jsonl"), **kwargs)
+
+    def _tail_state(self):
+        """Letzter Stand: ab dem letzten Vollstand der Datei nachgespielt."""
+        if not os.path.exists(self.path):
+            return None, 0
+        lines = []
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith('{"kind": "full"'):
+                    lines = []
+                lines.append(line)
+        state, count = None, 0
+        for line in lines:
+            entry = json.loads(line)
+            if entry["kind"] == "full":
+                state = Snapshot(entry["doc"])
+            else:
+                state = apply_patch(state, entry["patch"])
+                count += 1
+        return state, count
+
+    def append(self, doc, ts=None):
+        """Haengt einen neuen Stand an. -> Patch oder None, falls unveraendert."""
+        if self._last is None:
+            self._last, self._since_keyframe = self._tail_state()
+        snap = Snapshot(doc)
+        ts = _now_ms() if ts is None else ts
+        if self._last is not None and snap.digest == self._last.digest:
+            return None
+        if self._last is None or self._since_keyframe >= self.keyframe_every:
+            entry, patch = {"kind": "full", "ts": ts, "doc": doc}, None
+            self._since_keyframe = 0
+        else:
+            patch = diff(self._last, snap)
+            entry = {"kind": "patch", "ts": ts, "patch": patch}
+            self._since_keyframe += 1
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._last = snap
+        return patch if patch is not None else {}
+
+    def entries(self):
+        """(ts, art, patch|None, snapshot) je Zeile in Dateireihenfolge."""
+        if not os.path.exists(self.path):
+            return
+        state = None
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                entry = json.loads(line)
+                if entry["kind"] == "full":
+                    state = Snapshot(entry["doc"])
+                    yield entry["ts"], "full", None, state
+                else:
+                    patch = entry["patch"]
+                    before, state = state, apply_patch(state, patch)
+                    yield entry["ts"], "patch", (before, patch), state
+
+    def states(self):
+        """(ts, Dokument) je gespeichertem Stand."""
+        for ts, _kind, _patch, snap in self.entries():
+            yield ts, snap.document()
+
+
+def record(paths=None, history_dir=HISTORY_DIR, histories=None):
+    """Schreibt fuer jedes Board mit geaendertem Inhalt einen Eintrag. -> {pfad: Patch}."""
+    histories = histories if histories is not None else {}
+    written = {}
+    for path in paths or board_paths():
+        doc = load_json(path)
+        if doc is None:
+            continue
+        history = histories.get(path)
+        if history is None:
+            history = histories[path] = SnapshotHistory.for_board(path, history_dir)
+        patch = history.append(doc)
+        if patch is not None:
+            written[path] = patch
+    return written
+
+
+def _describe(change):
+    kind = change["type"]
+    if kind in ("added", "removed"):
+        return f"{kind} {change['id']} {change.get('title') or ''}".rstrip()
+    if kind == "moved":
+        return f"moved {change['id']}: {change['from']} -> {change['to']}"
+    if "added" in change:
+        return f"{kind} {change['id']} {change['field']}: +{change['added']} -{change['removed']}"
+    return f"{kind} {change['id']} {change['field']}: {change['old']!r} -> {change['new']!r}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Board-Schnappschuesse vergleichen bzw. als Deltas mitschreiben")
+    parser.add_argument("--diff", nargs=2, metavar=("ALT", "NEU"))
+    parser.add_argument("--record", action="store_true", help="board.json und Aufg_board_*.json mitschreiben")
+    parser.add_argument("--watch", type=float, default=None, help="mit --record: alle N Sekunden pruefen")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    args = parser.parse_args()
+
+    if args.diff:
+        old, new = (Snapshot(load_json(p)) for p in args.diff)
+        started = time.perf_counter()
+        patch = diff(old, new)
+        elapsed = (time.perf_counter() - started) * 1000
+        for change in changes(old, patch):
+            print("  " + _describe(change))
+        print(f"  ✓ {len(old.items)} -> {len(new.items)} Karten, Patch {len(canonical(patch))} Bytes "
+              f"({elapsed:.1f} ms)")
+    if args.record:
+        print("Schreibe Board-Historie ...")
+        histories = {}
+        while True:
+            for path, patch in record(board_paths(args.data_dir), args.history_dir, histories).items():
+                stamp = datetime.datetime.now().strftime("%H:%M:%S")
+                what = "Vollstand" if not patch else (
+                    f"{len(patch.get('add', {}))} neu, {len(patch.get('del', []))} weg, "
+                    f"{len(patch.get('upd', {}))} geaendert")
+                print(f"  ✓ {stamp} {os.path.basename(path)}: {what}")
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+    print("Fertig.")
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Zeitreise durch das Einsatzboard: board.json-Stand zu einem beliebigen Zeitpunkt.
+
+Quellen, zu einer Schrittfolge zusammengefuehrt:
+  - board_history/board.history.jsonl (board_diff.SnapshotHistory): exakte
+    Vollstaende und Patches, ab dem ersten Eintrag massgeblich.
+  - Lage_log.csv fuer die Zeit davor: "Einsatz erstellt", "Status gewechselt",
+    "Einheit zugewiesen/entfernt", "Personenzahl geaendert" usw. werden auf ein
+    leeres Board nachgespielt (Einheiten dort als Bezeichnung, nicht als id).
+
+Der Schrittindex (replay.steps: Zeit in ms UTC, Quelle, Zeile bzw. Byte-Offset)
+verweist nur auf die Quellen; Lage_log-Zeilen werden ueber csv_tail gelesen.
+Nach jeweils max(CHECKPOINT_EVERY, Kartenzahl) Schritten liegt ein Vollstand in
+replay.checkpoints.jsonl, state_at() spielt also hoechstens ein Intervall nach. update() verarbeitet nur
+neu hinzugekommene Log-Zeilen und History-Eintraege.
+
+Zeitangaben ohne Zone gelten als Ortszeit (TIMEZONE), wie im Lage_log.
+frames() liefert Staende entlang der Zeit, z.B. fuer die Bildfolge in log_report.
+
+Aufruf:  python3 scripts/board_replay.py --at "14:32" [--date 2026-02-04]
+         python3 scripts/board_replay.py --frames 6
+"""
+
+import argparse
+import copy
+import datetime
+import json
+import os
+import time
+import zoneinfo
+
+import numpy as np
+
+from board_diff import HISTORY_DIR, item_index, load_json, patch_document
+from csv_tail import CsvTail
+from einfo_logs import CREATE_ACTIONS, DATA_DIR, parse_zeitpunkt
+
+TIMEZONE = zoneinfo.ZoneInfo("Europe/Vienna")
+CHECKPOINT_EVERY = 64
+VERSION = 2
+STEP_DTYPE = np.dtype([("ts", "<i8"), ("source", "u1"), ("ref", "<u8")])
+LOG, HISTORY = 0, 1
+
+DEFAULT_COLUMNS = {"neu": "Neu", "in-bearbeitung": "In Bearbeitung", "erledigt": "Erledigt"}
+
+
+# ---------------------------------------------------------------------- Zeit
+
+def local_to_utc_ms(times):
+    """datetime64 in Ortszeit (ohne Zone) -> int64 ms UTC; NaT bleibt NaT-Wert (int64 min)."""
+    times = np.asarray(times, dtype="datetime64[s]")
+    secs = times.astype(np.int64)
+    out = np.full(len(secs), np.iinfo(np.int64).min, dtype=np.int64)
+    valid = ~np.isnat(times)
+    if not valid.any():
+        return out
+    # Zonenversatz je Stunde einmal bestimmen
+    hours, inverse = np.unique(secs[valid] // 3600, return_inverse=True)
+    offsets = np.array([
+        TIMEZONE.utcoffset(datetime.datetime.fromtimestamp(int(h) * 3600, datetime.timezone.utc)
+                           .replace(tzinfo=None)).total_seconds()
+        for h in hours], dtype=np.int64)
+    out[valid] = (secs[valid] - offsets[inverse]) * 1000
+    return out
+
+
+def to_ms(when, reference_ms=None):
+    """Zeitpunkt -> ms UTC. Zahlen sind ms, naive Angaben Ortszeit; "14:32" nimmt den Tag
+    von reference_ms (Ende der Aufzeichnung)."""
+    if isinstance(when, (int, np.integer)):
+        return int(when)
+    if isinstance(when, float):
+        return int(when)
+    if isinstance(when, str):
+        text = when.strip()
+        if len(text) <= 8 and ":" in text and reference_ms is not None:
+            day = datetime.datetime.fromtimestamp(reference_ms / 1000, TIMEZONE).date()
+            clock = datetime.time.fromisoformat(text if text.count(":") == 2 else text + ":00")
+            when = datetime.datetime.combine(day, clock)
+        else:
+            when = datetime.datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=TIMEZONE)
+    return int(when.timestamp() * 1000)
+
+
+def fmt_ms(ms):
+    return datetime.datetime.fromtimestamp(ms / 1000, TIMEZONE).strftime("%d.%m.%Y %H:%M:%S")
+
+
+def _iso(ms):
+    return datetime.datetime.fromtimestamp(ms / 1000, datetime.timezone.utc) \
+        .isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# ---------------------------------------------------------------------- Lage_log nachspielen
+
+def empty_board(columns=None):
+    return {"columns": {key: {"name": name, "items": []} for key, name in (columns or DEFAULT_COLUMNS).items()}}
+
+
+def _column_key(board, name):
+    for key, column in board["columns"].items():
+        if column.get("name") == name:
+            return key
+    key = name.lower().replace(" ", "-") or "neu"
+    board["columns"].setdefault(key, {"name": name, "items": []})
+    return key
+
+
+def apply_log_row(board, row, ts, index=None):
+    """Wendet eine Lage_log-Zeile auf ein board.json-foermiges Dokument an (in place).
+
+    index (board_diff.item_index) wird mitgefuehrt; ohne ihn wird er je Aufruf neu aufgebaut.
+    """
+    action = row.get("Aktion", "").strip()
+    card_id = row.get("InternID", "").strip() or row.get("EinsatzID", "").strip()
+    if not card_id:
+        return
+    if index is None:
+        index = item_index(board)
+    key, card = index.get(card_id, (None, None))
+    if action in CREATE_ACTIONS:
+        if card is None:
+            card = {"id": card_id, "humanId": row.get("EinsatzID", ""), "content": row.get("Einsatz", ""),
+                    "ort": row.get("Bemerkung", ""), "createdAt": _iso(ts), "statusSince": _iso(ts),
+                    "assignedVehicles": [], "everVehicles": [], "everPersonnel": 0, "source": "Lage_log"}
+            key = _column_key(board, row.get("Von") or "Neu")
+            board["columns"][key]["items"].insert(0, card)
+            index[card_id] = (key, card)
+        return
+    if card is None:
+        return
+    if action == "Status gewechselt" and row.get("Nach"):
+        target = _column_key(board, row["Nach"])
+        if target != key:
+            board["columns"][key]["items"].remove(card)
+            board["columns"][target]["items"].insert(0, card)
+            card["statusSince"] = _iso(ts)
+            index[card_id] = (target, card)
+    elif action == "Einheit zugewiesen" and row.get("Einheit"):
+        for field in ("assignedVehicles", "everVehicles"):
+            if row["Einheit"] not in card.setdefault(field, []):
+                card[field].append(row["Einheit"])
+    elif action == "Einheit entfernt" and row.get("Einheit"):
+        card["assignedVehicles"] = [v for v in card.get("assignedVehicles", []) if v != row["Einheit"]]
+    elif action == "Personenzahl geändert":
+        value = row.get("Bemerkung", "").split("→")[-1].strip()
+        card["manualPersonnel"] = int(value) if value.isdigit() else None
+    elif action.startswith("Einsatz aktualisiert") and row.get("Einsatz"):
+        card["content"] = row["Einsatz"]
+    elif action in ("Bereich aktiviert", "Bereich deaktiviert"):
+        card["isArea"] = action == "Bereich aktiviert"
+
+
+# ---------------------------------------------------------------------- Index
+
+class _State:
+    """Laufender Stand waehrend des Nachspielens (Dokument plus Kartenindex)."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.index = None
+
+    def cards(self):
+        return sum(len(c.get("items") or []) for c in self.doc.get("columns", {}).values())
+
+    def log(self, row, ts):
+        if self.index is None:
+            self.index = item_index(self.doc)
+        apply_log_row(self.doc, row, ts, self.index)
+
+    def history(self, entry):
+        if entry["kind"] == "full":
+            self.doc, self.index = entry["doc"], None
+        else:
+            if self.index is None:
+                self.index = item_index(self.doc)
+            self.doc = patch_document(self.doc, entry["patch"], self.index)
+
+
+class BoardReplay:
+    def __init__(self, data_dir=DATA_DIR, index_dir=HISTORY_DIR, every=CHECKPOINT_EVERY, csv_index_dir=None):
+        self.log_path = os.path.join(data_dir, "Lage_log.csv")
+        self.history_path = os.path.join(index_dir, "board.history.jsonl")
+        self.columns = {k: c.get("name", k) for k, c in
+                        ((load_json(os.path.join(data_dir, "board.json"), {}) or {}).get("columns") or {}).items()} \
+            or DEFAULT_COLUMNS
+        self.every = every
+        os.makedirs(index_dir, exist_ok=True)
+        self.steps_path = os.path.join(index_dir, "replay.steps")
+        self.ckpt_path = os.path.join(index_dir, "replay.checkpoints.jsonl")
+        self.meta_path = os.path.join(index_dir, "replay.json")
+        self.tail = CsvTail(self.log_path, index_dir=csv_index_dir or os.path.join(data_dir, "csv_index"))
+        self._load()
+
+    # -------------------------------------------------------------- Persistenz
+
+    def _load(self):
+        meta = load_json(self.meta_path)
+        if not meta or meta.get("version") != VERSION or meta.get("every") != self.every:
+            self._reset()
+            return
+        self.meta = meta
+        self.steps = np.fromfile(self.steps_path, dtype=STEP_DTYPE, count=meta["steps"]) \
+            if os.path.exists(self.steps_path) else np.zeros(0, STEP_DTYPE)
+        if len(self.steps) != meta["steps"]:
+            self._reset()
+
+    def _reset(self):
+        self.meta = {"version": VERSION, "every": self.every, "steps": 0, "log_rows": 0,
+                     "history_offset": 0, "history_start": None, "checkpoints": [], "keyframes": [], "ckpt_size": 0}
+        self.steps = np.zeros(0, STEP_DTYPE)
+        for path in (self.steps_path, self.ckpt_path):
+            open(path, "wb").close()
+
+    def _save(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.meta, fh)
+        os.replace(tmp, self.meta_path)
+
+    def _history_entries(self, offset, stop=None):
+        """(byte_offset, eintrag, naechster_offset) ab offset (bis stop) aus der Board-Historie."""
+        if not os.path.exists(self.history_path):
+            return
+        with open(self.history_path, "rb") as fh:
+            fh.seek(offset)
+            pos = offset
+            for line in fh:
+                if stop is not None and pos >= stop:
+                    break
+                if not line.endswith(b"\n"):
+                    break                        # Eintrag wird gerade geschrieben
+                yield pos, json.loads(line), pos + len(line)
+                pos += len(line)
+
+    def _history_start(self):
+        for _pos, entry, _next in self._history_entries(0):
+            return int(entry["ts"])
+        return None
+
+    # -------------------------------------------------------------- Fortschreiben
+
+    def update(self):
+        """Nimmt neue Log-Zeilen und History-Eintraege auf. -> Anzahl neuer Schritte."""
+        self.tail.update()
+        meta = self.meta
+        history_size = os.path.getsize(self.history_path) if os.path.exists(self.history_path) else 0
+        if (len(self.tail) < meta["log_rows"] or history_size < meta["history_offset"]
+                or self._history_start() != meta["history_start"]):
+            self._reset()
+            meta = self.meta
+        meta["history_start"] = history_start = self._history_start()
+
+        new = []
+        # Lage_log nur fuer die Zeit vor der ersten Board-Historie
+        if len(self.tail) > meta["log_rows"]:
+            rows = list(self.tail.rows(meta["log_rows"], len(self.tail)))
+            times = local_to_utc_ms(parse_zeitpunkt([r.get("Zeitpunkt", "") for r in rows]))
+            for n, ts in enumerate(times, start=meta["log_rows"]):
+                if ts != np.iinfo(np.int64).min and (history_start is None or ts < history_start):
+                    new.append((int(ts), LOG, n))
+            meta["log_rows"] = len(self.tail)
+        for pos, entry, end in self._history_entries(meta["history_offset"]):
+            if entry["kind"] == "full":
+                meta["keyframes"].append(len(self.steps) + len(new))
+            new.append((int(entry["ts"]), HISTORY, pos))
+            meta["history_offset"] = end
+        if not new:
+            self._save()
+            return 0
+
+        steps = np.array(new, dtype=STEP_DTYPE)
+        # Zeiten fuer die Suche monoton machen (Log-Zeilen sind nicht streng sortiert)
+        floor = self.steps["ts"][-1] if len(self.steps) else np.iinfo(np.int64).min
+        steps["ts"] = np.maximum.accumulate(np.maximum(steps["ts"], floor))
+        with open(self.steps_path, "ab") as fh:
+            steps.tofile(fh)
+        self.steps = np.concatenate((self.steps, steps))
+        meta["steps"] = len(self.steps)
+        self._checkpoint()
+        self._save()
+        return len(steps)
+
+    def _checkpoint(self):
+        """Setzt hinter dem letzten Checkpoint alle max(every, Kartenzahl) Schritte einen neuen.
+
+        Laden eines Checkpoints und Nachspielen eines Intervalls kosten so etwa gleich
+        viel, und die Checkpoint-Datei waechst nur linear mit der Zahl der Schritte.
+        """
+        start, state = self._restore(len(self.steps), keyframes=False)
+        with open(self.ckpt_path, "ab") as fh:
+            while True:
+                target = start - 1 + max(self.every, state.cards())
+                if target >= len(self.steps):
+                    break
+                self._advance(state, start, target + 1)
+                start = target + 1
+                entry = {"step": target, "ts": int(self.steps["ts"][target]), "doc": state.doc}
+                line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+                self.meta["checkpoints"].append([target, self.meta["ckpt_size"]])
+                self.meta["ckpt_size"] += fh.write(line)
+
+    # -------------------------------------------------------------- Nachspielen
+
+    def _restore(self, step, keyframes=True):
+        """(naechster Schritt, Stand) vom letzten Checkpoint vor `step`.
+
+        Liegt ein Vollstand der Board-Historie (keyframe) dazwischen, beginnt das
+        Nachspielen dort; er ersetzt das Dokument ohnehin vollstaendig.
+        """
+        checkpoints = self.meta["checkpoints"]
+        i = np.searchsorted([c[0] for c in checkpoints], step, side="left") - 1
+        keyframes = self.meta["keyframes"] if keyframes else []
+        k = np.searchsorted(keyframes, step, side="left") - 1
+        if k >= 0 and (i < 0 or keyframes[k] > checkpoints[i][0]):
+            return keyframes[k], _State(empty_board(self.columns))
+        if i < 0:
+            return 0, _State(empty_board(self.columns))
+        ckpt_step, offset = checkpoints[i]
+        with open(self.ckpt_path, "rb") as fh:
+            fh.seek(offset)
+            entry = json.loads(fh.readline())
+        return ckpt_step + 1, _State(entry["doc"])
+
+    def _advance(self, state, start, stop):
+        """Wendet die Schritte start..stop-1 an."""
+        steps = self.steps[start:stop]
+        if not len(steps):
+            return
+        log_sel = steps["source"] == LOG
+        if log_sel.any():
+            refs = steps["ref"][log_sel]
+            lo, hi = int(refs.min()), int(refs.max()) + 1
+            by_row = dict(zip(range(lo, hi), self.tail.rows(lo, hi)))
+        hist_sel = steps["source"] == HISTORY
+        if hist_sel.any():
+            refs = steps["ref"][hist_sel]
+            entries = {pos: entry for pos, entry, _end in
+                       self._history_entries(int(refs.min()), int(refs.max()) + 1)}
+        for ts, source, ref in zip(steps["ts"], steps["source"], steps["ref"]):
+            if source == LOG:
+                state.log(by_row[int(ref)], int(ts))
+            else:
+                state.history(entries[int(ref)])
+
+    # -------------------------------------------------------------- Abfragen
+
+    def __len__(self):
+        return len(self.steps)
+
+    def span(self):
+        if not len(self.steps):
+            return None, None
+        return int(self.steps["ts"][0]), int(self.steps["ts"][-1])
+
+    def step_at(self, when):
+        """Index des letzten Schritts bis einschliesslich `when` (-1: davor)."""
+        ms = to_ms(when, self.span()[1])
+        return int(np.searchsorted(self.steps["ts"], ms, side="right")) - 1
+
+    def state_at(self, when):
+        """board.json-foermiger Stand zum Zeitpunkt `when`."""
+        step = self.step_at(when)
+        if step < 0:
+            return empty_board(self.columns)
+        start, state = self._restore(step + 1)
+        self._advance(state, start, step + 1)
+        return state.doc                  # frisch geladen, gehoert dem Aufrufer
+
+    def frames(self, start=None, end=None, interval=None):
+        """(ms, Stand) entlang der Zeit.
+
+        Ohne interval: nach jedem Schritt im Bereich; sonst alle `interval` Sekunden.
+        """
+        first, last = self.span()
+        if first is None:
+            return
+        lo = to_ms(start, last) if start is not None else first
+        hi = to_ms(end, last) if end is not None else last
+        step = self.step_at(lo)
+        begin, state = self._restore(step + 1)
+        self._advance(state, begin, step + 1)
+        if interval is None:
+            yield lo, copy.deepcopy(state.doc)
+            stop = int(np.searchsorted(self.steps["ts"], hi, side="right"))
+            for s in range(step + 1, stop):
+                self._advance(state, s, s + 1)
+                yield int(self.steps["ts"][s]), copy.deepcopy(state.doc)
+            return
+        t = lo
+        while t <= hi:
+            target = int(np.searchsorted(self.steps["ts"], t, side="right"))
+            self._advance(state, step + 1, target)
+            step = target - 1
+            yield t, copy.deepcopy(state.doc)
+            t += int(interval * 1000)
+
+
+def open_replay(**kwargs):
+    replay = BoardReplay(**kwargs)
+    replay.update()
+    return replay
+
+
+def describe(doc):
+    lines = []
+    for column in doc["columns"].values():
+        lines.append(f"  {column.get('name')} ({len(column['items'])})")
+        for item in column["items"]:
+            units = ", ".join(map(str, item.get("assignedVehicles") or []))
+            lines.append(f"    {item.get('humanId', '')} {item.get('content', '')}" + (f" [{units}]" if units else ""))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand des Einsatzboards zu einem Zeitpunkt")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--index-dir", default=HISTORY_DIR)
+    parser.add_argument("--at", default=None, help='Zeitpunkt, z.B. "14:32" oder "2026-02-04 14:32"')
+    parser.add_argument("--date", default=None, help="Tag zu --at (Vorgabe: letzter Tag der Aufzeichnung)")
+    parser.add_argument("--frames", type=int, default=None, help="N gleichmaessig verteilte Staende ausgeben")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    replay = BoardReplay(args.data_dir, args.index_dir)
+    added = replay.update()
+    first, last = replay.span()
+    print(f"  ✓ {len(replay)} Schritte ({added} neu), {len(replay.meta['checkpoints'])} Checkpoints "
+          f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+    if first is None:
+        print("Keine Daten.")
+    elif args.at:
+        when = f"{args.date} {args.at}" if args.date else args.at
+        started = time.perf_counter()
+        doc = replay.state_at(when)
+        print(f"Stand {fmt_ms(to_ms(when, last))} ({(time.perf_counter() - started) * 1000:.1f} ms):")
+        print(describe(doc))
+    elif args.frames:
+        interval = max((last - first) / 1000 / max(args.frames - 1, 1), 1)
+        for ms, doc in replay.frames(interval=interval):
+            print(f"Stand {fmt_ms(ms)}:")
+            print(describe(doc))
+    print("Fertig.")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Inkrementelles Lesen der wachsenden EINFO-CSVs (protocol.csv, Lage_log.csv,
+Aufg_log_*.csv) ueber einen Offset-Index neben den Daten.
+
+Je CSV liegen unter INDEX_DIR drei Dateien:
+  <name>.rows  -- je Zeile (Byte-Offset uint64, Laenge uint32), nur angehaengt
+  <name>.keys  -- je Zeile und Schluesselspalte (Spalte uint8, crc32 des Werts, Zeile uint32)
+  <name>.json  -- Kopfzeile, gelesener Offset, Zeilenzahl, Pruefsummen, Leser-Cursor
+
+update() liest nur die Bytes ab dem zuletzt verarbeiteten Offset. Zeilenenden werden
+ueber die Anzahl der Anfuehrungszeichen bestimmt (gequotete Zeilenumbrueche in
+INFORMATION bleiben Teil der Zeile); eine noch unvollstaendige letzte Zeile wird
+beim naechsten Aufruf gelesen. Wurde die Datei neu geschrieben (z.B.
+rewriteCsvFromJson in server/utils/protocolCsv.mjs), passen Kopfzeile, erste oder
+letzte indizierte Zeile nicht mehr und der Index wird neu aufgebaut.
+
+row(i) liest eine Zeile per seek. get(nr) sucht den crc32 des Schluessels im
+Schluesselarray und prueft die Kandidaten an der Zeile selbst. new_rows(leser)
+liefert nur die seit dem letzten Aufruf dieses Lesers angehaengten Zeilen.
+
+Aufruf:  python3 scripts/csv_tail.py [--file CSV] [--show NR] [--consumer NAME]
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from einfo_logs import AUFG_FIELDS, DATA_DIR, LAGE_FIELDS
+
+INDEX_DIR = os.path.join(DATA_DIR, "csv_index")
+VERSION = 1
+ROW_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4")])
+KEY_DTYPE = np.dtype([("column", "u1"), ("hash", "<u4"), ("row", "<u4")])
+
+# Schluesselspalten je Datei; die erste ist die Vorgabe fuer find()/get()
+KEY_COLUMNS = {
+    "protocol.csv": ("PROTOKOLL-NR", "ID"),
+    "Lage_log.csv": (LAGE_FIELDS["key"], LAGE_FIELDS["label"]),
+    "Aufg_log_": (AUFG_FIELDS["key"],),
+}
+
+
+def key_columns_for(path):
+    name = os.path.basename(path)
+    for prefix, columns in KEY_COLUMNS.items():
+        if name.startswith(prefix):
+            return columns
+    return ()
+
+
+def _digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def split_rows(data, base=0):
+    """Zeilengrenzen in `data` (Beginn an einer Zeilengrenze).
+
+    Ein Zeilenumbruch beendet nur dann eine Zeile, wenn davor eine gerade Anzahl
+    Anfuehrungszeichen steht ("" im Feld zaehlt doppelt und stoert die Paritaet nicht).
+    -> (offsets, laengen, verbrauchte Bytes); Leerzeilen werden uebersprungen.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == 10)
+    if not len(newlines):
+        return np.zeros(0, np.uint64), np.zeros(0, np.uint32), 0
+    quotes = np.cumsum(buf == 34, dtype=np.int64)
+    ends = newlines[(quotes[newlines] & 1) == 0] + 1
+    if not len(ends):
+        return np.zeros(0, np.uint64), np.zeros(0, np.uint32), 0
+    starts = np.concatenate(([0], ends[:-1]))
+    lengths = ends - starts
+    # Leerzeilen (nur \n bzw. \r\n) nicht als Datensatz fuehren
+    blank = (lengths == 1) | ((lengths == 2) & (buf[np.maximum(ends - 2, 0)] == 13))
+    return ((starts[~blank] + base).astype(np.uint64), lengths[~blank].astype(np.uint32),
+            int(ends[-1]))
+
+
+def _key_hash(value):
+    return zlib.crc32(value.encode("utf-8"))
+
+
+def parse_rows(raw, delimiter=";"):
+    text = raw.decode("utf-8", errors="replace")
+    if text.startswith("\ufeff"):
+        text = text[1:]
+    return [row for row in csv.reader(io.StringIO(text, newline=""), delimiter=delimiter) if row]
+
+
+def parse_row(raw, delimiter=";"):
+    rows = parse_rows(raw, delimiter)
+    return rows[0] if rows else []
+
+
+class CsvTail:
+    """Offset-Index einer nur wachsenden CSV-Datei."""
+
+    def __init__(self, path, key_columns=None, index_dir=INDEX_DIR, delimiter=";"):
+        self.path = path
+        self.delimiter = delimiter
+        self.key_columns = tuple(key_columns if key_columns is not None else key_columns_for(path))
+        os.makedirs(index_dir, exist_ok=True)
+        base = os.path.join(index_dir, os.path.basename(path))
+        self.rows_path = base + ".rows"
+        self.keys_path = base + ".keys"
+        self.meta_path = base + ".json"
+        self._keys = None           # KEY_DTYPE-Array, erst bei Bedarf geladen
+        self._load()
+
+    # ------------------------------------------------------------------ Index-Dateien
+
+    def _empty_meta(self):
+        return {"version": VERSION, "file": os.path.basename(self.path), "header": [],
+                "header_hash": None, "header_len": 0, "offset": 0, "rows": 0, "keys": 0,
+                "first_hash": None, "last_hash": None, "key_columns": list(self.key_columns), "cursors": {}}
+
+    def _load(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as fh:
+                self.meta = json.load(fh)
+        except (OSError, ValueError):
+            self.meta = None
+        if (not self.meta or self.meta.get("version") != VERSION
+                or self.meta.get("key_columns") != list(self.key_columns)):
+            self._reset()
+            return
+        # nach einem Abbruch koennen rows/keys laenger sein als die Metadaten angeben
+        try:
+            self.offsets = np.fromfile(self.rows_path, dtype=ROW_DTYPE, count=self.meta["rows"])
+        except (OSError, ValueError):
+            self.offsets = np.zeros(0, dtype=ROW_DTYPE)
+        if len(self.offsets) != self.meta["rows"]:
+            self._reset()
+            return
+        for path, size in ((self.rows_path, self.meta["rows"] * ROW_DTYPE.itemsize),
+                           (self.keys_path, self.meta["keys"] * KEY_DTYPE.itemsize)):
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as fh:
+                    fh.truncate(size)
+
+    def _reset(self):
+        cursors = (self.meta or {}).get("cursors", {})
+        self.meta = self._empty_meta()
+        # Leser behalten ihren Namen, lesen nach einem Neuaufbau aber von vorn
+        self.meta["cursors"] = {name: 0 for name in cursors}
+        self.offsets = np.zeros(0, dtype=ROW_DTYPE)
+        self._keys = None
+        for path in (self.rows_path, self.keys_path):
+            open(path, "wb").close()
+
+    def _save(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.meta, fh, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def _unchanged(self, fh, size):
+        """Passt der bisher indizierte Teil noch zur Datei (nur angehaengt)?"""
+        meta = self.meta
+        if size < meta["offset"]:
+            return False
+        if meta["header_hash"] is not None:
+            fh.seek(0)
+            if _digest(fh.read(meta["header_len"])) != meta["header_hash"]:
+                return False
+        if meta["rows"]:
+            for row, digest in ((self.offsets[0], meta["first_hash"]), (self.offsets[-1], meta["last_hash"])):
+                fh.seek(int(row["offset"]))
+                if _digest(fh.read(int(row["length"]))) != digest:
+                    return False
+        return True
+
+    # ------------------------------------------------------------------ Fortschreiben
+
+    def update(self):
+        """Indiziert neu angehaengte Zeilen. -> Anzahl neuer Zeilen."""
+        if not os.path.exists(self.path):
+            if self.meta["offset"]:
+                self._reset()
+                self._save()
+            return 0
+        with open(self.path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if not self._unchanged(fh, size):
+                self._reset()
+            start = self.meta["offset"]
+            if size == start:
+                return 0
+            fh.seek(start)
+            data = fh.read(size - start)
+
+        offsets, lengths, used = split_rows(data, start)
+        if not used:
+            return 0
+        meta = self.meta
+        if meta["header_hash"] is None:
+            # erste Zeile der Datei ist die Kopfzeile
+            head = data[:int(lengths[0])] if len(lengths) else b""
+            meta["header"] = [h.strip() for h in parse_row(head, self.delimiter)]
+            meta["header_len"] = int(lengths[0]) if len(lengths) else 0
+            meta["header_hash"] = _digest(head)
+            offsets, lengths = offsets[1:], lengths[1:]
+
+        rows = np.zeros(len(offsets), dtype=ROW_DTYPE)
+        rows["offset"], rows["length"] = offsets, lengths
+        keys = self._key_entries(data, start, rows, meta["rows"])
+
+        with open(self.rows_path, "ab") as fh:
+            rows.tofile(fh)
+        with open(self.keys_path, "ab") as fh:
+            keys.tofile(fh)
+        if self._keys is not None:
+            self._keys = np.concatenate((self._keys, keys))
+        self.offsets = np.concatenate((self.offsets, rows))
+        meta["offset"] = start + used
+        meta["rows"] = len(self.offsets)
+        meta["keys"] += len(keys)
+        for name, row in (("first_hash", self.offsets[0]), ("last_hash", self.offsets[-1])):
+            if len(rows) and row["offset"] >= start:
+                o = int(row["offset"]) - start
+                meta[name] = _digest(data[o:o + int(row["length"])])
+        self._save()
+        return len(rows)
+
+    def _key_entries(self, data, start, rows, first_row):
+        """KEY_DTYPE-Eintraege der Schluesselspalten fuer die neuen Zeilen."""
+        header = self.meta["header"]
+        positions = [(i, header.index(c)) for i, c in enumerate(self.key_columns) if c in header]
+        if not positions or not len(rows):
+            return np.zeros(0, dtype=KEY_DTYPE)
+        lo = int(rows["offset"][0]) - start
+        hi = int(rows["offset"][-1]) + int(rows["length"][-1]) - start
+        parsed = parse_rows(data[lo:hi], self.delimiter)
+        if len(parsed) != len(rows):
+            # Block- und Zeilenzerlegung uneins (fehlerhaftes Quoting): zeilenweise
+            parsed = [parse_row(data[int(o) - start:int(o) - start + int(ln)], self.delimiter)
+                      for o, ln in zip(rows["offset"], rows["length"])]
+        out = []
+        for n, values in enumerate(parsed, start=first_row):
+            for column, pos in positions:
+                value = values[pos].strip() if pos < len(values) else ""
+                if value:
+                    out.append((column, _key_hash(value), n))
+        return np.array(out, dtype=KEY_DTYPE)
+
+    # ------------------------------------------------------------------ Zugriff
+
+    @property
+    def header(self):
+        return self.meta["header"]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _as_dict(self, values):
+        header = self.meta["header"]
+        if len(values) < len(header):
+            values = values + [""] * (len(header) - len(values))
+        return dict(zip(header, values))
+
+    def rows(self, start=0, stop=None):
+        """Zeilen start..stop als dicts; ein zusammenhaengender Lesevorgang."""
+        stop = len(self.offsets) if stop is None else min(stop, len(self.offsets))
+        if start >= stop:
+            return
+        first, last = self.offsets[start], self.offsets[stop - 1]
+        base = int(first["offset"])
+        with open(self.path, "rb") as fh:
+            fh.seek(base)
+            data = fh.read(int(last["offset"]) + int(last["length"]) - base)
+        for o, ln in zip(self.offsets["offset"][start:stop], self.offsets["length"][start:stop]):
+            o = int(o) - base
+            yield self._as_dict(parse_row(data[o:o + int(ln)], self.delimiter))
+
+    def row(self, i):
+        """Zeile i (0 = erste Datenzeile) als dict."""
+        if i < 0:
+            i += len(self.offsets)
+        if not 0 <= i < len(self.offsets):
+            raise IndexError(i)
+        return next(self.rows(i, i + 1))
+
+    def find(self, value, column=None):
+        """Zeilennummern mit `value` in der Schluesselspalte (Vorgabe: erste), aufsteigend."""
+        column = column or (self.key_columns[0] if self.key_columns else None)
+        if column not in self.key_columns:
+            raise KeyError(f"{column!r} ist keine Schluesselspalte von {os.path.basename(self.path)}")
+        if self._keys is None:
+            self._keys = np.fromfile(self.keys_path, dtype=KEY_DTYPE, count=self.meta["keys"])
+        value = str(value).strip()
+        col = self.key_columns.index(column)
+        hits = self._keys["row"][(self._keys["hash"] == _key_hash(value)) & (self._keys["column"] == col)]
+        # crc32-Kollisionen an der Zeile selbst ausschliessen
+        return [int(n) for n in hits if self.row(int(n)).get(column, "").strip() == value]
+
+    def get(self, value, column=None):
+        """Letzte Zeile zu einem Schluessel (z.B. aktueller Stand einer PROTOKOLL-NR) oder None."""
+        hits = self.find(value, column)
+        return self.row(hits[-1]) if hits else None
+
+    def history(self, value, column=None):
+        """Alle Zeilen zu einem Schluessel in Dateireihenfolge."""
+        return [self.row(i) for i in self.find(value, column)]
+
+    # ------------------------------------------------------------------ Leser-Cursor
+
+    def new_rows(self, consumer):
+        """(zeile, dict) aller Zeilen seit dem letzten vollstaendigen Durchlauf von `consumer`.
+
+        Der Cursor wird erst nach dem letzten Element gespeichert; bricht der Leser
+        vorher ab, erhaelt er dieselben Zeilen beim naechsten Mal erneut.
+        """
+        self.update()
+        start = self.meta["cursors"].get(consumer, 0)
+        stop = len(self.offsets)
+        for n, rec in enumerate(self.rows(start, stop), start=start):
+            yield n, rec
+        self.meta["cursors"][consumer] = stop
+        self._save()
+
+    def reset_consumer(self, consumer):
+        self.meta["cursors"].pop(consumer, None)
+        self._save()
+
+
+def open_tail(path, **kwargs):
+    """CsvTail auf dem aktuellen Stand der Datei."""
+    tail = CsvTail(path, **kwargs)
+    tail.update()
+    return tail
+
+
+def default_paths(data_dir=DATA_DIR):
+    names = ["protocol.csv", "Lage_log.csv"] + sorted(
+        n for n in os.listdir(data_dir) if n.startswith("Aufg_log_") and n.endswith(".csv"))
+    return [os.path.join(data_dir, n) for n in names if os.path.exists(os.path.join(data_dir, n))]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offset-Index der EINFO-CSVs fortschreiben")
+    parser.add_argument("--file", action="append", default=None, help="CSV-Datei (mehrfach moeglich)")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--show", default=None, help="Zeile zu diesem Schluessel ausgeben")
+    parser.add_argument("--consumer", default=None, help="neue Zeilen fuer diesen Leser ausgeben")
+    args = parser.parse_args()
+
+    print("Aktualisiere CSV-Index ...")
+    for path in args.file or default_paths():
+        started = time.perf_counter()
+        tail = CsvTail(path, index_dir=args.index_dir)
+        added = tail.update()
+        print(f"  ✓ {os.path.basename(path)}: {len(tail)} Zeilen, {added} neu "
+              f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+        if args.show:
+            rec = tail.get(args.show)
+            print(json.dumps(rec, ensure_ascii=False, indent=1) if rec else f"    {args.show}: nicht gefunden")
+        if args.consumer:
+            for n, rec in tail.new_rows(args.consumer):
+                print(f"    {n}: " + "; ".join(f"{k}={v}" for k, v in list(rec.items())[:4]))
+    print("Fertig.")
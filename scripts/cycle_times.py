@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Zykluszeiten der Einsaetze aus Lage_log.csv und board.json (optional ueber alle
+archivierten Uebungen, siehe exercise_archive.py).
+
+Je Einsatz werden als NumPy-Arrays bestimmt:
+  - Zeit bis zur ersten Einheitenzuweisung (Alarmierung),
+  - Verweildauer in "In Bearbeitung",
+  - Einsatzende (letzter Wechsel nach "Erledigt"),
+dazu die Zuweisungsabschnitte der Einheiten. Perzentile werden je Einsatztyp
+(conf/types.json) gebildet, die Einheitenauslastung je Standort der Einheit
+(conf/vehicles.json), und die Zahl gleichzeitig offener Einsaetze als Kurve
+ueber die Zeit.
+Ausgabe: server/data/prints/auswertung/Zykluszeiten_<Zeitstempel>.pdf
+
+Aufruf:  python3 scripts/cycle_times.py [--data-dir server/data] [--archives] [--out datei.pdf]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+import einfo_logs
+from board_replay import fmt_ms, local_to_utc_ms
+from exercise_archive import ARCHIVE_DIR, ArchiveSet
+from generate_help_pdfs import HilfePDF
+from log_report import REPORT_DIR, fmt_duration
+
+WORK_STATE = "In Bearbeitung"
+DONE_STATE = "Erledigt"
+NO_TYPE = "(ohne Typ)"
+NO_PLACE = "(ohne Ort)"
+NO_STATION = "(ohne Standort)"
+PERCENTILES = (50, 90, 95)
+NONE = np.iinfo(np.int64).max                 # Platzhalter "kein Zeitpunkt" fuer Minimum-Reduktionen
+PLACE = re.compile(r"\b\d{4}\s+([^,]+)")      # "9560 Feldkirchen in Kärnten" -> Gemeinde
+UNIT_LABEL = re.compile(r"^(.*?)\s*\(([^()]*)\)$")  # "TLF A (FF Feldkirchen)" -> Bezeichnung, Standort
+
+
+def load_types(data_dir=einfo_logs.DATA_DIR):
+    """Einsatztypen in der Reihenfolge von conf/types.json (Fallback types.json)."""
+    for path in (os.path.join(data_dir, "conf", "types.json"), os.path.join(data_dir, "types.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                types = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        return [str(t) for t in types if str(t).strip()]
+    return []
+
+
+def place_of(ort):
+    """Gemeinde/Ort aus einer Adresse ("u. Tiebelgasse 15, 9560 Feldkirchen, Österreich")."""
+    ort = re.sub(r"\s*\n\s*", ", ", (ort or "").strip())
+    if not ort:
+        return NO_PLACE
+    match = PLACE.search(ort)
+    if match:
+        return match.group(1).strip()
+    parts = [p.strip() for p in ort.split(",") if p.strip() and p.strip() != "Österreich"]
+    return parts[-1] if parts else NO_PLACE
+
+
+def _iso_to_s(values):
+    """ISO-Zeitstempel (UTC, "Z") -> int64 Sekunden, NONE bei leeren/ungueltigen Werten."""
+    out = np.full(len(values), NONE, dtype=np.int64)
+    for i, v in enumerate(values):
+        if isinstance(v, str) and v:
+            try:
+                out[i] = np.datetime64(v.rstrip("Z"), "s").astype(np.int64)
+            except ValueError:
+                pass
+    return out
+
+
+def _text(values):
+    return ["" if v is None else str(v) for v in values]
+
+
+# ---------------------------------------------------------------------- Einsaetze
+
+class IncidentTable:
+    """Einsaetze einer oder mehrerer Uebungen als parallele Arrays.
+
+    exercise          -- Uebungsname (object)
+    key, typ, place   -- Einsatz-ID, Einsatztyp, Ort (object)
+    created, dispatched, work_start, closed -- int64 Sekunden UTC, NONE = unbekannt/offen
+    work_secs         -- Sekunden in "In Bearbeitung"
+    units             -- Anzahl beteiligter Einheiten
+    assign_*          -- Zuweisungsabschnitte: Einsatzzeile, Einheit, Beginn, Ende
+    spans             -- {uebung: (beginn, ende)} der Aufzeichnung
+    """
+
+    FIELDS = ("exercise", "key", "typ", "place", "created", "dispatched", "work_start", "closed",
+              "work_secs", "units")
+    ASSIGN = ("assign_row", "assign_unit", "assign_start", "assign_end")
+
+    def __init__(self, columns, spans):
+        for name in self.FIELDS + self.ASSIGN:
+            setattr(self, name, columns[name])
+        self.spans = spans
+
+    def __len__(self):
+        return len(self.key)
+
+    @classmethod
+    def concat(cls, tables):
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls(_empty_columns(), {})
+        columns, offset = {}, 0
+        for name in cls.FIELDS + cls.ASSIGN:
+            columns[name] = np.concatenate([getattr(t, name) for t in tables])
+        rows = []
+        for t in tables:
+            rows.append(t.assign_row + offset)
+            offset += len(t)
+        columns["assign_row"] = np.concatenate(rows)
+        spans = {}
+        for t in tables:
+            spans.update(t.spans)
+        return cls(columns, spans)
+
+    def seconds(self, begin, end):
+        """end - begin in Sekunden als float, NaN wo einer fehlt oder negativ."""
+        ok = (begin != NONE) & (end != NONE) & (end >= begin)
+        out = np.full(len(begin), np.nan)
+        out[ok] = (end[ok] - begin[ok]).astype(np.float64)
+        return out
+
+    def time_to_dispatch(self):
+        return self.seconds(self.created, self.dispatched)
+
+    def time_in_work(self):
+        out = self.work_secs.astype(np.float64)
+        out[self.work_start == NONE] = np.nan
+        return out
+
+    def cycle_time(self):
+        return self.seconds(self.created, self.closed)
+
+
+def _empty_columns():
+    columns = {name: np.zeros(0, dtype=object) for name in ("exercise", "key", "typ", "place", "assign_unit")}
+    for name in ("created", "dispatched", "work_start", "closed", "work_secs", "units",
+                 "assign_row", "assign_start", "assign_end"):
+        columns[name] = np.zeros(0, dtype=np.int64)
+    return columns
+
+
+def incidents_from_log(table, items, name=""):
+    """IncidentTable einer Uebung aus Lage_log (LogTable) und den Karten von board.json.
+
+    items: Karten als dicts (id, typ, ort, createdAt, statusSince, column, everVehicles, ...).
+    Einsaetze ohne Logeintraege werden aus den Kartenfeldern ergaenzt.
+    """
+    item_ids = np.array([str(it.get("id") or "") for it in items], dtype=object)
+    keys = np.union1d(table.cats["key"].astype(object), item_ids) if len(table) else np.unique(item_ids)
+    keys = keys[keys != ""]
+    n = len(keys)
+    row_of = np.searchsorted(keys.astype(str), table.cats["key"]) if len(table) else np.zeros(0, np.int64)
+    row_of = np.minimum(row_of, max(n - 1, 0))
+
+    def minimum(rows, values):
+        out = np.full(n, NONE, dtype=np.int64)
+        np.minimum.at(out, rows, values)
+        return out
+
+    # Log: alle Zeiten nach UTC-Sekunden, Zeilen auf Einsatzzeilen abbilden
+    t = local_to_utc_ms(table.times) // 1000
+    key_code = table.codes["key"]
+    known = (table.cats["key"][key_code] != "") if len(table) else np.zeros(0, dtype=bool)
+    rows, t_rows, actions = row_of[key_code][known], t[known], table.codes["action"][known]
+
+    create = np.isin(actions, table.codes_of("action", einfo_logs.CREATE_ACTIONS))
+    created = minimum(rows[create], t_rows[create])
+    first = minimum(rows, t_rows)
+    created = np.where(created == NONE, first, created)
+    assign = actions == table.code_of("action", einfo_logs.ASSIGN_ACTION)
+    dispatched = minimum(rows[assign], t_rows[assign])
+
+    seg_key, state, start, end = einfo_logs.state_segments(table)
+    seg_rows = row_of[seg_key]
+    seg_start, seg_end = local_to_utc_ms(start) // 1000, local_to_utc_ms(end) // 1000
+    valid = table.cats["key"][seg_key] != ""
+    work = valid & (state == table.code_of("dst", WORK_STATE))
+    work_secs = np.bincount(seg_rows[work], weights=(seg_end - seg_start)[work], minlength=n).astype(np.int64)
+    work_start = minimum(seg_rows[work], seg_start[work])
+    last = np.ones(len(seg_key), dtype=bool)
+    last[:-1] = seg_key[1:] != seg_key[:-1]
+    done = valid & last & (state == table.code_of("dst", DONE_STATE))
+    closed = np.full(n, NONE, dtype=np.int64)
+    closed[seg_rows[done]] = seg_start[done]
+
+    a_key, a_unit, a_start, a_end, _open = einfo_logs.assignment_segments(table)
+    a_valid = table.cats["key"][a_key] != "" if len(a_key) else np.zeros(0, dtype=bool)
+    assign_row = row_of[a_key][a_valid]
+    assign_unit = table.cats["unit"][a_unit][a_valid].astype(object)
+    assign_start = (local_to_utc_ms(a_start) // 1000)[a_valid]
+    assign_end = (local_to_utc_ms(a_end) // 1000)[a_valid]
+    pairs = np.unique(assign_row * max(len(table.cats["unit"]), 1) + a_unit[a_valid]) if len(assign_row) else assign_row
+    units = np.bincount(pairs // max(len(table.cats["unit"]), 1), minlength=n).astype(np.int64)
+
+    # Kartenfelder: Typ und Ort immer, Zeiten nur wo das Log nichts liefert
+    typ = np.full(n, NO_TYPE, dtype=object)
+    place = np.full(n, NO_PLACE, dtype=object)
+    if len(items):
+        pos = np.searchsorted(keys.astype(str), item_ids.astype(str))
+        has = (item_ids != "") & (pos < n)
+        pos, sel = pos[has], np.flatnonzero(has)
+        typ[pos] = [str(items[i].get("typ") or "").strip() or NO_TYPE for i in sel]
+        place[pos] = [place_of(items[i].get("ort") or items[i].get("location")) for i in sel]
+        item_created = _iso_to_s([items[i].get("createdAt") for i in sel])
+        created[pos] = np.where(created[pos] == NONE, item_created, created[pos])
+        done_item = np.array([items[i].get("column") == "erledigt" for i in sel], dtype=bool)
+        item_closed = np.where(done_item, _iso_to_s([items[i].get("statusSince") for i in sel]), NONE)
+        closed[pos] = np.where((closed[pos] == NONE) & done_item, item_closed, closed[pos])
+        ever = np.array([len(items[i].get("everVehicles") or []) for i in sel], dtype=np.int64)
+        units[pos] = np.maximum(units[pos], ever)
+
+    stamps = np.concatenate([t, created[created != NONE]])
+    spans = {name: (int(stamps.min()), int(stamps.max()))} if len(stamps) else {}
+    return IncidentTable({
+        "exercise": np.full(n, name, dtype=object), "key": keys, "typ": typ, "place": place,
+        "created": created, "dispatched": dispatched, "work_start": work_start, "closed": closed,
+        "work_secs": work_secs, "units": units,
+        "assign_row": assign_row.astype(np.int64), "assign_unit": assign_unit,
+        "assign_start": assign_start, "assign_end": assign_end,
+    }, spans)
+
+
+def load_incidents(data_dir=einfo_logs.DATA_DIR, name="aktuell"):
+    """IncidentTable der laufenden Uebung in data_dir."""
+    path = os.path.join(data_dir, "Lage_log.csv")
+    table = einfo_logs.load_lage_log(path) if os.path.exists(path) else \
+        einfo_logs.table_from_columns({})
+    try:
+        with open(os.path.join(data_dir, "board.json"), "r", encoding="utf-8") as fh:
+            board = json.load(fh)
+    except (OSError, ValueError):
+        board = {}
+    items = [dict(item, column=key) for key, column in (board.get("columns") or {}).items()
+             for item in column.get("items") or [] if isinstance(item, dict)]
+    return incidents_from_log(table, items, name)
+
+
+def load_archived(archive_dir=ARCHIVE_DIR):
+    """IncidentTable ueber alle Archive (Tabellen lage_log und incidents)."""
+    tables = []
+    for arc in ArchiveSet(archive_dir).archives:
+        raw = {}
+        for column in einfo_logs.LAGE_FIELDS.values():
+            values = arc.column("lage_log", column)
+            raw[column] = values if values.dtype.kind == "M" else _text(values)
+        table = einfo_logs.table_from_columns(raw, source=arc.path)
+        columns = ("id", "typ", "ort", "createdAt", "statusSince", "column", "everVehicles.len")
+        data = {c: arc.column("incidents", c) for c in columns}
+        items = []
+        for i in range(arc.rows("incidents")):
+            item = {c: data[c][i] for c in columns[:3] + ("column",)}
+            for c in ("createdAt", "statusSince"):
+                v = data[c][i]
+                item[c] = str(v) if isinstance(v, np.datetime64) and not np.isnat(v) else \
+                    (v if isinstance(v, str) else None)
+            ever = data["everVehicles.len"][i]
+            item["everVehicles"] = [None] * int(ever) if isinstance(ever, (int, np.integer)) else []
+            items.append(item)
+        tables.append(incidents_from_log(table, items, arc.name))
+    return IncidentTable.concat(tables)
+
+
+# ---------------------------------------------------------------------- Kennzahlen
+
+def grouped_percentiles(values, groups, qs=PERCENTILES):
+    """Perzentile (naechster Rang) je Gruppe, NaN-Werte ausgenommen.
+
+    -> (gruppen, anzahl, perzentile[gruppe, q], mittel); alle Gruppen in einem Sortierlauf.
+    """
+    ok = ~np.isnan(values)
+    values, groups = values[ok], np.asarray(groups)[ok]
+    if not len(values):
+        return np.zeros(0, dtype=object), np.zeros(0, np.int64), np.zeros((0, len(qs))), np.zeros(0)
+    names, codes = np.unique(groups.astype(str), return_inverse=True)
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    counts = np.bincount(codes, minlength=len(names))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ranks = np.ceil(np.outer(counts, np.asarray(qs) / 100.0)).astype(np.int64) - 1
+    pct = values[starts[:, None] + np.clip(ranks, 0, None)]
+    means = np.bincount(codes, weights=values, minlength=len(names)) / counts
+    return names.astype(object), counts, pct, means
+
+
+def ordered_groups(names, preferred):
+    """Sortierung: zuerst in der Reihenfolge von `preferred` (types.json), dann alphabetisch."""
+    rank = {name: i for i, name in enumerate(preferred)}
+    return sorted(range(len(names)), key=lambda i: (rank.get(names[i], len(rank)), names[i]))
+
+
+def load_stations(data_dir=einfo_logs.DATA_DIR):
+    """Standort je Einheitenbezeichnung aus conf/vehicles.json und vehicles-extra.json."""
+    stations = {}
+    for path in (os.path.join(data_dir, "conf", "vehicles.json"), os.path.join(data_dir, "vehicles-extra.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                vehicles = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for v in vehicles or []:
+            if isinstance(v, dict) and v.get("label") and v.get("ort"):
+                stations[str(v["label"]).strip()] = str(v["ort"]).strip()
+    return stations
+
+
+def station_of(unit, stations):
+    """Standort einer Einheit aus dem Lage_log-Feld Einheit ("TLF A (FF Feldkirchen)").
+
+    Der Ort in Klammern stammt aus vehicles.json zum Zeitpunkt der Zuweisung; fehlt er
+    (oder ist "Unbekannt"), wird die Bezeichnung in `stations` nachgeschlagen.
+    """
+    unit = (unit or "").strip()
+    match = UNIT_LABEL.match(unit)
+    label, ort = (match.group(1).strip(), match.group(2).strip()) if match else (unit, "")
+    if ort and ort != "Unbekannt":
+        return ort
+    return stations.get(label) or stations.get(unit) or NO_STATION
+
+
+def unit_utilisation(incidents, stations=None):
+    """Einheiten-Einsatzzeit je Standort der Einheit.
+
+    -> [(standort, einsaetze, zuweisungen, einheiten, sekunden)] absteigend nach Einsatzzeit.
+    """
+    if not len(incidents.assign_row):
+        return []
+    stations = stations or {}
+    labels, unit_codes = np.unique(incidents.assign_unit.astype(str), return_inverse=True)
+    names, label_station = np.unique([station_of(u, stations) for u in labels], return_inverse=True)
+    codes = label_station[unit_codes]
+    secs = (incidents.assign_end - incidents.assign_start).astype(np.float64)
+    assignments = np.bincount(codes, minlength=len(names))
+    totals = np.bincount(codes, weights=secs, minlength=len(names))
+    rows = incidents.assign_row.astype(np.int64)
+    incident_counts = np.bincount(np.unique(codes * len(incidents) + rows) // len(incidents), minlength=len(names))
+    distinct = np.bincount(label_station, minlength=len(names))
+    order = np.lexsort((-incident_counts, -totals))
+    return [(str(names[i]), int(incident_counts[i]), int(assignments[i]), int(distinct[i]), float(totals[i]))
+            for i in order]
+
+
+def concurrency(incidents, exercise=None, step=60):
+    """Gleichzeitig offene Einsaetze -> (zeitpunkte [int64 s], anzahl) im Raster `step` Sekunden."""
+    sel = incidents.exercise == exercise if exercise is not None else np.ones(len(incidents), dtype=bool)
+    created = incidents.created[sel]
+    created = np.sort(created[created != NONE])
+    if not len(created):
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    closed = incidents.closed[sel]
+    closed = np.sort(closed[(closed != NONE) & (incidents.created[sel] != NONE)])
+    begin = int(created[0])
+    span = incidents.spans.get(exercise) if exercise is not None else None
+    end = max(int(span[1]) if span else begin, int(created[-1]))
+    grid = np.arange(begin - begin % step, end + step, step, dtype=np.int64)
+    counts = np.searchsorted(created, grid, side="right") - np.searchsorted(closed, grid, side="right")
+    return grid, counts
+
+
+def hourly_peaks(grid, counts):
+    """Hoechster Stand je Stunde -> (stunden [int64 s], maximum)."""
+    if not len(grid):
+        return grid, counts
+    hours = grid // 3600
+    idx = hours - hours[0]
+    peaks = np.zeros(int(idx[-1]) + 1, dtype=np.int64)
+    np.maximum.at(peaks, idx, counts)
+    return (hours[0] + np.arange(len(peaks))) * 3600, peaks
+
+
+# ---------------------------------------------------------------------- Bericht
+
+def percentile_table(pdf, values, incidents, types):
+    names, counts, pct, means = grouped_percentiles(values, incidents.typ)
+    if not len(names):
+        pdf.body("Keine auswertbaren Einsätze.")
+        return
+    rows = [(names[i], int(counts[i])) + tuple(fmt_duration(v) for v in pct[i]) + (fmt_duration(means[i]),)
+            for i in ordered_groups(list(names), types)]
+    _, total, all_pct, all_mean = grouped_percentiles(values, np.full(len(values), "Alle", dtype=object))
+    rows.append(("Alle", int(total[0])) + tuple(fmt_duration(v) for v in all_pct[0]) + (fmt_duration(all_mean[0]),))
+    headers = ["Einsatztyp", "Anzahl"] + [f"P{q}" for q in PERCENTILES] + ["Mittel"]
+    pdf.data_table(headers, rows, [55, 20, 25, 25, 25, 25])
+
+
+def generate_cycle_report(incidents, types, out_path=None, stations=None):
+    started = time.perf_counter()
+    pdf = HilfePDF("EINFO – Zykluszeiten")
+    pdf.alias_nb_pages()
+    exercises = sorted(incidents.spans, key=lambda name: incidents.spans[name][0])
+    subtitle = ""
+    if exercises:
+        first = min(s[0] for s in incidents.spans.values())
+        last = max(s[1] for s in incidents.spans.values())
+        subtitle = f"{fmt_ms(first * 1000)} – {fmt_ms(last * 1000)}"
+    pdf.cover_page("Zykluszeiten der Einsätze", subtitle)
+
+    pdf.add_page()
+    pdf.chapter_title("1. Übersicht")
+    pdf.body(f"{len(incidents)} Einsätze aus {len(exercises)} Übung(en).")
+    rows = []
+    for name in exercises:
+        sel = incidents.exercise == name
+        grid, counts = concurrency(incidents, name)
+        peak = int(counts.max()) if len(counts) else 0
+        at = fmt_ms(int(grid[int(counts.argmax())]) * 1000) if len(counts) else ""
+        rows.append((name, int(sel.sum()), int((incidents.closed[sel] != NONE).sum()), peak, at))
+    pdf.data_table(["Übung", "Einsätze", "Erledigt", "Max. offen", "Zeitpunkt"], rows, [55, 22, 22, 25, 46])
+
+    pdf.chapter_title("2. Zeit bis zur Alarmierung")
+    pdf.body("Von der Anlage des Einsatzes bis zur ersten Einheitenzuweisung, je Einsatztyp.")
+    percentile_table(pdf, incidents.time_to_dispatch(), incidents, types)
+
+    pdf.chapter_title("3. Bearbeitungsdauer")
+    pdf.section_title("3.1 Zeit in „In Bearbeitung“")
+    percentile_table(pdf, incidents.time_in_work(), incidents, types)
+    pdf.section_title("3.2 Anlage bis Erledigt")
+    percentile_table(pdf, incidents.cycle_time(), incidents, types)
+
+    pdf.add_page()
+    pdf.chapter_title("4. Einheitenauslastung je Standort")
+    usage = unit_utilisation(incidents, stations)
+    total = sum(u[4] for u in usage) or 1.0
+    if usage:
+        rows = [(station[:32], n, a, u, fmt_duration(secs), f"{secs / total:.0%}")
+                for station, n, a, u, secs in usage[:40]]
+        pdf.data_table(["Standort", "Einsätze", "Zuweis.", "Einheiten", "Einsatzzeit", "Anteil"], rows,
+                       [60, 20, 20, 22, 30, 18])
+    else:
+        pdf.body("Keine Einheitenzuweisungen protokolliert.")
+
+    pdf.chapter_title("5. Gleichzeitig offene Einsätze")
+    for nr, name in enumerate(exercises[-3:], start=1):
+        hours, peaks = hourly_peaks(*concurrency(incidents, name))
+        pdf.section_title(f"5.{nr} {name}")
+        labels = [fmt_ms(int(h) * 1000)[11:13] + "h" for h in hours]
+        pdf.bar_chart(labels, peaks.tolist(), height=45, value_fmt="{:d}")
+
+    if out_path is None:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        out_path = os.path.join(REPORT_DIR, time.strftime("Zykluszeiten_%Y%m%d_%H%M%S.pdf"))
+    pdf.output(out_path)
+    print(f"  ✓ {out_path} ({time.perf_counter() - started:.2f} s)")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zykluszeiten der Einsaetze als Nachbesprechungs-Bericht")
+    parser.add_argument("--data-dir", default=einfo_logs.DATA_DIR)
+    parser.add_argument("--archives", action="store_true", help="Archivierte Uebungen einbeziehen")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    print("Generiere Zykluszeiten ...")
+    started = time.perf_counter()
+    parts = [load_incidents(args.data_dir)]
+    if args.archives:
+        parts.append(load_archived(args.archive_dir))
+    incidents = IncidentTable.concat(parts)
+    print(f"  ✓ {len(incidents)} Einsätze geladen ({time.perf_counter() - started:.2f} s)")
+    generate_cycle_report(incidents, load_types(args.data_dir), args.out, load_stations(args.data_dir))
+    print("Fertig.")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Spaltenorientiertes Laden der EINFO-Aktionslogs (Lage_log.csv, Aufg_log_*.csv)
+und vektorisierte Auswertungen darauf.
+
+Jede Log-CSV wird einmal eingelesen und in NumPy-Arrays ueberfuehrt:
+Zeitpunkte als datetime64[s], alle Textspalten dictionary-codiert
+(int32-Codes + Kategorientabelle). Die Statistiken arbeiten ausschliesslich
+auf diesen Arrays.
+"""
+
+import csv
+import glob
+import os
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "server", "data")
+LAGE_LOG = os.path.join(DATA_DIR, "Lage_log.csv")
+
+# Zuordnung logischer Felder zu den CSV-Spalten (siehe EINSATZ_HEADERS in
+# server/server.js bzw. AUFG_HEADERS in server/utils/aufgabenLog.mjs).
+LAGE_FIELDS = {
+    "time": "Zeitpunkt",
+    "key": "InternID",
+    "label": "EinsatzID",
+    "title": "Einsatz",
+    "action": "Aktion",
+    "src": "Von",
+    "dst": "Nach",
+    "unit": "Einheit",
+}
+AUFG_FIELDS = {
+    "time": "Zeitpunkt",
+    "key": "ID",
+    "label": "Titel",
+    "title": "Typ",
+    "action": "Aktion",
+    "src": "Von Status",
+    "dst": "Nach Status",
+    "unit": "Verantwortlich",
+}
+
+# Aktionen, bei denen der Ausgangszustand in "Von" steht (Lage_log) statt in "Nach".
+CREATE_ACTIONS = ("Einsatz erstellt", "Einsatz erstellt (Auto-Import)")
+ASSIGN_ACTION = "Einheit zugewiesen"
+RELEASE_ACTION = "Einheit entfernt"
+
+
+# Zeichenpositionen von 'TT.MM.JJJJ  hh:mm:ss' (20 Zeichen) fuer 'JJJJ-MM-TThh:mm:ss'
+_ISO_PICK = [6, 7, 8, 9, -1, 3, 4, -1, 0, 1, -2, 12, 13, 14, 15, 16, 17, 18, 19]
+
+
+def parse_zeitpunkt(values):
+    """'04.02.2026  12:52:34' bzw. '04.02.2026, 12:52:34' -> datetime64[s] (NaT bei Fehler).
+
+    Die Umordnung zu ISO passiert auf einer Zeichenmatrix, nicht zeilenweise.
+    """
+    raw = np.char.strip(np.asarray(values, dtype="<U20"))
+    out = np.full(len(raw), np.datetime64("NaT"), dtype="datetime64[s]")
+    if not len(raw):
+        return out
+    chars = raw.view("<U1").reshape(len(raw), 20)
+    ok = (np.char.str_len(raw) == 20) & (chars[:, 2] == ".") & (chars[:, 5] == ".")
+    pick = chars[ok][:, [max(i, 0) for i in _ISO_PICK]]
+    pick[:, 4] = pick[:, 7] = "-"
+    pick[:, 10] = "T"
+    iso = np.ascontiguousarray(pick).view("<U19").ravel()
+    try:
+        out[ok] = iso.astype("datetime64[s]")
+    except ValueError:
+        good = np.flatnonzero(ok)
+        for i, v in zip(good, iso):
+            try:
+                out[i] = np.datetime64(str(v), "s")
+            except ValueError:
+                pass
+    return out
+
+
+def encode(values, categories=None):
+    """Dictionary-Encoding: Strings -> (int32-Codes, sortierte Kategorien).
+
+    Umgebende Leerzeichen werden auf Kategorienebene entfernt. Mit `categories`
+    wird gegen eine vorgegebene (sortierte) Tabelle codiert, unbekannte Werte -> -1.
+    """
+    cats, codes = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    cats, remap = np.unique(np.char.strip(cats), return_inverse=True)
+    codes = remap[codes].astype(np.int32) if len(codes) else codes.astype(np.int32)
+    if categories is None:
+        return codes, cats
+    pos = np.minimum(np.searchsorted(categories, cats), max(len(categories) - 1, 0))
+    known = categories[pos] == cats if len(categories) else np.zeros(len(cats), dtype=bool)
+    translate = np.where(known, pos, -1).astype(np.int32)
+    return (translate[codes] if len(codes) else codes), categories
+
+
+def read_csv_columns(path, delimiter=";"):
+    """Liest eine EINFO-CSV (BOM, Semikolon, gequotete Zeilenumbrueche) spaltenweise."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as fh:
+        reader = csv.reader(fh, delimiter=delimiter)
+        header = [h.strip() for h in next(reader, [])]
+        width = len(header)
+        rows = [row for row in reader if row]
+    if any(len(row) < width for row in rows):
+        rows = [row if len(row) >= width else row + [""] * (width - len(row)) for row in rows]
+    if not rows:
+        return {h: [] for h in header}
+    return {h: list(col) for h, col in zip(header, zip(*rows))}
+
+
+class LogTable:
+    """Spaltenorientierte Sicht auf ein Aktionslog.
+
+    times      -- datetime64[s], aufsteigend sortiert
+    codes[f]   -- int32-Codes je logischem Feld (key, label, title, action, unit, src, dst)
+    cats[f]    -- Kategorientabelle je Feld; src und dst teilen sich die Zustandsliste
+    """
+
+    def __init__(self, times, codes, cats, source=""):
+        self.times = times
+        self.codes = codes
+        self.cats = cats
+        self.source = source
+
+    def __len__(self):
+        return len(self.times)
+
+    def values(self, field):
+        return self.cats[field][self.codes[field]]
+
+    def code_of(self, field, value):
+        hits = np.flatnonzero(self.cats[field] == value)
+        return int(hits[0]) if len(hits) else -1
+
+    def codes_of(self, field, values):
+        return np.flatnonzero(np.isin(self.cats[field], list(values)))
+
+    def state_codes(self, create_actions=CREATE_ACTIONS):
+        """Zustand nach jeder Zeile: 'Nach', bei Anlage-Aktionen ersatzweise 'Von' (-1 = keiner)."""
+        empty = self.code_of("dst", "")
+        state = self.codes["dst"].copy()
+        no_dst = state == empty
+        created = np.isin(self.codes["action"], self.codes_of("action", create_actions))
+        state[no_dst & created] = self.codes["src"][no_dst & created]
+        state[no_dst & ~created] = -1
+        if empty >= 0:
+            state[state == empty] = -1
+        return state
+
+
+def load_log(path, fields=LAGE_FIELDS):
+    """Laedt eine Log-CSV als LogTable. Doppelt geschriebene Zeilen werden entfernt."""
+    return table_from_columns(read_csv_columns(path), fields, source=path)
+
+
+def table_from_columns(raw, fields=LAGE_FIELDS, source=""):
+    """LogTable aus bereits gelesenen Spalten {csv_spalte: [wert, ...]} (z.B. aus einem Archiv)."""
+    n = len(raw.get(fields["time"], []))
+
+    def col(name):
+        return raw.get(fields[name]) or [""] * n
+
+    raw_times = raw.get(fields["time"])
+    if isinstance(raw_times, np.ndarray) and raw_times.dtype.kind == "M":
+        times = raw_times.astype("datetime64[s]")      # bereits geparst (Archiv)
+    else:
+        times = parse_zeitpunkt(col("time"))
+    codes, cats = {}, {}
+    for name in ("key", "label", "title", "action", "unit"):
+        codes[name], cats[name] = encode(col(name))
+    # Von/Nach teilen sich eine gemeinsame Zustandstabelle
+    src_codes, src_cats = encode(col("src"))
+    dst_codes, dst_cats = encode(col("dst"))
+    states = np.union1d(np.union1d(src_cats, dst_cats), np.array([""]))
+    codes["src"], cats["src"] = np.searchsorted(states, src_cats).astype(np.int32)[src_codes], states
+    codes["dst"], cats["dst"] = np.searchsorted(states, dst_cats).astype(np.int32)[dst_codes], states
+
+    # Zeilen werden teils doppelt geschrieben; Duplikate ueber einen Schluessel aus
+    # Zeitpunkt und Codes erkennen (lexsort statt zeilenweisem Vergleich).
+    valid = np.flatnonzero(~np.isnat(times))
+    parts = [codes[f][valid] for f in ("unit", "dst", "src", "action", "key")] + [times[valid].astype(np.int64)]
+    order = np.lexsort(parts)
+    dup = np.zeros(len(order), dtype=bool)
+    if len(order) > 1:
+        same = np.ones(len(order) - 1, dtype=bool)
+        for p in parts:
+            ps = p[order]
+            same &= ps[1:] == ps[:-1]
+        dup[1:] = same
+    order = valid[order[~dup]]
+
+    return LogTable(times[order], {k: v[order] for k, v in codes.items()}, cats, source=source)
+
+
+def load_lage_log(path=LAGE_LOG):
+    return load_log(path, LAGE_FIELDS)
+
+
+def load_aufgaben_log(path):
+    return load_log(path, AUFG_FIELDS)
+
+
+def aufgaben_log_paths(data_dir=DATA_DIR):
+    """Alle rollenspezifischen Aufgaben-Logs, z.B. {'S2': '.../Aufg_log_S2.csv'}."""
+    out = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "Aufg_log_*.csv"))):
+        role = os.path.basename(path)[len("Aufg_log_"):-len(".csv")]
+        out[role] = path
+    return out
+
+
+# ----------------------------------------------------------------------
+#  Statistiken
+# ----------------------------------------------------------------------
+def transition_counts(table):
+    """Anzahl Zustandswechsel Von -> Nach, absteigend sortiert: [(von, nach, n), ...]"""
+    empty = table.code_of("dst", "")
+    src, dst = table.codes["src"], table.codes["dst"]
+    mask = (src != empty) & (dst != empty) & (src != dst)
+    if not mask.any():
+        return []
+    n = len(table.cats["dst"])
+    pairs, counts = np.unique(src[mask].astype(np.int64) * n + dst[mask], return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    states = table.cats["dst"]
+    return [(str(states[pairs[i] // n]), str(states[pairs[i] % n]), int(counts[i])) for i in order]
+
+
+def _segments(keys, times, until):
+    """Fuer nach (key, time) sortierte Ereignisse: Endzeit jedes Abschnitts."""
+    end = np.empty_like(times)
+    end[:-1] = times[1:]
+    end[-1] = until
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    end[last] = until
+    return end, last
+
+
+def state_segments(table, until=None, create_actions=CREATE_ACTIONS):
+    """Zustandsabschnitte je Eintrag als Arrays (key, state, start, end), nach key sortiert.
+
+    Offene Abschnitte laufen bis `until` (Standard: letzter Logeintrag).
+    """
+    empty_t = np.array([], dtype="datetime64[s]")
+    empty_i = np.array([], dtype=np.int32)
+    if not len(table):
+        return empty_i, empty_i, empty_t, empty_t
+    until = np.datetime64(until or table.times[-1], "s")
+    state = table.state_codes(create_actions)
+    sel = np.flatnonzero(state >= 0)
+    keys, times, state = table.codes["key"][sel], table.times[sel], state[sel]
+    order = np.lexsort((times, keys))
+    keys, times, state = keys[order], times[order], state[order]
+    if not len(keys):
+        return empty_i, empty_i, empty_t, empty_t
+    end, _ = _segments(keys, times, until)
+    return keys, state, times, np.maximum(end, times)
+
+
+def state_durations(table, until=None, create_actions=CREATE_ACTIONS):
+    """Verweildauer je Spalte/Status.
+
+    Gibt {zustand: (summe_sekunden, anzahl_abschnitte, median_sekunden)} zurueck.
+    """
+    _, state, start, end = state_segments(table, until, create_actions)
+    if not len(state):
+        return {}
+    secs = (end - start).astype(np.int64)
+    n_states = len(table.cats["dst"])
+    totals = np.bincount(state, weights=secs, minlength=n_states)
+    counts = np.bincount(state, minlength=n_states)
+    out = {}
+    for code in np.flatnonzero(counts):
+        out[str(table.cats["dst"][code])] = (
+            float(totals[code]),
+            int(counts[code]),
+            float(np.median(secs[state == code])),
+        )
+    return out
+
+
+def assignment_segments(table, until=None, assign=ASSIGN_ACTION, release=RELEASE_ACTION):
+    """Zuweisungsabschnitte als Arrays (key, unit, start, end, offen).
+
+    Ein Abschnitt beginnt mit einer Zuweisung und endet beim naechsten Ereignis
+    desselben Paares Eintrag/Einheit (normalerweise "Einheit entfernt") oder `until`.
+    """
+    empty_t = np.array([], dtype="datetime64[s]")
+    empty_i = np.array([], dtype=np.int64)
+    if not len(table):
+        return empty_i, empty_i, empty_t, empty_t, np.array([], dtype=bool)
+    until = np.datetime64(until or table.times[-1], "s")
+    a, r = table.code_of("action", assign), table.code_of("action", release)
+    sel = np.flatnonzero(np.isin(table.codes["action"], [a, r]) & (table.codes["unit"] != table.code_of("unit", "")))
+    if not len(sel):
+        return empty_i, empty_i, empty_t, empty_t, np.array([], dtype=bool)
+    n_units = len(table.cats["unit"])
+    pair = table.codes["key"][sel].astype(np.int64) * n_units + table.codes["unit"][sel]
+    times, is_assign = table.times[sel], table.codes["action"][sel] == a
+    order = np.lexsort((times, pair))
+    pair, times, is_assign = pair[order], times[order], is_assign[order]
+    end, last = _segments(pair, times, until)
+    start = is_assign
+    return (pair[start] // n_units, pair[start] % n_units, times[start],
+            np.maximum(end[start], times[start]), last[start])
+
+
+def unit_assignments(table, until=None, assign=ASSIGN_ACTION, release=RELEASE_ACTION):
+    """Einsatzdauer je Einheit aus Zuweisen/Entfernen-Paaren.
+
+    Gibt {einheit: (anzahl_zuweisungen, summe_sekunden, offen)} zurueck.
+    Noch nicht entfernte Zuweisungen zaehlen bis `until`.
+    """
+    _key, unit, start, end, still_open = assignment_segments(table, until, assign, release)
+    if not len(unit):
+        return {}
+    n_units = len(table.cats["unit"])
+    secs = (end - start).astype(np.int64)
+    counts = np.bincount(unit, minlength=n_units)
+    totals = np.bincount(unit, weights=secs, minlength=n_units)
+    opened = np.bincount(unit[still_open], minlength=n_units)
+    return {
+        str(table.cats["unit"][u]): (int(counts[u]), float(totals[u]), int(opened[u]))
+        for u in np.flatnonzero(counts)
+    }
+
+
+def hourly_rates(table, action=None):
+    """Ereignisse je Stunde als (stunden[datetime64[h]], anzahl) inkl. leerer Stunden."""
+    times = table.times
+    if action is not None:
+        times = times[table.codes["action"] == table.code_of("action", action)]
+    if not len(times):
+        return np.array([], dtype="datetime64[h]"), np.array([], dtype=np.int64)
+    hours = times.astype("datetime64[h]")
+    first = hours.min()
+    idx = (hours - first).astype(np.int64)
+    counts = np.bincount(idx)
+    return first + np.arange(len(counts)), counts
+
+
+def action_counts(table):
+    counts = np.bincount(table.codes["action"], minlength=len(table.cats["action"]))
+    order = np.argsort(-counts, kind="stable")
+    return [(str(table.cats["action"][i]), int(counts[i])) for i in order if counts[i]]
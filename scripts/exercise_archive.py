@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Spaltenorientiertes Archiv abgeschlossener Uebungen/Einsaetze.
+
+Quelle ist ein Datenverzeichnis (server/data) oder ein Sicherungs-ZIP aus
+server/data/archive (Admin -> Wartung). Daraus entstehen Tabellen:
+
+  incidents    -- Karten aus board.json (+ Spalte "column")
+  tasks        -- Karten aus Aufg_board_<Rolle>.json (+ Spalte "role")
+  protocol     -- Zeilen aus protocol.csv
+  lage_log     -- Zeilen aus Lage_log.csv
+  aufg_log     -- Zeilen aus Aufg_log_<Rolle>.csv (+ Spalte "role")
+  gps          -- Eintraege aus vehicles_gps.json
+  llm_actions  -- Eintraege aus llm_action_history.json
+
+Spaltentypen werden aus den Werten bestimmt: int, float, bool, time
+(ISO-Zeitstempel in UTC bzw. 'TT.MM.JJJJ hh:mm:ss' in Ortszeit, wie in den
+CSVs geschrieben -> datetime64[ms]) und string
+(dictionary-codiert, uint32-Codes + Stringtabelle). Listen und Objekte werden
+als JSON-Text abgelegt, Listen zusaetzlich mit "<feld>.len". Jede Spalte ist
+einzeln zlib-komprimiert (Sektionen im Format von address_store.write_sections)
+und traegt Statistiken (Anzahl, Nullwerte, min/max bzw. Anzahl verschiedener
+Werte).
+
+ArchiveSet.scan() liest ueber beliebig viele Archive nur die angefragten
+Spalten; Archive, deren min/max nicht zu einem Bereichsfilter passen, werden
+gar nicht dekomprimiert.
+
+Aufruf:  python3 scripts/exercise_archive.py --add [QUELLE ...] [--name NAME]
+         python3 scripts/exercise_archive.py --report [--year 2026]
+"""
+
+import argparse
+import collections
+import datetime
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import zipfile
+import zlib
+
+import numpy as np
+
+from address_store import StringTable, _Interner, read_sections, write_sections
+from einfo_logs import DATA_DIR, parse_zeitpunkt, read_csv_columns
+
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive", "columnar")
+MAGIC = b"EINFOARC"
+VERSION = 1
+EXTENSION = ".einfoarc"
+LEVEL = 6
+
+ISO_TIME = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+DE_TIME = re.compile(r"^\d{2}\.\d{2}\.\d{4},?\s+\d{2}:\d{2}:\d{2}$")
+OFFSET = re.compile(r"[+-]\d{2}:?\d{2}$")
+INT_TEXT = re.compile(r"^-?[1-9]\d{0,17}$|^0$")
+
+# Dateien einer Uebung, die archiviert werden
+SOURCE_FILES = ("board.json", "protocol.csv", "Lage_log.csv", "vehicles_gps.json",
+                "llm_action_history.json")
+SOURCE_PATTERNS = ("Aufg_board_*.json", "Aufg_log_*.csv")
+# Zeitspalte je Tabelle fuer Jahresfilter
+TIME_COLUMNS = {"incidents": "createdAt", "protocol": "ZEITPUNKT", "lage_log": "Zeitpunkt",
+                "aufg_log": "Zeitpunkt", "tasks": "dueAt"}
+
+
+# ---------------------------------------------------------------------- Quellen
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return default
+
+
+def _role(path, prefix):
+    name = os.path.basename(path)
+    return name[len(prefix):name.rindex(".")]
+
+
+def _csv_rows(path, extra=None):
+    cols = read_csv_columns(path)
+    names = list(cols)
+    out = []
+    for values in zip(*cols.values()):
+        row = dict(zip(names, values))
+        if extra:
+            row.update(extra)
+        out.append(row)
+    return out
+
+
+def collect_tables(data_dir):
+    """Liest die Dateien einer Uebung -> {tabelle: [dict, ...]}."""
+    tables = collections.defaultdict(list)
+
+    board = _read_json(os.path.join(data_dir, "board.json"), {})
+    for key, column in (board.get("columns") or {}).items():
+        for item in column.get("items") or []:
+            tables["incidents"].append(dict(item, column=key))
+
+    for path in sorted(glob.glob(os.path.join(data_dir, "Aufg_board_*.json"))):
+        doc = _read_json(path, {})
+        items = doc.get("items") if isinstance(doc, dict) else doc
+        role = _role(path, "Aufg_board_")
+        tables["tasks"].extend(dict(item, role=role) for item in items or [] if isinstance(item, dict))
+
+    for name, table in (("protocol.csv", "protocol"), ("Lage_log.csv", "lage_log")):
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            tables[table] = _csv_rows(path)
+    for path in sorted(glob.glob(os.path.join(data_dir, "Aufg_log_*.csv"))):
+        tables["aufg_log"].extend(_csv_rows(path, {"role": _role(path, "Aufg_log_")}))
+
+    for name, table in (("vehicles_gps.json", "gps"), ("llm_action_history.json", "llm_actions")):
+        doc = _read_json(os.path.join(data_dir, name), [])
+        tables[table] = [r for r in doc if isinstance(r, dict)] if isinstance(doc, list) else []
+    return tables
+
+
+def _extract_zip(zip_path, target):
+    """Holt die Uebungsdateien aus einem Sicherungs-ZIP (flachste Fundstelle je Name)."""
+    wanted = {}
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not (name in SOURCE_FILES or any(
+                    fnmatch.fnmatch(name, p) for p in SOURCE_PATTERNS)):
+                continue
+            depth = info.filename.count("/")
+            if name not in wanted or depth < wanted[name].filename.count("/"):
+                wanted[name] = info
+        for name, info in wanted.items():
+            with zf.open(info) as src, open(os.path.join(target, name), "wb") as dst:
+                dst.write(src.read())
+    return len(wanted)
+
+
+# ---------------------------------------------------------------------- Spalten
+
+def _flatten(row):
+    out = {}
+    for key, value in row.items():
+        if isinstance(value, list):
+            out[key] = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            out[key + ".len"] = len(value)
+        elif isinstance(value, dict):
+            out[key] = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        else:
+            out[key] = value
+    return out
+
+
+def _is_null(v):
+    return v is None or v == ""
+
+
+def infer_kind(values):
+    """Spaltentyp aus den Nicht-Null-Werten: int, float, bool, time oder string."""
+    present = [v for v in values if not _is_null(v)]
+    if not present:
+        return "string"
+    if all(isinstance(v, bool) for v in present):
+        return "bool"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        ints = all(isinstance(v, int) for v in present)
+        return "int" if ints and len(present) == len(values) else "float"
+    if all(isinstance(v, str) for v in present):
+        if all(ISO_TIME.match(v) or DE_TIME.match(v) for v in present):
+            return "time"
+        if all(INT_TEXT.match(v) for v in present):
+            return "int" if len(present) == len(values) else "float"
+    return "string"
+
+
+def _parse_times(values):
+    out = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ms]")
+    iso = [i for i, v in enumerate(values) if isinstance(v, str) and ISO_TIME.match(v)]
+    de = [i for i, v in enumerate(values) if isinstance(v, str) and DE_TIME.match(v)]
+    for i in iso:
+        v = values[i]
+        if v.endswith("Z") or not OFFSET.search(v):
+            out[i] = np.datetime64(v.rstrip("Z"), "ms")
+        else:
+            utc = datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
+            out[i] = np.datetime64(utc.replace(tzinfo=None), "ms")
+    if de:
+        out[de] = parse_zeitpunkt([values[i] for i in de]).astype("datetime64[ms]")
+    return out
+
+
+def encode_column(values):
+    """-> (typ, {suffix: array}, statistik)."""
+    kind = infer_kind(values)
+    nulls = sum(1 for v in values if _is_null(v))
+    stats = {"count": len(values), "nulls": nulls}
+    if kind == "bool":
+        arr = np.array([-1 if _is_null(v) else int(v) for v in values], dtype=np.int8)
+        stats.update(true=int((arr == 1).sum()))
+        return kind, {"": arr}, stats
+    if kind in ("int", "float"):
+        dtype = np.int64 if kind == "int" else np.float64
+        arr = np.array([np.nan if _is_null(v) else float(v) if kind == "float" else int(v)
+                        for v in values], dtype=dtype)
+        valid = arr if kind == "int" else arr[~np.isnan(arr)]
+        if len(valid):
+            stats.update(min=valid.min().item(), max=valid.max().item())
+        return kind, {"": arr}, stats
+    if kind == "time":
+        arr = _parse_times(values)
+        valid = arr[~np.isnat(arr)]
+        if len(valid):
+            stats.update(min=str(valid.min()), max=str(valid.max()))
+        return kind, {"": arr.astype(np.int64)}, stats
+    interner = _Interner()
+    codes = np.array([interner(v if isinstance(v, str) or v is None else json.dumps(v))
+                      for v in values], dtype=np.uint32)
+    offsets, blob = interner.encode()
+    stats.update(distinct=len(interner.values) - 1)
+    return kind, {"": codes, ".offsets": offsets, ".blob": np.frombuffer(blob, dtype=np.uint8)}, stats
+
+
+# ---------------------------------------------------------------------- Schreiben
+
+def build_archive(tables, out_path, name, source="", digest=None):
+    """Schreibt {tabelle: [dict]} als komprimiertes Spaltenarchiv. -> Metadaten."""
+    sections, schema = {}, {}
+    for table, rows in sorted(tables.items()):
+        if not rows:
+            continue
+        flat = [_flatten(r) for r in rows]
+        columns = list(dict.fromkeys(k for r in flat for k in r))
+        schema[table] = {"rows": len(flat), "columns": {}}
+        for column in columns:
+            kind, arrays, stats = encode_column([r.get(column) for r in flat])
+            parts = {}
+            for suffix, arr in arrays.items():
+                raw = np.ascontiguousarray(arr)
+                section = f"{table}/{column}{suffix}"
+                sections[section] = np.frombuffer(zlib.compress(raw.tobytes(), LEVEL), dtype=np.uint8)
+                parts[suffix or "values"] = {"section": section, "dtype": raw.dtype.str,
+                                             "count": int(raw.size)}
+            schema[table]["columns"][column] = {"type": kind, "parts": parts, "stats": stats}
+
+    meta = {
+        "name": name,
+        "source": source,
+        "digest": digest,
+        "archived": datetime.datetime.now().isoformat(timespec="seconds"),
+        "tables": schema,
+        "period": _period(schema),
+    }
+    write_sections(out_path, sections, meta, magic=MAGIC, version=VERSION)
+    return meta
+
+
+def _period(schema):
+    """Zeitraum der Uebung aus allen Zeitspalten (fuer Filter nach Jahr o.ae.)."""
+    lo, hi = [], []
+    for table in schema.values():
+        for col in table["columns"].values():
+            if col["type"] == "time" and "min" in col["stats"]:
+                lo.append(col["stats"]["min"])
+                hi.append(col["stats"]["max"])
+    return {"min": min(lo), "max": max(hi)} if lo else {}
+
+
+def _unique_name(archive_dir, base):
+    """`base`, bei Kollision mit einem vorhandenen Archiv `base_2`, `base_3`, ..."""
+    name, n = base, 1
+    while os.path.exists(os.path.join(archive_dir, name + EXTENSION)):
+        n += 1
+        name = f"{base}_{n}"
+    return name
+
+
+def source_digest(data_dir):
+    """SHA-1 ueber Namen und Inhalt der Uebungsdateien eines Verzeichnisses."""
+    names = [n for n in SOURCE_FILES if os.path.isfile(os.path.join(data_dir, n))]
+    for pattern in SOURCE_PATTERNS:
+        names += [os.path.basename(p) for p in glob.glob(os.path.join(data_dir, pattern))]
+    h = hashlib.sha1()
+    for name in sorted(set(names)):
+        h.update(name.encode("utf-8") + b"\0")
+        with open(os.path.join(data_dir, name), "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def find_archive(archive_dir, digest):
+    """Vorhandenes Archiv mit gleichem Quell-Hash -> (pfad, metadaten) oder None."""
+    for path in sorted(glob.glob(os.path.join(archive_dir, "*" + EXTENSION))):
+        meta, _ = read_sections(path, MAGIC)
+        if meta.get("digest") == digest:
+            return path, meta
+    return None
+
+
+def archive_exercise(source=DATA_DIR, archive_dir=ARCHIVE_DIR, name=None):
+    """Archiviert ein Datenverzeichnis oder Sicherungs-ZIP. -> (pfad, metadaten).
+
+    Ohne `name` wird der Name aus der Quelle abgeleitet (ZIP-Name bzw.
+    Verzeichnisname + Zeitstempel) und bei Kollision durchnummeriert; ein
+    vorhandenes Archiv mit ausdruecklich angegebenem Namen wird nicht ueberschrieben.
+    Ist dieselbe Uebung (gleicher Inhalts-Hash der Quelldateien) schon archiviert,
+    kommt das vorhandene Archiv zurueck, damit sie in Auswertungen nicht doppelt zaehlt.
+    """
+    if source.endswith(".zip"):
+        with tempfile.TemporaryDirectory() as tmp:
+            _extract_zip(source, tmp)
+            return _archive_dir(tmp, archive_dir, name, source, os.path.basename(source))
+    return _archive_dir(source, archive_dir, name, source, os.path.abspath(source))
+
+
+def _archive_dir(data_dir, archive_dir, name, source, label):
+    digest = source_digest(data_dir)
+    existing = find_archive(archive_dir, digest)
+    if existing:
+        return existing
+    if name is None:
+        base = os.path.basename(os.path.normpath(source))
+        if source.endswith(".zip"):
+            base = os.path.splitext(base)[0]
+        else:
+            base = f"{base}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        name = _unique_name(archive_dir, base)
+    out_path = os.path.join(archive_dir, name + EXTENSION)
+    if os.path.exists(out_path):
+        raise FileExistsError(f"Archiv existiert bereits: {out_path}")
+    return out_path, build_archive(collect_tables(data_dir), out_path, name, label, digest)
+
+
+# ---------------------------------------------------------------------- Lesen
+
+class ExerciseArchive:
+    """Ein Archiv; Spalten werden erst beim Zugriff dekomprimiert (und gecacht)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta, self.sections = read_sections(path, MAGIC)
+        self.name = self.meta["name"]
+        self._cache = {}
+
+    def tables(self):
+        return list(self.meta["tables"])
+
+    def rows(self, table):
+        return self.meta["tables"].get(table, {}).get("rows", 0)
+
+    def columns(self, table):
+        return list(self.meta["tables"].get(table, {}).get("columns", {}))
+
+    def info(self, table, column):
+        return self.meta["tables"].get(table, {}).get("columns", {}).get(column)
+
+    def _part(self, part):
+        raw = zlib.decompress(self.sections[part["section"]].tobytes())
+        return np.frombuffer(raw, dtype=np.dtype(part["dtype"]), count=part["count"])
+
+    def column(self, table, column):
+        """Spalte als NumPy-Array; Strings als object-Array, Zeiten als datetime64[ms].
+
+        Fehlt die Spalte in diesem Archiv, kommen Nullwerte in Tabellenlaenge.
+        """
+        key = (table, column)
+        if key in self._cache:
+            return self._cache[key]
+        info = self.info(table, column)
+        n = self.rows(table)
+        if info is None:
+            arr = np.full(n, None, dtype=object)
+        elif info["type"] == "string":
+            codes = self._part(info["parts"]["values"])
+            strings = StringTable(self._part(info["parts"][".offsets"]), self._part(info["parts"][".blob"]))
+            arr = strings.values()[codes]
+        elif info["type"] == "time":
+            arr = self._part(info["parts"]["values"]).view("datetime64[ms]")
+        else:
+            arr = self._part(info["parts"]["values"])
+        self._cache[key] = arr
+        return arr
+
+    def may_match(self, table, where):
+        """False, wenn die Spaltenstatistik einen Treffer ausschliesst."""
+        for column, cond in (where or {}).items():
+            info = self.info(table, column)
+            if info is None:
+                return False
+            stats = info["stats"]
+            if isinstance(cond, tuple) and "min" in stats:
+                lo, hi = cond
+                smin, smax = stats["min"], stats["max"]
+                if info["type"] == "time":
+                    smin, smax = np.datetime64(smin), np.datetime64(smax)
+                    lo = None if lo is None else np.datetime64(lo)
+                    hi = None if hi is None else np.datetime64(hi)
+                if (lo is not None and smax < lo) or (hi is not None and smin >= hi):
+                    return False
+            elif isinstance(cond, tuple) and stats["count"] == stats["nulls"]:
+                return False
+        return True
+
+    def mask(self, table, where):
+        mask = np.ones(self.rows(table), dtype=bool)
+        for column, cond in (where or {}).items():
+            values = self.column(table, column)
+            if isinstance(cond, tuple):
+                lo, hi = cond
+                if values.dtype.kind == "M":
+                    lo = None if lo is None else np.datetime64(lo, "ms")
+                    hi = None if hi is None else np.datetime64(hi, "ms")
+                    mask &= ~np.isnat(values)
+                if lo is not None:
+                    mask &= values >= lo
+                if hi is not None:
+                    mask &= values < hi
+            elif isinstance(cond, (list, set, frozenset)):
+                mask &= np.isin(values, list(cond))
+            else:
+                mask &= values == cond
+        return mask
+
+
+class ArchiveSet:
+    """Abfragen ueber alle Archive eines Verzeichnisses."""
+
+    def __init__(self, archive_dir=ARCHIVE_DIR, paths=None):
+        if paths is None:
+            paths = sorted(glob.glob(os.path.join(archive_dir, "*" + EXTENSION)))
+        self.archives = [ExerciseArchive(p) for p in paths]
+
+    def __len__(self):
+        return len(self.archives)
+
+    def scan(self, table, columns, where=None):
+        """Liest `columns` der Tabelle aus allen Archiven -> {spalte: array, "exercise": array}.
+
+        where: {spalte: wert | [werte] | (von, bis)}; (von, bis) ist halboffen, None = offen.
+        Nur die genannten Spalten und die Filterspalten werden dekomprimiert.
+        """
+        parts = {c: [] for c in columns}
+        exercise = []
+        for arc in self.archives:
+            if not arc.rows(table) or not arc.may_match(table, where):
+                continue
+            mask = arc.mask(table, where)
+            if not mask.any():
+                continue
+            for c in columns:
+                parts[c].append(arc.column(table, c)[mask])
+            exercise.append(np.full(int(mask.sum()), arc.name, dtype=object))
+        out = {c: _concat(v) for c, v in parts.items()}
+        out["exercise"] = _concat(exercise)
+        return out
+
+    def count_by(self, table, column, where=None):
+        """Haeufigkeit je Wert -> [(wert, anzahl)] absteigend."""
+        values = self.scan(table, [column], where)[column]
+        if not len(values):
+            return []
+        cats, counts = np.unique(values.astype(str), return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        return [(str(cats[i]), int(counts[i])) for i in order]
+
+
+def _concat(arrays):
+    if not arrays:
+        return np.zeros(0, dtype=object)
+    kinds = {a.dtype.kind for a in arrays}
+    if len(kinds) > 1:
+        arrays = [a.astype(object) for a in arrays]
+    return np.concatenate(arrays)
+
+
+def year_range(year):
+    return (f"{year}-01-01", f"{year + 1}-01-01")
+
+
+def year_where(table, year):
+    """Filter auf das Jahr ueber die Zeitspalte der Tabelle (TIME_COLUMNS); None = alle."""
+    if year is None:
+        return None
+    return {TIME_COLUMNS[table]: year_range(year)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Uebungen spaltenorientiert archivieren und auswerten")
+    parser.add_argument("--add", nargs="*", default=None,
+                        help="Datenverzeichnis(se) oder Sicherungs-ZIPs archivieren (leer: server/data)")
+    parser.add_argument("--name", default=None, help="Archivname (nur bei einer Quelle)")
+    parser.add_argument("--dir", default=ARCHIVE_DIR)
+    parser.add_argument("--report", action="store_true", help="Jahresauswertung ueber alle Archive")
+    parser.add_argument("--year", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.add is not None:
+        print("Archiviere Uebungen ...")
+        for source in args.add or [DATA_DIR]:
+            started = time.perf_counter()
+            known = set(glob.glob(os.path.join(args.dir, "*" + EXTENSION)))
+            path, meta = archive_exercise(source, args.dir, args.name if len(args.add or [0]) == 1 else None)
+            if path in known:
+                print(f"  ✓ {source} bereits archiviert: {path}")
+                continue
+            rows = ", ".join(f"{t} {s['rows']}" for t, s in meta["tables"].items())
+            print(f"  ✓ {path} ({os.path.getsize(path)} Bytes, {time.perf_counter() - started:.2f} s): {rows}")
+
+    if args.report:
+        started = time.perf_counter()
+        archives = ArchiveSet(args.dir)
+        print(f"Auswertung ueber {len(archives)} Archive" + (f" ({args.year})" if args.year else "") + ":")
+        data = archives.scan("incidents", ["typ", "everPersonnel", "everVehicles.len"],
+                             year_where("incidents", args.year))
+        print(f"  ✓ {len(data['typ'])} Einsaetze in {len(set(data['exercise']))} Uebungen")
+        if len(data["typ"]):
+            types = np.unique(data["typ"].astype(str), return_counts=True)
+            for typ, count in sorted(zip(*types), key=lambda tc: -tc[1])[:15]:
+                print(f"    {count:6d}  {typ or '(ohne Typ)'}")
+            print(f"  ✓ Fahrzeuge je Einsatz: {np.nanmean(data['everVehicles.len'].astype(float)):.2f}")
+        for table, column in (("protocol", "KANAL"), ("lage_log", "Aktion")):
+            top = archives.count_by(table, column, year_where(table, args.year))[:5]
+            print(f"  ✓ {table}.{column}: " + ", ".join(f"{v or '-'} {n}" for v, n in top))
+        print(f"  ✓ {time.perf_counter() - started:.2f} s")
+    print("Fertig.")
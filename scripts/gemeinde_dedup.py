@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Dedupliziert und verschlankt den Adresskorpus
+(chatbot/knowledge/Adressen/gemeinden/gemeinde_*.jsonl).
+
+Ablauf (zeilenweise, ohne den Korpus komplett zu laden):
+  1. Ortsnamen je PLZ sammeln und Schreibvarianten auf einen kanonischen Ort
+     abbilden ("Eberndorf, Österreich" -> "Eberndorf", "Basd Kleinkirchheim"
+     -> "Bad Kleinkirchheim", "Frantschach" -> "Frantschach-St. Gertraud").
+  2. Datensaetze ueber osm_type/osm_id und ueber die normalisierte Adresse
+     (Strasse, Hausnummer, PLZ, Name) hashen; Duplikate werden zusammengefuehrt
+     (fehlende Felder ergaenzt, doc_types vereinigt).
+  3. Schlanke JSONL je kanonischem Ort schreiben: ohne `content` (wird beim
+     Ingest aus den Feldern erzeugt) und ohne Tags, die Top-Level-Felder
+     wiederholen. Dazu gemeinden_index.jsonl und dedup_report.json.
+
+Aufruf:  python3 scripts/gemeinde_dedup.py [--src DIR] [--out DIR] [--keep-content]
+"""
+
+import argparse
+import collections
+import difflib
+import hashlib
+import json
+import os
+import re
+import time
+
+from address_store import GEMEINDE_DIR, gemeinde_files
+
+OUT_DIR = os.path.join(os.path.dirname(GEMEINDE_DIR), "gemeinden_dedup")
+REPORT_NAME = "dedup_report.json"
+
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+COUNTRY_SUFFIX = re.compile(r"[,\s]*(oesterreich|austria)$")
+# Zusaetze, die aus einem Ortsteil den Gemeindenamen machen ("Afritz" -> "Afritz am See")
+QUALIFIERS = ("am", "an", "in", "im", "ob", "bei", "st")
+# Tags, die bereits als Top-Level-Feld im Datensatz stehen
+REDUNDANT_TAGS = ("addr:street", "addr:housenumber", "addr:postcode", "addr:city", "addr:country", "name")
+MERGE_FIELDS = ("name", "category", "address", "street", "housenumber", "postcode", "place", "lat", "lon")
+
+
+def place_key(place):
+    """Vergleichsschluessel fuer Ortsnamen: klein, ohne Umlaute/Satzzeichen/Laenderzusatz."""
+    key = (place or "").strip().lower().translate(UMLAUTS)
+    key = re.sub(r"\bsankt\b", "st", key)
+    key = re.sub(r"[^a-z0-9]+", " ", key).strip()
+    return COUNTRY_SUFFIX.sub("", key).strip()
+
+
+def slug(place):
+    """Dateiname wie im Quellkorpus: gemeinde_<ort>.jsonl."""
+    value = (place or "Unbekannt").strip().lower().translate(UMLAUTS)
+    return re.sub(r"[^a-z0-9 \-]", "", value).strip().replace(" ", "_")
+
+
+def _is_variant(variant, canonical):
+    """True, wenn `variant` eine Schreibvariante oder ein Kurzname von `canonical` ist."""
+    a, b = place_key(variant), place_key(canonical)
+    if not a or not b:
+        return False
+    if a.replace(" ", "") == b.replace(" ", ""):
+        return True
+    if b.startswith(a + " ") and b[len(a) + 1:].split()[0] in QUALIFIERS:
+        return True
+    if a[0] != b[0]:
+        return False
+    return difflib.SequenceMatcher(None, a.replace(" ", ""), b.replace(" ", "")).ratio() >= 0.93
+
+
+def canonical_places(paths):
+    """Pass 1: {(plz, ort): kanonischer_ort} aus den Ortshaeufigkeiten je PLZ."""
+    counts = collections.defaultdict(collections.Counter)
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                counts[rec.get("postcode") or ""][rec.get("place") or ""] += 1
+
+    mapping = {}
+    for postcode, places in counts.items():
+        chosen = []
+        # haeufigster Name zuerst, bei Gleichstand ohne Laenderzusatz und der laengere Name
+        ranked = sorted(places.items(), key=lambda kv: (
+            -kv[1], bool(COUNTRY_SUFFIX.search(kv[0].lower().translate(UMLAUTS))), -len(kv[0]), kv[0]))
+        for place, _ in ranked:
+            target = next((c for c in chosen if _is_variant(place, c)), None)
+            if target is None:
+                chosen.append(place)
+                target = place
+            mapping[(postcode, place)] = target
+    return mapping
+
+
+def record_keys(rec):
+    """Hash-Schluessel eines Datensatzes: OSM-Objekt und normalisierte Adresse (falls vorhanden)."""
+    keys = []
+    if rec.get("osm_id") is not None:
+        keys.append(f"osm:{rec.get('osm_type')}:{rec['osm_id']}")
+    street = place_key(rec.get("street"))
+    if street and rec.get("housenumber"):
+        parts = (street, place_key(rec.get("housenumber")), rec.get("postcode") or "", place_key(rec.get("name")))
+        keys.append("adr:" + "|".join(parts))
+    return [hashlib.blake2b(k.encode("utf-8"), digest_size=8).digest() for k in keys]
+
+
+def slim(rec, keep_content=False):
+    out = {k: v for k, v in rec.items() if v is not None and v != ""}
+    if not keep_content:
+        out.pop("content", None)
+    tags = {k: v for k, v in (rec.get("tags") or {}).items() if k not in REDUNDANT_TAGS}
+    if tags:
+        out["tags"] = tags
+    else:
+        out.pop("tags", None)
+    return out
+
+
+def merge(kept, dup):
+    """Ergaenzt fehlende Felder und vereinigt doc_types; liefert die Liste ergaenzter Felder."""
+    filled = [f for f in MERGE_FIELDS if kept.get(f) in (None, "") and dup.get(f) not in (None, "")]
+    for f in filled:
+        kept[f] = dup[f]
+    for k, v in (dup.get("tags") or {}).items():
+        kept.setdefault("tags", {}).setdefault(k, v)
+    types = set(kept.get("doc_types") or [kept.get("doc_type")]) | set(dup.get("doc_types") or [dup.get("doc_type")])
+    types.discard(None)
+    if len(types) > 1:
+        kept["doc_types"] = sorted(types)
+        # Objekte mit Namen sind primaer POIs, auch wenn sie eine Adresse tragen
+        if "pois" in types and kept.get("name"):
+            kept["doc_type"] = "pois"
+    return filled
+
+
+class _Writers:
+    """Haelt je Ausgabedatei einen offenen Handle und zaehlt Datensaetze und BBOX mit."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.handles = {}
+        self.stats = {}
+
+    def write(self, place, rec):
+        name = f"gemeinde_{slug(place)}.jsonl"
+        fh = self.handles.get(name)
+        if fh is None:
+            fh = self.handles[name] = open(os.path.join(self.out_dir, name), "w", encoding="utf-8")
+            self.stats[name] = {"gemeinde": place or "Unbekannt", "records": 0, "bbox": None}
+        fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        st = self.stats[name]
+        st["records"] += 1
+        lat, lon = rec.get("lat"), rec.get("lon")
+        if lat is not None and lon is not None:
+            bb = st["bbox"]
+            if bb is None:
+                st["bbox"] = {"min_lat": lat, "min_lon": lon, "max_lat": lat, "max_lon": lon}
+            else:
+                bb["min_lat"], bb["max_lat"] = min(bb["min_lat"], lat), max(bb["max_lat"], lat)
+                bb["min_lon"], bb["max_lon"] = min(bb["min_lon"], lon), max(bb["max_lon"], lon)
+        return name
+
+    def close(self):
+        for fh in self.handles.values():
+            fh.close()
+
+
+def _file_records(path):
+    """Zeilen einer Quelldatei; Duplikate desselben OSM-Objekts stehen stets in derselben Datei."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                rec = json.loads(line)
+                if rec.get("doc_type") != "gemeinde_index":
+                    yield rec
+
+
+def dedup_corpus(src_dir=GEMEINDE_DIR, out_dir=OUT_DIR, keep_content=False):
+    """Schreibt den deduplizierten Korpus nach `out_dir` und liefert den Bericht (dict)."""
+    started = time.perf_counter()
+    paths = gemeinde_files(src_dir)
+    places = canonical_places(paths)
+    os.makedirs(out_dir, exist_ok=True)
+    writers = _Writers(out_dir)
+
+    seen = {}            # Hash -> (Datei, Ort, Adresse) des behaltenen Datensatzes
+    report = {
+        "input_files": len(paths), "input_records": 0, "output_records": 0,
+        "input_bytes": sum(os.path.getsize(p) for p in paths),
+        "duplicates_osm": 0, "duplicates_address": 0,
+        "renamed_places": {}, "merged_files": collections.defaultdict(list), "collapsed": [],
+    }
+    try:
+        for path in paths:
+            # Innerhalb einer Datei werden Duplikate zusammengefuehrt, bevor geschrieben wird;
+            # dateiuebergreifend genuegt der Hash-Satz, Speicherbedarf ~ groesste Einzeldatei.
+            pending, local = [], {}
+            for rec in _file_records(path):
+                report["input_records"] += 1
+                keys = record_keys(rec)
+                hit = next((k for k in keys if k in local), None)
+                if hit is not None:
+                    kept = pending[local[hit]]
+                    filled = merge(kept, rec)
+                    kind = "osm" if hit == keys[0] and rec.get("osm_id") is not None else "address"
+                    report["duplicates_" + kind] += 1
+                    report["collapsed"].append({
+                        "kind": kind, "file": os.path.basename(path),
+                        "kept": kept.get("osm_id"), "dropped": rec.get("osm_id"),
+                        "label": rec.get("address") or rec.get("name"), "filled": filled,
+                    })
+                    for k in keys:
+                        local.setdefault(k, local[hit])
+                    continue
+                prior = next((seen[k] for k in keys if k in seen), None)
+                if prior is not None:
+                    kind = "osm" if keys[0] in seen and rec.get("osm_id") is not None else "address"
+                    report["duplicates_" + kind] += 1
+                    report["collapsed"].append({
+                        "kind": kind, "file": os.path.basename(path), "kept_in": prior,
+                        "dropped": rec.get("osm_id"), "label": rec.get("address") or rec.get("name"),
+                    })
+                    continue
+                for k in keys:
+                    local[k] = len(pending)
+                pending.append(rec)
+
+            for rec in pending:
+                raw = rec.get("place") or ""
+                canonical = places.get((rec.get("postcode") or "", raw), raw)
+                if canonical != raw:
+                    rec["place"] = canonical
+                    if raw and (rec.get("address") or "").endswith(raw):
+                        rec["address"] = rec["address"][:-len(raw)] + canonical
+                    report["renamed_places"][raw] = canonical
+                out_name = writers.write(canonical, slim(rec, keep_content))
+                src_name = os.path.basename(path)
+                if out_name != src_name and src_name not in report["merged_files"][out_name]:
+                    report["merged_files"][out_name].append(src_name)
+                for k in record_keys(rec):
+                    seen[k] = out_name
+                report["output_records"] += 1
+    finally:
+        writers.close()
+
+    with open(os.path.join(out_dir, "gemeinden_index.jsonl"), "w", encoding="utf-8") as fh:
+        for st in sorted(writers.stats.values(), key=lambda s: -s["records"]):
+            content = (f"Gemeinde/Ort: {st['gemeinde']}\n"
+                       f"Anzahl Datensätze (POI+Adresse+Gebäude): {st['records']}\n"
+                       f"BBOX: {st['bbox']}")
+            fh.write(json.dumps({
+                "source": "OSM", "region": "Kärnten", "doc_type": "gemeinde_index",
+                "gemeinde": st["gemeinde"], "records": st["records"], "bbox": st["bbox"], "content": content,
+            }, ensure_ascii=False) + "\n")
+
+    report["output_files"] = len(writers.stats)
+    report["output_bytes"] = sum(
+        os.path.getsize(os.path.join(out_dir, name)) for name in writers.stats
+    )
+    report["merged_files"] = {k: v for k, v in sorted(report["merged_files"].items())}
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    with open(os.path.join(out_dir, REPORT_NAME), "w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adresskorpus deduplizieren und verschlanken")
+    parser.add_argument("--src", default=GEMEINDE_DIR)
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--keep-content", action="store_true", help="content-Feld nicht entfernen")
+    args = parser.parse_args()
+    if os.path.abspath(args.src) == os.path.abspath(args.out):
+        parser.error("--out muss sich von --src unterscheiden")
+    print("Dedupliziere Adresskorpus ...")
+    r = dedup_corpus(args.src, args.out, args.keep_content)
+    print(f"  ✓ {r['input_records']} -> {r['output_records']} Datensätze "
+          f"({r['duplicates_osm']} OSM-Duplikate, {r['duplicates_address']} Adress-Duplikate)")
+    print(f"  ✓ {r['input_files']} -> {r['output_files']} Dateien, "
+          f"{r['input_bytes'] / 1e6:.1f} -> {r['output_bytes'] / 1e6:.1f} MB ({r['seconds']:.2f} s)")
+    for out_name, sources in r["merged_files"].items():
+        print(f"    {out_name} <- {', '.join(sources)}")
+    print(f"  ✓ Bericht: {os.path.join(args.out, REPORT_NAME)}")
+    print("Fertig.")
@@ -7,6 +7,8 @@ Ausgabe: client/public/Hilfe.pdf, Hilfe_Aufgabenboard.pdf, Hilfe_Meldestelle.pdf
 import os
 from fpdf import FPDF
 
+import api_catalog
+
 OUT_DIR = os.path.join(os.path.dirname(__file__), "..", "client", "public")
 
 # DejaVu Sans supports full Unicode including German umlauts
@@ -120,6 +122,57 @@ class HilfePDF(FPDF):
             fill = not fill
         self.ln(4)
 
+    def data_table(self, headers, rows, col_w):
+        """Allgemeine Tabelle im Stil von role_table; rows = [(zelle, ...), ...]"""
+        self.set_font("DejaVu", "B", 9)
+        self.set_fill_color(30, 60, 120)
+        self.set_text_color(255, 255, 255)
+        for head, w in zip(headers, col_w):
+            self.cell(w, 7, head, border=1, fill=True)
+        self.ln()
+        self.set_text_color(30, 30, 30)
+        self.set_font("DejaVu", "", 9)
+        fill = False
+        for row in rows:
+            if fill:
+                self.set_fill_color(240, 240, 250)
+            else:
+                self.set_fill_color(255, 255, 255)
+            for value, w in zip(row, col_w):
+                self.cell(w, 6, str(value), border=1, fill=True)
+            self.ln()
+            fill = not fill
+        self.ln(4)
+
+    def bar_chart(self, labels, values, height=50, value_fmt="{:g}"):
+        """Einfaches Balkendiagramm ueber die volle Seitenbreite."""
+        if not len(values):
+            return
+        if self.get_y() + height + 20 > self.h - self.b_margin:
+            self.add_page()
+        x0 = self.l_margin
+        y0 = self.get_y()
+        width = self.w - self.l_margin - self.r_margin
+        vmax = max(max(values), 1e-9)
+        slot = width / len(values)
+        bar_w = max(slot * 0.7, 0.3)
+        self.set_draw_color(200, 200, 200)
+        self.line(x0, y0 + height, x0 + width, y0 + height)
+        self.set_fill_color(30, 60, 120)
+        self.set_font("DejaVu", "", 6)
+        self.set_text_color(80, 80, 80)
+        show_every = max(1, len(values) // 24)
+        for i, (label, value) in enumerate(zip(labels, values)):
+            h = height * float(value) / vmax
+            x = x0 + i * slot + (slot - bar_w) / 2
+            if h > 0:
+                self.rect(x, y0 + height - h, bar_w, h, style="F")
+            if i % show_every == 0:
+                if len(values) <= 24:
+                    self.text(x, y0 + height - h - 1, value_fmt.format(value))
+                self.text(x, y0 + height + 4, str(label))
+        self.set_y(y0 + height + 8)
+
 
 # ======================================================================
 #  EINSATZBOARD
@@ -1780,267 +1833,20 @@ def generate_admin_help():
         "Antworten erfolgen im JSON-Format."
     )
 
-    # -- 17.1 Board & Fahrzeuge --
-    pdf.section_title("17.1 Einsatzboard & Fahrzeuge")
-    pdf.bullet("GET  /api/board \u2013 Gibt das komplette Einsatzboard mit allen Spalten zurueck.")
-    pdf.bullet("GET  /api/vehicles \u2013 Listet alle Fahrzeuge (Basis + Zusatz) auf.")
-    pdf.bullet("POST /api/vehicles \u2013 Legt ein neues Fahrzeug an oder klont ein bestehendes.")
-    pdf.bullet("PATCH /api/vehicles/:id/availability \u2013 Aendert die Verfuegbarkeit eines Fahrzeugs.")
-    pdf.bullet("PATCH /api/vehicles/:id/position \u2013 Aktualisiert die GPS-Position eines Fahrzeugs.")
-    pdf.bullet("DELETE /api/vehicles/:id/position \u2013 Loescht eine manuelle Positions-Ueberschreibung.")
-    pdf.bullet("GET  /api/groups/availability \u2013 Gibt den Verfuegbarkeitsstatus aller Gruppen zurueck.")
-    pdf.bullet("GET  /api/groups/alerted \u2013 Listet alarmierte Gruppen auf.")
-    pdf.bullet("PATCH /api/groups/:name/availability \u2013 Aendert die Verfuegbarkeit einer Gruppe.")
-    pdf.bullet("GET  /api/gps \u2013 Gibt GPS-Daten zurueck.")
-    pdf.bullet("GET  /api/types \u2013 Gibt verfuegbare Einsatztypen zurueck.")
-    pdf.bullet("GET  /api/nearby \u2013 Sucht naechstgelegene Einheiten/Ressourcen.")
-
-    # -- 17.2 Einsatzkarten --
-    pdf.section_title("17.2 Einsatzkarten (Cards)")
-    pdf.bullet("POST /api/cards \u2013 Legt eine neue Einsatzkarte an.")
-    pdf.bullet("POST /api/cards/:id/move \u2013 Verschiebt eine Karte in eine andere Spalte.")
-    pdf.bullet("POST /api/cards/:id/assign \u2013 Weist ein Fahrzeug einer Karte zu.")
-    pdf.bullet("POST /api/cards/:id/unassign \u2013 Entfernt ein Fahrzeug von einer Karte.")
-    pdf.bullet("PATCH /api/cards/:id/personnel \u2013 Aktualisiert die Personalstaerke einer Karte.")
-    pdf.bullet(
-        "PATCH /api/cards/:id \u2013 Aktualisiert Karten-Eigenschaften "
-        "(Titel, Ort, Typ, Koordinaten, Abschnitt usw.)."
-    )
-
-    # -- 17.3 Protokoll --
-    pdf.add_page()
-    pdf.section_title("17.3 Protokoll (Meldestelle)")
-    pdf.bullet("GET  /api/protocol \u2013 Listet alle Protokolleintraege auf.")
-    pdf.bullet("POST /api/protocol \u2013 Erstellt einen neuen Protokolleintrag.")
-    pdf.bullet("GET  /api/protocol/:nr \u2013 Gibt einen bestimmten Eintrag zurueck.")
-    pdf.bullet("PUT  /api/protocol/:nr \u2013 Aktualisiert einen Protokolleintrag.")
-    pdf.bullet("POST /api/protocol/:nr/lock \u2013 Sperrt einen Eintrag zur Bearbeitung.")
-    pdf.bullet("DELETE /api/protocol/:nr/lock \u2013 Gibt die Sperre eines Eintrags frei.")
-    pdf.bullet("GET  /api/protocol/csv/file \u2013 Exportiert das Protokoll als CSV-Datei.")
-    pdf.bullet(
-        "GET  /api/protocol/auto-print-config \u2013 Gibt die Auto-Druck-Konfiguration "
-        "zurueck (nur Admin)."
-    )
-    pdf.bullet(
-        "POST /api/protocol/auto-print-config \u2013 Aktualisiert die "
-        "Auto-Druck-Konfiguration (nur Admin)."
-    )
-
-    # -- 17.4 Aufgaben --
-    pdf.section_title("17.4 Aufgaben")
-    pdf.bullet("GET  /api/aufgaben \u2013 Listet alle Aufgaben fuer die aktuelle Rolle auf.")
-    pdf.bullet("POST /api/aufgaben \u2013 Erstellt eine neue Aufgabe.")
-    pdf.bullet("POST /api/aufgaben/:id/edit \u2013 Bearbeitet eine bestehende Aufgabe.")
-    pdf.bullet("POST /api/aufgaben/:id/status \u2013 Aendert den Status einer Aufgabe.")
-    pdf.bullet("POST /api/aufgaben/reorder \u2013 Sortiert Aufgaben um.")
-    pdf.bullet("GET  /api/aufgaben/config \u2013 Gibt die Aufgabenkonfiguration zurueck.")
-    pdf.bullet("GET  /api/aufgaben/protocols \u2013 Gibt Protokolle fuer die aktuelle Rolle zurueck.")
-
-    # -- 17.5 Mail --
-    pdf.section_title("17.5 Mail")
-    pdf.bullet("GET  /api/mail/status \u2013 Gibt den Mail-Konfigurationsstatus zurueck.")
-    pdf.bullet("POST /api/mail/send \u2013 Versendet eine E-Mail.")
-    pdf.bullet("GET  /api/mail/inbox/status \u2013 Prueft den Inbox-Status.")
-    pdf.bullet("GET  /api/mail/inbox \u2013 Listet Inbox-Nachrichten auf (mit optionalem limit-Parameter).")
-    pdf.bullet("GET  /api/mail/schedule \u2013 Listet alle Mail-Zeitplaene auf (nur Admin).")
-    pdf.bullet("POST /api/mail/schedule \u2013 Erstellt einen neuen Mail-Zeitplan (nur Admin).")
-    pdf.bullet("PUT  /api/mail/schedule/:id \u2013 Aktualisiert einen Mail-Zeitplan (nur Admin).")
-    pdf.bullet("DELETE /api/mail/schedule/:id \u2013 Loescht einen Mail-Zeitplan (nur Admin).")
-
-    # -- 17.6 HTTP-Zeitplaene --
-    pdf.add_page()
-    pdf.section_title("17.6 HTTP-API-Zeitplaene")
-    pdf.bullet("GET  /api/http/schedule \u2013 Listet alle HTTP-Zeitplaene auf (nur Admin).")
-    pdf.bullet("POST /api/http/schedule \u2013 Erstellt einen neuen HTTP-Zeitplan (nur Admin).")
-    pdf.bullet("PUT  /api/http/schedule/:id \u2013 Aktualisiert einen HTTP-Zeitplan (nur Admin).")
-    pdf.bullet("DELETE /api/http/schedule/:id \u2013 Loescht einen HTTP-Zeitplan (nur Admin).")
-
-    # -- 17.7 Import / Export --
-    pdf.section_title("17.7 Import & Export")
-    pdf.bullet("GET  /api/import/auto-config \u2013 Gibt die Auto-Import-Konfiguration zurueck.")
-    pdf.bullet("POST /api/import/auto-config \u2013 Aktualisiert die Auto-Import-Konfiguration.")
-    pdf.bullet("POST /api/import/trigger \u2013 Loest einen sofortigen Import aus.")
-    pdf.bullet("GET  /api/export/pdf \u2013 Exportiert das Board als PDF.")
-    pdf.bullet("GET  /api/log.csv \u2013 Laedt das Aktivitaetsprotokoll als CSV herunter.")
-
-    # -- 17.8 Fetcher-Steuerung --
-    pdf.section_title("17.8 Feuerwehr-Fetcher")
-    pdf.bullet("GET  /api/ff/status \u2013 Gibt den Fetcher-Status zurueck.")
-    pdf.bullet("GET  /api/ff/status/details \u2013 Gibt detaillierten Fetcher-Status zurueck.")
-    pdf.bullet("GET  /api/ff/creds \u2013 Prueft, ob Fetcher-Zugangsdaten vorhanden sind.")
-    pdf.bullet("POST /api/ff/creds \u2013 Speichert Fetcher-Zugangsdaten.")
-    pdf.bullet("POST /api/ff/start \u2013 Startet den Fetcher-Dienst.")
-    pdf.bullet("POST /api/ff/stop \u2013 Stoppt den Fetcher-Dienst.")
-
-    # -- 17.9 Drucken --
-    pdf.section_title("17.9 Drucken")
-    pdf.bullet("POST /api/print/server \u2013 Druckt ein PDF ueber den Systemdrucker.")
-    pdf.bullet("GET  /api/print/server/info \u2013 Gibt Drucker-Informationen zurueck.")
-    pdf.bullet("POST /api/print/:nr/print \u2013 Druckt einen Protokolleintrag.")
-    pdf.bullet("POST /api/print/blank/print \u2013 Druckt ein leeres Protokollformular.")
-    pdf.bullet("GET  /api/print/:nr/print/file/:file \u2013 Gibt eine gedruckte Protokolldatei zurueck.")
-    pdf.bullet("GET  /api/print/blank/print/file/:file \u2013 Gibt eine leere Protokolldatei zurueck.")
-    pdf.bullet(
-        "POST /api/incident-print/:incidentId/print \u2013 Speichert einen "
-        "Einsatz als PDF."
-    )
-    pdf.bullet(
-        "POST /api/incident-print/:incidentId/mail \u2013 Versendet einen "
-        "Einsatz per E-Mail."
-    )
-
-    # -- 17.10 KI-Analyse / Situation --
-    pdf.add_page()
-    pdf.section_title("17.10 KI-Analyse & Situationsanalyse")
-    pdf.bullet("GET  /api/situation/status \u2013 Gibt den Analyse-Status zurueck.")
-    pdf.bullet(
-        "POST /api/situation/analysis-loop/sync \u2013 Synchronisiert den "
-        "Analyse-Zyklus."
-    )
-    pdf.bullet("GET  /api/situation/analysis \u2013 Gibt das Analyse-Ergebnis zurueck.")
-    pdf.bullet("POST /api/situation/question \u2013 Stellt eine Situations-Frage.")
-    pdf.bullet(
-        "POST /api/situation/suggestion/feedback \u2013 Gibt Feedback "
-        "zu einem Vorschlag."
-    )
-    pdf.bullet(
-        "POST /api/situation/question/feedback \u2013 Gibt Feedback zu "
-        "einer Antwort."
-    )
-    pdf.bullet("GET  /api/situation/analysis-config \u2013 Gibt die Analyse-Konfiguration zurueck.")
-    pdf.bullet("POST /api/situation/analysis-config \u2013 Aktualisiert die Analyse-Konfiguration.")
-
-    # -- 17.11 Admin-Filterregeln --
-    pdf.section_title("17.11 Admin-Filterregeln")
-    pdf.bullet("GET  /api/admin/filtering-rules/status \u2013 Gibt den Filterstatus zurueck.")
-    pdf.bullet("GET  /api/admin/filtering-rules \u2013 Listet alle Filterregeln auf.")
-    pdf.bullet("PUT  /api/admin/filtering-rules \u2013 Aktualisiert die Filterregeln.")
-    pdf.bullet("GET  /api/admin/filtering-rules/learned \u2013 Gibt gelernte Filtergewichte zurueck.")
-    pdf.bullet("POST /api/admin/filtering-rules/reset-learned \u2013 Setzt gelernte Gewichte zurueck.")
-    pdf.bullet("GET  /api/admin/filtering-rules/ai-analysis-config \u2013 Gibt die KI-Analyse-Konfiguration zurueck.")
-    pdf.bullet("PUT  /api/admin/filtering-rules/ai-analysis-config \u2013 Aktualisiert die KI-Analyse-Konfiguration.")
-    pdf.bullet("GET  /api/admin/filtering-rules/scenario \u2013 Gibt die Szenario-Konfiguration zurueck.")
-    pdf.bullet("PUT  /api/admin/filtering-rules/scenario \u2013 Aktualisiert die Szenario-Konfiguration.")
-
-    # -- 17.12 Benutzer & Rollen --
-    pdf.section_title("17.12 Benutzer & Rollen")
-    pdf.bullet("GET  /api/user/roles \u2013 Gibt alle Rollen zurueck.")
-    pdf.bullet("PUT  /api/user/roles \u2013 Aktualisiert die Rollen (nur Admin).")
-    pdf.bullet("GET  /api/user/online-roles \u2013 Gibt online-aktive Rollen zurueck.")
-
-    # -- 17.13 Admin-Verwaltung --
-    pdf.add_page()
-    pdf.section_title("17.13 Admin-Verwaltung")
-    pdf.bullet("POST /api/user/admin/initialsetup \u2013 Erststart: Initialisiert das System mit Standarddaten.")
-    pdf.bullet("POST /api/user/admin/archive \u2013 Erstellt ein ZIP-Archiv aller Daten.")
-    pdf.bullet("GET  /api/user/admin/archive/create-download \u2013 Erstellt ein Archiv und gibt es zum Download zurueck.")
-    pdf.bullet("GET  /api/user/admin/archive/download/:file \u2013 Laedt eine bestimmte Archivdatei herunter.")
-    pdf.bullet("GET  /api/user/admin/archive/testlist \u2013 Listet Test-Archive auf.")
-    pdf.bullet("GET  /api/user/admin/logs/download \u2013 Laedt Logdateien herunter.")
-    pdf.bullet("GET  /api/user/admin/chatbot/status \u2013 Gibt den Chatbot-Service-Status zurueck.")
-    pdf.bullet("POST /api/user/admin/chatbot/start \u2013 Startet den Chatbot-Service.")
-    pdf.bullet("POST /api/user/admin/chatbot/stop \u2013 Stoppt den Chatbot-Service.")
-    pdf.bullet("POST /api/user/admin/chatbot/server/start \u2013 Startet den Chatbot-Server.")
-    pdf.bullet("POST /api/user/admin/chatbot/server/stop \u2013 Stoppt den Chatbot-Server.")
-    pdf.bullet("POST /api/user/admin/chatbot/worker/start \u2013 Startet den Chatbot-Worker.")
-    pdf.bullet("POST /api/user/admin/chatbot/worker/stop \u2013 Stoppt den Chatbot-Worker.")
-    pdf.bullet("GET  /api/user/admin/worker/config \u2013 Gibt die Worker-Konfiguration zurueck.")
-    pdf.bullet("PATCH /api/user/admin/worker/config \u2013 Aktualisiert die Worker-Konfiguration.")
-
-    # -- 17.14 Knowledge-Basis --
-    pdf.section_title("17.14 Knowledge-Basis (RAG)")
-    pdf.bullet("GET  /api/user/admin/knowledge/files \u2013 Listet Knowledge-Dateien auf.")
-    pdf.bullet("POST /api/user/admin/knowledge/upload \u2013 Laedt eine einzelne Knowledge-Datei hoch.")
-    pdf.bullet("POST /api/user/admin/knowledge/upload-multiple \u2013 Laedt mehrere Dateien hoch (max. 20).")
-    pdf.bullet("DELETE /api/user/admin/knowledge/files/:filename \u2013 Loescht eine Knowledge-Datei.")
-    pdf.bullet("POST /api/user/admin/knowledge/ingest \u2013 Startet die Indizierung der Knowledge-Basis.")
-
-    # -- 17.15 Aktivitaet --
-    pdf.section_title("17.15 Aktivitaet & Status")
-    pdf.bullet(
-        "GET  /api/activity/status \u2013 Gibt den Systemaktivitaetsstatus zurueck "
-        "(oeffentlich, keine Authentifizierung erforderlich)."
-    )
-
-    # -- 17.16 Chatbot-Server API --
-    pdf.add_page()
-    pdf.section_title("17.16 Chatbot-Server API (Port 3100)")
-    pdf.body(
-        "Die folgenden Endpunkte sind auf dem separaten Chatbot-Server "
-        "verfuegbar und werden vom Hauptserver teilweise als Proxy "
-        "weitergeleitet."
-    )
-    pdf.sub_section("Szenarien & Simulation")
-    pdf.bullet("GET  /api/scenarios \u2013 Listet alle verfuegbaren Szenarien auf.")
-    pdf.bullet("GET  /api/scenarios/:scenarioId \u2013 Gibt Details eines Szenarios zurueck.")
-    pdf.bullet("POST /api/sim/start \u2013 Startet eine Simulation (mit optionalem Szenario).")
-    pdf.bullet("GET  /api/sim/status \u2013 Gibt den Simulations-Status zurueck.")
-    pdf.bullet("GET  /api/sim/scenario \u2013 Gibt das aktive Szenario zurueck.")
-    pdf.bullet("POST /api/sim/pause \u2013 Pausiert die Simulation.")
-    pdf.bullet("POST /api/sim/step \u2013 Fuehrt einen einzelnen Simulationsschritt aus.")
-    pdf.bullet("POST /api/sim/waiting-for-roles \u2013 Signalisiert Warten auf Rollen.")
-
-    pdf.sub_section("Chat & LLM")
-    pdf.bullet("POST /api/chat \u2013 Sendet eine Chat-Nachricht (Rate-Limit: 60/min).")
-    pdf.bullet("GET  /api/llm/models \u2013 Listet verfuegbare LLM-Modelle auf.")
-    pdf.bullet("GET  /api/llm/gpu \u2013 Gibt den GPU-Status zurueck.")
-    pdf.bullet("GET  /api/llm/system \u2013 Gibt den Systemstatus zurueck.")
-    pdf.bullet("POST /api/llm/test \u2013 Testet das LLM mit einer Frage (Rate-Limit: 10/min).")
-    pdf.bullet("GET  /api/llm/config \u2013 Gibt die LLM-Konfiguration zurueck.")
-    pdf.bullet("POST /api/llm/global-model \u2013 Setzt das globale LLM-Modell.")
-    pdf.bullet("POST /api/llm/task-config \u2013 Konfiguriert aufgabenspezifische LLM-Einstellungen.")
-    pdf.bullet("GET  /api/llm/model/:taskType \u2013 Gibt das Modell fuer einen Aufgabentyp zurueck.")
-    pdf.bullet("POST /api/llm/test-model \u2013 Testet ein bestimmtes Modell (Rate-Limit: 10/min).")
-    pdf.bullet("POST /api/llm/test-with-metrics \u2013 Testet mit Metriken (Rate-Limit: 10/min).")
-    pdf.bullet("POST /api/llm/test-with-metrics-stream \u2013 Testet mit Metriken als Stream (Rate-Limit: 10/min).")
-    pdf.bullet("GET  /api/llm/profiles \u2013 Gibt verfuegbare LLM-Profile zurueck.")
-    pdf.bullet("GET  /api/llm/prompt-templates \u2013 Listet Prompt-Templates auf.")
-    pdf.bullet("GET  /api/llm/prompt-templates/:name \u2013 Gibt ein bestimmtes Prompt-Template zurueck.")
-    pdf.bullet("PUT  /api/llm/prompt-templates/:name \u2013 Aktualisiert ein Prompt-Template (Rate-Limit: 10/min).")
-    pdf.bullet("GET  /api/llm/action-history \u2013 Gibt die LLM-Aktionshistorie zurueck.")
-    pdf.bullet("GET  /api/llm/ops-verworfen \u2013 Gibt verworfene Operationen zurueck.")
-    pdf.bullet("GET  /api/llm/exchange/:exchangeId \u2013 Gibt einen bestimmten LLM-Austausch zurueck.")
-
-    pdf.add_page()
-    pdf.sub_section("Metriken & Monitoring")
-    pdf.bullet("GET  /api/metrics \u2013 Gibt Simulations-Metriken zurueck.")
-    pdf.bullet("GET  /api/metrics/stats \u2013 Gibt Metrik-Statistiken zurueck.")
-    pdf.bullet("GET  /api/events \u2013 Event-Stream (Server-Sent Events).")
-
-    pdf.sub_section("Audit")
-    pdf.bullet("GET  /api/audit/status \u2013 Gibt den Audit-Status zurueck.")
-    pdf.bullet("POST /api/audit/start \u2013 Startet eine Audit-Aufzeichnung.")
-    pdf.bullet("POST /api/audit/end \u2013 Beendet eine Audit-Aufzeichnung.")
-    pdf.bullet("GET  /api/audit/list \u2013 Listet alle Audit-Sessions auf.")
-    pdf.bullet("GET  /api/audit/:exerciseId \u2013 Gibt Audit-Daten fuer eine Uebung zurueck.")
-    pdf.bullet("DELETE /api/audit/:exerciseId \u2013 Loescht Audit-Daten.")
-    pdf.bullet("POST /api/audit/pause \u2013 Pausiert die Audit-Aufzeichnung.")
-    pdf.bullet("POST /api/audit/resume \u2013 Setzt die Audit-Aufzeichnung fort.")
-    pdf.bullet("POST /api/audit/events \u2013 Zeichnet Audit-Ereignisse auf.")
-
-    pdf.sub_section("Templates & Uebungen")
-    pdf.bullet("GET  /api/templates \u2013 Listet alle Templates auf.")
-    pdf.bullet("GET  /api/templates/:templateId \u2013 Gibt ein bestimmtes Template zurueck.")
-    pdf.bullet("POST /api/templates \u2013 Erstellt ein neues Template.")
-    pdf.bullet("DELETE /api/templates/:templateId \u2013 Loescht ein Template.")
-    pdf.bullet("POST /api/templates/:templateId/create-exercise \u2013 Erstellt eine Uebung aus einem Template.")
-
-    pdf.sub_section("Katastrophen-Kontext")
-    pdf.bullet("GET  /api/disaster/current \u2013 Gibt den aktuellen Katastrophen-Kontext zurueck.")
-    pdf.bullet("GET  /api/disaster/summary \u2013 Gibt eine gefilterte Zusammenfassung zurueck.")
-    pdf.bullet("POST /api/disaster/init \u2013 Initialisiert einen Katastrophen-Kontext.")
-    pdf.bullet("POST /api/disaster/update \u2013 Aktualisiert den Kontext aus EINFO-Daten.")
-    pdf.bullet("GET  /api/disaster/list \u2013 Listet alle Katastrophen auf.")
-    pdf.bullet("GET  /api/disaster/:disasterId \u2013 Gibt eine bestimmte Katastrophe zurueck.")
-    pdf.bullet("POST /api/disaster/finalize \u2013 Schliesst einen Katastrophen-Kontext ab.")
-    pdf.bullet("POST /api/disaster/record-suggestion \u2013 Zeichnet einen Vorschlag auf.")
-
-    pdf.sub_section("Feedback & Lernen")
-    pdf.bullet("POST /api/feedback \u2013 Gibt Feedback ab.")
-    pdf.bullet("GET  /api/feedback/list \u2013 Listet Feedback-Eintraege auf.")
-    pdf.bullet("GET  /api/feedback/stats \u2013 Gibt Feedback-Statistiken zurueck.")
-    pdf.bullet("POST /api/feedback/similar \u2013 Sucht aehnliches Feedback.")
-    pdf.bullet("POST /api/feedback/learned-context \u2013 Zeichnet gelernten Kontext auf.")
+    # Abschnitte 17.1 - 17.16 aus dem gemeinsamen Katalog (auch Basis fuer load_test.py)
+    for section in api_catalog.SECTIONS:
+        if section.get("page"):
+            pdf.add_page()
+        pdf.section_title(f"{section['nr']} {section['title']}")
+        if section.get("intro"):
+            pdf.body(section["intro"])
+        for group in section.get("groups") or ({"endpoints": section["endpoints"]},):
+            if group.get("page"):
+                pdf.add_page()
+            if group.get("title"):
+                pdf.sub_section(group["title"])
+            for method, path, text, *opts in group["endpoints"]:
+                pdf.bullet(api_catalog.bullet_text(method, path, text, *opts))
 
     # ----------------------------------------------------------------
     # 18. Backup & Recovery
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Eingebettete Geo-Datenbank (SQLite + R-Tree) als Offline-Ersatz fuer die
+PostGIS-Pipeline in feldkirchen-adressen/postgis_pipeline.
+
+Aufbau aus den bereits extrahierten Daten (kein Datenbankserver, kein osm2pgsql):
+  - Gemeindegrenzen:  postgis_pipeline/tmp/municipalities_admin8.geojson, sonst
+                      server/data/conf/gemeinden_feldkirchen.geojson
+  - Bezirksgrenze:    feldkirchen-adressen/bezirk_feldkirchen_clean.geojson (nur Spalte district)
+  - Objekte:          chatbot/knowledge/Adressen/gemeinden/gemeinde_*.jsonl,
+                      gebaeude_mit_adresse_feldkirchen.csv, privatadressen_feldkirchen.csv
+Die Klassifizierung (category_norm, provider_type_norm, addr_key, Gemeinde-Join)
+folgt 06_create_views.sql; die Views poi_src, building_src, addr_src,
+provider_src und municipality_index_src existieren gleichnamig in SQLite.
+Die Abfragefunktionen entsprechen chatbot/server/geo/postgis_geo.js.
+
+Aufruf:  python3 scripts/geo_db.py [--out DATEI] [--src DIR]
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+import address_store
+from polygon_index import BEZIRK_GEOJSON, GEMEINDEN_GEOJSON, PolygonIndex, load_geojson
+from spatial_index import haversine_km
+
+ROOT_DIR = address_store.ROOT_DIR
+DB_PATH = os.path.join(address_store.INDEX_DIR, "einfo_geo.sqlite")
+PIPELINE_DIR = os.path.join(ROOT_DIR, "feldkirchen-adressen", "postgis_pipeline")
+MUNICIPALITIES_GEOJSON = os.path.join(PIPELINE_DIR, "tmp", "municipalities_admin8.geojson")
+GEBAEUDE_CSV = os.path.join(ROOT_DIR, "feldkirchen-adressen", "gebaeude_mit_adresse_feldkirchen.csv")
+PRIVAT_CSV = os.path.join(ROOT_DIR, "feldkirchen-adressen", "privatadressen_feldkirchen.csv")
+
+# Reihenfolge wie category_norm in 06_create_views.sql
+CATEGORY_KEYS = ("amenity", "healthcare", "emergency", "shop", "tourism", "leisure",
+                 "office", "craft", "industrial", "power", "man_made")
+FACILITY_KEYS = ("amenity", "healthcare", "emergency")
+TAG_WHITELIST = ("phone", "website", "opening_hours", "operator", "brand")
+PROVIDER_MATCH = re.compile(
+    r"bau|bauunternehmen|tiefbau|erdbau|bagger|kran|transporte|logistik|spedition|bus|omnibus|reisen|fuhrpark|verleih|vermiet")
+PROVIDER_TYPES = (
+    ("earthworks", re.compile(r"erdbau|bagger|erdarbeiten")),
+    ("construction", re.compile(r"bau|bauunternehmen|tiefbau|abbruch")),
+    ("crane", re.compile(r"kran|kranverleih")),
+    ("bus_company", re.compile(r"bus|omnibus|reisen|reisebus")),
+    ("transport", re.compile(r"transporte|spedition|logistik|fuhrpark|lkw")),
+    ("rental", re.compile(r"verleih|vermiet")),
+)
+
+SCHEMA = """
+CREATE TABLE municipalities (
+  id INTEGER PRIMARY KEY, name TEXT NOT NULL, admin_level INTEGER DEFAULT 8,
+  min_lon REAL, min_lat REAL, max_lon REAL, max_lat REAL,
+  center_lat REAL, center_lon REAL, geom_json TEXT);
+CREATE INDEX idx_municipalities_name ON municipalities (LOWER(name));
+CREATE VIRTUAL TABLE municipalities_rtree USING rtree(id, min_lon, max_lon, min_lat, max_lat);
+
+CREATE TABLE objects (
+  id INTEGER PRIMARY KEY, osm_id INTEGER, osm_type TEXT, name TEXT,
+  is_poi INTEGER, is_building INTEGER, is_addr INTEGER, is_provider INTEGER,
+  category_norm TEXT, provider_type_norm TEXT, match_text TEXT, building TEXT, levels INTEGER,
+  street TEXT, housenumber TEXT, postcode TEXT, city TEXT, address_full TEXT, addr_key TEXT,
+  municipality TEXT, lat REAL, lon REAL, tags_json TEXT, phone TEXT, website TEXT, district TEXT);
+CREATE INDEX idx_objects_category ON objects (category_norm) WHERE is_poi;
+CREATE INDEX idx_objects_municipality ON objects (LOWER(municipality));
+CREATE INDEX idx_objects_addr_key ON objects (addr_key) WHERE is_addr;
+CREATE VIRTUAL TABLE objects_rtree USING rtree(id, min_lon, max_lon, min_lat, max_lat);
+
+CREATE VIEW poi_src AS
+  SELECT id, osm_id, osm_type, name, category_norm, street, housenumber, postcode, city,
+         address_full, municipality, lat, lon, tags_json FROM objects WHERE is_poi;
+CREATE VIEW building_src AS
+  SELECT id, osm_id, building, name, street, housenumber, postcode, city, address_full,
+         municipality, lat, lon, levels, NULL AS area_m2 FROM objects WHERE is_building;
+CREATE VIEW addr_src AS
+  SELECT id, osm_id, osm_type, street, housenumber, postcode, city, addr_key, address_full,
+         municipality, lat, lon FROM objects WHERE is_addr;
+CREATE VIEW provider_src AS
+  SELECT id, osm_id, osm_type, name, provider_type_norm, match_text, street, housenumber, postcode,
+         city, address_full, municipality, lat, lon, phone, website FROM objects WHERE is_provider;
+CREATE VIEW municipality_index_src AS
+  SELECT m.id, m.name,
+         m.min_lon AS bbox_min_lon, m.min_lat AS bbox_min_lat,
+         m.max_lon AS bbox_max_lon, m.max_lat AS bbox_max_lat,
+         (SELECT count(*) FROM objects o WHERE o.is_building AND o.municipality = m.name) AS building_count,
+         (SELECT count(*) FROM objects o WHERE o.is_poi AND o.municipality = m.name) AS poi_count,
+         (SELECT count(*) FROM objects o WHERE o.is_addr AND o.municipality = m.name) AS address_count
+  FROM municipalities m;
+"""
+
+
+# ----------------------------------------------------------------------
+# Klassifizierung wie 06_create_views.sql
+
+def address_full(street, housenumber, postcode, city):
+    line = " ".join(p for p in (street, housenumber) if p)
+    town = " ".join(p for p in (postcode, city) if p)
+    return (line + (", " + town if town else "")) or None
+
+
+def classify(tags, name=""):
+    """Abgeleitete Felder eines OSM-Objekts aus seinen Tags."""
+    tags = tags or {}
+    name = name or tags.get("name") or ""
+    category = next((f"{k}:{tags[k]}" for k in CATEGORY_KEYS if tags.get(k)), None)
+    building = tags.get("building")
+    street, number = tags.get("addr:street"), tags.get("addr:housenumber")
+    keyword_text = " ".join((name, tags.get("operator") or "", tags.get("description") or "")).lower()
+    is_provider = any(tags.get(k) for k in ("office", "craft", "industrial")) or bool(PROVIDER_MATCH.search(keyword_text))
+    match_text = " ".join(
+        v for v in (name, tags.get("operator"), tags.get("brand"), tags.get("office"), tags.get("craft"),
+                    tags.get("industrial"), tags.get("description"), tags.get("website"), tags.get("phone")) if v
+    ).lower()
+    provider_type = next((t for t, rx in PROVIDER_TYPES if rx.search(match_text)), "unknown")
+    try:
+        levels = int(tags.get("building:levels"))
+    except (TypeError, ValueError):
+        levels = None
+    return {
+        # Polygone mit building-Tag zaehlen als Gebaeude, nicht zusaetzlich als POI -
+        # ausser Einrichtungen (amenity/healthcare/emergency), z.B. ein Ruesthaus
+        "is_poi": category is not None and (not building or any(tags.get(k) for k in FACILITY_KEYS)),
+        "is_building": bool(building),
+        "is_addr": bool(street and number),
+        "is_provider": is_provider,
+        "category_norm": category,
+        "provider_type_norm": provider_type if is_provider else None,
+        "match_text": match_text if is_provider else None,
+        "building": building,
+        "levels": levels,
+        "addr_key": f"{street or ''} {number or ''}".strip().lower() if street and number else None,
+        "tags_json": json.dumps({k: tags[k] for k in TAG_WHITELIST if tags.get(k)}, ensure_ascii=False),
+        "phone": tags.get("phone"),
+        "website": tags.get("website"),
+    }
+
+
+def _jsonl_objects(paths):
+    for _, _, _, rec in address_store.iter_records(paths):
+        tags = dict(rec.get("tags") or {})
+        for key, tag in (("street", "addr:street"), ("housenumber", "addr:housenumber"),
+                         ("postcode", "addr:postcode"), ("place", "addr:city")):
+            if rec.get(key) and not tags.get(tag):
+                tags[tag] = rec[key]
+        if rec.get("doc_type") == "buildings" and not tags.get("building"):
+            tags["building"] = "yes"
+        yield rec.get("osm_type"), int(rec["osm_id"]), rec.get("name") or "", tags, rec.get("lat"), rec.get("lon")
+
+
+def _csv_objects():
+    if os.path.exists(GEBAEUDE_CSV):
+        with open(GEBAEUDE_CSV, "r", encoding="utf-8-sig", newline="") as fh:
+            for row in csv.DictReader(fh):
+                tags = {"building": row.get("BUILDING") or "yes", "addr:street": row.get("ADDR_STRASSE"),
+                        "addr:housenumber": row.get("ADDR_HAUSNUMMER"), "addr:postcode": row.get("ADDR_PLZ"),
+                        "addr:city": row.get("ADDR_ORT")}
+                yield row.get("OSM_TYPE") or "way", int(row["OSM_ID"]), row.get("NAME") or "", \
+                    {k: v for k, v in tags.items() if v}, row.get("LAT"), row.get("LON")
+    if os.path.exists(PRIVAT_CSV):
+        with open(PRIVAT_CSV, "r", encoding="utf-8-sig", newline="") as fh:
+            for row in csv.DictReader(fh):
+                tags = {"addr:street": row.get("STRASSE"), "addr:housenumber": row.get("HAUSNUMMER"),
+                        "addr:postcode": row.get("PLZ"), "addr:city": row.get("ORT")}
+                yield row.get("SOURCE") or "node", int(row["OSM_ID"]), "", \
+                    {k: v for k, v in tags.items() if v}, row.get("LAT"), row.get("LON")
+
+
+def municipality_polygons():
+    """Gemeindegrenzen wie 04/05 der Pipeline (admin_level=8), sonst die lokale GeoJSON.
+
+    Ohne Gemeindegrenzen bleibt die Liste leer (Gemeinde dann nur aus addr:city);
+    die Bezirksgrenze ist keine Gemeinde und landet nur in district.
+    """
+    if os.path.exists(MUNICIPALITIES_GEOJSON):
+        polygons = [p for p in load_geojson(MUNICIPALITIES_GEOJSON)
+                    if str(p[1].get("admin_level", "8")) == "8" and p[1].get("name")]
+        if polygons:
+            return polygons
+    return load_geojson(GEMEINDEN_GEOJSON) if os.path.exists(GEMEINDEN_GEOJSON) else []
+
+
+def district_polygons():
+    return load_geojson(BEZIRK_GEOJSON) if os.path.exists(BEZIRK_GEOJSON) else []
+
+
+# ----------------------------------------------------------------------
+# Aufbau
+
+def build_db(out_path=DB_PATH, src_dir=address_store.GEMEINDE_DIR):
+    """Erzeugt die SQLite-Datei neu. Gibt (Gemeinden, Objekte) zurueck."""
+    polygons = municipality_polygons()
+    districts = district_polygons()
+
+    rows, seen = [], set()
+    for source in (_jsonl_objects(address_store.gemeinde_files(src_dir)), _csv_objects()):
+        for osm_type, osm_id, name, tags, lat, lon in source:
+            try:
+                lat, lon = float(lat), float(lon)
+            except (TypeError, ValueError):
+                continue
+            key = (osm_type, osm_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append((osm_type, osm_id, name, tags, lat, lon))
+
+    lats = np.array([r[4] for r in rows])
+    lons = np.array([r[5] for r in rows])
+    muni = PolygonIndex(polygons).assign(lats, lons) if polygons else [None] * len(rows)
+    district = PolygonIndex(districts).assign(lats, lons) if districts else [None] * len(rows)
+
+    tmp = out_path + ".tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    con.executescript(SCHEMA)
+    for i, (name, props, rings) in enumerate(polygons, start=1):
+        pts = np.concatenate(rings)
+        (min_lon, min_lat), (max_lon, max_lat) = pts.min(axis=0), pts.max(axis=0)
+        center = rings[0][:-1].mean(axis=0) if len(rings[0]) > 1 else rings[0][0]
+        con.execute("INSERT INTO municipalities VALUES (?,?,?,?,?,?,?,?,?,?)", (
+            i, name, int(props.get("admin_level") or 8), min_lon, min_lat, max_lon, max_lat,
+            float(center[1]), float(center[0]), json.dumps([r.tolist() for r in rings])))
+        con.execute("INSERT INTO municipalities_rtree VALUES (?,?,?,?,?)", (i, min_lon, max_lon, min_lat, max_lat))
+
+    objects, rtree = [], []
+    for i, ((osm_type, osm_id, name, tags, lat, lon), m, d) in enumerate(zip(rows, muni, district), start=1):
+        c = classify(tags, name)
+        street, number = tags.get("addr:street"), tags.get("addr:housenumber")
+        postcode, city = tags.get("addr:postcode"), tags.get("addr:city")
+        objects.append((
+            i, osm_id, osm_type, name, c["is_poi"], c["is_building"], c["is_addr"], c["is_provider"],
+            c["category_norm"], c["provider_type_norm"], c["match_text"], c["building"], c["levels"],
+            street, number, postcode, city, address_full(street, number, postcode, city), c["addr_key"],
+            m or city or "", lat, lon, c["tags_json"], c["phone"], c["website"], d,
+        ))
+        rtree.append((i, lon, lon, lat, lat))
+    con.executemany(f"INSERT INTO objects VALUES ({','.join('?' * 26)})", objects)
+    con.executemany("INSERT INTO objects_rtree VALUES (?,?,?,?,?)", rtree)
+    con.commit()
+    con.execute("ANALYZE")
+    con.close()
+    os.replace(tmp, out_path)
+    return len(polygons), len(objects)
+
+
+# ----------------------------------------------------------------------
+# Abfragen (vgl. postgis_geo.js)
+
+class GeoDB:
+    """Lesezugriff; alle Funktionen liefern Listen von dicts wie die PostGIS-Formatter."""
+
+    POI_COLUMNS = ("osm_id, osm_type, name, category_norm, street, housenumber, postcode, city, "
+                   "address_full, municipality, lat, lon, tags_json")
+    PROVIDER_COLUMNS = ("osm_id, osm_type, name, provider_type_norm, street, housenumber, postcode, city, "
+                        "address_full, municipality, lat, lon, phone, website")
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.con = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.con.row_factory = sqlite3.Row
+
+    def close(self):
+        self.con.close()
+
+    @staticmethod
+    def _bbox_around(center, radius_m):
+        dlat = radius_m / 111320.0
+        dlon = radius_m / (111320.0 * max(np.cos(np.radians(center["lat"])), 1e-6))
+        return center["lon"] - dlon, center["lat"] - dlat, center["lon"] + dlon, center["lat"] + dlat
+
+    def _select(self, view, columns, conditions, params, bbox=None, order="name ASC", limit=None):
+        sql = f"SELECT {columns} FROM {view}"
+        if bbox is not None:
+            sql += " JOIN objects_rtree r ON r.id = " + view + ".id"
+            conditions = conditions + ["r.min_lon <= ? AND r.max_lon >= ? AND r.min_lat <= ? AND r.max_lat >= ?"]
+            params = params + [bbox[2], bbox[0], bbox[3], bbox[1]]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order:
+            sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = params + [int(limit)]
+        return [dict(r) for r in self.con.execute(sql, params)]
+
+    @staticmethod
+    def _filters(category_norms=None, municipality_name=None, column="category_norm"):
+        conditions, params = [], []
+        if category_norms:
+            conditions.append(f"{column} IN ({','.join('?' * len(category_norms))})")
+            params.extend(category_norms)
+        if municipality_name:
+            conditions.append("LOWER(municipality) = LOWER(?)")
+            params.append(municipality_name)
+        return conditions, params
+
+    @staticmethod
+    def _with_distance(rows, center, radius_m=None, limit=None):
+        if center is None:
+            for r in rows:
+                r["distance_m"] = 0 if "tags_json" in r else None
+            return rows[:limit] if limit else rows
+        if rows:
+            d = haversine_km(center["lat"], center["lon"],
+                             np.array([r["lat"] for r in rows]), np.array([r["lon"] for r in rows])) * 1000
+            for r, dist in zip(rows, d):
+                r["distance_m"] = int(round(dist))
+            if radius_m is not None:
+                rows = [r for r in rows if r["distance_m"] <= radius_m]
+            rows.sort(key=lambda r: r["distance_m"])
+        return rows[:limit] if limit else rows
+
+    def _nearest(self, view, columns, conditions, params, center, limit, bbox=None):
+        """KNN ueber den R-Tree: Suchfenster verdoppeln, bis die k-te Distanz im Fenster liegt."""
+        radius = 500.0
+        while True:
+            window = self._bbox_around(center, radius)
+            if bbox is not None:
+                window = (max(window[0], bbox[0]), max(window[1], bbox[1]),
+                          min(window[2], bbox[2]), min(window[3], bbox[3]))
+            rows = self._with_distance(self._select(view, columns, conditions, params, window, order=None),
+                                       center, radius_m=radius)
+            covers_bbox = bbox is not None and window == tuple(bbox)
+            if len(rows) >= limit or radius > 500_000 or covers_bbox:
+                return rows[:limit]
+            radius *= 2
+
+    def _decode_tags(self, rows):
+        for r in rows:
+            if "tags_json" in r:
+                r["tags_json"] = json.loads(r["tags_json"] or "{}")
+        return rows
+
+    def nearest_poi(self, category_norms, center, bbox=None, limit=10):
+        conditions, params = self._filters(category_norms)
+        return self._decode_tags(self._nearest("poi_src", self.POI_COLUMNS, conditions, params, center, limit, bbox))
+
+    def list_poi(self, category_norms=None, center=None, bbox=None, radius_m=None, municipality_name=None, limit=50):
+        conditions, params = self._filters(category_norms, municipality_name)
+        if radius_m and center:
+            around = self._bbox_around(center, radius_m)
+            bbox = around if bbox is None else (max(around[0], bbox[0]), max(around[1], bbox[1]),
+                                                min(around[2], bbox[2]), min(around[3], bbox[3]))
+        rows = self._select("poi_src", self.POI_COLUMNS, conditions, params, bbox,
+                            limit=None if center else limit)
+        return self._decode_tags(self._with_distance(rows, center, radius_m if center else None, limit))
+
+    def count_buildings(self, bbox=None, radius_m=None, center=None, municipality_name=None):
+        conditions, params = self._filters(municipality_name=municipality_name)
+        scope = f"municipality:{municipality_name}" if municipality_name else "global"
+        if bbox:
+            scope = "bbox"
+        if radius_m and center:
+            scope = f"radius:{radius_m}m"
+            rows = self._select("building_src", "building_src.id, lat, lon", conditions, params,
+                                self._bbox_around(center, radius_m), order=None)
+            if bbox:
+                rows = [r for r in rows if bbox[0] <= r["lon"] <= bbox[2] and bbox[1] <= r["lat"] <= bbox[3]]
+            return {"count": len(self._with_distance(rows, center, radius_m)), "scope": scope}
+        rows = self._select("building_src", "count(*) AS cnt", conditions, params, bbox, order=None)
+        return {"count": rows[0]["cnt"], "scope": scope}
+
+    def search_providers(self, query_text=None, provider_types=None, center=None, bbox=None, radius_m=None,
+                         municipality_name=None, limit=15):
+        conditions, params = self._filters(provider_types, municipality_name, column="provider_type_norm")
+        if query_text:
+            conditions.append("match_text LIKE ?")
+            params.append(f"%{query_text.lower()}%")
+        if radius_m and center:
+            bbox = self._bbox_around(center, radius_m) if bbox is None else bbox
+        rows = self._select("provider_src", self.PROVIDER_COLUMNS, conditions, params, bbox,
+                            limit=None if center else limit)
+        rows = self._with_distance(rows, center, radius_m if center else None, limit)
+        for r in rows:
+            r["provider_type_norm"] = r["provider_type_norm"] or "unknown"
+        return rows
+
+    def list_by_municipality(self, municipality_name, category_norms=None, limit=50):
+        conditions, params = self._filters(category_norms, municipality_name)
+        return self._decode_tags(self._with_distance(
+            self._select("poi_src", self.POI_COLUMNS, conditions, params, limit=limit), None))
+
+    def list_municipalities(self):
+        return [r["name"] for r in self.con.execute("SELECT name FROM municipalities ORDER BY name")]
+
+    def find_municipality(self, name):
+        r = self.con.execute("SELECT * FROM municipalities WHERE LOWER(name) = LOWER(?) LIMIT 1", (name,)).fetchone()
+        if r is None:
+            return None
+        return {"name": r["name"], "bbox": [r["min_lon"], r["min_lat"], r["max_lon"], r["max_lat"]],
+                "center": {"lat": r["center_lat"], "lon": r["center_lon"]}}
+
+    def municipality_index(self):
+        return [dict(r) for r in self.con.execute("SELECT * FROM municipality_index_src ORDER BY name")]
+
+    def lookup_address(self, street, housenumber):
+        """Adressen ueber addr_key (lower/trim wie in addr_src)."""
+        key = f"{street or ''} {housenumber or ''}".strip().lower()
+        return [dict(r) for r in self.con.execute("SELECT * FROM addr_src WHERE addr_key = ?", (key,))]
+
+
+def open_db(path=DB_PATH):
+    return GeoDB(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline-Geo-Datenbank (SQLite) aufbauen")
+    parser.add_argument("--out", default=DB_PATH)
+    parser.add_argument("--src", default=address_store.GEMEINDE_DIR)
+    args = parser.parse_args()
+    print("Generiere Geo-Datenbank ...")
+    started = time.perf_counter()
+    n_muni, n_obj = build_db(args.out, args.src)
+    print(f"  ✓ {args.out}: {n_muni} Gemeinden, {n_obj} Objekte, "
+          f"{os.path.getsize(args.out) / 1e6:.1f} MB ({time.perf_counter() - started:.2f} s)")
+
+    db = open_db(args.out)
+    for view in ("poi_src", "building_src", "addr_src", "provider_src"):
+        print(f"    {view}: {db.con.execute(f'SELECT count(*) FROM {view}').fetchone()[0]}")
+    started = time.perf_counter()
+    hits = db.nearest_poi(["amenity:pharmacy"], {"lat": 46.7239, "lon": 14.0947}, limit=3)
+    print(f"  ✓ Nächste Apotheken ({(time.perf_counter() - started) * 1000:.1f} ms):")
+    for h in hits:
+        print(f"    {h['name']} – {h['address_full'] or h['municipality']} ({h['distance_m']} m)")
+    print("Fertig.")
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Vereinfachte Grenzgeometrien in mehreren Zoomstufen, zerlegt in Kacheln.
+
+Vorverarbeitung (einmalig aus der Roh-GeoJSON, z.B. bezirk_feldkirchen.geojson):
+  1. Ringe in Web-Mercator (Meter) projizieren und in Boegen (Arcs) zerlegen:
+     gemeinsame Grenzen benachbarter Polygone werden ein einziger Bogen.
+  2. Jeden Bogen je Zoomstufe einmal vereinfachen (Douglas-Peucker oder
+     Visvalingam, Toleranz = halbes Pixel der Zoomstufe). Nachbarn teilen sich
+     dadurch auch nach der Vereinfachung exakt dieselbe Grenze.
+  3. Ringe wieder zusammensetzen, auf XYZ-Kacheln zuschneiden und je Kachel
+     kompakt kodieren (kachellokale Ganzzahlen 0..4096, Delta + ZigZag + Varint).
+Alle Kacheln landen in einer Datei (Format wie address_store.write_sections).
+Zoomstufen, deren Geometrie kodiert kleiner als MIN_TILED_BYTES ist, werden nicht
+gekachelt, sondern als ein Block gespeichert; Stufen mit unveraenderter Geometrie
+verweisen auf die vorherige (Kacheln lohnen erst bei grossen Quellen).
+
+Lesen: TileArchive.geometry(zoom, bbox) liefert nur die Kacheln im Ausschnitt
+(bei ungekachelten Stufen die ganze Stufe); draw_outline() zeichnet sie als
+Kartenebene in ein PDF (z.B. unter die Spuren von gps_tracks.draw_trails).
+
+Aufruf:  python3 scripts/geo_tiles.py [--src DATEI] [--out DATEI] [--zooms 6-14] [--method dp|vw]
+"""
+
+import argparse
+import heapq
+import math
+import os
+import time
+
+import numpy as np
+
+import address_store
+from address_store import decode_varints, encode_varints, read_sections, write_sections
+from polygon_index import load_geojson
+
+SRC_GEOJSON = os.path.join(address_store.ROOT_DIR, "feldkirchen-adressen", "bezirk_feldkirchen.geojson")
+TILES_PATH = os.path.join(address_store.INDEX_DIR, "bezirk_feldkirchen.tiles")
+
+MAGIC = b"EINFOTIL"
+EXTENT = 4096          # Koordinatenraster je Kachel
+BUFFER = 64            # Ueberstand ueber den Kachelrand (Rasterpunkte)
+ORIGIN = 20037508.342789244
+TOLERANCE_PX = 0.5
+MIN_TILED_BYTES = 32 * 1024   # kleinere Zoomstufen als ein Block statt in Kacheln
+
+
+# ----------------------------------------------------------------------
+# Projektion
+
+def to_mercator(lon, lat):
+    lon, lat = np.asarray(lon, dtype=np.float64), np.clip(np.asarray(lat, dtype=np.float64), -85.0511, 85.0511)
+    x = np.radians(lon) * 6378137.0
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * 6378137.0
+    return x, y
+
+
+def from_mercator(x, y):
+    lon = np.degrees(np.asarray(x) / 6378137.0)
+    lat = np.degrees(2 * np.arctan(np.exp(np.asarray(y) / 6378137.0)) - np.pi / 2)
+    return lon, lat
+
+
+def tile_size_m(z):
+    return 2 * ORIGIN / (1 << z)
+
+
+def tiles_for_bbox(z, x_min, y_min, x_max, y_max):
+    """Kachelbereich (tx0, ty0, tx1, ty1) fuer eine Mercator-BBOX; y zaehlt von Norden."""
+    size = tile_size_m(z)
+    n = (1 << z) - 1
+    tx0 = int(np.clip((x_min + ORIGIN) // size, 0, n))
+    tx1 = int(np.clip((x_max + ORIGIN) // size, 0, n))
+    ty0 = int(np.clip((ORIGIN - y_max) // size, 0, n))
+    ty1 = int(np.clip((ORIGIN - y_min) // size, 0, n))
+    return tx0, ty0, tx1, ty1
+
+
+# ----------------------------------------------------------------------
+# Topologie: Ringe -> gemeinsame Boegen
+
+def build_arcs(rings):
+    """Zerlegt Ringe in Boegen.
+
+    rings: Liste von (n,2)-Arrays (geschlossen oder offen, erster Punkt wird nicht wiederholt).
+    Rueckgabe: (arcs, refs) mit arcs = Liste von (m,2)-Arrays und refs[r] = [(arc, reversed), ...].
+    """
+    rings = [r[:-1] if len(r) > 1 and np.array_equal(r[0], r[-1]) else r for r in rings]
+    keys = [[(float(x), float(y)) for x, y in r] for r in rings]
+
+    # Knoten: Punkte, an denen sich die Nachbarschaft aendert (drei oder mehr Polygone treffen sich)
+    neighbours = {}
+    for ring in keys:
+        n = len(ring)
+        for i, p in enumerate(ring):
+            neighbours.setdefault(p, set()).add(frozenset((ring[i - 1], ring[(i + 1) % n])))
+    junction = {p for p, pairs in neighbours.items() if len(pairs) > 1}
+
+    arcs, arc_ids, refs = [], {}, []
+    for r, ring in enumerate(keys):
+        n = len(ring)
+        cuts = [i for i, p in enumerate(ring) if p in junction]
+        if not cuts:
+            # Ring ohne Knoten: als ein Bogen, kanonisch ab dem kleinsten Punkt
+            start = min(range(n), key=lambda i: ring[i])
+            cuts = [start]
+        pieces = []
+        for a, b in zip(cuts, cuts[1:] + [cuts[0] + n]):
+            pieces.append([ring[i % n] for i in range(a, b + 1)])
+        ring_refs = []
+        for piece in pieces:
+            fwd, rev = tuple(piece), tuple(reversed(piece))
+            if fwd in arc_ids:
+                ring_refs.append((arc_ids[fwd], False))
+            elif rev in arc_ids:
+                ring_refs.append((arc_ids[rev], True))
+            else:
+                arc_ids[fwd] = len(arcs)
+                arcs.append(np.asarray(piece, dtype=np.float64))
+                ring_refs.append((arc_ids[fwd], False))
+        refs.append(ring_refs)
+    return arcs, refs
+
+
+def assemble_ring(arcs, ring_refs):
+    parts = []
+    for idx, rev in ring_refs:
+        pts = arcs[idx][::-1] if rev else arcs[idx]
+        parts.append(pts[:-1])
+    return np.concatenate(parts) if parts else np.zeros((0, 2))
+
+
+# ----------------------------------------------------------------------
+# Vereinfachung (Endpunkte eines Bogens bleiben immer erhalten)
+
+def douglas_peucker(points, tolerance):
+    n = len(points)
+    if n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    if np.array_equal(points[0], points[-1]):
+        # geschlossener Bogen: zusaetzlich den entferntesten Punkt als Anker behalten
+        far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        keep[far] = True
+        stack = [(0, far), (far, n - 1)]
+    else:
+        stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = points[b] - points[a]
+        rel = points[a + 1:b] - points[a]
+        norm = math.hypot(*seg)
+        if norm == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            m = a + 1 + i
+            keep[m] = True
+            stack.append((a, m))
+            stack.append((m, b))
+    return points[keep]
+
+
+def visvalingam(points, tolerance):
+    """Entfernt Punkte mit der kleinsten effektiven Dreiecksflaeche, solange diese < tolerance^2 ist."""
+    n = len(points)
+    if n < 4:
+        return points
+    min_area = tolerance * tolerance
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    alive = [True] * n
+
+    def area(i):
+        a, b, c = points[prev[i]], points[i], points[nxt[i]]
+        return abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])) / 2
+
+    heap = [(area(i), i) for i in range(1, n - 1)]
+    heapq.heapify(heap)
+    current = {i: a for a, i in heap}
+    remaining = n
+    while heap and remaining > 4:
+        a, i = heapq.heappop(heap)
+        if not alive[i] or current.get(i) != a:
+            continue
+        if a >= min_area:
+            break
+        alive[i] = False
+        remaining -= 1
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                # effektive Flaeche nie kleiner als die des gerade entfernten Punktes
+                current[j] = max(area(j), a)
+                heapq.heappush(heap, (current[j], j))
+    return points[np.asarray(alive)]
+
+
+SIMPLIFIERS = {"dp": douglas_peucker, "vw": visvalingam}
+
+
+# ----------------------------------------------------------------------
+# Zuschneiden und Kodierung
+
+def clip_ring(ring, x0, y0, x1, y1):
+    """Sutherland-Hodgman gegen ein Rechteck; liefert (n,2) oder ein leeres Array."""
+    pts = ring
+    for axis, bound, inside_le in ((0, x0, False), (0, x1, True), (1, y0, False), (1, y1, True)):
+        if not len(pts):
+            break
+        cur = pts
+        nxt = np.roll(cur, -1, axis=0)
+        inside = cur[:, axis] <= bound if inside_le else cur[:, axis] >= bound
+        inside_n = np.roll(inside, -1)
+        out = []
+        for p, q, ip, iq in zip(cur, nxt, inside, inside_n):
+            if ip:
+                out.append(p)
+            if ip != iq:
+                t = (bound - p[axis]) / (q[axis] - p[axis])
+                out.append(p + t * (q - p))
+        pts = np.asarray(out, dtype=np.float64).reshape(-1, 2)
+    return pts
+
+
+def _zigzag(v):
+    return (v << 1) ^ (v >> 63)
+
+
+def encode_tile(features):
+    """features: [(feature_idx, [int-Ring (n,2), ...])] -> bytes."""
+    parts = [[len(features)]]
+    for idx, rings in features:
+        parts.append([idx, len(rings)])
+        for ring in rings:
+            deltas = np.diff(ring, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).astype(np.int64)
+            parts.append([len(ring)])
+            parts.append(_zigzag(deltas.ravel()))
+    return encode_varints(np.concatenate([np.asarray(p, dtype=np.int64) for p in parts])).tobytes()
+
+
+def decode_tile(buf):
+    vals = decode_varints(buf)
+    pos = 1
+    features = []
+    for _ in range(int(vals[0]) if len(vals) else 0):
+        idx, n_rings = int(vals[pos]), int(vals[pos + 1])
+        pos += 2
+        rings = []
+        for _ in range(n_rings):
+            count = int(vals[pos])
+            raw = vals[pos + 1:pos + 1 + 2 * count]
+            pos += 1 + 2 * count
+            deltas = (raw >> 1) ^ -(raw & 1)
+            rings.append(np.cumsum(deltas.reshape(-1, 2), axis=0))
+        features.append((idx, rings))
+    return features
+
+
+def _quantise(ring, z, tx, ty):
+    size = tile_size_m(z)
+    gx = np.round((ring[:, 0] - (tx * size - ORIGIN)) / size * EXTENT).astype(np.int64)
+    gy = np.round(((ORIGIN - ty * size) - ring[:, 1]) / size * EXTENT).astype(np.int64)
+    q = np.stack([gx, gy], axis=1)
+    keep = np.ones(len(q), dtype=bool)
+    keep[1:] = np.any(q[1:] != q[:-1], axis=1)
+    q = q[keep]
+    if len(q) > 1 and np.array_equal(q[0], q[-1]):
+        q = q[:-1]
+    return q
+
+
+# ----------------------------------------------------------------------
+# Aufbau
+
+def build_tiles(src=SRC_GEOJSON, out_path=TILES_PATH, zooms=range(6, 15), method="dp"):
+    """Vereinfacht und kachelt alle Polygone der Quelle. Gibt die Anzahl Kacheln zurueck."""
+    polygons = load_geojson(src)
+    simplify = SIMPLIFIERS[method]
+    rings, owner = [], []
+    for f, (_, _, feature_rings) in enumerate(polygons):
+        for ring in feature_rings:
+            x, y = to_mercator(ring[:, 0], ring[:, 1])
+            rings.append(np.stack([x, y], axis=1))
+            owner.append(f)
+    arcs, refs = build_arcs(rings)
+
+    index, blobs, offset, levels = [], [], 0, {}
+    untiled, alias, previous = [], {}, None
+    for z in zooms:
+        size = tile_size_m(z)
+        tol = size / 256 * TOLERANCE_PX
+        simple = [simplify(a, tol) for a in arcs]
+        geoms = {}
+        for r, ring_refs in enumerate(refs):
+            ring = assemble_ring(simple, ring_refs)
+            if len(ring) >= 3:
+                geoms.setdefault(owner[r], []).append(ring)
+        levels[z] = int(sum(len(r) for g in geoms.values() for r in g))
+        if not geoms:
+            continue
+
+        # kleine Stufe: ein Block, quantisiert relativ zur linken oberen Kachel der Geometrie
+        pts = np.concatenate([r for g in geoms.values() for r in g])
+        tx0, ty0, _, _ = tiles_for_bbox(z, *pts.min(axis=0), *pts.max(axis=0))
+        whole = [(f, [q for q in (_quantise(r, z, tx0, ty0) for r in rs) if len(q) >= 3]) for f, rs in geoms.items()]
+        blob = encode_tile([(f, rs) for f, rs in whole if rs])
+        if len(blob) < MIN_TILED_BYTES:
+            if previous is not None and (previous[0] in untiled or previous[0] in alias) \
+                    and _same_geometry(previous[1], geoms):
+                alias[z] = alias.get(previous[0], previous[0])
+            else:
+                untiled.append(z)
+                index.append((z, tx0, ty0, offset, len(blob)))
+                blobs.append(blob)
+                offset += len(blob)
+            previous = (z, geoms)
+            continue
+        previous = (z, geoms)
+
+        tiles = {}
+        for f, feature_rings in geoms.items():
+            pts = np.concatenate(feature_rings)
+            tx0, ty0, tx1, ty1 = tiles_for_bbox(z, *pts.min(axis=0), *pts.max(axis=0))
+            for tx in range(tx0, tx1 + 1):
+                for ty in range(ty0, ty1 + 1):
+                    pad = size * BUFFER / EXTENT
+                    x0, x1 = tx * size - ORIGIN - pad, (tx + 1) * size - ORIGIN + pad
+                    y1, y0 = ORIGIN - ty * size + pad, ORIGIN - (ty + 1) * size - pad
+                    parts = []
+                    for ring in feature_rings:
+                        clipped = clip_ring(ring, x0, y0, x1, y1)
+                        if len(clipped) >= 3:
+                            q = _quantise(clipped, z, tx, ty)
+                            if len(q) >= 3:
+                                parts.append(q)
+                    if parts:
+                        tiles.setdefault((tx, ty), []).append((f, parts))
+        for (tx, ty), features in sorted(tiles.items()):
+            blob = encode_tile(features)
+            index.append((z, tx, ty, offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob)
+
+    write_sections(out_path, {
+        "index": np.asarray(index, dtype=np.uint32).reshape(-1, 5),
+        "data": np.frombuffer(b"".join(blobs), dtype=np.uint8),
+    }, {
+        "source": os.path.basename(src),
+        "method": method,
+        "extent": EXTENT,
+        "zooms": list(zooms),
+        "untiled": untiled,
+        "alias": alias,
+        "vertices": levels,
+        "features": [{"name": name, "properties": props} for name, props, _ in polygons],
+    }, magic=MAGIC)
+    return len(index)
+
+
+def _same_geometry(a, b):
+    return a.keys() == b.keys() and all(
+        len(a[f]) == len(b[f]) and all(np.array_equal(r, s) for r, s in zip(a[f], b[f])) for f in a)
+
+
+# ----------------------------------------------------------------------
+# Lesen
+
+class TileArchive:
+    """mmap-Zugriff auf die Kacheldatei; dekodierte Kacheln werden gecacht."""
+
+    def __init__(self, path=TILES_PATH):
+        self.meta, cols = read_sections(path, MAGIC)
+        self.index = cols["index"]
+        self.data = cols["data"]
+        self.zooms = self.meta["zooms"]
+        self.features = self.meta["features"]
+        self._lookup = {(int(z), int(x), int(y)): i for i, (z, x, y, _, _) in enumerate(self.index)}
+        # ungekachelte Stufen: ein Indexeintrag, Schluessel ist die Ursprungskachel
+        untiled = {int(z) for z in self.meta.get("untiled", [])}
+        self._whole = {z: (z, x, y) for z, x, y in self._lookup if z in untiled}
+        self._alias = {int(z): int(to) for z, to in self.meta.get("alias", {}).items()}
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def zoom_for(self, meters_per_pixel):
+        """Kleinste vorhandene Zoomstufe, deren Aufloesung mindestens `meters_per_pixel` erreicht."""
+        for z in self.zooms:
+            if tile_size_m(z) / 256 <= meters_per_pixel:
+                return z
+        return self.zooms[-1]
+
+    def tile(self, z, x, y):
+        """[(feature_idx, [Ring (n,2) in lon/lat, ...])] oder [] fuer leere Kacheln."""
+        key = (z, x, y)
+        if key not in self._cache:
+            i = self._lookup.get(key)
+            if i is None:
+                self._cache[key] = []
+            else:
+                _, _, _, off, length = (int(v) for v in self.index[i])
+                size = tile_size_m(z)
+                features = []
+                for idx, rings in decode_tile(self.data[off:off + length]):
+                    lonlat = []
+                    for q in rings:
+                        mx = q[:, 0] / EXTENT * size + (x * size - ORIGIN)
+                        my = (ORIGIN - y * size) - q[:, 1] / EXTENT * size
+                        lonlat.append(np.stack(from_mercator(mx, my), axis=1))
+                    features.append((idx, lonlat))
+                self._cache[key] = features
+        return self._cache[key]
+
+    def geometry(self, z, bbox):
+        """Alle Kachelgeometrien im Ausschnitt bbox=(min_lon, min_lat, max_lon, max_lat)."""
+        z = self._alias.get(z, z)
+        if z in self._whole:
+            return list(self.tile(*self._whole[z]))
+        x_min, y_min = to_mercator(bbox[0], bbox[1])
+        x_max, y_max = to_mercator(bbox[2], bbox[3])
+        tx0, ty0, tx1, ty1 = tiles_for_bbox(z, x_min, y_min, x_max, y_max)
+        out = []
+        for tx in range(tx0, tx1 + 1):
+            for ty in range(ty0, ty1 + 1):
+                out.extend(self.tile(z, tx, ty))
+        return out
+
+
+
+def draw_outline(pdf, archive, bbox, x, y, w, h, color=(30, 60, 120)):
+    """Zeichnet die Polygone im Ausschnitt bbox als Flaechen in das Rechteck (x, y, w, h) in mm. -> Zoomstufe."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    mx0, my0 = to_mercator(min_lon, min_lat)
+    mx1, my1 = to_mercator(max_lon, max_lat)
+    scale = min(w / float(mx1 - mx0), h / float(my1 - my0))
+    z = archive.zoom_for(1.0 / scale / (72 / 25.4))       # ein PDF-Punkt je Pixel
+    pdf.set_fill_color(*[min(255, c + 170) for c in color])
+    with pdf.rect_clip(x, y, w, h):
+        for _, rings in archive.geometry(z, bbox):
+            for ring in rings:
+                px, py = to_mercator(ring[:, 0], ring[:, 1])
+                pts = list(zip(x + (px - mx0) * scale, y + h - (py - my0) * scale))
+                pdf.polygon(pts, style="F")
+    # nur Flaechen fuellen; Umrisslinien wuerden an den Kachelraendern sichtbar
+    pdf.set_draw_color(*color)
+    pdf.rect(x, y, w, h)
+    return z
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grenzgeometrien vereinfachen und kacheln")
+    parser.add_argument("--src", default=SRC_GEOJSON)
+    parser.add_argument("--out", default=TILES_PATH)
+    parser.add_argument("--zooms", default="6-14", help="z.B. 6-14 oder 8,10,12")
+    parser.add_argument("--method", choices=sorted(SIMPLIFIERS), default="dp")
+    args = parser.parse_args()
+    if "-" in args.zooms:
+        lo, hi = (int(v) for v in args.zooms.split("-"))
+        zooms = range(lo, hi + 1)
+    else:
+        zooms = [int(v) for v in args.zooms.split(",")]
+
+    print("Generiere Kacheln ...")
+    started = time.perf_counter()
+    n = build_tiles(args.src, args.out, zooms, args.method)
+    print(f"  ✓ {args.out}: {n} Kacheln, {os.path.getsize(args.out) / 1e3:.1f} kB "
+          f"(Quelle {os.path.getsize(args.src) / 1e3:.1f} kB, {time.perf_counter() - started:.2f} s)")
+    archive = TileArchive(args.out)
+    for z, count in archive.meta["vertices"].items():
+        note = (f" (wie z{archive.meta['alias'][z]})" if z in archive.meta["alias"]
+                else " (ungekachelt)" if int(z) in archive.meta["untiled"] else "")
+        print(f"    z{z}: {count} Stützpunkte{note}")
+    print("Fertig.")
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Bewegungsverlauf der Einheiten aus vehicles_gps.json.
+
+Der Server ueberschreibt vehicles_gps.json mit dem jeweils letzten Fix je Einheit
+(name, lat, lng, accuracy, created). Dieser Speicher schreibt die Fixes nur
+anhaengend mit, ohne JSON-Schnappschuesse:
+
+  gps_tracks/tracks.open    -- Journal der noch offenen Fixes (FIX_DTYPE)
+  gps_tracks/tracks.chunks  -- versiegelte Bloecke zu je CHUNK_FIXES Fixes einer
+                               Einheit: Zeit (ms) und Koordinaten (1e-7 Grad,
+                               Festkomma) als Deltas, ZigZag + Varint
+  gps_tracks/tracks.index   -- je Block Einheit, Zeitraum, Ausdehnung und Lage
+                               in tracks.chunks (CHUNK_DTYPE) -> Zeitbereichsabfragen
+  gps_tracks/tracks.json    -- Einheiten und Dateistaende
+
+Die letzten RING Fixes je Einheit liegen zusaetzlich in einem Ringpuffer im
+Speicher (latest()). Streckenlaenge, Fahrzeiten und vereinfachte Spuren fuer
+Kartendarstellungen (draw_trails) lesen nur die Bloecke im abgefragten Zeitraum.
+
+Aufruf:  python3 scripts/gps_tracks.py [--data-dir server/data] [--watch SEKUNDEN]
+                                       [--unit NAME] [--from ZEIT] [--to ZEIT] [--pdf DATEI]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import time
+
+import numpy as np
+
+from address_store import decode_varints, encode_varints
+from board_replay import fmt_ms
+from einfo_logs import DATA_DIR
+from geo_tiles import TILES_PATH, TileArchive, douglas_peucker, draw_outline, from_mercator, to_mercator
+from spatial_index import haversine_km
+
+TRACK_DIR = os.path.join(DATA_DIR, "gps_tracks")
+VERSION = 1
+SCALE = 10_000_000                 # Festkomma: 1e-7 Grad (~1 cm)
+CHUNK_FIXES = 240                  # eine Stunde bei 15-Sekunden-Takt
+RING = 32
+MOVING_KMH = 5.0                   # darunter gilt die Einheit als stehend
+MAX_GAP_S = 300                    # laengere Luecken zaehlen weder als Fahrt noch als Stand
+
+FIX_DTYPE = np.dtype([("unit", "<u4"), ("t", "<i8"), ("lat", "<i4"), ("lng", "<i4"), ("acc", "<u2")])
+CHUNK_DTYPE = np.dtype([
+    ("unit", "<u4"), ("count", "<u4"), ("t0", "<i8"), ("t1", "<i8"),
+    ("lat0", "<i4"), ("lng0", "<i4"),
+    ("lat_min", "<i4"), ("lat_max", "<i4"), ("lng_min", "<i4"), ("lng_max", "<i4"),
+    ("offset", "<u8"), ("nbytes", "<u4"),
+])
+
+
+def unit_key(fix):
+    return str(fix.get("realname") or fix.get("name") or fix.get("id") or "").strip()
+
+
+def _ms(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------- Kodierung
+
+def encode_chunk(fixes):
+    """Fixes einer Einheit (FIX_DTYPE, nach Zeit) -> (Indexzeile ohne offset, Bytes)."""
+    head = np.zeros(1, dtype=CHUNK_DTYPE)[0]
+    head["unit"], head["count"] = fixes["unit"][0], len(fixes)
+    head["t0"], head["t1"] = fixes["t"][0], fixes["t"][-1]
+    head["lat0"], head["lng0"] = fixes["lat"][0], fixes["lng"][0]
+    head["lat_min"], head["lat_max"] = fixes["lat"].min(), fixes["lat"].max()
+    head["lng_min"], head["lng_max"] = fixes["lng"].min(), fixes["lng"].max()
+    streams = [np.diff(fixes[f].astype(np.int64), prepend=np.int64(fixes[f][0])) for f in ("t", "lat", "lng")]
+    streams.append(fixes["acc"].astype(np.int64))
+    raw = np.concatenate(streams)
+    payload = encode_varints((raw << 1) ^ (raw >> 63)).tobytes()
+    head["nbytes"] = len(payload)
+    return head, payload
+
+
+def decode_chunk(head, payload):
+    vals = decode_varints(payload)
+    vals = ((vals >> 1) ^ -(vals & 1)).reshape(4, int(head["count"]))
+    out = np.zeros(int(head["count"]), dtype=FIX_DTYPE)
+    out["unit"] = head["unit"]
+    out["t"] = head["t0"] + np.cumsum(vals[0])
+    out["lat"] = head["lat0"] + np.cumsum(vals[1])
+    out["lng"] = head["lng0"] + np.cumsum(vals[2])
+    out["acc"] = vals[3]
+    return out
+
+
+# ---------------------------------------------------------------------- Speicher
+
+class TrackStore:
+    def __init__(self, track_dir=TRACK_DIR, chunk_fixes=CHUNK_FIXES, ring=RING):
+        os.makedirs(track_dir, exist_ok=True)
+        self.chunks_path = os.path.join(track_dir, "tracks.chunks")
+        self.index_path = os.path.join(track_dir, "tracks.index")
+        self.open_path = os.path.join(track_dir, "tracks.open")
+        self.meta_path = os.path.join(track_dir, "tracks.json")
+        self.chunk_fixes = chunk_fixes
+        self.ring_size = ring
+        self._load()
+
+    # -------------------------------------------------------------- Persistenz
+
+    def _load(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            meta = None
+        if not meta or meta.get("version") != VERSION:
+            meta = {"version": VERSION, "units": [], "info": {}, "chunks": 0, "chunk_bytes": 0}
+            for path in (self.chunks_path, self.index_path, self.open_path):
+                open(path, "wb").close()
+        self.meta = meta
+        # Nach einem Abbruch: nur den in tracks.json bestaetigten Stand verwenden
+        for path, size in ((self.chunks_path, meta["chunk_bytes"]),
+                           (self.index_path, meta["chunks"] * CHUNK_DTYPE.itemsize)):
+            if not os.path.exists(path) or os.path.getsize(path) != size:
+                with open(path, "ab") as fh:
+                    fh.truncate(size)
+        self.index = np.fromfile(self.index_path, dtype=CHUNK_DTYPE)
+        self.units = {name: i for i, name in enumerate(meta["units"])}
+        journal = np.fromfile(self.open_path, dtype=FIX_DTYPE) if os.path.exists(self.open_path) \
+            else np.zeros(0, FIX_DTYPE)
+        n = len(self.units)
+        sealed = np.full(n, np.iinfo(np.int64).min, dtype=np.int64)
+        if len(self.index):
+            np.maximum.at(sealed, self.index["unit"], self.index["t1"])
+        journal = journal[(journal["unit"] < n)]
+        journal = journal[journal["t"] > sealed[journal["unit"]]]
+        self.pending = [journal[journal["unit"] == u] for u in range(n)]
+        self._rewrite_journal()
+
+        self.ring = np.zeros((n, self.ring_size), dtype=FIX_DTYPE)
+        self.ring_len = np.zeros(n, dtype=np.int64)
+        for u in range(n):
+            recent = self.pending[u]
+            if len(recent) < self.ring_size:
+                rows = np.flatnonzero(self.index["unit"] == u)
+                if len(rows):
+                    recent = np.concatenate((self._read_chunk(int(rows[-1])), recent))
+            self._push_ring(u, recent)
+
+    def _save(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.meta, fh, ensure_ascii=False)
+        os.replace(tmp, self.meta_path)
+
+    def _rewrite_journal(self):
+        tmp = self.open_path + ".tmp"
+        rest = [p for p in self.pending if len(p)]
+        (np.concatenate(rest) if rest else np.zeros(0, FIX_DTYPE)).tofile(tmp)
+        os.replace(tmp, self.open_path)
+
+    def _read_chunk(self, row):
+        head = self.index[row]
+        with open(self.chunks_path, "rb") as fh:
+            fh.seek(int(head["offset"]))
+            return decode_chunk(head, fh.read(int(head["nbytes"])))
+
+    def _push_ring(self, u, fixes):
+        fixes = fixes[-self.ring_size:]
+        if not len(fixes):
+            return
+        slots = (self.ring_len[u] + np.arange(len(fixes))) % self.ring_size
+        self.ring[u, slots] = fixes
+        self.ring_len[u] += len(fixes)
+
+    def _unit(self, key, fix):
+        u = self.units.get(key)
+        if u is None:
+            u = self.units[key] = len(self.meta["units"])
+            self.meta["units"].append(key)
+            self.pending.append(np.zeros(0, FIX_DTYPE))
+            self.ring = np.concatenate((self.ring, np.zeros((1, self.ring_size), dtype=FIX_DTYPE)))
+            self.ring_len = np.append(self.ring_len, 0)
+        self.meta["info"][key] = {k: fix.get(k) for k in ("name", "realname", "subline", "color", "userId")}
+        return u
+
+    # -------------------------------------------------------------- Schreiben
+
+    def add(self, fixes):
+        """Nimmt Fixes (dicts wie in vehicles_gps.json) auf; bekannte/aeltere werden uebersprungen.
+
+        -> Anzahl neuer Fixes.
+        """
+        new, last = [], {}
+        for fix in fixes:
+            key, t = unit_key(fix), _ms(fix.get("created"))
+            if not key or t is None or fix.get("lat") is None or fix.get("lng") is None:
+                continue
+            u = self._unit(key, fix)
+            if u not in last:
+                last[u] = self.latest_t(u)
+            if last[u] is not None and t <= last[u]:
+                continue
+            last[u] = t
+            acc = min(max(int(fix.get("accuracy") or 0), 0), 65535)
+            new.append((u, t, int(round(float(fix["lat"]) * SCALE)), int(round(float(fix["lng"]) * SCALE)), acc))
+        if not new:
+            return 0
+        batch = np.array(new, dtype=FIX_DTYPE)
+        batch = batch[np.lexsort((batch["t"], batch["unit"]))]
+        with open(self.open_path, "ab") as fh:
+            batch.tofile(fh)
+        for u in np.unique(batch["unit"]):
+            fixes_u = batch[batch["unit"] == u]
+            self.pending[u] = np.concatenate((self.pending[u], fixes_u))
+            self._push_ring(int(u), fixes_u)
+        self._seal()
+        self._save()
+        return len(batch)
+
+    def _seal(self, force=False):
+        """Versiegelt volle (mit force: alle) offenen Bloecke."""
+        heads, payloads = [], []
+        offset = self.meta["chunk_bytes"]
+        for u, fixes in enumerate(self.pending):
+            while len(fixes) >= self.chunk_fixes or (force and len(fixes)):
+                part, fixes = fixes[:self.chunk_fixes], fixes[self.chunk_fixes:]
+                head, payload = encode_chunk(part)
+                head["offset"] = offset
+                offset += len(payload)
+                heads.append(head)
+                payloads.append(payload)
+            self.pending[u] = fixes
+        if not heads:
+            return 0
+        heads = np.array(heads, dtype=CHUNK_DTYPE)
+        with open(self.chunks_path, "ab") as fh:
+            fh.write(b"".join(payloads))
+        with open(self.index_path, "ab") as fh:
+            heads.tofile(fh)
+        self.index = np.concatenate((self.index, heads))
+        self.meta["chunks"] = len(self.index)
+        self.meta["chunk_bytes"] = offset
+        self._save()                   # Bloecke zuerst bestaetigen, dann das Journal kuerzen
+        self._rewrite_journal()
+        return len(heads)
+
+    def flush(self):
+        """Versiegelt alle offenen Fixes (z.B. am Uebungsende)."""
+        n = self._seal(force=True)
+        self._save()
+        return n
+
+    def poll(self, path=os.path.join(DATA_DIR, "vehicles_gps.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                doc = json.load(fh)
+        except (OSError, ValueError):
+            return 0
+        return self.add([f for f in doc if isinstance(f, dict)] if isinstance(doc, list) else [])
+
+    # -------------------------------------------------------------- Lesen
+
+    def unit_id(self, unit):
+        if isinstance(unit, (int, np.integer)):
+            return int(unit)
+        if unit in self.units:
+            return self.units[unit]
+        matches = [u for name, u in self.units.items() if name.lower().startswith(str(unit).lower())]
+        if len(matches) == 1:
+            return matches[0]
+        raise KeyError(unit)
+
+    def latest_t(self, u):
+        n = self.ring_len[u]
+        return int(self.ring[u, (n - 1) % self.ring_size]["t"]) if n else None
+
+    def latest(self, unit=None):
+        """Letzte Position -> {"unit", "t", "lat", "lng", "accuracy"}; ohne unit fuer alle Einheiten."""
+        units = range(len(self.ring_len)) if unit is None else [self.unit_id(unit)]
+        out = []
+        for u in units:
+            n = self.ring_len[u]
+            if not n:
+                continue
+            fix = self.ring[u, (n - 1) % self.ring_size]
+            out.append({"unit": self.meta["units"][u], "t": int(fix["t"]),
+                        "lat": fix["lat"] / SCALE, "lng": fix["lng"] / SCALE, "accuracy": int(fix["acc"])})
+        return out if unit is None else (out[0] if out else None)
+
+    def recent(self, unit):
+        """Die letzten RING Fixes aus dem Ringpuffer (FIX_DTYPE, nach Zeit)."""
+        u = self.unit_id(unit)
+        n = min(self.ring_len[u], self.ring_size)
+        slots = (self.ring_len[u] - n + np.arange(n)) % self.ring_size
+        return self.ring[u, slots]
+
+    def fixes(self, unit, start=None, end=None):
+        """Fixes einer Einheit im Zeitraum [start, end) (ms) -> FIX_DTYPE.
+
+        Nur Bloecke, deren Zeitraum den Ausschnitt beruehrt, werden gelesen.
+        """
+        u = self.unit_id(unit)
+        lo = np.iinfo(np.int64).min if start is None else int(start)
+        hi = np.iinfo(np.int64).max if end is None else int(end)
+        rows = np.flatnonzero((self.index["unit"] == u) & (self.index["t1"] >= lo) & (self.index["t0"] < hi))
+        parts = []
+        if len(rows):
+            with open(self.chunks_path, "rb") as fh:
+                for row in rows:
+                    head = self.index[row]
+                    fh.seek(int(head["offset"]))
+                    parts.append(decode_chunk(head, fh.read(int(head["nbytes"]))))
+        parts.append(self.pending[u])
+        out = np.concatenate(parts)
+        return out[(out["t"] >= lo) & (out["t"] < hi)]
+
+    def track(self, unit, start=None, end=None):
+        """(t [ms], lat, lng) als Arrays in Grad."""
+        f = self.fixes(unit, start, end)
+        return f["t"], f["lat"] / SCALE, f["lng"] / SCALE
+
+    def length_km(self, unit, start=None, end=None):
+        _, lat, lng = self.track(unit, start, end)
+        if len(lat) < 2:
+            return 0.0
+        return float(haversine_km(lat[:-1], lng[:-1], lat[1:], lng[1:]).sum())
+
+    def drive_times(self, unit, start=None, end=None, moving_kmh=MOVING_KMH, max_gap_s=MAX_GAP_S):
+        """{"moving", "standing", "gaps"} in Sekunden und die gefahrene Strecke ("km")."""
+        t, lat, lng = self.track(unit, start, end)
+        if len(t) < 2:
+            return {"moving": 0.0, "standing": 0.0, "gaps": 0.0, "km": 0.0}
+        dt = np.diff(t) / 1000.0
+        km = haversine_km(lat[:-1], lng[:-1], lat[1:], lng[1:])
+        gap = dt > max_gap_s
+        speed = np.where(dt > 0, km / np.maximum(dt, 1e-9) * 3600, 0.0)
+        moving = ~gap & (speed >= moving_kmh)
+        return {"moving": float(dt[moving].sum()), "standing": float(dt[~gap & ~moving].sum()),
+                "gaps": float(dt[gap].sum()), "km": float(km[moving].sum())}
+
+    def trail(self, unit, start=None, end=None, tolerance_m=10.0):
+        """Vereinfachte Spur (Douglas-Peucker in Web-Mercator) -> Array (n, 2) lon/lat."""
+        _, lat, lng = self.track(unit, start, end)
+        if len(lat) < 3:
+            return np.stack([lng, lat], axis=1)
+        x, y = to_mercator(lng, lat)
+        # Mercator-Meter auf Bodenmeter: Toleranz mit 1/cos(Breite) skalieren
+        tolerance = tolerance_m / np.cos(np.radians(float(lat.mean())))
+        points = douglas_peucker(np.stack([x, y], axis=1), tolerance)
+        return np.stack(from_mercator(points[:, 0], points[:, 1]), axis=1)
+
+    def stats(self):
+        pending = sum(len(p) for p in self.pending)
+        sealed = int(self.index["count"].sum()) if len(self.index) else 0
+        return {"units": len(self.units), "fixes": sealed + pending, "chunks": len(self.index),
+                "pending": pending, "bytes": self.meta["chunk_bytes"] + pending * FIX_DTYPE.itemsize}
+
+
+def draw_trails(pdf, trails, x, y, w, h, colors=None, tiles=None):
+    """Zeichnet Spuren [(beschriftung, Array (n, 2) lon/lat)] in das Rechteck (x, y, w, h) in mm.
+
+    Mit `tiles` (geo_tiles.TileArchive) liegen die Gemeindeflaechen im Ausschnitt darunter.
+    """
+    trails = [(label, pts) for label, pts in trails if len(pts)]
+    if not trails:
+        return
+    allpts = np.concatenate([pts for _, pts in trails])
+    mx, my = to_mercator(allpts[:, 0], allpts[:, 1])
+    mx0, my0 = mx.min(), my.min()
+    scale = min(w / max(float(mx.max() - mx0), 1.0), h / max(float(my.max() - my0), 1.0))
+    palette = colors or [(30, 60, 120), (220, 38, 38), (22, 163, 74), (234, 179, 8), (120, 60, 160)]
+    if tiles is not None:
+        lon0, lat0 = from_mercator(mx0, my0)
+        lon1, lat1 = from_mercator(mx0 + w / scale, my0 + h / scale)
+        draw_outline(pdf, tiles, (float(lon0), float(lat0), float(lon1), float(lat1)), x, y, w, h)
+    pdf.set_draw_color(30, 60, 120)
+    pdf.rect(x, y, w, h)
+    pdf.set_font("DejaVu", "", 7)
+    for i, (label, pts) in enumerate(trails):
+        px, py = to_mercator(pts[:, 0], pts[:, 1])
+        points = list(zip(x + (px - mx0) * scale, y + h - (py - my0) * scale))
+        pdf.set_draw_color(*palette[i % len(palette)])
+        if len(points) > 1:
+            pdf.polyline(points)
+        pdf.set_text_color(*palette[i % len(palette)])
+        pdf.text(points[-1][0] + 1, points[-1][1], str(label))
+    pdf.set_text_color(30, 30, 30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GPS-Fixes der Einheiten mitschreiben und auswerten")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--track-dir", default=None)
+    parser.add_argument("--watch", type=float, default=None, help="vehicles_gps.json alle N Sekunden einlesen")
+    parser.add_argument("--unit", default=None, help="Einheit auswerten (Name oder Anfang davon)")
+    parser.add_argument("--from", dest="start", default=None, help="ISO-Zeitpunkt")
+    parser.add_argument("--to", dest="end", default=None, help="ISO-Zeitpunkt")
+    parser.add_argument("--pdf", default=None, help="Spuren mit Gemeindegrenzen als PDF-Karte schreiben")
+    parser.add_argument("--tiles", default=TILES_PATH, help="Kacheldatei aus geo_tiles.py")
+    args = parser.parse_args()
+
+    store = TrackStore(args.track_dir or os.path.join(args.data_dir, "gps_tracks"))
+    gps_path = os.path.join(args.data_dir, "vehicles_gps.json")
+    print("Schreibe GPS-Spuren ...")
+    while True:
+        added = store.poll(gps_path)
+        if added or args.watch is None:
+            s = store.stats()
+            print(f"  ✓ {datetime.datetime.now():%H:%M:%S} {added} neue Fixes; {s['units']} Einheiten, "
+                  f"{s['fixes']} Fixes in {s['chunks']} Bloecken ({s['bytes'] / 1e3:.1f} kB)")
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+    if args.unit:
+        start, end = (_ms(v) if v else None for v in (args.start, args.end))
+        started = time.perf_counter()
+        d = store.drive_times(args.unit, start, end)
+        trail = store.trail(args.unit, start, end)
+        last = store.latest(args.unit)
+        print(f"  {store.meta['units'][store.unit_id(args.unit)]}: {store.length_km(args.unit, start, end):.2f} km, "
+              f"Fahrt {d['moving'] / 60:.0f} min, Stand {d['standing'] / 60:.0f} min, "
+              f"Spur {len(trail)} Punkte ({(time.perf_counter() - started) * 1000:.1f} ms)")
+        if last:
+            print(f"  zuletzt {fmt_ms(last['t'])}: {last['lat']:.6f}, {last['lng']:.6f} (±{last['accuracy']} m)")
+    if args.pdf:
+        from generate_help_pdfs import HilfePDF
+
+        start, end = (_ms(v) if v else None for v in (args.start, args.end))
+        units = [store.meta["units"][store.unit_id(args.unit)]] if args.unit else store.meta["units"]
+        trails = [(unit, store.trail(unit, start, end)) for unit in units]
+        tiles = TileArchive(args.tiles) if os.path.exists(args.tiles) else None
+        pdf = HilfePDF("GPS-Spuren")
+        pdf.add_page()
+        draw_trails(pdf, trails, 10, 25, pdf.w - 20, pdf.h - 45, tiles=tiles)
+        pdf.output(args.pdf)
+        print(f"  ✓ {args.pdf}: {sum(len(t) > 0 for _, t in trails)} Spuren"
+              + ("" if tiles else f" (ohne Gemeindegrenzen, {args.tiles} fehlt)"))
+    print("Fertig.")
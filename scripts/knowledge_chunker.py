@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Chunking der Knowledge-Quellen zu JSONL im Schema von
+chatbot/server/rag/jsonl_schema_validator.js ("einfo-jsonl-1.0").
+
+Jede Quelle laeuft als Kette von Generatoren, ohne das Dokument komplett zu laden:
+  Zeilen (PDF-Seiten aus pdf_extract.py, .md/.txt) -> normalise -> sections
+  -> chunk_tokens (Wortgrenze, Ueberlappung, bevorzugt am Satzende) -> enrich
+Adress-/POI-JSONL (gemeinde_*.jsonl) wird je Zeile direkt ins Schema gebracht.
+
+Quellen werden in einem Prozesspool verarbeitet (eine Quelle je Task, Worker nach
+MAX_TASKS_PER_CHILD Tasks neu gestartet); jeder Worker schreibt eine Teildatei
+nach knowledge_index/chunks/, die danach zu knowledge_chunks.jsonl zusammengefuegt
+werden. Unveraenderte Quellen (manifest.json) werden nicht neu gechunkt.
+
+Aufruf:  python3 scripts/knowledge_chunker.py [--src DIR] [--adressen DIR] [--out DATEI]
+                                             [--max-tokens N] [--overlap N] [--workers N] [--cache DATEI]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+import unicodedata
+from multiprocessing import Pool
+
+import address_store
+import pdf_extract
+from gemeinde_dedup import slug
+
+OUT_PATH = os.path.join(address_store.INDEX_DIR, "knowledge_chunks.jsonl")
+MANIFEST_NAME = "manifest.json"
+
+SCHEMA_VERSION = "einfo-jsonl-1.0"
+REGION = "Kärnten"
+MAX_CONTENT_LENGTH = 5000          # wie jsonl_schema_validator.js
+MAX_TOKENS = 220
+OVERLAP = 40
+MAX_TASKS_PER_CHILD = 25
+DOC_ID_VERSION = 2                 # 2: doc_ids aus dem relativen Quellpfad (statt Inhalts-Hash)
+TEXT_SUFFIXES = (".md", ".txt")
+
+# Kopf-/Fusszeilen ("37 von 126", "Seite 3", reine Seitenzahlen)
+PAGE_LINE = re.compile(r"^(.{0,90}\b\d+\s+von\s+\d+\b.{0,90}|seite\s+\d+(\s*(/|von)\s*\d+)?|\d{1,4})$", re.I)
+HYPHEN_END = re.compile(r"([a-zäöüß])\s?-$")
+KEEP_HYPHEN_BEFORE = ("und", "oder", "bzw", "sowie", "bis")
+MD_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+NUM_HEADING = re.compile(r"^(\d{1,2}(?:\.\d{1,2}){0,4})\.?\s+([A-ZÄÖÜ][^.;:,]{2,90})$")
+PARAGRAPH_HEADING = re.compile(r"^(§\s*\d+[a-z]?)\.?\s*(.{0,90})$")
+SENTENCE_END = re.compile(r"[.!?:;]$")
+CONTROL = dict.fromkeys(c for c in range(32) if c not in (9, 10))
+CONTROL[0xAD] = None                # weiches Trennzeichen
+
+
+# ----------------------------------------------------------------------
+# Quellen -> (seite, zeile)
+
+def pdf_lines(digest, cache_path=pdf_extract.CACHE_PATH):
+    con = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True)
+    try:
+        for page, text in con.execute("SELECT page, text FROM pages WHERE file_hash = ? ORDER BY page", (digest,)):
+            for line in text.splitlines():
+                yield page + 1, line
+            yield page + 1, ""
+    finally:
+        con.close()
+
+
+def text_lines(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            yield 1, line.rstrip("\n")
+
+
+# ----------------------------------------------------------------------
+# Generator-Stufen
+
+def normalise(lines):
+    """Unicode/Leerraum vereinheitlichen, Kopf-/Fusszeilen entfernen, Silbentrennung aufheben.
+
+    Leere Zeilen bleiben als Absatzgrenze ("") erhalten.
+    """
+    carry, carry_page = "", None
+    for page, line in lines:
+        line = unicodedata.normalize("NFKC", line).translate(CONTROL)
+        line = " ".join(line.split())
+        if line and PAGE_LINE.match(line):
+            continue
+        if carry:
+            first = line.split(" ", 1)[0] if line else ""
+            if first[:1].islower() and first.rstrip(".,;") not in KEEP_HYPHEN_BEFORE:
+                line = carry + line
+            else:
+                yield carry_page, carry + "-"
+            carry = ""
+        if not line:
+            yield page, ""
+            continue
+        m = HYPHEN_END.search(line)
+        if m:
+            carry, carry_page = line[:m.start()] + m.group(1), page
+            continue
+        yield page, line
+    if carry:
+        yield carry_page, carry + "-"
+
+
+def _heading(line):
+    """(ebene, titel) fuer Ueberschriftszeilen, sonst None."""
+    m = MD_HEADING.match(line)
+    if m:
+        return len(m.group(1)), m.group(2)
+    m = NUM_HEADING.match(line)
+    if m:
+        return m.group(1).count(".") + 1, f"{m.group(1)} {m.group(2)}"
+    m = PARAGRAPH_HEADING.match(line)
+    if m and len(line) <= 100:
+        return 9, " ".join(filter(None, (m.group(1), m.group(2))))
+    return None
+
+
+def sections(lines):
+    """(seite, abschnitt, zeile); abschnitt = Ueberschriftenpfad "1 Titel > 1.2 Unter"."""
+    stack = []
+    for page, line in lines:
+        head = _heading(line) if line else None
+        if head:
+            level, title = head
+            stack = [s for s in stack if s[0] < level] + [(level, title)]
+            continue
+        yield page, " > ".join(t for _, t in stack), line
+
+
+def chunk_tokens(items, max_tokens=MAX_TOKENS, overlap=OVERLAP):
+    """Fasst Woerter zu Chunks <= max_tokens zusammen -> (abschnitt, seite_von, seite_bis, text).
+
+    Geschnitten wird bevorzugt am letzten Satzende im hinteren Viertel; die letzten
+    `overlap` Woerter werden in den naechsten Chunk desselben Abschnitts uebernommen.
+    Ein Abschnittswechsel beendet den Chunk immer.
+    """
+    words, pages, fresh, current = [], [], 0, None
+
+    def emit(n):
+        return current, pages[0], pages[n - 1], " ".join(words[:n])
+
+    for page, section, line in items:
+        if section != current:
+            if fresh:
+                yield emit(len(words))
+            words, pages, fresh, current = [], [], 0, section
+        for word in line.split():
+            words.append(word)
+            pages.append(page)
+            fresh += 1
+            if len(words) >= max_tokens:
+                cut = len(words)
+                for i in range(len(words) - 1, max_tokens * 3 // 4, -1):
+                    if SENTENCE_END.search(words[i - 1]):
+                        cut = i
+                        break
+                yield emit(cut)
+                keep = max(cut - overlap, 0)
+                words, pages = words[keep:], pages[keep:]
+                fresh = len(words) - (cut - keep)
+    if fresh:
+        yield emit(len(words))
+
+
+def enrich(chunks, doc):
+    """Chunk-Tupel -> Records im Validator-Schema. `doc`: key, title, file, kind."""
+    for idx, (section, page_from, page_to, text) in enumerate(chunks):
+        record = {
+            "schema_version": SCHEMA_VERSION,
+            "doc_id": f"{doc['kind']}:{doc['key']}:{idx}",
+            "doc_type": "document_snippet",
+            "source": "KNOWLEDGE",
+            "region": REGION,
+            "title": f"{doc['title']} – {section}" if section else doc["title"],
+            "file": doc["file"],
+            "section": section or None,
+            "chunk_index": idx,
+            "tokens": len(text.split()),
+            "content": text[:MAX_CONTENT_LENGTH],
+        }
+        if doc["kind"] == "pdf":
+            record["page_from"], record["page_to"] = page_from, page_to
+        yield record
+
+
+def address_records(path):
+    """gemeinde_*.jsonl -> Records im Validator-Schema (doc_id osm:<typ>:<id>, je Datei einmal)."""
+    seen = set()
+    for _, _, _, rec in address_store.iter_records([path]):
+        doc_id = f"osm:{rec.get('osm_type')}:{rec['osm_id']}"
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        doc_type = (rec.get("doc_type") or "address").lower()
+        doc_type = {"addresses": "address", "buildings": "building", "pois": "poi"}.get(doc_type, doc_type)
+        full = rec.get("address") if isinstance(rec.get("address"), str) else None
+        out = {
+            "schema_version": SCHEMA_VERSION,
+            "doc_id": doc_id,
+            "doc_type": doc_type,
+            "source": rec.get("source") or "OSM",
+            "region": rec.get("region") or REGION,
+            "title": rec.get("name") or full or "Untitled",
+            "name": rec.get("name"),
+            "category": rec.get("category"),
+            "address": {
+                "full": full,
+                "street": rec.get("street"),
+                "housenumber": rec.get("housenumber"),
+                "postcode": rec.get("postcode"),
+                "city": rec.get("place"),
+                "municipality": rec.get("place"),
+            },
+            "ids": {"osm_type": rec.get("osm_type"), "osm_id": rec["osm_id"]},
+            "tags": rec.get("tags") or {},
+        }
+        if rec.get("lat") is not None and rec.get("lon") is not None:
+            out["geo"] = {"lat": float(rec["lat"]), "lon": float(rec["lon"])}
+        content = (rec.get("content") or "").strip()
+        if not content:
+            lines = [out["title"], f"Kategorie: {out['category']}" if out["category"] else None,
+                     f"Adresse: {full}" if full else None]
+            content = "\n".join(filter(None, lines))
+        out["content"] = content[:MAX_CONTENT_LENGTH]
+        yield out
+
+
+# ----------------------------------------------------------------------
+# Quellen und Worker
+
+def _source_key(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def list_sources(src_dir=pdf_extract.KNOWLEDGE_DIR, adressen_dir=address_store.GEMEINDE_DIR):
+    """[(art, pfad)] - PDFs, Text-/Markdown-Dateien, Adress-JSONL."""
+    sources = [("pdf", p) for p in pdf_extract.pdf_files(src_dir)]
+    for path in sorted(glob.glob(os.path.join(src_dir, "**", "*"), recursive=True)):
+        if path.lower().endswith(TEXT_SUFFIXES) and os.path.getsize(path) and os.path.basename(path) != "Dummy.txt":
+            sources.append(("text", path))
+    sources += [("jsonl", p) for p in address_store.gemeinde_files(adressen_dir)]
+    return sources
+
+
+def part_name(kind, path):
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+    base = slug(os.path.splitext(os.path.basename(path))[0].replace("_", " ")).replace("-", "_")[:60]
+    return f"{kind}-{base}-{digest}.jsonl"
+
+
+def doc_key(path, src_dir=pdf_extract.KNOWLEDGE_DIR):
+    """Schluessel fuer doc_ids: relativer Quellpfad, damit inhaltsgleiche PDFs und
+    gleichnamige Dateien in verschiedenen Ordnern eigene ids bekommen."""
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(src_dir)).replace(os.sep, "/")
+    return hashlib.sha1(rel.encode("utf-8")).hexdigest()[:16]
+
+
+def records_for(kind, path, digest=None, max_tokens=MAX_TOKENS, overlap=OVERLAP, cache_path=pdf_extract.CACHE_PATH,
+                src_dir=pdf_extract.KNOWLEDGE_DIR):
+    """Record-Generator einer Quelle. Der Inhalts-digest dient nur als Cache-Schluessel (PDF-Text)."""
+    if kind == "jsonl":
+        return address_records(path)
+    name = os.path.basename(path)
+    lines = pdf_lines(digest, cache_path) if kind == "pdf" else text_lines(path)
+    doc = {"kind": kind, "key": doc_key(path, src_dir), "file": name,
+           "title": os.path.splitext(name)[0].replace("_", " ").strip()}
+    return enrich(chunk_tokens(sections(normalise(lines)), max_tokens, overlap), doc)
+
+
+def _chunk_source(task):
+    kind, path, digest, part_path, options = task
+    started = time.perf_counter()
+    count, chars = 0, 0
+    tmp = part_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        for record in records_for(kind, path, digest, **options):
+            line = json.dumps(record, ensure_ascii=False)
+            fh.write(line + "\n")
+            count += 1
+            chars += len(record["content"])
+    os.replace(tmp, part_path)
+    return path, count, chars, time.perf_counter() - started
+
+
+def chunk_all(src_dir=pdf_extract.KNOWLEDGE_DIR, adressen_dir=address_store.GEMEINDE_DIR, out_path=OUT_PATH,
+              max_tokens=MAX_TOKENS, overlap=OVERLAP, workers=None, cache_path=pdf_extract.CACHE_PATH):
+    """Chunkt alle geaenderten Quellen und fuegt die Teildateien zu out_path zusammen.
+
+    Liefert [(pfad, records, zeichen, sekunden|None)] in Quellreihenfolge (None = aus manifest).
+    """
+    sources = list_sources(src_dir, adressen_dir)
+    pdfs = [p for kind, p in sources if kind == "pdf"]
+    status, failed = pdf_extract.extract_all(cache_path=cache_path, workers=workers, paths=pdfs)
+    sources = [(kind, p) for kind, p in sources if p not in failed]
+
+    part_dir = os.path.join(os.path.dirname(os.path.abspath(out_path)), "chunks")
+    os.makedirs(part_dir, exist_ok=True)
+    manifest_path = os.path.join(part_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = {}
+    options = {"max_tokens": max_tokens, "overlap": overlap, "cache_path": cache_path, "src_dir": src_dir}
+    settings = f"{max_tokens}:{overlap}:{DOC_ID_VERSION}"
+
+    tasks, results, parts = [], {}, []
+    for kind, path in sources:
+        part_path = os.path.join(part_dir, part_name(kind, path))
+        parts.append(part_path)
+        digest = status[path][0] if kind == "pdf" else None
+        key = f"{settings}:{digest or _source_key(path)}"
+        entry = manifest.get(path)
+        if entry and entry["key"] == key and os.path.exists(part_path):
+            results[path] = (path, entry["records"], entry["chars"], None)
+            continue
+        tasks.append((kind, path, digest, part_path, options))
+        manifest[path] = {"key": key}
+
+    if tasks:
+        with Pool(workers, maxtasksperchild=MAX_TASKS_PER_CHILD) as pool:
+            for path, count, chars, seconds in pool.imap_unordered(_chunk_source, tasks, chunksize=1):
+                results[path] = (path, count, chars, seconds)
+                manifest[path].update(records=count, chars=chars)
+
+    manifest = {p: manifest[p] for _, p in sources}
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1)
+
+    # alte Teildateien entfernter Quellen loeschen
+    keep = {os.path.basename(p) for p in parts} | {MANIFEST_NAME}
+    for name in os.listdir(part_dir):
+        if name not in keep:
+            os.remove(os.path.join(part_dir, name))
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as out:
+        for part_path in parts:
+            with open(part_path, "rb") as fh:
+                shutil.copyfileobj(fh, out)
+    os.replace(tmp, out_path)
+    return [results[p] for _, p in sources], failed
+
+
+def iter_chunks(path=OUT_PATH):
+    """Records aus knowledge_chunks.jsonl zeilenweise."""
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knowledge-Quellen zu Chunk-JSONL verarbeiten")
+    parser.add_argument("--src", default=pdf_extract.KNOWLEDGE_DIR)
+    parser.add_argument("--adressen", default=address_store.GEMEINDE_DIR)
+    parser.add_argument("--out", default=OUT_PATH)
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--overlap", type=int, default=OVERLAP)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=pdf_extract.CACHE_PATH, help="SQLite-Cache der PDF-Texte")
+    args = parser.parse_args()
+
+    print("Generiere Knowledge-Chunks ...")
+    started = time.perf_counter()
+    results, failed = chunk_all(args.src, args.adressen, args.out, args.max_tokens, args.overlap, args.workers,
+                                args.cache)
+    fresh = [r for r in results if r[3] is not None]
+    print(f"  ✓ {len(results)} Quellen ({len(fresh)} neu gechunkt), "
+          f"{sum(r[1] for r in results)} Records in {time.perf_counter() - started:.2f} s")
+    for path, count, chars, seconds in sorted(fresh, key=lambda r: -r[3])[:10]:
+        print(f"    {seconds:6.2f} s  {os.path.basename(path)}: {count} Records, {chars / max(count, 1):.0f} Zeichen/Record")
+    for path, error in failed.items():
+        print(f"  ! {os.path.basename(path)} uebersprungen: {error}")
+    print(f"  ✓ {args.out}")
+    print("Fertig.")
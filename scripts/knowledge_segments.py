@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Inkrementelle Aktualisierung des Knowledge-Index (Basis- + Delta-Segment).
+
+Einheit ist die Teildatei je Quelle aus knowledge_chunker.py (knowledge_index/chunks/);
+ihr Inhalts-Hash bestimmt, ob sich eine Quelle geaendert hat.
+  - Basis-Segment: Chunks, vector_index und bm25_index aller Quellen zum Zeitpunkt
+    der letzten Kompaktierung.
+  - Delta-Segment: neue/geaenderte Quellen seit der Basis (klein, bei jeder
+    Aktualisierung komplett neu gebaut).
+  - Tombstones: doc_ids der Basis, deren Quelle geaendert oder entfernt wurde und die
+    keine unveraenderte Quelle der Basis ebenfalls liefert (je Quelle, nicht je doc_id).
+  - Je Segment bleibt von nahezu gleichen Chunks nur der kanonische (near_duplicates.py).
+  - Kompaktierung (Hintergrund-Thread), sobald das Delta COMPACT_RATIO der Basis
+    bzw. COMPACT_MIN Chunks ueberschreitet: neue Basis, leeres Delta.
+Zustand in segments/state.json (Version wird bei jeder Aenderung erhoeht);
+SegmentedIndex laedt bei geaenderter Version neu und fuehrt Basis und Delta
+in der Suche zusammen.
+
+Aufruf:  python3 scripts/knowledge_segments.py [--refresh] [--compact] [--watch SEK] [--query TEXT]
+                                              [--dir DIR] [--src DIR] [--chunks DATEI] [--cache DATEI]
+         python3 scripts/knowledge_segments.py --check
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import address_store
+import bm25_index
+import knowledge_chunker
+import near_duplicates
+import pdf_extract
+import vector_index
+
+SEGMENT_DIR = os.path.join(address_store.INDEX_DIR, "segments")
+STATE_NAME = "state.json"
+COMPACT_RATIO = 0.1
+COMPACT_MIN = 2000
+
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _doc_ids(part_path):
+    with open(part_path, "r", encoding="utf-8") as fh:
+        return [json.loads(line)["doc_id"] for line in fh if line.strip()]
+
+
+def build_segment(seg_dir, name, part_paths, dedup=True):
+    """Fuegt Teildateien zu <name>.jsonl zusammen und baut .vec/.bm25. Gibt die Anzahl Chunks zurueck.
+
+    Mit dedup bleibt je Cluster nahezu gleicher Chunks nur der kanonische (near_duplicates.py).
+    """
+    chunks = os.path.join(seg_dir, name + ".jsonl")
+    raw = chunks + ".all.tmp" if dedup else chunks
+    with open(raw, "wb") as out:
+        for path in part_paths:
+            with open(path, "rb") as fh:
+                shutil.copyfileobj(fh, out)
+    if dedup:
+        near_duplicates.dedup_chunks(raw, chunks)
+        os.remove(raw)
+    n = vector_index.build_index(chunks, os.path.join(seg_dir, name + ".vec"))
+    if n:
+        bm25_index.build_index(chunks, os.path.join(seg_dir, name + ".bm25"))
+    return n
+
+
+class SegmentManager:
+    """Pflegt Basis, Delta und Tombstones anhand der Quell-Teildateien."""
+
+    def __init__(self, seg_dir=SEGMENT_DIR, src_dir=pdf_extract.KNOWLEDGE_DIR,
+                 adressen_dir=address_store.GEMEINDE_DIR, chunks_path=knowledge_chunker.OUT_PATH,
+                 cache_path=pdf_extract.CACHE_PATH):
+        self.seg_dir = seg_dir
+        self.src_dir = src_dir
+        self.adressen_dir = adressen_dir
+        self.chunks_path = chunks_path
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self._chunk_lock = threading.Lock()
+        self._building = set()
+        self._compactor = None
+        os.makedirs(seg_dir, exist_ok=True)
+
+    # -- Zustand -------------------------------------------------------
+
+    @property
+    def state_path(self):
+        return os.path.join(self.seg_dir, STATE_NAME)
+
+    def load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {"version": 0, "base": None, "delta": None, "tombstones": []}
+
+    def _save_state(self, state):
+        state["version"] += 1
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(state, fh, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+        self._cleanup(state)
+
+    def _cleanup(self, state):
+        """Entfernt Segmentdateien, die der Zustand nicht mehr referenziert."""
+        keep = {STATE_NAME}
+        for seg in (state["base"], state["delta"]):
+            if seg:
+                keep.update(seg["name"] + ext for ext in (".jsonl", ".vec", ".bm25", ".sources.json"))
+        for name in os.listdir(self.seg_dir):
+            if name not in keep and name.split(".", 1)[0] not in self._building and not name.endswith(".tmp"):
+                os.remove(os.path.join(self.seg_dir, name))
+
+    def _base_sources(self, state):
+        if not state["base"]:
+            return {}
+        with open(os.path.join(self.seg_dir, state["base"]["name"] + ".sources.json"), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+    # -- Quellen -------------------------------------------------------
+
+    def current_sources(self):
+        """Chunkt geaenderte Quellen und liefert {quelle: (teildatei, hash)}."""
+        with self._chunk_lock:
+            _, failed = knowledge_chunker.chunk_all(self.src_dir, self.adressen_dir, self.chunks_path,
+                                                    cache_path=self.cache_path)
+        part_dir = os.path.join(os.path.dirname(os.path.abspath(self.chunks_path)), "chunks")
+        out = {}
+        for kind, path in knowledge_chunker.list_sources(self.src_dir, self.adressen_dir):
+            if path in failed:
+                continue
+            part = os.path.join(part_dir, knowledge_chunker.part_name(kind, path))
+            out[path] = (part, _file_hash(part))
+        return out
+
+    # -- Aktualisierung ------------------------------------------------
+
+    def _update_delta(self, state, sources):
+        """Delta und Tombstones relativ zur Basis neu bestimmen. Gibt (neu, geaendert, entfernt) zurueck."""
+        base = self._base_sources(state)
+        added = [p for p in sources if p not in base]
+        changed = [p for p in sources if p in base and base[p]["hash"] != sources[p][1]]
+        removed = [p for p in base if p not in sources]
+        wanted = {p: sources[p][1] for p in added + changed}
+        # nur doc_ids, die ausschliesslich von geaenderten/entfernten Quellen stammen
+        kept = {d for p in base if p in sources and p not in changed for d in base[p]["doc_ids"]}
+        tombstones = sorted({d for p in changed + removed for d in base[p]["doc_ids"]} - kept)
+
+        current = state["delta"]["sources"] if state["delta"] else {}
+        if wanted != current or tombstones != state["tombstones"]:
+            delta = None
+            if wanted:
+                name = f"delta-{state['version'] + 1}"
+                count = build_segment(self.seg_dir, name, [sources[p][0] for p in wanted])
+                delta = {"name": name, "sources": wanted, "count": count}
+            state["delta"], state["tombstones"] = delta, tombstones
+            self._save_state(state)
+        return added, changed, removed
+
+    def refresh(self, background=True):
+        """Delta aktualisieren; ohne Basis wird sofort kompaktiert. Liefert eine Zusammenfassung."""
+        sources = self.current_sources()
+        with self.lock:
+            state = self.load_state()
+            if not state["base"]:
+                state["base"], state["delta"], state["tombstones"] = self._build_base(state, sources), None, []
+                self._save_state(state)
+                return {"version": state["version"], "added": len(sources), "changed": 0, "removed": 0,
+                        "delta": 0, "compacting": False}
+            added, changed, removed = self._update_delta(state, sources)
+        compacting = self.maybe_compact(background)
+        delta = state["delta"]["count"] if state["delta"] else 0
+        return {"version": state["version"], "added": len(added), "changed": len(changed),
+                "removed": len(removed), "delta": delta, "compacting": compacting}
+
+    # -- Kompaktierung -------------------------------------------------
+
+    def _build_base(self, state, sources):
+        name = f"base-{state['version'] + 1}"
+        self._building.add(name)
+        try:
+            count = build_segment(self.seg_dir, name, [part for part, _ in sources.values()])
+            with open(os.path.join(self.seg_dir, name + ".sources.json"), "w", encoding="utf-8") as fh:
+                json.dump({p: {"hash": h, "doc_ids": _doc_ids(part)} for p, (part, h) in sources.items()},
+                          fh, ensure_ascii=False)
+        finally:
+            self._building.discard(name)
+        return {"name": name, "count": count}
+
+    def needs_compaction(self, state=None):
+        state = state or self.load_state()
+        if not state["base"] or not state["delta"]:
+            return False
+        return state["delta"]["count"] >= max(COMPACT_MIN, COMPACT_RATIO * state["base"]["count"])
+
+    def compact(self):
+        """Neue Basis aus dem aktuellen Stand; danach Delta relativ zur neuen Basis."""
+        sources = self.current_sources()
+        with self.lock:
+            version = self.load_state()["version"]
+        base = self._build_base({"version": version}, sources)      # ausserhalb der Sperre (dauert)
+        with self.lock:
+            state = self.load_state()
+            state["base"], state["delta"], state["tombstones"] = base, None, []
+            self._save_state(state)
+            # Aenderungen waehrend der Kompaktierung landen wieder im Delta
+            self._update_delta(state, self.current_sources())
+        return state["version"]
+
+    def maybe_compact(self, background=True):
+        if not self.needs_compaction() or (self._compactor and self._compactor.is_alive()):
+            return False
+        if not background:
+            self.compact()
+            return True
+        self._compactor = threading.Thread(target=self.compact, name="knowledge-compaction", daemon=True)
+        self._compactor.start()
+        return True
+
+    def watch(self, interval=5.0, callback=None):
+        """Prueft alle `interval` Sekunden die Quellen und aktualisiert bei Aenderungen."""
+        while True:
+            summary = self.refresh()
+            if callback and (summary["added"] or summary["changed"] or summary["removed"]):
+                callback(summary)
+            time.sleep(interval)
+
+
+class SegmentedIndex:
+    """Suche ueber Basis und Delta; laedt neu, sobald sich die Zustandsversion aendert."""
+
+    def __init__(self, seg_dir=SEGMENT_DIR):
+        self.seg_dir = seg_dir
+        self.version = None
+        self._mtime = None
+        self.segments = []
+        self.tombstones = frozenset()
+        self.reload()
+
+    def reload(self):
+        path = os.path.join(self.seg_dir, STATE_NAME)
+        mtime = os.stat(path).st_mtime_ns
+        if mtime == self._mtime:
+            return False
+        with open(path, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+        segments = []
+        for kind in ("base", "delta"):
+            seg = state[kind]
+            if seg and seg["count"]:
+                base = os.path.join(self.seg_dir, seg["name"])
+                segments.append((kind, bm25_index.open_index(base + ".bm25"), vector_index.open_index(base + ".vec")))
+        self.segments = segments
+        self.tombstones = frozenset(state["tombstones"])
+        self.version, self._mtime = state["version"], mtime
+        return True
+
+    def _alive(self, kind, doc_id, bm25=None, row=None):
+        """Delta-Treffer und Basis-Treffer ohne Tombstone; ein entfernter kanonischer Chunk bleibt
+        sichtbar, solange eines seiner Duplikate (Feld "duplicates") noch lebt."""
+        if kind == "delta" or doc_id not in self.tombstones:
+            return True
+        if bm25 is None or row is None:
+            return False
+        return any(d not in self.tombstones for d in bm25.record(row).get("duplicates", ()))
+
+    def search(self, query, k=10, depth=50, **filters):
+        """Hybride Suche (BM25 + Vektor, RRF) ueber alle Segmente -> [(doc_id, score, raenge)].
+
+        Je Verfahren werden die Treffer der Segmente nach Score zusammengefuehrt (BM25 mit
+        gemeinsamer Statistik aller Segmente, sonst waeren die IDF-Werte des kleinen Deltas
+        nicht vergleichbar); Delta-Treffer ersetzen gleichnamige Basis-Treffer, Tombstones
+        werden ausgefiltert.
+        """
+        self.reload()
+        fetch = depth + min(len(self.tombstones), depth)
+        stats = bm25_index.collection_stats([bm25 for _, bm25, _ in self.segments], query)
+        merged = {"bm25": [], "vector": []}
+        for kind, bm25, vec in self.segments:
+            for row, score in bm25.search(query, fetch, stats=stats, **filters):
+                doc_id = bm25.doc_id(row)
+                if self._alive(kind, doc_id, bm25, row):
+                    merged["bm25"].append((score, kind == "delta", doc_id))
+            for row, score in vec.search(query, fetch, **filters)[0]:
+                doc_id = vec.doc_id(row)
+                if self._alive(kind, doc_id, bm25, bm25.row_for(doc_id)):
+                    merged["vector"].append((score, kind == "delta", doc_id))
+        rankings = {}
+        for name, hits in merged.items():
+            seen, ids = set(), []
+            for _, _, doc_id in sorted(hits, key=lambda h: (-h[0], not h[1])):
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    ids.append(doc_id)
+            rankings[name] = ids[:depth]
+        return bm25_index.rrf_fuse(rankings)[:k]
+
+    def record(self, doc_id):
+        """Chunk-Record zu einer doc_id (Delta vor Basis)."""
+        for kind, bm25, _ in reversed(self.segments):
+            row = bm25.row_for(doc_id)
+            if row is not None and self._alive(kind, doc_id, bm25, row):
+                return bm25.record(row)
+        return None
+
+
+def check_new_source(docs=600, seed=0):
+    """Prueft in einem temporaeren Verzeichnis, dass eine eben hinzugefuegte Quelle (Delta)
+    fuer ihren eigenen, sonst unbekannten Begriff an erster Stelle steht.
+
+    -> {anfrage: (rang gesamt, rang BM25)}, None = nicht unter den Treffern.
+    """
+    rng = np.random.default_rng(seed)
+    filler = ("Einsatz Leitung Fahrzeug Mannschaft Alarmierung Lage Abschnitt Funk Meldung Bericht "
+              "Uebung Gemeinde Bezirk Wasser Strasse Bruecke Hochwasser Sturm Versorgung Rettung").split()
+    with tempfile.TemporaryDirectory() as tmp:
+        src, adressen = os.path.join(tmp, "src"), os.path.join(tmp, "adressen")
+        os.makedirs(src)
+        os.makedirs(adressen)
+        for i in range(docs):
+            words = list(rng.choice(filler, 120))
+            if i % 10 == 0:
+                words += ["Notfallplan"] * 3
+            with open(os.path.join(src, f"dok_{i:04d}.md"), "w", encoding="utf-8") as fh:
+                fh.write(f"# Dokument {i}\n\n" + " ".join(words) + "\n")
+        manager = SegmentManager(os.path.join(tmp, "segments"), src, adressen,
+                                 os.path.join(tmp, "knowledge_chunks.jsonl"), os.path.join(tmp, "cache.sqlite"))
+        manager.refresh(background=False)
+        with open(os.path.join(src, "zwergpinguin.md"), "w", encoding="utf-8") as fh:
+            fh.write("# Pinguingehege\n\nDer Zwergpinguin braucht einen eigenen Notfallplan. "
+                     + " ".join(rng.choice(filler, 60)) + "\n")
+        manager.refresh(background=False)
+        index = SegmentedIndex(manager.seg_dir)
+        result = {}
+        for query in ("Zwergpinguin", "Zwergpinguin Notfallplan"):
+            hits = index.search(query, 10)
+            result[query] = (None, None)
+            for rank, (doc_id, _, ranks) in enumerate(hits, 1):
+                if "Zwergpinguin" in ((index.record(doc_id) or {}).get("content") or ""):
+                    result[query] = (rank, ranks.get("bm25"))
+                    break
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knowledge-Index inkrementell aktualisieren")
+    parser.add_argument("--dir", default=SEGMENT_DIR)
+    parser.add_argument("--src", default=pdf_extract.KNOWLEDGE_DIR)
+    parser.add_argument("--adressen", default=address_store.GEMEINDE_DIR)
+    parser.add_argument("--chunks", default=knowledge_chunker.OUT_PATH)
+    parser.add_argument("--cache", default=pdf_extract.CACHE_PATH, help="SQLite-Cache der PDF-Texte")
+    parser.add_argument("--refresh", action="store_true", help="geaenderte Quellen ins Delta uebernehmen")
+    parser.add_argument("--compact", action="store_true", help="Basis neu bauen, Delta leeren")
+    parser.add_argument("--watch", type=float, default=None, metavar="SEK", help="Quellen laufend ueberwachen")
+    parser.add_argument("--query", default=None)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="neue Quelle muss fuer ihren Begriff vorne liegen")
+    args = parser.parse_args()
+
+    if args.check:
+        failed = False
+        for query, (rank, bm25_rank) in check_new_source().items():
+            ok = rank == 1 and bm25_rank == 1
+            failed |= not ok
+            print(f"  {'✓' if ok else '✗'} \"{query}\": neue Quelle auf Rang {rank} (BM25 {bm25_rank})")
+        raise SystemExit(1 if failed else 0)
+
+    manager = SegmentManager(args.dir, args.src, args.adressen, args.chunks, args.cache)
+    if args.refresh or not os.path.exists(manager.state_path):
+        started = time.perf_counter()
+        s = manager.refresh(background=False)
+        print(f"  ✓ Version {s['version']}: {s['added']} neu, {s['changed']} geaendert, {s['removed']} entfernt, "
+              f"Delta {s['delta']} Chunks ({time.perf_counter() - started:.2f} s)")
+    if args.compact:
+        started = time.perf_counter()
+        print(f"  ✓ Kompaktiert, Version {manager.compact()} ({time.perf_counter() - started:.2f} s)")
+    if args.query:
+        index = SegmentedIndex(args.dir)
+        started = time.perf_counter()
+        hits = index.search(args.query, args.k)
+        print(f"  Anfrage \"{args.query}\" (Version {index.version}, {(time.perf_counter() - started) * 1000:.1f} ms):")
+        for doc_id, score, ranks in hits:
+            print(f"    {score:.3f}  {(index.record(doc_id) or {}).get('title')}  {ranks}")
+    if args.watch:
+        print(f"Ueberwache Quellen alle {args.watch:g} s ...")
+        manager.watch(args.watch, lambda s: print(
+            f"  ✓ Version {s['version']}: {s['added']} neu, {s['changed']} geaendert, {s['removed']} entfernt, "
+            f"Delta {s['delta']} Chunks{', Kompaktierung laeuft' if s['compacting'] else ''}"))
+    print("Fertig.")
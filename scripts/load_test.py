@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+Lastgenerator fuer die EINFO-HTTP-API (asyncio, nur Standardbibliothek + numpy).
+
+- Endpunkte und Rate-Limits kommen aus api_catalog.py (gleiche Quelle wie Kapitel 17
+  im Admin-Handbuch); Szenarien verweisen per "METHODE /pfad" darauf.
+- Offene Last: Anfragen treffen als Poisson-Prozess mit --rate je Sekunde ein, egal wie
+  schnell der Server antwortet. Die Latenz zaehlt ab dem geplanten Sendezeitpunkt, Warten
+  auf eine freie Verbindung ist also enthalten (keine "coordinated omission").
+  Mehrere Raten (--rate 50,100,200) laufen nacheinander als Stufen.
+- Keep-Alive-Verbindungspool je Server (--connections), HTTP/1.1 ueber asyncio-Streams.
+- Je Endpunkt ein HDR-artiges Histogramm (log-linear, < 1 % Aufloesungsfehler),
+  Fehler und Rate-Limit-Treffer (429) getrennt gezaehlt.
+
+Mit --local startet im selben Prozess ein Stand-in-Server (alle Katalogrouten,
+Rate-Limits wie chatbot/server/middleware/rate-limit.js, Antwortzeiten ueber
+--cpu-ms/--io-ms); mit --data liefert er echte Dateien, z.B. aus synth_data.py.
+--serve startet nur den Stand-in, um ihn von einem anderen Rechner aus zu belasten.
+
+Aufruf:  python3 scripts/load_test.py --local [--rate 50,100,200] [--duration 30] [--mix stab=3,chatbot=1]
+         python3 scripts/load_test.py --base http://einfo:4040 --chatbot http://einfo:3100 --cookie "sid=..."
+         python3 scripts/load_test.py --serve [--port 4040] [--data VERZEICHNIS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import urllib.parse
+
+import numpy as np
+
+import api_catalog
+
+# Szenario-Mixe: (Gewicht, "METHODE /pfad"). Pfadplatzhalter werden aus PARAMS befuellt.
+SCENARIOS = {
+    # Stabsarbeitsplaetze: Polling der Boards, dazu Meldungen, Aufgaben und Kartenbewegungen
+    "stab": (
+        (20, "GET /api/board"), (15, "GET /api/protocol"), (15, "GET /api/aufgaben"),
+        (8, "GET /api/gps"), (5, "GET /api/vehicles"), (5, "GET /api/user/online-roles"),
+        (5, "GET /api/activity/status"), (2, "GET /api/situation/status"), (1, "GET /api/nearby"),
+        (3, "POST /api/protocol"), (3, "PUT /api/protocol/:nr"),
+        (1, "POST /api/protocol/:nr/lock"), (1, "DELETE /api/protocol/:nr/lock"),
+        (2, "POST /api/aufgaben"), (3, "POST /api/aufgaben/:id/status"),
+        (2, "POST /api/cards/:id/move"), (1, "POST /api/cards/:id/assign"), (1, "PATCH /api/cards/:id"),
+    ),
+    # Uebungssteuerung und KI-Assistent auf dem Chatbot-Server
+    "chatbot": (
+        (10, "POST /api/chat"), (10, "GET /api/sim/status"), (3, "GET /api/llm/gpu"),
+        (5, "GET /api/disaster/current"), (3, "GET /api/disaster/summary"), (3, "GET /api/audit/status"),
+        (4, "POST /api/audit/events"), (2, "GET /api/feedback/list"), (1, "POST /api/feedback"),
+        (3, "GET /api/metrics"), (1, "POST /api/sim/step"),
+    ),
+    # Gelegentliche Admin-Abfragen
+    "admin": (
+        (3, "GET /api/ff/status"), (2, "GET /api/mail/inbox/status"), (2, "GET /api/print/server/info"),
+        (2, "GET /api/admin/filtering-rules/status"), (1, "GET /api/user/admin/chatbot/status"),
+        (1, "GET /api/situation/analysis-config"),
+    ),
+}
+
+PARAMS = {"id": ("c-1", "c-2", "c-3"), "nr": ("1", "2", "3"), "name": ("FF-Feldkirchen",)}
+
+BODIES = {
+    "POST /api/chat": {"question": "Wie ist die aktuelle Lage?"},
+    "POST /api/protocol": {"infoTyp": "Information", "information": "Lasttest", "anvon": "S2",
+                           "uebermittlungsart": {"ein": True, "kanalNr": "Funk"}},
+    "PUT /api/protocol/:nr": {"information": "Lasttest (Nachtrag)"},
+    "POST /api/aufgaben": {"title": "Lasttest", "type": "Auftrag", "responsible": "S3"},
+    "POST /api/aufgaben/:id/status": {"status": "In Bearbeitung"},
+    "POST /api/cards/:id/move": {"to": "in-bearbeitung"},
+    "POST /api/cards/:id/assign": {"vehicleId": "TLFA-4000-1"},
+    "PATCH /api/cards/:id": {"ort": "Hauptplatz 1, 9560 Feldkirchen"},
+    "POST /api/audit/events": {"events": [{"type": "load_test"}]},
+    "POST /api/feedback": {"helpful": True},
+}
+
+RESPONSE_FILES = {
+    "GET /api/board": "board.json",
+    "GET /api/gps": "vehicles_gps.json",
+    "GET /api/vehicles": os.path.join("conf", "vehicles.json"),
+    "GET /api/types": os.path.join("conf", "types.json"),
+    "GET /api/aufgaben": "Aufg_board_S1.json",
+}
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+# ---------------------------------------------------------------------- Histogramm
+
+class LatencyHistogram:
+    """Log-lineares Histogramm in Mikrosekunden wie HdrHistogram.
+
+    Werte < 2**(SUB_BITS+1) exakt, darueber je Zweierpotenz 2**SUB_BITS gleich breite
+    Faecher -> relativer Fehler < 2**-SUB_BITS. Zaehler sind ein numpy-Array und lassen
+    sich addieren (merge) oder als {index: anzahl} speichern.
+    """
+
+    SUB_BITS = 7
+    MAX_SHIFT = 36                                     # bis ca. 2**44 us
+
+    def __init__(self):
+        half = 1 << self.SUB_BITS
+        self.counts = np.zeros((self.MAX_SHIFT + 2) * half, dtype=np.int64)
+        self.total_us = 0
+        self.max_us = 0
+
+    def _index(self, us):
+        shift = max(us.bit_length() - self.SUB_BITS - 1, 0)
+        return min((shift << self.SUB_BITS) + (us >> shift), len(self.counts) - 1)
+
+    def record(self, us):
+        us = max(int(us), 0)
+        self.counts[self._index(us)] += 1
+        self.total_us += us
+        self.max_us = max(self.max_us, us)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def upper_bounds(self):
+        """Groesster Wert je Fach (wie HdrHistogram "highest equivalent value")."""
+        half = 1 << self.SUB_BITS
+        idx = np.arange(len(self.counts))
+        shift = np.maximum(idx // half - 1, 0)
+        sub = idx - (shift << self.SUB_BITS)
+        return ((sub + 1) << shift) - 1
+
+    def percentiles(self, qs=PERCENTILES):
+        """-> Werte in us; Fach-Obergrenze, hoechstens das gemessene Maximum."""
+        n = self.count
+        if not n:
+            return [0] * len(qs)
+        cum = np.cumsum(self.counts)
+        ranks = np.maximum(np.ceil(np.asarray(qs, dtype=float) / 100 * n), 1)
+        idx = np.searchsorted(cum, ranks)
+        return [min(int(v), self.max_us) for v in self.upper_bounds()[idx]]
+
+    def mean_us(self):
+        return self.total_us / self.count if self.count else 0.0
+
+    def to_dict(self):
+        nz = np.flatnonzero(self.counts)
+        return {"sub_bits": self.SUB_BITS, "counts": {int(i): int(self.counts[i]) for i in nz},
+                "total_us": self.total_us, "max_us": self.max_us}
+
+
+class EndpointStats:
+    def __init__(self):
+        self.hist = LatencyHistogram()
+        self.status = {}
+        self.errors = 0                                # Verbindungsfehler, Timeouts, 4xx/5xx ausser 429
+        self.limited = 0                               # 429
+        self.bytes = 0
+
+    def add(self, status, us, size):
+        self.hist.record(us)
+        self.status[status] = self.status.get(status, 0) + 1
+        self.bytes += size
+        if status == 429:
+            self.limited += 1
+        elif not 200 <= status < 400:
+            self.errors += 1
+
+
+# ---------------------------------------------------------------------- HTTP/1.1
+
+class HttpError(Exception):
+    pass
+
+
+async def read_response(reader, method):
+    """-> (status, headers, body, keep_alive). Content-Length, chunked oder bis EOF."""
+    line = await reader.readline()
+    if not line:
+        raise asyncio.IncompleteReadError(b"", None)
+    parts = line.decode("latin-1").split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise HttpError(f"Ungueltige Statuszeile: {line[:80]!r}")
+    status = int(parts[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    keep = parts[0] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if not size:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body, keep = await reader.read(), False
+    return status, headers, body, keep
+
+
+def encode_request(method, host, path, headers, body):
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: keep-alive",
+             "Accept: application/json", "User-Agent: einfo-load-test"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    if body is not None or method in ("POST", "PUT", "PATCH"):
+        body = body or b""
+        lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+
+class ConnectionPool:
+    """Keep-Alive-Verbindungen zu einem Server; hoechstens `size` gleichzeitig in Benutzung."""
+
+    def __init__(self, url, size=32, headers=None, timeout=30.0):
+        parsed = urllib.parse.urlsplit(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.prefix = parsed.path.rstrip("/")
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.opened = 0
+
+    async def request(self, method, path, body=None):
+        async with self.slots:
+            for attempt in (0, 1):
+                reused = bool(self.idle)
+                if reused:
+                    reader, writer = self.idle.pop()
+                else:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), self.timeout)
+                    self.opened += 1
+                try:
+                    writer.write(encode_request(method, f"{self.host}:{self.port}", self.prefix + path,
+                                                self.headers, body))
+                    await writer.drain()
+                    status, headers, data, keep = await asyncio.wait_for(
+                        read_response(reader, method), self.timeout)
+                except (asyncio.IncompleteReadError, ConnectionError) as exc:
+                    writer.close()
+                    if reused and attempt == 0:          # vom Server geschlossene Leerlaufverbindung
+                        continue
+                    raise HttpError(str(exc) or type(exc).__name__)
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep:
+                    self.idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, headers, data
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+# ---------------------------------------------------------------------- Last
+
+def build_mix(spec, catalog):
+    """"stab=3,chatbot=1" -> (keys, kumulierte Gewichte). "read" = alle GET-Endpunkte gleich gewichtet."""
+    by_key = {ep["key"]: ep for ep in catalog}
+    weights = {}
+    for part in spec.split(","):
+        name, _, factor = part.partition("=")
+        name, factor = name.strip(), float(factor or 1)
+        if name == "read":
+            entries = [(1, ep["key"]) for ep in catalog if ep["method"] == "GET" and not ep["stream"]]
+        elif name in SCENARIOS:
+            entries = SCENARIOS[name]
+        else:
+            raise SystemExit(f"Unbekanntes Szenario: {name} (verfuegbar: {', '.join(SCENARIOS)}, read)")
+        total = sum(w for w, _ in entries)
+        for w, key in entries:
+            if key not in by_key:
+                raise SystemExit(f"Szenario {name}: {key} fehlt in api_catalog.py")
+            weights[key] = weights.get(key, 0) + factor * w / total
+    keys = sorted(weights)
+    return [by_key[k] for k in keys], np.cumsum([weights[k] for k in keys])
+
+
+class LoadRun:
+    """Eine Laststufe: offene Poisson-Ankuenfte mit fester Rate ueber `duration` Sekunden."""
+
+    def __init__(self, pools, mix, params=PARAMS, max_inflight=10000, seed=1):
+        self.pools = pools
+        self.endpoints, self.cum = mix
+        self.params = params
+        self.max_inflight = max_inflight
+        self.rng = random.Random(seed)
+        self.stats = {}
+        self.dropped = 0                               # Client am Limit, Anfrage nicht gesendet
+        self.inflight = 0
+
+    def _prepare(self, ep):
+        path = ep["path"]
+        if ":" in path:
+            path = api_catalog.fill_path(path, {k: self.rng.choice(v) for k, v in self.params.items()}, "1")
+        body = BODIES.get(ep["key"])
+        return path, (json.dumps(body).encode("utf-8") if body is not None else None)
+
+    async def _one(self, ep, scheduled):
+        stats = self.stats.setdefault(ep["key"], EndpointStats())
+        loop = asyncio.get_running_loop()
+        try:
+            path, body = self._prepare(ep)
+            status, _, data = await self.pools[ep["server"]].request(ep["method"], path, body)
+            size = len(data)
+        except (HttpError, OSError, asyncio.TimeoutError):
+            status, size = 0, 0
+        finally:
+            self.inflight -= 1
+        stats.add(status, (loop.time() - scheduled) * 1e6, size)
+
+    async def run(self, rate, duration):
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        start = t = loop.time()
+        self.started = time.time()
+        while True:
+            t += self.rng.expovariate(rate)
+            if t - start >= duration:
+                break
+            delay = t - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            ep = self.endpoints[int(np.searchsorted(self.cum, self.rng.random() * self.cum[-1], side="right"))]
+            if self.inflight >= self.max_inflight:
+                self.dropped += 1
+                continue
+            self.inflight += 1
+            task = asyncio.ensure_future(self._one(ep, t))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        self.elapsed = loop.time() - start
+        return self
+
+    def total(self):
+        hist = LatencyHistogram()
+        for s in self.stats.values():
+            hist.merge(s.hist)
+        return hist
+
+    def summary(self, rate):
+        total = self.total()
+        n = total.count
+        return {"rate": rate, "sent": n, "dropped": self.dropped, "achieved": n / self.elapsed if self.elapsed else 0,
+                "errors": sum(s.errors for s in self.stats.values()),
+                "limited": sum(s.limited for s in self.stats.values()),
+                "percentiles_us": dict(zip(map(str, PERCENTILES), total.percentiles())),
+                "mean_us": total.mean_us(), "max_us": total.max_us,
+                "endpoints": {key: {"count": s.hist.count, "errors": s.errors, "limited": s.limited,
+                                    "status": {str(k): v for k, v in sorted(s.status.items())}, "bytes": s.bytes,
+                                    "percentiles_us": dict(zip(map(str, PERCENTILES), s.hist.percentiles())),
+                                    "histogram": s.hist.to_dict()}
+                              for key, s in sorted(self.stats.items())}}
+
+
+def _ms(us):
+    return f"{us / 1000:.1f}"
+
+
+def print_stage(run, rate):
+    print(f"\n  Stufe {rate:g}/s: {run.total().count} Anfragen in {run.elapsed:.1f} s, "
+          f"{run.dropped} verworfen (Client-Limit)")
+    print(f"  {'Endpunkt':<42} {'n':>7} {'429':>5} {'Fehler':>6} " +
+          " ".join(f"{'p' + format(q, 'g'):>8}" for q in PERCENTILES) + f" {'max':>8}  (ms)")
+    rows = sorted(run.stats.items(), key=lambda kv: -kv[1].hist.count)
+    for key, s in rows + [("Gesamt", None)]:
+        hist = run.total() if s is None else s.hist
+        limited = sum(x.limited for x in run.stats.values()) if s is None else s.limited
+        errors = sum(x.errors for x in run.stats.values()) if s is None else s.errors
+        print(f"  {key[:42]:<42} {hist.count:>7} {limited:>5} {errors:>6} " +
+              " ".join(f"{_ms(v):>8}" for v in hist.percentiles()) + f" {_ms(hist.max_us):>8}")
+
+
+async def load_test(base, chatbot, mix, rates, duration, connections, headers, max_inflight, seed):
+    catalog = [ep for ep in api_catalog.endpoints() if not ep["stream"]]
+    pools = {"einfo": ConnectionPool(base, connections, headers), "chatbot": ConnectionPool(chatbot, connections, headers)}
+    stages = []
+    try:
+        for k, rate in enumerate(rates):
+            run = await LoadRun(pools, build_mix(mix, catalog), max_inflight=max_inflight, seed=seed + k) \
+                .run(rate, duration)
+            print_stage(run, rate)
+            stages.append(run.summary(rate))
+    finally:
+        for pool in pools.values():
+            pool.close()
+    print("\n  Verbindungen geoeffnet: " + ", ".join(f"{name} {pool.opened}" for name, pool in pools.items()))
+    return stages
+
+
+# ---------------------------------------------------------------------- Stand-in-Server
+
+class StandInServer:
+    """Antwortet auf alle Katalogrouten mit JSON, Keep-Alive und Rate-Limits je IP und Pfad.
+
+    Node ist einfaedig: `cpu_ms` wird seriell abgearbeitet (ein Lock), `io_ms`
+    (lognormal, z.B. Dateizugriffe oder LLM) laeuft parallel. Damit laesst sich die
+    Saettigung des echten Servers grob nachstellen.
+    """
+
+    def __init__(self, cpu_ms=0.3, io_ms=5.0, data_dir=None, seed=1):
+        self.catalog = [ep for ep in api_catalog.endpoints() if not ep["stream"]]
+        self.routes = {}
+        for ep in self.catalog:
+            self.routes.setdefault(ep["method"], []).append((api_catalog.path_pattern(ep["path"]), ep))
+        for entries in self.routes.values():                  # feste Pfade vor Platzhaltern
+            entries.sort(key=lambda e: e[1]["path"].count(":"))
+        self.cpu_s, self.io_s = cpu_ms / 1000, io_ms / 1000
+        self.cpu = asyncio.Lock()
+        self.rng = random.Random(seed)
+        self.windows = {}
+        self.files = {}
+        for key, name in RESPONSE_FILES.items():
+            path = os.path.join(data_dir, name) if data_dir else None
+            if path and os.path.isfile(path):
+                with open(path, "rb") as fh:
+                    self.files[key] = fh.read()
+        self.requests = 0
+        self.clients = {}
+
+    def route(self, method, path):
+        for pattern, ep in self.routes.get(method, ()):
+            if pattern.match(path):
+                return ep
+        return None
+
+    def _limited(self, ip, ep, path):
+        """Festes Zeitfenster je IP und konkretem Pfad wie rate-limit.js -> None oder Sekunden bis zum Reset."""
+        if not ep["limit"]:
+            return None
+        now = time.monotonic()
+        key = (ip, path)
+        count, reset = self.windows.get(key, (0, 0.0))
+        if now > reset:
+            count, reset = 0, now + api_catalog.RATE_WINDOW_S
+        if count >= ep["limit"]:
+            return max(int(reset - now + 0.999), 1)
+        self.windows[key] = (count + 1, reset)
+        return None
+
+    async def respond(self, method, path, ip):
+        path = path.split("?", 1)[0]
+        ep = self.route(method, path)
+        if ep is None:
+            return 404, {}, {"ok": False, "error": "not_found"}
+        retry = self._limited(ip, ep, path)
+        if retry is not None:
+            return 429, {"Retry-After": str(retry), "X-RateLimit-Limit": str(ep["limit"]),
+                         "X-RateLimit-Remaining": "0"}, {"ok": False, "error": "rate_limit_exceeded",
+                                                         "retryAfter": retry}
+        async with self.cpu:
+            if self.cpu_s:
+                time.sleep(self.cpu_s)                      # blockiert bewusst die Schleife wie Node
+        if self.io_s:
+            await asyncio.sleep(self.rng.lognormvariate(np.log(self.io_s), 0.5))
+        if ep["key"] in self.files:
+            return 200, {}, self.files[ep["key"]]
+        return 200, {}, {"ok": True, "endpoint": ep["key"]}
+
+    async def handle(self, reader, writer):
+        ip = (writer.get_extra_info("peername") or ("?",))[0]
+        self.clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, path, version = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length") or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+                self.requests += 1
+                status, extra, payload = await self.respond(method, path, ip)
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                close = headers.get("connection", "").lower() == "close" or not version.startswith("HTTP/1.1")
+                head = [f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERR'}",
+                        "Content-Type: application/json; charset=utf-8", f"Content-Length: {len(body)}",
+                        f"Connection: {'close' if close else 'keep-alive'}"] + [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        """Schliesst den Server samt offener Keep-Alive-Verbindungen."""
+        self.server.close()
+        tasks = list(self.clients)
+        for writer in self.clients.values():
+            writer.close()                                  # Handler sehen EOF und enden regulaer
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ---------------------------------------------------------------------- Ablauf
+
+async def main(args):
+    rates = [float(r) for r in args.rate.split(",") if r.strip()]
+    headers = {"Cookie": args.cookie} if args.cookie else {}
+    if args.serve or args.local:
+        server = await StandInServer(args.cpu_ms, args.io_ms, args.data, args.seed) \
+            .start(args.host if args.serve else "127.0.0.1", args.port if args.serve else 0)
+        print(f"  ✓ Stand-in-Server auf Port {server.port} "
+              f"({len(server.catalog)} Routen, {len(server.files)} Dateien aus --data)")
+        if args.serve:
+            async with server.server:
+                await server.server.serve_forever()
+        base = chatbot = f"http://127.0.0.1:{server.port}"
+    else:
+        base, chatbot = args.base, args.chatbot or args.base
+    try:
+        stages = await load_test(base, chatbot, args.mix, rates, args.duration, args.connections, headers,
+                                 args.max_inflight, args.seed)
+    finally:
+        if args.local:
+            await server.stop()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"base": base, "chatbot": chatbot, "mix": args.mix, "duration": args.duration,
+                       "connections": args.connections, "stages": stages}, fh, ensure_ascii=False, indent=1)
+        print(f"  ✓ {args.json}")
+    print("\n  Stufe    gesendet  erreicht/s  429  Fehler    p50     p99   p99.9 (ms)")
+    for s in stages:
+        p = s["percentiles_us"]
+        print(f"  {s['rate']:>6g} {s['sent']:>10} {s['achieved']:>10.1f} {s['limited']:>5} {s['errors']:>6} "
+              f"{_ms(p['50']):>7} {_ms(p['99']):>7} {_ms(p['99.9']):>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lastgenerator fuer die EINFO-HTTP-API")
+    parser.add_argument("--base", default=f"http://127.0.0.1:{api_catalog.SERVERS['einfo']}",
+                        help="Hauptserver (server/server.js)")
+    parser.add_argument("--chatbot", help="Chatbot-Server, Standard: wie --base "
+                        f"(sonst z.B. http://127.0.0.1:{api_catalog.SERVERS['chatbot']})")
+    parser.add_argument("--cookie", help="Session-Cookie fuer geschuetzte Endpunkte")
+    parser.add_argument("--mix", default="stab=3,chatbot=1",
+                        help=f"Szenarien mit Gewicht: {', '.join(SCENARIOS)}, read")
+    parser.add_argument("--rate", default="50", help="Anfragen/s, mehrere Stufen mit Komma")
+    parser.add_argument("--duration", type=float, default=30, help="Sekunden je Stufe")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-Alive-Verbindungen je Server")
+    parser.add_argument("--max-inflight", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Ergebnis inkl. Histogrammen als JSON speichern")
+    parser.add_argument("--local", action="store_true", help="gegen Stand-in-Server im selben Prozess")
+    parser.add_argument("--serve", action="store_true", help="nur den Stand-in-Server starten")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=api_catalog.SERVERS["einfo"])
+    parser.add_argument("--data", help="Datenverzeichnis fuer Stand-in-Antworten (z.B. aus synth_data.py)")
+    parser.add_argument("--cpu-ms", type=float, default=0.3, help="Stand-in: serielle Rechenzeit je Anfrage")
+    parser.add_argument("--io-ms", type=float, default=5.0, help="Stand-in: parallele Wartezeit je Anfrage (Median)")
+    args = parser.parse_args()
+
+    print("Generiere Last ..." if not args.serve else "Starte Stand-in-Server ...")
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
+    print("Fertig.")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Nachbesprechungs-Bericht aus Lage_log.csv und den Aufg_log_*.csv.
+Ausgabe: server/data/prints/auswertung/Auswertung_<Zeitstempel>.pdf
+
+Aufruf:  python3 scripts/log_report.py [--data-dir server/data] [--out datei.pdf] [--frames N]
+                                     [--history-dir VERZ]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import board_replay
+import einfo_logs
+from generate_help_pdfs import HilfePDF
+
+REPORT_DIR = os.path.join(einfo_logs.DATA_DIR, "prints", "auswertung")
+
+# Farben der Zeitleiste, angelehnt an die Spalten des Einsatzboards
+STATE_COLORS = {
+    "Neu": (220, 38, 38),
+    "In Bearbeitung": (234, 179, 8),
+    "Erledigt": (22, 163, 74),
+}
+FALLBACK_COLORS = [(30, 60, 120), (120, 60, 160), (14, 116, 144), (100, 100, 100)]
+
+
+def fmt_duration(seconds):
+    seconds = int(round(seconds))
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    if h:
+        return f"{h} h {m:02d} min"
+    if m:
+        return f"{m} min {s:02d} s"
+    return f"{s} s"
+
+
+def fmt_time(t):
+    return str(np.datetime64(t, "s")).replace("T", " ")
+
+
+def state_color(name, i):
+    return STATE_COLORS.get(name, FALLBACK_COLORS[i % len(FALLBACK_COLORS)])
+
+
+# ----------------------------------------------------------------------
+def timeline_chart(pdf, table, max_rows=40):
+    """Gantt-artige Zeitleiste: eine Zeile je Einsatz, Abschnitte nach Spalte eingefaerbt."""
+    keys, state, start, end = einfo_logs.state_segments(table)
+    if not len(keys):
+        pdf.body("Keine Statusabschnitte im Log vorhanden.")
+        return
+    t0 = table.times[0].astype(np.int64)
+    t1 = max(table.times[-1].astype(np.int64), t0 + 1)
+    uniq = np.unique(keys)[:max_rows]
+    label_codes = {}
+    for k, l in zip(table.codes["key"], table.codes["label"]):
+        label_codes.setdefault(int(k), int(l))
+
+    x0 = pdf.l_margin + 28
+    width = pdf.w - pdf.r_margin - x0
+    row_h = 4.2
+    scale = width / float(t1 - t0)
+    pdf.set_font("DejaVu", "", 7)
+    pdf.set_text_color(30, 30, 30)
+    for key in uniq:
+        if pdf.get_y() + row_h > pdf.h - pdf.b_margin - 10:
+            pdf.add_page()
+        y = pdf.get_y()
+        label = table.cats["label"][label_codes.get(int(key), 0)] or table.cats["key"][key]
+        pdf.text(pdf.l_margin, y + row_h - 1, str(label)[:18])
+        sel = keys == key
+        for s, a, b in zip(state[sel], start[sel].astype(np.int64), end[sel].astype(np.int64)):
+            pdf.set_fill_color(*state_color(str(table.cats["dst"][s]), int(s)))
+            pdf.rect(x0 + (a - t0) * scale, y + 0.5, max((b - a) * scale, 0.4), row_h - 1, style="F")
+        pdf.set_y(y + row_h)
+
+    pdf.ln(2)
+    pdf.set_font("DejaVu", "", 7)
+    pdf.text(x0, pdf.get_y(), fmt_time(table.times[0]))
+    pdf.text(pdf.w - pdf.r_margin - 25, pdf.get_y(), fmt_time(table.times[-1]))
+    pdf.ln(4)
+    for i, name in enumerate(table.cats["dst"]):
+        if not name:
+            continue
+        pdf.set_fill_color(*state_color(str(name), i))
+        pdf.rect(pdf.get_x(), pdf.get_y() + 1, 3, 3, style="F")
+        pdf.set_x(pdf.get_x() + 4)
+        pdf.cell(30, 5, str(name))
+    pdf.ln(8)
+    if len(np.unique(keys)) > max_rows:
+        pdf.body(f"Es werden die ersten {max_rows} von {len(np.unique(keys))} Einsätzen dargestellt.")
+
+
+def stats_sections(pdf, table, nr, title):
+    """Statuswechsel, Verweildauer und Stundenrate fuer ein Log."""
+    pdf.add_page()
+    pdf.chapter_title(f"{nr}. {title}")
+    pdf.body(
+        f"{len(table)} Einträge, {len(np.unique(table.codes['key']))} Objekte, "
+        f"Zeitraum {fmt_time(table.times[0])} bis {fmt_time(table.times[-1])}."
+    )
+
+    pdf.section_title(f"{nr}.1 Aktionen")
+    pdf.data_table(["Aktion", "Anzahl"], einfo_logs.action_counts(table)[:20], [140, 35])
+
+    pdf.section_title(f"{nr}.2 Statuswechsel")
+    transitions = einfo_logs.transition_counts(table)
+    if transitions:
+        pdf.data_table(["Von", "Nach", "Anzahl"], transitions, [70, 70, 35])
+    else:
+        pdf.body("Keine Statuswechsel protokolliert.")
+
+    pdf.section_title(f"{nr}.3 Verweildauer je Spalte")
+    durations = einfo_logs.state_durations(table)
+    rows = [
+        (name, n, fmt_duration(total), fmt_duration(median), fmt_duration(total / n))
+        for name, (total, n, median) in sorted(durations.items(), key=lambda kv: -kv[1][0])
+    ]
+    pdf.data_table(["Spalte", "Abschnitte", "Summe", "Median", "Mittel"], rows, [55, 25, 35, 30, 30])
+
+    pdf.section_title(f"{nr}.4 Ereignisse je Stunde")
+    hours, counts = einfo_logs.hourly_rates(table)
+    labels = [str(h)[11:13] + "h" for h in hours]
+    pdf.bar_chart(labels, counts.tolist(), height=45, value_fmt="{:d}")
+    if len(counts):
+        pdf.body(
+            f"Spitze: {int(counts.max())} Ereignisse um {str(hours[int(counts.argmax())]).replace('T', ' ')} Uhr, "
+            f"Mittel {counts.mean():.1f} je Stunde."
+        )
+
+
+def frame_sections(pdf, data_dir, nr, frames, max_cards=12, history_dir=None):
+    """Lagebild zu `frames` gleichmaessig verteilten Zeitpunkten (board_replay).
+
+    Die Replay-Indizes landen in `history_dir`, ohne Angabe in einem temporaeren
+    Verzeichnis; das Datenverzeichnis wird nicht beschrieben.
+    """
+    if history_dir is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            return frame_sections(pdf, data_dir, nr, frames, max_cards, tmp)
+    replay = board_replay.BoardReplay(data_dir, history_dir, csv_index_dir=os.path.join(history_dir, "csv_index"))
+    replay.update()
+    first, last = replay.span()
+    if first is None or frames < 1:
+        pdf.body("Kein Verlauf des Einsatzboards vorhanden.")
+        return
+    interval = max((last - first) / 1000 / max(frames - 1, 1), 1)
+    for i, (ms, doc) in enumerate(replay.frames(interval=interval), start=1):
+        columns = list(doc["columns"].values())
+        pdf.sub_section(f"{nr}.{i} Stand {board_replay.fmt_ms(ms)}")
+        pdf.body(", ".join(f"{c.get('name')}: {len(c['items'])}" for c in columns))
+        rows = [
+            (c.get("name", ""), item.get("humanId", ""), str(item.get("content", ""))[:40],
+             ", ".join(map(str, item.get("assignedVehicles") or []))[:30])
+            for c in columns if c.get("name") != "Erledigt" for item in c["items"]
+        ]
+        if rows:
+            pdf.data_table(["Spalte", "Nr.", "Einsatz", "Einheiten"], rows[:max_cards], [32, 18, 75, 50])
+            if len(rows) > max_cards:
+                pdf.body(f"... und {len(rows) - max_cards} weitere offene Einsätze.")
+
+
+def generate_log_report(data_dir=einfo_logs.DATA_DIR, out_path=None, frames=6, history_dir=None):
+    started = time.perf_counter()
+    lage = einfo_logs.load_lage_log(os.path.join(data_dir, "Lage_log.csv"))
+    aufgaben = {
+        role: einfo_logs.load_aufgaben_log(path)
+        for role, path in einfo_logs.aufgaben_log_paths(data_dir).items()
+    }
+
+    pdf = HilfePDF("EINFO – Einsatz-Auswertung")
+    pdf.alias_nb_pages()
+    subtitle = ""
+    if len(lage):
+        subtitle = f"{fmt_time(lage.times[0])} – {fmt_time(lage.times[-1])}"
+    pdf.cover_page("Einsatz-Auswertung", subtitle)
+
+    if len(lage):
+        stats_sections(pdf, lage, 1, "Einsatzboard (Lage_log)")
+
+        pdf.section_title("1.5 Einheiten")
+        units = einfo_logs.unit_assignments(lage)
+        if units:
+            rows = [
+                (unit, n, fmt_duration(total), fmt_duration(total / n), opened)
+                for unit, (n, total, opened) in sorted(units.items(), key=lambda kv: -kv[1][1])
+            ]
+            pdf.data_table(["Einheit", "Zuweisungen", "Einsatzzeit", "Mittel", "Offen"], rows, [60, 28, 35, 30, 22])
+        else:
+            pdf.body("Keine Einheitenzuweisungen protokolliert.")
+
+        pdf.add_page()
+        pdf.chapter_title("2. Zeitleiste")
+        timeline_chart(pdf, lage)
+
+        pdf.add_page()
+        pdf.chapter_title("3. Lagebild im Zeitverlauf")
+        frame_sections(pdf, data_dir, 3, frames, history_dir=history_dir)
+
+    nr = 4
+    for role, table in aufgaben.items():
+        if not len(table):
+            continue
+        stats_sections(pdf, table, nr, f"Aufgabenboard {role}")
+        nr += 1
+
+    if out_path is None:
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        out_path = os.path.join(REPORT_DIR, time.strftime("Auswertung_%Y%m%d_%H%M%S.pdf"))
+    pdf.output(out_path)
+    print(f"  ✓ {out_path} ({time.perf_counter() - started:.2f} s)")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auswertung aus Lage_log.csv und Aufg_log_*.csv")
+    parser.add_argument("--data-dir", default=einfo_logs.DATA_DIR)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--frames", type=int, default=6, help="Anzahl Lagebilder im Zeitverlauf")
+    parser.add_argument("--history-dir", default=None,
+                        help="Verzeichnis fuer die Replay-Indizes (Vorgabe: temporaer)")
+    args = parser.parse_args()
+    print("Generiere Auswertung ...")
+    generate_log_report(args.data_dir, args.out, args.frames, args.history_dir)
+    print("Fertig.")
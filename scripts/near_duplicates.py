@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Erkennung nahezu gleicher Chunks (MinHash + LSH) in knowledge_chunks.jsonl.
+
+  - Shingles: SHINGLE aufeinanderfolgende Woerter des gefalteten Inhalts
+    (kuerzere Texte: der ganze Text als ein Shingle).
+  - MinHash-Signaturen mit NUM_PERM Multiply-Shift-Hashes, vektorisiert ueber alle
+    Shingles (np.minimum.reduceat je Chunk).
+  - LSH: BANDS Baender zu ROWS Zeilen; Chunks im selben Bucket werden gegen den
+    ersten Bucket-Eintrag geprueft (geschaetzte Jaccard-Aehnlichkeit >= THRESHOLD)
+    und per Union-Find zu Clustern verbunden - ohne paarweisen Vergleich aller Chunks.
+  - Adress-/Gebaeude-/POI-Records werden nicht verglichen (SKIP_TYPES).
+  - Je Cluster bleibt ein kanonischer Chunk (laengster Inhalt, bei Gleichstand der
+    erste); er bekommt die doc_ids der uebrigen im Feld "duplicates".
+
+Aufruf:  python3 scripts/near_duplicates.py [--chunks DATEI] [--out DATEI] [--report DATEI]
+                                           [--threshold 0.8]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+import address_store
+from bm25_index import fold
+from knowledge_chunker import OUT_PATH as CHUNKS_PATH
+
+DEDUP_PATH = os.path.join(address_store.INDEX_DIR, "knowledge_chunks.dedup.jsonl")
+REPORT_PATH = os.path.join(address_store.INDEX_DIR, "near_duplicates.json")
+
+SHINGLE = 5
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.8
+SKIP_TYPES = ("address", "building", "poi")   # strukturierte Records nie zusammenfassen
+BATCH_ELEMENTS = 1 << 23     # uint64-Elemente je Block (64 MB)
+WORD = re.compile(r"\w+")
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def shingles(text, size=SHINGLE):
+    words = WORD.findall(fold(text or ""))
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def _permutations(num_perm=NUM_PERM, seed=1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 63, num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+    return a, b
+
+
+def signatures(texts, num_perm=NUM_PERM):
+    """(n, num_perm) uint32 MinHash-Signaturen; Texte ohne Woerter erhalten MAX_HASH ueberall."""
+    a, b = _permutations(num_perm)
+    hashes, counts = [], []
+    for text in texts:
+        sh = shingles(text)
+        counts.append(len(sh))
+        hashes.extend(zlib.crc32(s.encode("utf-8")) for s in sh)
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    counts = np.asarray(counts, dtype=np.int64)
+    out = np.full((len(counts), num_perm), MAX_HASH, dtype=np.uint64)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    nonempty = np.flatnonzero(counts)
+    # Chunks blockweise, damit die Shingles x Permutationen-Matrix begrenzt bleibt
+    cum = np.cumsum(counts[nonempty])
+    limit = max(BATCH_ELEMENTS // num_perm, 1)
+    lo = 0
+    while lo < len(nonempty):
+        done = cum[lo - 1] if lo else 0
+        hi = max(lo + 1, int(np.searchsorted(cum, done + limit, side="right")))
+        docs = nonempty[lo:hi]
+        s0, s1 = starts[docs[0]], starts[docs[-1]] + counts[docs[-1]]
+        with np.errstate(over="ignore"):
+            h = (hashes[s0:s1, None] * a + b) >> np.uint64(32)
+        out[docs] = np.minimum.reduceat(h, starts[docs] - s0, axis=0)
+        lo = hi
+    return out.astype(np.uint32)
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def clusters(sigs, threshold=THRESHOLD, bands=BANDS):
+    """Cluster-Label je Chunk (kleinster Index im Cluster)."""
+    n, num_perm = sigs.shape
+    rows = num_perm // bands
+    uf = _UnionFind(n)
+    empty = np.all(sigs == np.uint32(MAX_HASH), axis=1)
+    for band in range(bands):
+        block = np.ascontiguousarray(sigs[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1], [True])))
+        for s, e in zip(bounds[:-1], bounds[1:]):
+            if e - s < 2:
+                continue
+            members = order[s:e]
+            members = members[~empty[members]]
+            if len(members) < 2:
+                continue
+            head = members[0]
+            sim = np.mean(sigs[members[1:]] == sigs[head], axis=1)
+            for m in members[1:][sim >= threshold]:
+                uf.union(head, m)
+    return np.array([uf.find(i) for i in range(n)])
+
+
+def _read_chunks(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def find_duplicates(records, threshold=THRESHOLD):
+    """-> (labels, kanonisch-Maske) fuer eine Liste von Chunk-Records.
+
+    Adress-, Gebaeude- und POI-Records (SKIP_TYPES) bleiben eigene Cluster: sie
+    unterscheiden sich oft nur im Namen ("Eva Preis"/"Felix Preis", gleiche Adresse).
+    """
+    sigs = signatures([None if r.get("doc_type") in SKIP_TYPES else r.get("content") for r in records])
+    labels = clusters(sigs, threshold)
+    lengths = np.array([len(r.get("content") or "") for r in records])
+    # kanonisch: laengster Inhalt, bei Gleichstand der erste
+    order = np.lexsort((np.arange(len(records)), -lengths, labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = labels[order][1:] != labels[order][:-1]
+    canonical = np.zeros(len(records), dtype=bool)
+    canonical[order[first]] = True
+    return labels, canonical
+
+
+def dedup_chunks(chunks_path=CHUNKS_PATH, out_path=DEDUP_PATH, report_path=None, threshold=THRESHOLD):
+    """Schreibt nur kanonische Chunks (mit "duplicates") nach out_path. Liefert (vorher, nachher, cluster)."""
+    records = _read_chunks(chunks_path)
+    labels, canonical = find_duplicates(records, threshold)
+    members = {}
+    for i, label in enumerate(labels):
+        members.setdefault(int(label), []).append(i)
+    canon_of = {int(labels[i]): i for i in np.flatnonzero(canonical)}
+
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        for i in np.flatnonzero(canonical):
+            rec = dict(records[i])
+            # inhaltsgleiche Dateien liefern gleiche doc_ids - nur fremde, je einmal
+            dups = list(dict.fromkeys(records[j]["doc_id"] for j in members[int(labels[i])]
+                                      if records[j]["doc_id"] != rec["doc_id"]))
+            if dups:
+                rec["duplicates"] = dups
+            fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    os.replace(tmp, out_path)
+
+    groups = [m for m in members.values() if len(m) > 1]
+    if report_path:
+        report = {
+            "chunks": len(records),
+            "kept": int(canonical.sum()),
+            "clusters": len(groups),
+            "threshold": threshold,
+            "largest": [
+                {"canonical": records[canon_of[int(labels[m[0]])]]["doc_id"],
+                 "title": records[canon_of[int(labels[m[0]])]].get("title"),
+                 "members": [records[j]["doc_id"] for j in m]}
+                for m in sorted(groups, key=len, reverse=True)[:50]
+            ],
+        }
+        with open(report_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=1)
+    return len(records), int(canonical.sum()), len(groups)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nahezu gleiche Knowledge-Chunks zusammenfassen")
+    parser.add_argument("--chunks", default=CHUNKS_PATH)
+    parser.add_argument("--out", default=DEDUP_PATH)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    print("Suche Beinahe-Duplikate ...")
+    started = time.perf_counter()
+    before, after, groups = dedup_chunks(args.chunks, args.out, args.report, args.threshold)
+    print(f"  ✓ {before} Chunks -> {after} kanonisch ({groups} Cluster, "
+          f"{time.perf_counter() - started:.2f} s)")
+    print(f"  ✓ {args.out}")
+    print(f"  ✓ {args.report}")
+    print("Fertig.")
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Naechstgelegene Einheiten fuer alle offenen Einsaetze auf einmal
+(vgl. Handbuch Einsatzboard, Abschnitt "Nächstgelegene Einheiten anzeigen").
+
+Einheiten:    conf/vehicles.json + vehicles-extra.json
+Position:     GPS-Fix aus vehicles_gps.json, sonst Standort der Gruppe aus
+              group_locations.json (data/ und data/conf/)
+Verfuegbar:   vehicles-availability.json / group-availability.json
+Einsaetze:    board.json (Karten mit Koordinaten, ohne Spalte "erledigt")
+
+Die Distanzen Einsatz x Einheit werden als eine Haversine-Matrix berechnet.
+Die Ranglisten je Einsatz werden zwischengespeichert und nur neu berechnet,
+wenn sich der Einsatz oder eine fuer ihn relevante Einheit um mehr als die
+Bewegungsschwelle verschoben bzw. ihren Status geaendert hat.
+
+Aufruf:  python3 scripts/nearest_units.py [--data-dir server/data] [-k 5] [--radius-km 10] [--out DATEI]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from spatial_index import DATA_DIR, haversine_km
+
+MOVE_THRESHOLD_KM = 0.2
+DEFAULT_RADIUS_KM = 10.0
+OPEN_COLUMNS = ("neu", "in-bearbeitung")
+
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return default
+
+
+def _norm(value):
+    return re.sub(r"[^a-z0-9]", "", str(value or "").lower())
+
+
+def is_unavailable(value, now_ms=None):
+    """Wie sanitizeAvailabilityValue in server.js; abgelaufene Sperren gelten als verfuegbar."""
+    if value is False:
+        return True
+    if not isinstance(value, dict) or value.get("available") not in (None, False):
+        return False
+    until = value.get("until", value.get("untilMs"))
+    if until is None:
+        return True
+    try:
+        until_ms = float(until) if not isinstance(until, str) else \
+            datetime.fromisoformat(until.replace("Z", "+00:00")).timestamp() * 1000
+    except ValueError:
+        return True
+    now_ms = now_ms if now_ms is not None else time.time() * 1000
+    return until_ms > now_ms
+
+
+class Units:
+    """Spaltenweise Sicht auf alle Einheiten (gleiche Reihenfolge in allen Arrays)."""
+
+    def __init__(self, ids, labels, groups, lat, lon, source, available, assigned):
+        self.ids = ids
+        self.labels = labels
+        self.groups = groups
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.source = source
+        self.available = np.asarray(available, dtype=bool)
+        self.assigned = assigned
+        self.index = {uid: i for i, uid in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_units(data_dir=DATA_DIR, board=None):
+    vehicles = _read_json(os.path.join(data_dir, "conf", "vehicles.json"), [])
+    vehicles += _read_json(os.path.join(data_dir, "vehicles-extra.json"), [])
+    fixes = _read_json(os.path.join(data_dir, "vehicles_gps.json"), [])
+    stations = dict(_read_json(os.path.join(data_dir, "conf", "group_locations.json"), {}))
+    stations.update(_read_json(os.path.join(data_dir, "group_locations.json"), {}))
+    veh_avail = _read_json(os.path.join(data_dir, "vehicles-availability.json"), {})
+    group_avail = _read_json(os.path.join(data_dir, "group-availability.json"), {})
+    if board is None:
+        board = _read_json(os.path.join(data_dir, "board.json"), {})
+
+    assigned_to = {}
+    for col in (board.get("columns") or {}).values():
+        for card in col.get("items") or []:
+            for vid in card.get("assignedVehicles") or []:
+                assigned_to[str(vid)] = card.get("id")
+
+    # GPS-Fix einer Einheit: Name des Fixes == Bezeichnung, oder realname == "<Bezeichnung> <Gruppe>"
+    fix_by_key = {}
+    for fix in fixes:
+        if fix.get("lat") is None or fix.get("lng") is None:
+            continue
+        fix_by_key.setdefault(_norm(fix.get("realname")), fix)
+        fix_by_key.setdefault(_norm(fix.get("name")), fix)
+
+    ids, labels, groups, lat, lon, source, available, assigned = [], [], [], [], [], [], [], []
+    used = set()
+    now_ms = time.time() * 1000
+    for v in vehicles:
+        if not v or v.get("id") is None:
+            continue
+        label, group = v.get("label") or str(v["id"]), v.get("ort") or ""
+        fix = fix_by_key.get(_norm(label + group)) or fix_by_key.get(_norm(label))
+        station = stations.get(group) or {}
+        if fix is not None:
+            pos, src = (fix["lat"], fix["lng"]), "gps"
+            used.add(id(fix))
+        elif station.get("lat") is not None:
+            pos, src = (station["lat"], station.get("lon", station.get("lng"))), "station"
+        else:
+            pos, src = (np.nan, np.nan), ""
+        ids.append(str(v["id"]))
+        labels.append(label)
+        groups.append(group)
+        lat.append(float(pos[0]))
+        lon.append(float(pos[1]))
+        source.append(src)
+        available.append(not is_unavailable(veh_avail.get(str(v["id"])), now_ms)
+                         and not is_unavailable(group_avail.get(group), now_ms))
+        assigned.append(assigned_to.get(str(v["id"])))
+
+    # GPS-Fixes ohne passende Einheit werden als eigene Einheiten gefuehrt
+    for fix in fixes:
+        if id(fix) in used or fix.get("lat") is None or fix.get("lng") is None:
+            continue
+        name = fix.get("name") or str(fix.get("id"))
+        real = fix.get("realname") or ""
+        ids.append(f"gps:{fix.get('id')}")
+        labels.append(name)
+        groups.append(real[len(name):].strip() if real.startswith(name) else "")
+        lat.append(float(fix["lat"]))
+        lon.append(float(fix["lng"]))
+        source.append("gps")
+        available.append(True)
+        assigned.append(None)
+    return Units(ids, labels, groups, lat, lon, source, available, assigned)
+
+
+def load_incidents(data_dir=DATA_DIR, board=None, columns=OPEN_COLUMNS):
+    """(ids, labels, lat, lon) aller Karten mit Koordinaten aus den angegebenen Spalten."""
+    if board is None:
+        board = _read_json(os.path.join(data_dir, "board.json"), {})
+    ids, labels, lat, lon = [], [], [], []
+    for key in columns:
+        for card in ((board.get("columns") or {}).get(key) or {}).get("items") or []:
+            try:
+                la = float(card.get("latitude", card.get("lat")))
+                lo = float(card.get("longitude", card.get("lng")))
+            except (TypeError, ValueError):
+                continue
+            ids.append(card.get("id"))
+            labels.append(card.get("humanId") or card.get("content") or card.get("id"))
+            lat.append(la)
+            lon.append(lo)
+    return ids, labels, np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+
+
+def distance_matrix(inc_lat, inc_lon, units):
+    """Haversine-Distanzen [Einsatz, Einheit] in km; Einheiten ohne Position -> inf."""
+    d = haversine_km(np.asarray(inc_lat)[:, None], np.asarray(inc_lon)[:, None],
+                     units.lat[None, :], units.lon[None, :])
+    return np.where(np.isnan(d), np.inf, d)
+
+
+class NearestUnits:
+    """Ranglisten je Einsatz mit Cache; `update()` laedt Einheiten neu und invalidiert gezielt."""
+
+    def __init__(self, data_dir=DATA_DIR, k=5, radius_km=DEFAULT_RADIUS_KM,
+                 move_threshold_km=MOVE_THRESHOLD_KM, only_available=False):
+        self.data_dir = data_dir
+        self.k = k
+        self.radius_km = radius_km
+        self.move_threshold_km = move_threshold_km
+        self.only_available = only_available
+        self.units = None
+        self._cache = {}     # incident_id -> (lat, lon, cutoff_km, ranked, unit_ids, anker-Units)
+        self.stats = {"hits": 0, "computed": 0, "invalidated": 0}
+
+    def update(self, units=None, board=None):
+        """Neue Einheitenlage uebernehmen; betroffene Einsaetze aus dem Cache werfen.
+
+        Verglichen wird je Cache-Eintrag mit dem Einheitenstand, aus dem er berechnet wurde
+        (Anker), damit sich viele kleine Schritte unterhalb der Schwelle aufsummieren.
+        """
+        units = units if units is not None else load_units(self.data_dir, board)
+        self.units = units
+        by_anchor = {}
+        for key, entry in self._cache.items():
+            by_anchor.setdefault(id(entry[5]), (entry[5], []))[1].append(key)
+        for anchor, keys in by_anchor.values():
+            for key in self._stale(anchor, units, keys):
+                del self._cache[key]
+                self.stats["invalidated"] += 1
+
+    def _stale(self, anchor, units, keys):
+        """Eintraege (keys, alle mit Anker `anchor`), die die neue Lage `units` betrifft."""
+        if set(anchor.ids) != set(units.ids):
+            return keys
+        j = np.array([anchor.index[uid] for uid in units.ids], dtype=np.int64)
+        moved_km = haversine_km(anchor.lat[j], anchor.lon[j], units.lat, units.lon)
+        changed = (np.nan_to_num(moved_km, nan=np.inf) > self.move_threshold_km) \
+            & ~(np.isnan(anchor.lat[j]) & np.isnan(units.lat))
+        changed |= anchor.available[j] != units.available
+        changed |= np.array([anchor.assigned[a] != units.assigned[b] for b, a in enumerate(j)], dtype=bool)
+        moved = np.flatnonzero(changed)
+        if not len(moved):
+            return []
+        # Ein Einsatz ist betroffen, wenn eine veraenderte Einheit in seiner Liste steht
+        # oder jetzt naeher liegt als der bisher letzte Listenplatz.
+        lat = np.array([self._cache[key][0] for key in keys])
+        lon = np.array([self._cache[key][1] for key in keys])
+        cutoff = np.array([self._cache[key][2] for key in keys])
+        d = haversine_km(lat[:, None], lon[:, None], units.lat[moved][None, :], units.lon[moved][None, :])
+        closer = (np.nan_to_num(d, nan=np.inf) <= cutoff[:, None]).any(axis=1)
+        moved_ids = {units.ids[i] for i in moved}
+        return [key for key, hit in zip(keys, closer) if hit or moved_ids & self._cache[key][4]]
+
+    def rank(self, ids, lats, lons):
+        """{incident_id: [ {unitId, label, group, distanceKm, source, available, assignedCardId}, ... ]}"""
+        if self.units is None:
+            self.update()
+        out, todo = {}, []
+        for n, (iid, la, lo) in enumerate(zip(ids, lats, lons)):
+            hit = self._cache.get(iid)
+            if hit is not None and hit[0] == la and hit[1] == lo:
+                out[iid] = hit[3]
+                self.stats["hits"] += 1
+            else:
+                todo.append(n)
+        if todo:
+            todo = np.asarray(todo)
+            lats, lons = np.asarray(lats, dtype=np.float64)[todo], np.asarray(lons, dtype=np.float64)[todo]
+            dist = distance_matrix(lats, lons, self.units)
+            if self.only_available:
+                dist[:, ~self.units.available] = np.inf
+            dist[dist > self.radius_km] = np.inf
+            k = min(self.k, dist.shape[1])
+            part = np.argpartition(dist, k - 1, axis=1)[:, :k] if k else np.zeros((len(todo), 0), int)
+            order = np.take_along_axis(part, np.argsort(np.take_along_axis(dist, part, 1), axis=1), 1)
+            for row, n in enumerate(todo):
+                ranked = [self._entry(u, dist[row, u]) for u in order[row] if np.isfinite(dist[row, u])]
+                # Cutoff: Radius, solange die Liste nicht voll ist, sonst die Distanz des letzten Platzes
+                cutoff = ranked[-1]["distanceKm"] if len(ranked) == self.k else self.radius_km
+                self._cache[ids[n]] = (lats[row], lons[row], cutoff, ranked, {e["unitId"] for e in ranked},
+                                       self.units)
+                out[ids[n]] = ranked
+                self.stats["computed"] += 1
+        return out
+
+    def _entry(self, u, d):
+        units = self.units
+        return {
+            "unitId": units.ids[u], "label": units.labels[u], "group": units.groups[u],
+            "distanceKm": round(float(d), 2), "source": units.source[u],
+            "available": bool(units.available[u]), "assignedCardId": units.assigned[u],
+        }
+
+    def rank_board(self, board=None):
+        """Ranglisten fuer alle offenen Einsaetze aus board.json."""
+        ids, _, lat, lon = load_incidents(self.data_dir, board)
+        return self.rank(ids, lat, lon)
+
+
+def format_units(ranked, limit=5):
+    """Kurzzeilen fuer die Ausgabe: "TLF A (FF Feldkirchen) 1,2 km, GPS"."""
+    lines = []
+    for e in ranked[:limit]:
+        flags = ["GPS" if e["source"] == "gps" else "Standort"]
+        if not e["available"]:
+            flags.append("nicht verfügbar")
+        if e["assignedCardId"]:
+            flags.append("gebunden")
+        group = f" ({e['group']})" if e["group"] else ""
+        km = f"{e['distanceKm']:.1f}".replace(".", ",")
+        lines.append(f"{e['label']}{group} {km} km, {', '.join(flags)}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Naechstgelegene Einheiten je Einsatz berechnen")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--radius-km", type=float, default=DEFAULT_RADIUS_KM)
+    parser.add_argument("--only-available", action="store_true")
+    parser.add_argument("--out", default=None, help="Ranglisten als JSON schreiben")
+    args = parser.parse_args()
+
+    engine = NearestUnits(args.data_dir, args.k, args.radius_km, only_available=args.only_available)
+    started = time.perf_counter()
+    engine.update()
+    ids, labels, lat, lon = load_incidents(args.data_dir)
+    ranked = engine.rank(ids, lat, lon)
+    print(f"  ✓ {len(ids)} Einsätze x {len(engine.units)} Einheiten "
+          f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+    for iid, label in zip(ids, labels):
+        print(f"  {label}:")
+        for line in format_units(ranked[iid], args.k):
+            print(f"    {line}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"generatedAt": datetime.now(timezone.utc).isoformat(), "incidents": ranked},
+                      fh, ensure_ascii=False, indent=2)
+        print(f"  ✓ {args.out}")
+    print("Fertig.")
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Textextraktion der Knowledge-PDFs (chatbot/knowledge/**/*.pdf) mit Cache.
+
+  - Seiten werden in einem Prozesspool extrahiert (Bloecke zu PAGES_PER_TASK Seiten,
+    jeder Worker haelt das geoeffnete PDF offen).
+  - Ergebnis je (Datei-Hash, Seite) landet in knowledge_index/pdf_text_cache.sqlite.
+    Der Hash wird nur neu berechnet, wenn sich Groesse oder mtime der Datei aendern.
+  - Jede Seite speichert ihre Extraktionszeit; langsame Dokumente/Seiten werden
+    am Ende ausgegeben (optional als CSV-Log).
+Nach dem Hinzufuegen eines neuen PDFs wird nur dieses eine PDF extrahiert.
+
+Benoetigt: pypdf (pip install pypdf)
+
+Aufruf:  python3 scripts/pdf_extract.py [--src DIR] [--cache DATEI] [--workers N] [--log DATEI] [--prune]
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import address_store
+
+KNOWLEDGE_DIR = os.path.join(address_store.ROOT_DIR, "chatbot", "knowledge")
+CACHE_PATH = os.path.join(address_store.INDEX_DIR, "pdf_text_cache.sqlite")
+PAGES_PER_TASK = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+  path TEXT PRIMARY KEY, size INTEGER, mtime REAL, file_hash TEXT, pages INTEGER);
+CREATE TABLE IF NOT EXISTS pages (
+  file_hash TEXT, page INTEGER, text TEXT, seconds REAL, error TEXT,
+  PRIMARY KEY (file_hash, page));
+"""
+
+
+def pdf_files(src_dir=KNOWLEDGE_DIR):
+    return sorted(glob.glob(os.path.join(src_dir, "**", "*.pdf"), recursive=True))
+
+
+def file_hash(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Worker (laeuft im Prozesspool)
+
+_READERS = {}
+
+
+def _reader(path):
+    reader = _READERS.get(path)
+    if reader is None:
+        from pypdf import PdfReader
+        if len(_READERS) > 4:
+            _READERS.clear()
+        reader = _READERS[path] = PdfReader(path)
+    return reader
+
+
+def _page_count(path):
+    """(seitenzahl, None) oder (None, fehler) - z.B. verschluesselte PDFs ohne `cryptography`."""
+    try:
+        return len(_reader(path).pages), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+def _extract_pages(path, pages):
+    """[(seite, text, sekunden, fehler)] fuer die angegebenen Seiten (0-basiert)."""
+    reader = _reader(path)
+    out = []
+    for n in pages:
+        started = time.perf_counter()
+        try:
+            text, error = reader.pages[n].extract_text() or "", None
+        except Exception as exc:           # defekte Seiten duerfen den Lauf nicht abbrechen
+            text, error = "", f"{type(exc).__name__}: {exc}"
+        out.append((n, text, time.perf_counter() - started, error))
+    return out
+
+
+# ----------------------------------------------------------------------
+
+class TextCache:
+    """Seitentexte je (Datei-Hash, Seite) in SQLite."""
+
+    def __init__(self, path=CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.con = sqlite3.connect(path)
+        self.con.executescript(SCHEMA)
+
+    def close(self):
+        self.con.close()
+
+    def resolve(self, path):
+        """(hash, seitenzahl|None); rechnet den Hash nur bei geaenderter Groesse/mtime neu."""
+        st = os.stat(path)
+        row = self.con.execute("SELECT size, mtime, file_hash, pages FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime:
+            return row[2], row[3]
+        digest = file_hash(path)
+        known = self.con.execute("SELECT pages FROM files WHERE file_hash = ? AND pages IS NOT NULL LIMIT 1",
+                                 (digest,)).fetchone()
+        pages = known[0] if known else None
+        self.con.execute("INSERT OR REPLACE INTO files VALUES (?,?,?,?,?)", (path, st.st_size, st.st_mtime, digest, pages))
+        self.con.commit()
+        return digest, pages
+
+    def set_pages(self, path, pages):
+        self.con.execute("UPDATE files SET pages = ? WHERE path = ?", (pages, path))
+        self.con.commit()
+
+    def missing(self, digest, pages):
+        done = {r[0] for r in self.con.execute("SELECT page FROM pages WHERE file_hash = ?", (digest,))}
+        return [n for n in range(pages) if n not in done]
+
+    def store(self, digest, results):
+        self.con.executemany("INSERT OR REPLACE INTO pages VALUES (?,?,?,?,?)",
+                             [(digest, n, text, sec, err) for n, text, sec, err in results])
+        self.con.commit()
+
+    def pages(self, digest):
+        """Seitentexte in Reihenfolge -> [(seite, text)]."""
+        return self.con.execute("SELECT page, text FROM pages WHERE file_hash = ? ORDER BY page", (digest,)).fetchall()
+
+    def iter_pages(self, digest):
+        """Wie pages(), aber zeilenweise vom Cursor (ohne das ganze Dokument im Speicher)."""
+        yield from self.con.execute("SELECT page, text FROM pages WHERE file_hash = ? ORDER BY page", (digest,))
+
+    def timings(self, digest):
+        return self.con.execute("SELECT page, seconds, error FROM pages WHERE file_hash = ? ORDER BY page",
+                                (digest,)).fetchall()
+
+    def prune(self, keep_paths):
+        """Entfernt Eintraege fuer nicht mehr vorhandene Dateien und verwaiste Hashes."""
+        keep = set(keep_paths)
+        gone = [p for (p,) in self.con.execute("SELECT path FROM files") if p not in keep]
+        self.con.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in gone])
+        cur = self.con.execute("DELETE FROM pages WHERE file_hash NOT IN (SELECT file_hash FROM files)")
+        self.con.commit()
+        return len(gone), cur.rowcount
+
+
+def extract_all(src_dir=KNOWLEDGE_DIR, cache_path=CACHE_PATH, workers=None, paths=None):
+    """Extrahiert alle noch nicht gecachten Seiten.
+
+    Liefert ({pfad: (hash, seiten, neu_extrahiert)}, {pfad: fehler}). Nicht lesbare
+    Dateien werden uebersprungen und beim naechsten Lauf erneut versucht.
+    """
+    paths = paths if paths is not None else pdf_files(src_dir)
+    cache = TextCache(cache_path)
+    status, todo, failed = {}, [], {}
+    try:
+        for path in paths:
+            digest, pages = cache.resolve(path)
+            status[path] = [digest, pages, 0]
+            if pages is None:
+                todo.append(path)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Seitenzahlen unbekannter Dateien parallel ermitteln
+            for path, (count, error) in zip(todo, pool.map(_page_count, todo)):
+                if error:
+                    failed[path] = error
+                    del status[path]
+                    continue
+                status[path][1] = count
+                cache.set_pages(path, count)
+
+            # inhaltsgleiche Dateien (gleicher Hash) nur einmal extrahieren
+            futures, seen = {}, set()
+            for path, (digest, pages, _) in status.items():
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                missing = cache.missing(digest, pages)
+                for i in range(0, len(missing), PAGES_PER_TASK):
+                    fut = pool.submit(_extract_pages, path, missing[i:i + PAGES_PER_TASK])
+                    futures[fut] = path
+            for fut in as_completed(futures):
+                path = futures[fut]
+                results = fut.result()
+                cache.store(status[path][0], results)
+                status[path][2] += len(results)
+    finally:
+        cache.close()
+    return {p: tuple(v) for p, v in status.items()}, failed
+
+
+def document_pages(path, cache_path=CACHE_PATH):
+    """Seitentexte eines PDFs aus dem Cache (extrahiert bei Bedarf) -> [(seite, text)]."""
+    _, failed = extract_all(paths=[path], cache_path=cache_path, workers=1)
+    if failed:
+        raise RuntimeError(f"{os.path.basename(path)}: {failed[path]}")
+    cache = TextCache(cache_path)
+    try:
+        digest, _ = cache.resolve(path)
+        return cache.pages(digest)
+    finally:
+        cache.close()
+
+
+def timing_report(status, cache_path=CACHE_PATH, log_path=None, top=10):
+    """Gesamtzeit je Dokument und langsamste Seiten; optional alle Seiten als CSV."""
+    cache = TextCache(cache_path)
+    docs, slow, errors = [], [], 0
+    try:
+        rows = []
+        for path, (digest, pages, _) in status.items():
+            t = cache.timings(digest)
+            total = sum(sec or 0 for _, sec, _ in t)
+            docs.append((os.path.basename(path), pages, total))
+            for page, sec, err in t:
+                slow.append((sec or 0, os.path.basename(path), page + 1))
+                errors += err is not None
+                rows.append((os.path.relpath(path, KNOWLEDGE_DIR), page + 1, f"{sec or 0:.4f}", err or ""))
+    finally:
+        cache.close()
+    if log_path:
+        with open(log_path, "w", encoding="utf-8-sig", newline="") as fh:
+            writer = csv.writer(fh, delimiter=";")
+            writer.writerow(["DATEI", "SEITE", "SEKUNDEN", "FEHLER"])
+            writer.writerows(rows)
+    docs.sort(key=lambda d: -d[2])
+    slow.sort(reverse=True)
+    return docs[:top], slow[:top], errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Text aus den Knowledge-PDFs extrahieren (mit Cache)")
+    parser.add_argument("--src", default=KNOWLEDGE_DIR)
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--log", default=None, help="Seitenzeiten als CSV schreiben")
+    parser.add_argument("--prune", action="store_true", help="Cache-Einträge entfernter PDFs löschen")
+    args = parser.parse_args()
+
+    print("Extrahiere PDF-Text ...")
+    started = time.perf_counter()
+    status, failed = extract_all(args.src, args.cache, args.workers)
+    fresh = sum(v[2] for v in status.values())
+    total = sum(v[1] or 0 for v in status.values())
+    print(f"  ✓ {len(status)} PDFs, {total} Seiten, davon {fresh} neu extrahiert "
+          f"({time.perf_counter() - started:.2f} s)")
+    for path, (_, pages, n) in status.items():
+        if n:
+            print(f"    {os.path.basename(path)}: {n}/{pages} Seiten")
+    docs, slow, errors = timing_report(status, args.cache, args.log)
+    print("  Langsamste Dokumente:")
+    for name, pages, sec in docs:
+        print(f"    {sec:7.2f} s  {name} ({pages} Seiten, {sec / max(pages or 1, 1) * 1000:.0f} ms/Seite)")
+    print("  Langsamste Seiten:")
+    for sec, name, page in slow:
+        print(f"    {sec:7.3f} s  {name} S. {page}")
+    if errors:
+        print(f"  ! {errors} Seiten mit Fehler")
+    for path, error in failed.items():
+        print(f"  ! {os.path.basename(path)} nicht lesbar: {error}")
+    if args.prune:
+        cache = TextCache(args.cache)
+        files, pages = cache.prune(pdf_files(args.src))
+        cache.close()
+        print(f"  ✓ Bereinigt: {files} Dateien, {pages} Seiten")
+    if args.log:
+        print(f"  ✓ {args.log}")
+    print("Fertig.")
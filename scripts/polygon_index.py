@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Punkt-in-Polygon-Zuordnung (Gemeinde/Bezirk) fuer viele Punkte auf einmal.
+
+Polygone aus GeoJSON (Feature, FeatureCollection, Polygon/MultiPolygon mit
+Loechern) werden in eine flache Kantenliste uebersetzt. Je Polygon gibt es
+  - eine BBOX als Vorfilter (vektorisiert ueber alle Punkte),
+  - Breitenbaender, in die jede Kante einsortiert ist; ein Punkt prueft nur die
+    Kanten seines Bandes.
+Der Strahltest (gerade/ungerade Anzahl Schnitte) laeuft als NumPy-Matrix
+Punkte x Kanten je Band.
+
+Quellen: server/data/conf/gemeinden_feldkirchen.geojson,
+         feldkirchen-adressen/bezirk_feldkirchen_clean.geojson
+
+Aufruf:  python3 scripts/polygon_index.py [--geojson DATEI ...] [--store DATEI]
+"""
+
+import argparse
+import collections
+import json
+import os
+import time
+
+import numpy as np
+
+import address_store
+from spatial_index import DATA_DIR, board_points
+
+GEMEINDEN_GEOJSON = os.path.join(DATA_DIR, "conf", "gemeinden_feldkirchen.geojson")
+BEZIRK_GEOJSON = os.path.join(address_store.ROOT_DIR, "feldkirchen-adressen", "bezirk_feldkirchen_clean.geojson")
+
+NAME_PROPERTIES = ("name", "gemeinde", "GEMNAM", "Name", "NAME")
+# Obergrenze fuer die Punkte-x-Kanten-Matrix je Block (Anzahl Elemente)
+BLOCK_ELEMENTS = 1 << 22
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        text = fh.read().strip()
+    # bezirk_feldkirchen.geojson (ungereinigt) endet mit einem Komma
+    return json.loads(text.rstrip(","))
+
+
+def _features(obj):
+    kind = obj.get("type")
+    if kind == "FeatureCollection":
+        for feat in obj.get("features") or []:
+            yield from _features(feat)
+    elif kind == "Feature":
+        if obj.get("geometry"):
+            yield obj.get("properties") or {}, obj["geometry"]
+    elif kind in ("Polygon", "MultiPolygon"):
+        yield {}, obj
+
+
+def _rings(geometry):
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return []
+    return [np.asarray(ring, dtype=np.float64)[:, :2] for poly in polygons for ring in poly if len(ring) >= 3]
+
+
+def load_geojson(*paths):
+    """[(name, properties, [ring (n,2) lon/lat, ...])] aus einer oder mehreren GeoJSON-Dateien."""
+    out = []
+    for path in paths:
+        for props, geometry in _features(_load_json(path)):
+            rings = _rings(geometry)
+            if not rings:
+                continue
+            name = next((props[k] for k in NAME_PROPERTIES if props.get(k)), None)
+            out.append((str(name or f"Polygon {len(out) + 1}"), props, rings))
+    return out
+
+
+class PolygonIndex:
+    """Kantenliste aller Polygone mit BBOX- und Breitenband-Vorfilter."""
+
+    def __init__(self, polygons, band_edges=8):
+        self.names = [name for name, _, _ in polygons]
+        self.properties = [props for _, props, _ in polygons]
+        self.bbox = np.full((len(polygons), 4), np.nan)        # min_lon, min_lat, max_lon, max_lat
+        self._bands = []
+        for i, (_, _, rings) in enumerate(polygons):
+            x0 = np.concatenate([r[:, 0] for r in rings])
+            y0 = np.concatenate([r[:, 1] for r in rings])
+            # Kante k verbindet Punkt k mit dem naechsten Punkt desselben Rings (Ring wird geschlossen)
+            x1 = np.concatenate([np.roll(r[:, 0], -1) for r in rings])
+            y1 = np.concatenate([np.roll(r[:, 1], -1) for r in rings])
+            keep = y0 != y1                        # waagrechte Kanten schneiden den Strahl nie
+            x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+            self.bbox[i] = (x0.min(), y0.min(), x0.max(), y0.max())
+            self._bands.append(self._build_bands(x0, y0, x1, y1, self.bbox[i], band_edges))
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_geojson(cls, *paths):
+        return cls(load_geojson(*paths))
+
+    @staticmethod
+    def _build_bands(x0, y0, x1, y1, bbox, band_edges):
+        """Teilt die Polygonhoehe in Baender; je Band die Kanten, deren y-Bereich es schneidet."""
+        n_bands = int(np.clip(len(x0) // band_edges, 1, 4096))
+        lo, hi = bbox[1], bbox[3]
+        height = (hi - lo) / n_bands or 1.0
+        first = np.clip(((np.minimum(y0, y1) - lo) / height).astype(np.int64), 0, n_bands - 1)
+        last = np.clip(((np.maximum(y0, y1) - lo) / height).astype(np.int64), 0, n_bands - 1)
+        counts = last - first + 1
+        edge_of = np.repeat(np.arange(len(x0)), counts)
+        band_of = np.repeat(first, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        order = np.argsort(band_of, kind="stable")
+        edges = edge_of[order]
+        starts = np.searchsorted(band_of[order], np.arange(n_bands + 1))
+        slope = (x1 - x0) / (y1 - y0)
+        return {
+            "lo": lo, "height": height, "n": n_bands, "starts": starts,
+            "x0": x0[edges], "y0": y0[edges], "y1": y1[edges], "slope": slope[edges],
+        }
+
+    def _contains(self, i, px, py):
+        """Strahltest fuer Punkte, die bereits in der BBOX von Polygon i liegen."""
+        b = self._bands[i]
+        band = np.clip(((py - b["lo"]) / b["height"]).astype(np.int64), 0, b["n"] - 1)
+        order = np.argsort(band, kind="stable")
+        bounds = np.searchsorted(band[order], np.arange(b["n"] + 1))
+        inside = np.zeros(len(px), dtype=bool)
+        for k in np.flatnonzero(np.diff(bounds)):
+            e0, e1 = b["starts"][k], b["starts"][k + 1]
+            if e0 == e1:
+                continue
+            ex0, ey0, ey1, slope = (b[f][e0:e1] for f in ("x0", "y0", "y1", "slope"))
+            rows = order[bounds[k]:bounds[k + 1]]
+            step = max(1, BLOCK_ELEMENTS // (e1 - e0))
+            for s in range(0, len(rows), step):
+                sel = rows[s:s + step]
+                y = py[sel, None]
+                straddle = (ey0 > y) != (ey1 > y)
+                cross = straddle & (px[sel, None] < ex0 + (y - ey0) * slope)
+                inside[sel] = np.count_nonzero(cross, axis=1) & 1
+        return inside
+
+    def locate(self, lats, lons):
+        """Polygonindex je Punkt (erstes passendes Polygon in Dateireihenfolge), -1 = ausserhalb."""
+        py = np.asarray(lats, dtype=np.float64).ravel()
+        px = np.asarray(lons, dtype=np.float64).ravel()
+        result = np.full(len(px), -1, dtype=np.int32)
+        for i, (x_min, y_min, x_max, y_max) in enumerate(self.bbox):
+            cand = np.flatnonzero((result < 0) & (px >= x_min) & (px <= x_max) & (py >= y_min) & (py <= y_max))
+            if len(cand):
+                result[cand[self._contains(i, px[cand], py[cand])]] = i
+        return result
+
+    def assign(self, lats, lons, default=None):
+        """Polygonname je Punkt (Objekt-Array), `default` fuer Punkte ausserhalb."""
+        names = np.array(self.names + [default], dtype=object)
+        return names[self.locate(lats, lons)]
+
+
+def default_index():
+    """Gemeindegrenzen, sofern vorhanden, sonst bzw. zusaetzlich die Bezirksgrenze."""
+    paths = [p for p in (GEMEINDEN_GEOJSON, BEZIRK_GEOJSON) if os.path.exists(p)]
+    return PolygonIndex.from_geojson(*paths)
+
+
+def tag_store(index, store=None):
+    """Polygonindex fuer jeden Datensatz des Adressspeichers (address_store.py)."""
+    store = store or address_store.open_store()
+    return index.locate(store.lat, store.lon)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Punkte Gemeinden/Bezirken zuordnen")
+    parser.add_argument("--geojson", nargs="*", default=None)
+    parser.add_argument("--store", default=address_store.STORE_PATH)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="board.json/vehicles_gps.json zuordnen")
+    args = parser.parse_args()
+
+    index = PolygonIndex.from_geojson(*args.geojson) if args.geojson else default_index()
+    print(f"  ✓ {len(index)} Polygone: {', '.join(index.names)}")
+
+    if not os.path.exists(args.store):
+        address_store.build_store(out_path=args.store)
+    store = address_store.open_store(args.store)
+    started = time.perf_counter()
+    codes = tag_store(index, store)
+    elapsed = time.perf_counter() - started
+    print(f"  ✓ Adressspeicher: {len(store)} Punkte in {elapsed * 1000:.1f} ms "
+          f"({len(store) / max(elapsed, 1e-9):,.0f} Punkte/s)")
+    counts = collections.Counter(int(c) for c in codes)
+    for code, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+        print(f"    {index.names[code] if code >= 0 else 'ausserhalb'}: {n}")
+
+    points = board_points(args.data_dir)
+    if points:
+        names = index.assign([p[1] for p in points], [p[2] for p in points], default="–")
+        for (label, _, _), name in zip(points, names):
+            print(f"  {label}: {name}")
+    print("Fertig.")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Kennzahlen des Meldestellen-Workflows aus protocol.csv.
+
+protocol.csv enthaelt je Speichervorgang eine Zeile mit dem vollstaendigen Stand
+eines Protokolleintrags (ID bzw. PROTOKOLL-NR). Daraus werden je Eintrag
+Anlagezeit, Kanal, Richtung (EING/AUSG), Bestaetigungszeitpunkt und die
+Massnahmen M1-M5 mit Verantwortlichem (V1-V5) und Erledigt-Kennzeichen (X1-X5)
+des letzten Stands gefuehrt. Die Kennzahlen werden auf diesen Arrays berechnet:
+  - Durchsatz je Kanal und je Stunde (eingehend/ausgehend),
+  - Rueckstand unbestaetigter Ausgaenge mit externen Empfaengern ueber die Zeit,
+  - Bestaetigungsdauer (Perzentile je Kanal),
+  - offene Massnahmen je Funktion.
+Neue Zeilen werden ueber csv_tail.CsvTail inkrementell eingelesen; nur bei
+einer neu geschriebenen Datei wird von vorn begonnen.
+
+Aufruf:  python3 scripts/protocol_kpi.py [--data-dir server/data] [--watch SEKUNDEN]
+"""
+
+import argparse
+import datetime
+import os
+import time
+
+import numpy as np
+
+from address_store import _Interner
+from csv_tail import CsvTail
+from cycle_times import NONE, grouped_percentiles
+from einfo_logs import DATA_DIR, parse_zeitpunkt
+from log_report import fmt_duration
+
+MEASURES = 5
+# Rollen des Stabs; andere Empfaenger in ERGEHT_AN verlangen eine Bestaetigung
+# (INTERNAL_RECIPIENT_IDS in server/printRoutes.js)
+INTERNAL_RECIPIENTS = {"EL", "LTSTB", "LTSTBSTV", "S1", "S2", "S3", "S4", "S5", "S6"}
+NO_FUNCTION = "(ohne)"
+
+
+def _flag(values):
+    return np.char.strip(np.asarray(values, dtype=str)) != ""
+
+
+def needs_confirmation(outgoing, recipients, extra):
+    """Ausgang mit externen Empfaengern (ERGEHT_AN ausserhalb des Stabs oder ERGAENZUNG)."""
+    external = np.array([
+        any(r.strip() and r.strip().upper() not in INTERNAL_RECIPIENTS for r in value.split(","))
+        for value in recipients], dtype=bool)
+    return outgoing & (external | _flag(extra))
+
+
+class ProtocolKpi:
+    """Laufende Kennzahlen ueber protocol.csv; update() liest nur angehaengte Zeilen."""
+
+    def __init__(self, path=os.path.join(DATA_DIR, "protocol.csv"), index_dir=None):
+        kwargs = {"index_dir": index_dir} if index_dir else {}
+        self.tail = CsvTail(path, **kwargs)
+        self._reset()
+
+    def _reset(self):
+        self.seen = 0
+        self.first_hash = None
+        self.entries = {}                       # ID -> Zeile in den Arrays
+        self.channels = _Interner()
+        self.functions = _Interner()
+        self.created = np.zeros(0, dtype=np.int64)
+        self.confirmed = np.zeros(0, dtype=np.int64)
+        self.channel = np.zeros(0, dtype=np.int32)
+        self.incoming = np.zeros(0, dtype=bool)
+        self.outgoing = np.zeros(0, dtype=bool)
+        self.needs = np.zeros(0, dtype=bool)
+        self.measure = np.zeros((0, MEASURES), dtype=np.int32)     # Funktion je Massnahme, 0 = keine
+        self.done = np.zeros((0, MEASURES), dtype=bool)
+
+    def __len__(self):
+        return len(self.created)
+
+    def _grow(self, n):
+        extra = n - len(self.created)
+        if extra <= 0:
+            return
+        self.created = np.concatenate((self.created, np.full(extra, NONE, dtype=np.int64)))
+        self.confirmed = np.concatenate((self.confirmed, np.full(extra, NONE, dtype=np.int64)))
+        for name, dtype in (("channel", np.int32), ("incoming", bool), ("outgoing", bool), ("needs", bool)):
+            setattr(self, name, np.concatenate((getattr(self, name), np.zeros(extra, dtype=dtype))))
+        self.measure = np.concatenate((self.measure, np.zeros((extra, MEASURES), dtype=np.int32)))
+        self.done = np.concatenate((self.done, np.zeros((extra, MEASURES), dtype=bool)))
+
+    def update(self):
+        """Nimmt neue Zeilen auf. -> Anzahl verarbeiteter Zeilen."""
+        self.tail.update()
+        if len(self.tail) < self.seen or self.tail.meta.get("first_hash") != self.first_hash:
+            if self.seen:
+                self._reset()
+        self.first_hash = self.tail.meta.get("first_hash")
+        rows = list(self.tail.rows(self.seen, len(self.tail)))
+        self.seen = len(self.tail)
+        if rows:
+            self._apply(rows)
+        return len(rows)
+
+    def _apply(self, rows):
+        """Ein Durchlauf ueber einen Block von Zeilen (Reihenfolge = Dateireihenfolge)."""
+        col = lambda name: [r.get(name, "") for r in rows]
+        keys = [(r.get("ID") or "").strip() or "#" + (r.get("PROTOKOLL-NR") or "").strip() for r in rows]
+        entry = np.array([self.entries.setdefault(k, len(self.entries)) for k in keys], dtype=np.int64)
+        self._grow(len(self.entries))
+        times = parse_zeitpunkt(col("ZEITPUNKT")).astype(np.int64)
+        valid = times != np.datetime64("NaT").astype(np.int64)
+
+        np.minimum.at(self.created, entry[valid], times[valid])
+        confirmed = valid & _flag(col("BESTÄTIGT_DURCH"))
+        np.minimum.at(self.confirmed, entry[confirmed], times[confirmed])
+
+        # Zustandsfelder aus der jeweils letzten Zeile eines Eintrags
+        _, first_rev = np.unique(entry[::-1], return_index=True)
+        last = len(entry) - 1 - first_rev
+        pick = lambda name: [rows[i].get(name, "") for i in last]
+        target = entry[last]
+        self.channel[target] = [self.channels((v or "").strip()) for v in pick("KANAL")]
+        self.incoming[target] = _flag(pick("EING"))
+        self.outgoing[target] = _flag(pick("AUSG"))
+        self.needs[target] = needs_confirmation(self.outgoing[target], pick("ERGEHT_AN"), pick("ERGAENZUNG"))
+        for m in range(MEASURES):
+            text = _flag(pick(f"M{m + 1}"))
+            owner = [self.functions((v or "").strip() or NO_FUNCTION) for v in pick(f"V{m + 1}")]
+            self.measure[target, m] = np.where(text, owner, 0)
+            self.done[target, m] = _flag(pick(f"X{m + 1}"))
+
+    # -------------------------------------------------------------- Kennzahlen
+
+    def span(self):
+        known = self.created[self.created != NONE]
+        if not len(known):
+            return None, None
+        stamps = np.concatenate((known, self.confirmed[self.confirmed != NONE]))
+        return int(stamps.min()), int(stamps.max())
+
+    def throughput(self):
+        """{kanal: (eingehend, ausgehend, gesamt)} absteigend nach gesamt."""
+        n = len(self.channels.values)
+        ein = np.bincount(self.channel[self.incoming], minlength=n)
+        aus = np.bincount(self.channel[self.outgoing], minlength=n)
+        total = np.bincount(self.channel, minlength=n)
+        order = np.argsort(-total, kind="stable")
+        return {self.channels.values[c] or "(leer)": (int(ein[c]), int(aus[c]), int(total[c]))
+                for c in order if total[c]}
+
+    def hourly(self):
+        """(stunden [datetime64[h]], kanaele, anzahl[stunde, kanal]) nach Anlagezeit."""
+        known = self.created != NONE
+        if not known.any():
+            return np.zeros(0, dtype="datetime64[h]"), [], np.zeros((0, 0), dtype=np.int64)
+        hours = self.created[known] // 3600
+        first = hours.min()
+        n_ch = len(self.channels.values)
+        flat = np.bincount((hours - first) * n_ch + self.channel[known],
+                           minlength=int(hours.max() - first + 1) * n_ch)
+        counts = flat.reshape(-1, n_ch)
+        used = np.flatnonzero(counts.sum(axis=0))
+        stamps = (first + np.arange(len(counts))).astype("datetime64[h]")
+        return stamps, [self.channels.values[c] or "(leer)" for c in used], counts[:, used]
+
+    def backlog(self, step=3600):
+        """Unbestaetigte Eintraege mit Bestaetigungspflicht -> (zeitpunkte [int64 s], anzahl)."""
+        created = np.sort(self.created[self.needs & (self.created != NONE)])
+        if not len(created):
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        confirmed = np.sort(self.confirmed[self.needs & (self.confirmed != NONE)])
+        _, end = self.span()
+        grid = np.arange(created[0] - created[0] % step + step, end + 2 * step, step, dtype=np.int64)
+        grid = grid[grid - step <= end]
+        return grid, np.searchsorted(created, grid, side="right") - np.searchsorted(confirmed, grid, side="right")
+
+    def confirmation_latency(self):
+        """Bestaetigungsdauer je Kanal -> (kanaele, anzahl, perzentile, mittel) wie grouped_percentiles."""
+        ok = self.needs & (self.created != NONE) & (self.confirmed != NONE) & (self.confirmed >= self.created)
+        secs = np.where(ok, self.confirmed - self.created, 0).astype(np.float64)
+        secs[~ok] = np.nan
+        labels = np.array(self.channels.values, dtype=object)[self.channel]
+        return grouped_percentiles(secs, labels)
+
+    def open_measures(self):
+        """[(funktion, offen, erledigt)] je Verantwortlichem, absteigend nach offen."""
+        n = len(self.functions.values)
+        has = self.measure > 0
+        open_ = np.bincount(self.measure[has & ~self.done], minlength=n)
+        done = np.bincount(self.measure[has & self.done], minlength=n)
+        order = np.argsort(-open_, kind="stable")
+        return [(self.functions.values[f], int(open_[f]), int(done[f])) for f in order if open_[f] or done[f]]
+
+    def summary(self):
+        pending = self.needs & (self.confirmed == NONE)
+        has = self.measure > 0
+        return {"entries": len(self), "rows": self.seen,
+                "incoming": int(self.incoming.sum()), "outgoing": int(self.outgoing.sum()),
+                "needs_confirmation": int(self.needs.sum()), "unconfirmed": int(pending.sum()),
+                "measures": int(has.sum()), "open_measures": int((has & ~self.done).sum())}
+
+
+def _fmt_s(secs):
+    return datetime.datetime.fromtimestamp(int(secs), datetime.timezone.utc).strftime("%d.%m. %H:%M")
+
+
+def print_report(kpi):
+    s = kpi.summary()
+    print(f"  {s['entries']} Eintraege aus {s['rows']} Zeilen: {s['incoming']} eingehend, {s['outgoing']} ausgehend; "
+          f"{s['unconfirmed']} von {s['needs_confirmation']} unbestaetigt, "
+          f"{s['open_measures']} von {s['measures']} Massnahmen offen")
+    print("  Kanal            Ein   Aus  Gesamt")
+    for channel, (ein, aus, total) in kpi.throughput().items():
+        print(f"  {channel[:15]:<15} {ein:>4} {aus:>5} {total:>7}")
+    hours, channels, counts = kpi.hourly()
+    if len(hours):
+        busiest = int(counts.sum(axis=1).argmax())
+        print(f"  Spitzenstunde {str(hours[busiest]).replace('T', ' ')} Uhr: {int(counts[busiest].sum())} Eintraege "
+              f"({', '.join(f'{c} {int(n)}' for c, n in zip(channels, counts[busiest]) if n)})")
+    grid, backlog = kpi.backlog()
+    if len(grid):
+        peak = int(backlog.argmax())
+        print(f"  Rueckstand unbestaetigt: max. {int(backlog[peak])} um {_fmt_s(grid[peak])}, "
+              f"aktuell {int(backlog[-1])}")
+    names, counts, pct, means = kpi.confirmation_latency()
+    for name, n, p, mean in zip(names, counts, pct, means):
+        print(f"  Bestaetigung {name or '(leer)'}: {n}x, P50 {fmt_duration(p[0])}, P90 {fmt_duration(p[1])}, "
+              f"Mittel {fmt_duration(mean)}")
+    for function, open_, done in kpi.open_measures()[:15]:
+        print(f"  Massnahmen {function}: {open_} offen, {done} erledigt")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kennzahlen der Meldestelle aus protocol.csv")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--watch", type=float, default=None, help="alle N Sekunden neue Zeilen auswerten")
+    args = parser.parse_args()
+
+    print("Generiere Meldestellen-Kennzahlen ...")
+    kpi = ProtocolKpi(os.path.join(args.data_dir, "protocol.csv"), os.path.join(args.data_dir, "csv_index"))
+    while True:
+        started = time.perf_counter()
+        added = kpi.update()
+        if added or args.watch is None:
+            print(f"  ✓ {added} neue Zeilen ({(time.perf_counter() - started) * 1000:.1f} ms)")
+            print_report(kpi)
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+    print("Fertig.")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Zweistufiger Ergebnis-Cache vor der Knowledge-Suche (knowledge_segments.SegmentedIndex
+oder jede Suchfunktion mit Versionsangabe).
+
+  1. Exakt: LRU auf der normalisierten Anfrage (gefaltet, ohne Satzzeichen,
+     Woerter sortiert) plus k und Filter.
+  2. Aehnlich: Einbettung der Anfrage (HashingEmbedder) gegen die zuletzt gestellten
+     Anfragen; ab SIMILARITY (Kosinus) und nur bei gleicher Menge inhaltstragender
+     Woerter (ohne STOPWORDS, gestemmt; Orte, Zahlen und Paragraphen also identisch)
+     wird das gespeicherte Ergebnis wiederverwendet.
+Aendert sich die Segmentversion des Index, werden beide Stufen verworfen.
+stats() liefert Treffer, Fehlzugriffe und Trefferquoten je Stufe.
+
+Aufruf:  python3 scripts/retrieval_cache.py [--dir SEGMENTE] [--queries DATEI] [--repeat N]
+"""
+
+import argparse
+import collections
+import re
+import threading
+import time
+
+import numpy as np
+
+from bm25_index import fold, stem
+from vector_index import HashingEmbedder
+
+CAPACITY = 512
+SIMILAR_CAPACITY = 1024
+SIMILARITY = 0.88
+WORD = re.compile(r"§\s*\d+[a-z]?|\w+(?:-\w+)*")
+# Funktions- und Fragewoerter (gefaltet); alles andere muss fuer einen Aehnlichkeitstreffer uebereinstimmen
+STOPWORDS = frozenset("""
+    der die das den dem des ein eine einer einem einen eines und oder bzw sowie
+    von vom zu zum zur im in ins am an auf aus bei mit nach fuer ueber unter um
+    ist sind war wird werden wurde hat haben gibt es sich man bitte
+    was wer wie wo wann welche welcher welches welchen warum wieviel wie viele
+    kann koennen muss muessen soll sollen darf
+    ich wir sie er mein meine unser unsere dort hier noch auch nur
+""".split())
+
+SAMPLE_QUERIES = (
+    "Wer ist zuständig für Hochwasser?",
+    "wer ist für hochwasser zuständig",
+    "Adresse von FF Poitschach",
+    "Adresse der FF Poitschach",
+    "Was regelt § 5 K-KHG?",
+    "Was regelt der § 5 K-KHG",
+    "Aufgaben der Einsatzleitung",
+    "Apotheke Feldkirchen",
+)
+
+
+def query_tokens(query):
+    return [t.replace(" ", "") for t in WORD.findall(fold(query or ""))]
+
+
+def normalise_query(query):
+    """Schluessel der exakten Stufe: gefaltete Woerter, sortiert (Wortstellung egal)."""
+    return " ".join(sorted(query_tokens(query)))
+
+
+def content_key(tokens):
+    """Inhaltstragende Woerter einer Anfrage (gestemmt) - Bedingung fuer einen Aehnlichkeitstreffer."""
+    return frozenset(stem(t) for t in tokens if t not in STOPWORDS)
+
+
+class RetrievalCache:
+    """Cache vor `search_fn(query, k, **filters)`; `version_fn()` liefert die Indexversion."""
+
+    def __init__(self, search_fn, version_fn, capacity=CAPACITY, similar_capacity=SIMILAR_CAPACITY,
+                 similarity=SIMILARITY, embedder=None):
+        self.search_fn = search_fn
+        self.version_fn = version_fn
+        self.capacity = capacity
+        self.similarity = similarity
+        self.embedder = embedder or HashingEmbedder()
+        self.lock = threading.Lock()
+        self._exact = collections.OrderedDict()
+        self._vectors = np.zeros((similar_capacity, self.embedder.dim), dtype=np.float32)
+        self._slots = [None] * similar_capacity         # (scope, inhaltswoerter, ergebnis)
+        self._next = 0
+        self._version = None
+        self.counters = collections.Counter()
+
+    @classmethod
+    def for_segments(cls, index, **kwargs):
+        """Cache vor knowledge_segments.SegmentedIndex (Version aus segments/state.json)."""
+        def version():
+            index.reload()
+            return index.version
+        return cls(index.search, version, **kwargs)
+
+    def _clear(self):
+        self._exact.clear()
+        self._vectors[:] = 0
+        self._slots = [None] * len(self._slots)
+        self._next = 0
+
+    def _check_version(self):
+        version = self.version_fn()
+        if version != self._version:
+            if self._version is not None:
+                self.counters["invalidations"] += 1
+            self._clear()
+            self._version = version
+
+    def _similar(self, vec, scope, content):
+        scores = self._vectors @ vec
+        for i in np.argsort(-scores)[:8]:
+            if scores[i] < self.similarity:
+                break
+            slot = self._slots[i]
+            if slot and slot[0] == scope and slot[1] == content:
+                return slot[2]
+        return None
+
+    def _put_exact(self, key, result):
+        self._exact[key] = result
+        self._exact.move_to_end(key)
+        if len(self._exact) > self.capacity:
+            self._exact.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def search(self, query, k=10, **filters):
+        """Ergebnis aus dem Cache oder von search_fn (wird dann in beiden Stufen abgelegt)."""
+        tokens = query_tokens(query)
+        scope = (k, tuple(sorted((f, str(v)) for f, v in filters.items() if v is not None)))
+        key = (normalise_query(query), scope)
+        with self.lock:
+            self._check_version()
+            hit = self._exact.get(key)
+            if hit is not None:
+                self._exact.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return hit
+            vec = self.embedder.embed([" ".join(tokens)])[0]
+            content = content_key(tokens)
+            hit = self._similar(vec, scope, content)
+            if hit is not None:
+                self.counters["similar_hits"] += 1
+                self._put_exact(key, hit)
+                return hit
+            self.counters["misses"] += 1
+            version = self._version
+
+        started = time.perf_counter()
+        result = self.search_fn(query, k, **filters)
+        elapsed = time.perf_counter() - started
+
+        with self.lock:
+            self.counters["search_ms"] += elapsed * 1000
+            if version == self._version:          # zwischenzeitlich invalidiert -> nicht ablegen
+                self._put_exact(key, result)
+                self._vectors[self._next] = vec
+                self._slots[self._next] = (scope, content, result)
+                self._next = (self._next + 1) % len(self._slots)
+        return result
+
+    def stats(self):
+        c = self.counters
+        total = c["exact_hits"] + c["similar_hits"] + c["misses"]
+        rate = (lambda n: n / total if total else 0.0)
+        return {
+            "requests": total,
+            "exact_hits": c["exact_hits"],
+            "similar_hits": c["similar_hits"],
+            "misses": c["misses"],
+            "hit_rate": rate(c["exact_hits"] + c["similar_hits"]),
+            "exact_rate": rate(c["exact_hits"]),
+            "similar_rate": rate(c["similar_hits"]),
+            "invalidations": c["invalidations"],
+            "evictions": c["evictions"],
+            "avg_search_ms": c["search_ms"] / c["misses"] if c["misses"] else 0.0,
+            "version": self._version,
+        }
+
+
+if __name__ == "__main__":
+    import knowledge_segments
+
+    parser = argparse.ArgumentParser(description="Retrieval-Cache mit Beispielanfragen pruefen")
+    parser.add_argument("--dir", default=knowledge_segments.SEGMENT_DIR)
+    parser.add_argument("--queries", default=None, help="Textdatei, eine Anfrage je Zeile")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as fh:
+            queries = [line.strip() for line in fh if line.strip()]
+    else:
+        queries = list(SAMPLE_QUERIES)
+    cache = RetrievalCache.for_segments(knowledge_segments.SegmentedIndex(args.dir))
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for q in queries:
+            cache.search(q, 5)
+    elapsed = time.perf_counter() - started
+    s = cache.stats()
+    print(f"  ✓ {s['requests']} Anfragen in {elapsed * 1000:.1f} ms: Trefferquote {s['hit_rate']:.0%} "
+          f"(exakt {s['exact_rate']:.0%}, aehnlich {s['similar_rate']:.0%}), "
+          f"Suche ohne Cache {s['avg_search_ms']:.1f} ms")
+    print("Fertig.")
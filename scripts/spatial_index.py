@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Raeumlicher Index (Gitter) fuer Naechste-Adresse- und Reverse-Geocoding-Abfragen.
+
+Punkte werden in ein regelmaessiges Gitter (lokale Projektion in km) einsortiert.
+Abfragen werden nach Gitterzelle gruppiert: alle Abfragepunkte einer Zelle teilen
+sich dieselbe Kandidatenmenge, die Haversine-Distanzen werden als Matrix in einem
+Schritt berechnet und per argpartition auf die k naechsten reduziert.
+
+Quellen: Adressspeicher (address_store.py) oder gebaeude_mit_adresse_feldkirchen.csv.
+
+Aufruf:  python3 scripts/spatial_index.py [--csv DATEI] [--out DATEI] [--data-dir server/data]
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+import address_store
+from address_store import StringTable, read_sections, write_sections
+
+ROOT_DIR = address_store.ROOT_DIR
+INDEX_PATH = os.path.join(address_store.INDEX_DIR, "adressen.geoidx")
+GEBAEUDE_CSV = os.path.join(ROOT_DIR, "feldkirchen-adressen", "gebaeude_mit_adresse_feldkirchen.csv")
+DATA_DIR = os.path.join(ROOT_DIR, "server", "data")
+
+MAGIC = b"EINFOGEO"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Grosskreisdistanz in km; alle Argumente broadcastbar (Grad)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class SpatialIndex:
+    """Gitterindex ueber Punkten; Punkte liegen nach Zellschluessel sortiert vor."""
+
+    def __init__(self, lat, lon, ids, keys, cells, starts, labels, meta):
+        self.lat = lat
+        self.lon = lon
+        self.ids = ids
+        self.keys = keys
+        self.cells = cells
+        self.starts = starts
+        self.labels = labels
+        self.meta = meta
+        self.cell_km = meta["cell_km"]
+        self.cos0 = meta["cos0"]
+        self._cell_x = cells // meta["ny"] + meta["cx_min"]
+        self._cell_y = cells % meta["ny"] + meta["cy_min"]
+
+    def __len__(self):
+        return len(self.lat)
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, lat, lon, labels=None, cell_km=0.2):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        ids = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        if not len(ids):
+            raise ValueError("keine Punkte mit Koordinaten")
+        cos0 = float(np.cos(np.radians(lat[ids].mean())))
+        meta = {"cell_km": float(cell_km), "cos0": cos0}
+        cx, cy = cls._cell_xy(lat[ids], lon[ids], meta)
+        meta.update(cx_min=int(cx.min()), cy_min=int(cy.min()), nx=int(cx.max() - cx.min() + 1),
+                    ny=int(cy.max() - cy.min() + 1))
+        keys = cls._key(cx, cy, meta)
+        order = np.argsort(keys, kind="stable")
+        ids, keys = ids[order], keys[order]
+        cells, starts = np.unique(keys, return_index=True)
+        starts = np.append(starts, len(keys)).astype(np.int64)
+        label_table = None
+        if labels is not None:
+            interner = address_store._Interner()
+            codes = np.fromiter((interner(labels[i]) for i in ids), dtype=np.uint32, count=len(ids))
+            offsets, blob = interner.encode()
+            label_table = (codes, StringTable(offsets, np.frombuffer(blob, dtype=np.uint8)))
+        return cls(lat[ids], lon[ids], ids.astype(np.int64), keys, cells, starts, label_table, meta)
+
+    @staticmethod
+    def _cell_xy(lat, lon, meta):
+        x = np.asarray(lon) * meta["cos0"] * KM_PER_DEG_LON
+        y = np.asarray(lat) * KM_PER_DEG_LAT
+        return np.floor(x / meta["cell_km"]).astype(np.int64), np.floor(y / meta["cell_km"]).astype(np.int64)
+
+    @staticmethod
+    def _key(cx, cy, meta):
+        return (cx - meta["cx_min"]) * meta["ny"] + (cy - meta["cy_min"])
+
+    # ------------------------------------------------------------------
+    def save(self, path=INDEX_PATH):
+        columns = {"lat": self.lat, "lon": self.lon, "ids": self.ids, "keys": self.keys,
+                   "cells": self.cells, "starts": self.starts}
+        if self.labels is not None:
+            codes, table = self.labels
+            columns.update({"label": codes, "label.offsets": table.offsets, "label.blob": table.blob})
+        write_sections(path, columns, dict(self.meta, count=len(self)), magic=MAGIC)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        meta, cols = read_sections(path, magic=MAGIC)
+        labels = None
+        if "label" in cols:
+            labels = (cols["label"], StringTable(cols["label.offsets"], cols["label.blob"]))
+        return cls(cols["lat"], cols["lon"], cols["ids"], cols["keys"], cols["cells"], cols["starts"],
+                   labels, meta)
+
+    def label(self, pos):
+        """Beschriftung des Punktes an Indexposition `pos` (nicht der Quell-ID)."""
+        if self.labels is None or pos < 0:
+            return ""
+        codes, table = self.labels
+        return table[int(codes[pos])]
+
+    # ------------------------------------------------------------------
+    def _candidates(self, cx, cy, ring):
+        """Indexpositionen aller Punkte in belegten Zellen mit Chebyshev-Abstand <= ring."""
+        sel = np.flatnonzero((np.abs(self._cell_x - cx) <= ring) & (np.abs(self._cell_y - cy) <= ring))
+        if not len(sel):
+            return np.array([], dtype=np.int64)
+        lo = self.starts[sel]
+        lengths = self.starts[sel + 1] - lo
+        offs = np.repeat(lo - np.cumsum(np.append(0, lengths[:-1])), lengths)
+        return offs + np.arange(lengths.sum())
+
+    def _query_near(self, lats, lons, cx, cy, rows, k, dist, pos, slack):
+        """Schneller Pfad: 3x3-Zellnachbarschaft fuer alle Abfragen gleichzeitig.
+
+        Gibt die Zeilen zurueck, fuer die das Ergebnis noch nicht gesichert ist.
+        """
+        d = np.arange(-1, 2)
+        ncx = (cx[rows, None] + np.repeat(d, 3)[None, :])
+        ncy = (cy[rows, None] + np.tile(d, 3)[None, :])
+        keys = self._key(ncx, ncy, self.meta)
+        inside = ((ncx >= self.meta["cx_min"]) & (ncx < self.meta["cx_min"] + self.meta["nx"])
+                  & (ncy >= self.meta["cy_min"]) & (ncy < self.meta["cy_min"] + self.meta["ny"]))
+        cell = np.minimum(np.searchsorted(self.cells, keys), len(self.cells) - 1)
+        hit = inside & (self.cells[cell] == keys)
+        lo = np.where(hit, self.starts[cell], 0).ravel()
+        lengths = np.where(hit, self.starts[cell + 1] - self.starts[cell], 0).ravel()
+        total = int(lengths.sum())
+        if not total:
+            return rows
+        q = np.repeat(np.repeat(np.arange(len(rows)), 9), lengths)
+        pt = np.repeat(lo - np.cumsum(np.append(0, lengths[:-1])), lengths) + np.arange(total)
+        dd = haversine_km(lats[rows][q], lons[rows][q], self.lat[pt], self.lon[pt])
+        # ein einzelner Float-Schluessel (Abfrage + normierte Distanz) sortiert schneller als lexsort
+        order = np.argsort(q + dd / (dd.max() * 1.0001 + 1e-12))
+        q, pt, dd = q[order], pt[order], dd[order]
+        first = np.searchsorted(q, np.arange(len(rows)))
+        rank = np.arange(total) - first[q]
+        counts = np.bincount(q, minlength=len(rows))
+        take = rank < k
+        kth = np.full(len(rows), np.inf)
+        kth[counts >= k] = dd[first[counts >= k] + k - 1]
+        ok = kth <= self.cell_km * slack
+        sel = take & ok[q]
+        dist[rows[q[sel]], rank[sel]] = dd[sel]
+        pos[rows[q[sel]], rank[sel]] = pt[sel]
+        return rows[~ok]
+
+    def query_batch(self, lats, lons, k=1, max_km=None):
+        """k naechste Punkte je Abfrage -> (dist_km[n, k], pos[n, k]); fehlend = (inf, -1).
+
+        `pos` sind Indexpositionen; die Quell-IDs liefert `self.ids[pos]`.
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        n = len(lats)
+        dist = np.full((n, k), np.inf)
+        pos = np.full((n, k), -1, dtype=np.int64)
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        if not valid.any():
+            return dist, pos
+        cx, cy = self._cell_xy(np.where(valid, lats, 0.0), np.where(valid, lons, 0.0), self.meta)
+        # Projektion ist lokal; Sicherheitsabschlag fuer die Ring-Garantie
+        slack = 0.97
+        rows_valid = self._query_near(lats, lons, cx, cy, np.flatnonzero(valid), k, dist, pos, slack)
+        if not len(rows_valid):
+            return self._cap(dist, pos, max_km)
+
+        # Restliche Abfragen (duenn besiedelt / ausserhalb): nach Zelle gruppiert, Ring erweitern
+        qkey = cx[rows_valid] * (1 << 31) + cy[rows_valid]
+        groups, inverse = np.unique(qkey, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(groups) + 1))
+
+        for g in range(len(groups)):
+            rows = rows_valid[order[bounds[g]:bounds[g + 1]]]
+            gx, gy = int(cx[rows[0]]), int(cy[rows[0]])
+            # ab diesem Ring ist das gesamte Gitter abgedeckt
+            max_ring = max(gx - self.meta["cx_min"], self.meta["cx_min"] + self.meta["nx"] - 1 - gx,
+                           gy - self.meta["cy_min"], self.meta["cy_min"] + self.meta["ny"] - 1 - gy, 1)
+            ring = 2
+            while True:
+                cand = self._candidates(gx, gy, ring)
+                reach = ring * self.cell_km * slack
+                covered = ring >= max_ring or (max_km is not None and reach >= max_km)
+                if len(cand) < k and not covered:
+                    ring *= 2
+                    continue
+                d = haversine_km(lats[rows, None], lons[rows, None], self.lat[cand][None, :], self.lon[cand][None, :])
+                kk = min(k, len(cand))
+                if kk < len(cand):
+                    part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+                else:
+                    part = np.broadcast_to(np.arange(kk), (len(rows), kk))
+                dk = np.take_along_axis(d, part, axis=1)
+                srt = np.argsort(dk, axis=1)
+                # Ergebnis ist sicher, wenn die k-te Distanz innerhalb des garantierten Radius liegt;
+                # sonst direkt auf den Ring springen, der diese Distanz abdeckt.
+                need = dk.max() if kk else np.inf
+                if covered or need <= reach:
+                    dist[rows, :kk] = np.take_along_axis(dk, srt, axis=1)
+                    pos[rows, :kk] = cand[np.take_along_axis(part, srt, axis=1)]
+                    break
+                ring = min(max(ring + 1, int(np.ceil(need / (self.cell_km * slack)))), max_ring)
+        return self._cap(dist, pos, max_km)
+
+    @staticmethod
+    def _cap(dist, pos, max_km):
+        if max_km is not None:
+            far = dist > max_km
+            dist[far] = np.inf
+            pos[far] = -1
+        return dist, pos
+
+    def query(self, lat, lon, k=1, max_km=None):
+        dist, pos = self.query_batch([lat], [lon], k, max_km)
+        return dist[0], pos[0]
+
+
+# ----------------------------------------------------------------------
+def build_from_store(store=None, cell_km=0.2):
+    store = store or address_store.open_store()
+    labels = [store.address(i) for i in range(len(store))]
+    return SpatialIndex.build(store.lat, store.lon, labels, cell_km)
+
+
+def build_from_csv(path=GEBAEUDE_CSV, cell_km=0.2):
+    """gebaeude_mit_adresse_feldkirchen.csv (LAT/LON, ADDR_*) als Punktquelle."""
+    lat, lon, labels = [], [], []
+    with open(path, "r", encoding="utf-8-sig", newline="") as fh:
+        for row in csv.DictReader(fh):
+            try:
+                lat.append(float(row.get("LAT") or "nan"))
+                lon.append(float(row.get("LON") or "nan"))
+            except ValueError:
+                lat.append(np.nan)
+                lon.append(np.nan)
+            street = " ".join(p for p in (row.get("ADDR_STRASSE"), row.get("ADDR_HAUSNUMMER") or row.get("HAUSNUMMER")) if p)
+            town = " ".join(p for p in (row.get("ADDR_PLZ"), row.get("ADDR_ORT")) if p)
+            labels.append(", ".join(p for p in (street, town) if p) or row.get("NAME") or "")
+    return SpatialIndex.build(lat, lon, labels, cell_km)
+
+
+def reverse_geocode(index, lats, lons, max_km=0.5):
+    """Naechste bekannte Adresse je Punkt -> [(adresse, distanz_km) | (None, None)]."""
+    dist, pos = index.query_batch(lats, lons, k=1, max_km=max_km)
+    return [
+        (index.label(p), float(d)) if p >= 0 else (None, None)
+        for d, p in zip(dist[:, 0], pos[:, 0])
+    ]
+
+
+def board_points(data_dir=DATA_DIR):
+    """Einsatzkoordinaten aus board.json und GPS-Fixes aus vehicles_gps.json."""
+    points = []
+    try:
+        with open(os.path.join(data_dir, "board.json"), "r", encoding="utf-8") as fh:
+            board = json.load(fh)
+        for col in board.get("columns", {}).values():
+            for item in col.get("items", []):
+                points.append((item.get("humanId") or item.get("id"), item.get("latitude"), item.get("longitude")))
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(data_dir, "vehicles_gps.json"), "r", encoding="utf-8") as fh:
+            for fix in json.load(fh):
+                points.append((fix.get("name"), fix.get("lat"), fix.get("lng")))
+    except (OSError, ValueError):
+        pass
+    return [(name, float(lat), float(lon)) for name, lat, lon in points if lat is not None and lon is not None]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raeumlichen Adressindex bauen und abfragen")
+    parser.add_argument("--store", default=address_store.STORE_PATH)
+    parser.add_argument("--csv", default=None, help="statt des Adressspeichers eine Gebaeude-CSV verwenden")
+    parser.add_argument("--out", default=INDEX_PATH)
+    parser.add_argument("--cell-km", type=float, default=0.2)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="board.json/vehicles_gps.json reverse-geocodieren")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.csv:
+        index = build_from_csv(args.csv, args.cell_km)
+    else:
+        if not os.path.exists(args.store):
+            address_store.build_store(out_path=args.store)
+        index = build_from_store(address_store.open_store(args.store), args.cell_km)
+    index.save(args.out)
+    print(f"  ✓ {args.out}: {len(index)} Punkte ({time.perf_counter() - started:.2f} s)")
+
+    index = SpatialIndex.load(args.out)
+    points = board_points(args.data_dir)
+    if points:
+        started = time.perf_counter()
+        hits = reverse_geocode(index, [p[1] for p in points], [p[2] for p in points])
+        elapsed = (time.perf_counter() - started) * 1000
+        for (name, _, _), (label, d) in zip(points, hits):
+            where = f"{label} ({d * 1000:.0f} m)" if label is not None else "–"
+            print(f"  {name}: {where}")
+        print(f"  {len(points)} Punkte in {elapsed:.1f} ms")
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Synthetische Grosslage (Hochwasser/Sturm) im Format von server/data.
+
+Erzeugt reproduzierbar (--seed) und in beliebigem Umfang:
+  - board.json mit --incidents Einsaetzen und passendem Lage_log.csv
+    (Anlage, Zuweisung, Statuswechsel, Personenzahl, Entfernen),
+  - protocol.csv mit bis zu --protocol-rows Zeilen (Anlage und Nachtraege je Eintrag,
+    Mails als gequotete mehrzeilige Texte),
+  - Aufg_board_<Rolle>.json und Aufg_log_<Rolle>.csv fuer jede Stabsfunktion,
+  - vehicles_gps.json (letzter Stand) und vehicles_gps.history.jsonl (ein Fix je
+    Zeile im --gps-interval-Takt), dazu conf/vehicles.json,
+    group_locations.json und conf/types.json.
+Adressen und Koordinaten stammen aus dem Gemeinde-JSONL-Korpus.
+
+Alle Dateien werden zeilenweise geschrieben: Ereignisse laufen ueber einen Heap,
+der nur die noch offenen Einsaetze/Eintraege haelt, und die Karten von board.json
+werden je Spalte in Zwischendateien gesammelt. Der Speicherbedarf haengt daher
+von der Zahl gleichzeitig offener Vorgaenge ab, nicht vom Umfang der Ausgabe.
+
+Aufruf:  python3 scripts/synth_data.py --out VERZEICHNIS [--seed 1] [--incidents 10000]
+             [--protocol-rows 1000000] [--tasks 1000] [--units 60] [--hours 48]
+"""
+
+import argparse
+import csv
+import datetime
+import heapq
+import itertools
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+import address_store
+from board_replay import TIMEZONE
+
+ROLES = ("LTSTB", "LTSTBSTV", "S1", "S2", "S3", "S4", "S5", "S6")
+COLUMNS = (("neu", "Neu"), ("in-bearbeitung", "In Bearbeitung"), ("erledigt", "Erledigt"))
+LAGE_HEADER = ["Zeitpunkt", "Benutzer", "EinsatzID", "Einsatz", "Aktion", "Von", "Nach", "Einheit",
+               "Bemerkung", "InternID"]
+AUFG_HEADER = ["Zeitpunkt", "Rolle", "Benutzer", "Aktion", "Titel", "Typ", "Verantwortlich",
+               "Von Status", "Nach Status", "Einsatz", "Notiz", "ID"]
+PROTOCOL_HEADER = ["ZEITPUNKT", "AKTION", "PROTOKOLL-NR", "ZU", "DRUCK", "DATUM", "ZEIT", "BENUTZER",
+                   "EING", "AUSG", "KANAL", "AN/VON", "INFORMATION", "RUECKMELDUNG1", "TYP",
+                   "ERGEHT_AN", "ERGAENZUNG"] + [f"{c}{i}" for i in range(1, 6) for c in "MVX"] + \
+                  ["BESTÄTIGT_DURCH", "ID"]
+
+INCIDENTS = {
+    "Technische Hilfeleistung": ("Keller auspumpen", "Baum auf Straße", "Verklausung Bach",
+                                 "Sandsäcke anliefern", "Dach abgedeckt", "Hangrutschung"),
+    "Verkehrsunfall": ("Fahrzeug bergen unter 3.5t", "Fahrzeug bergen über 3.5t", "VU mit eingekl. Person"),
+    "Brand": ("Kaminbrand", "Brand Nebengebäude", "Flurbrand"),
+    "Türöffnung": ("Türöffnung", "Türöffnung Notfall"),
+    "Tierrettung": ("Tier in Notlage", "Tierrettung aus Gewässer"),
+    "Brandmeldeanlage ausgelöst": ("BMA ausgelöst",),
+}
+INCIDENT_WEIGHTS = (0.62, 0.12, 0.08, 0.07, 0.05, 0.06)
+CHANNELS = (("Funk", 0.35), ("Telefon", 0.3), ("MAIL", 0.2), ("Fax", 0.05), ("Bote", 0.1))
+INFO_TYPES = ("Information", "Lagemeldung", "Auftrag", "Rückfrage")
+EXTERNAL = ("BH Feldkirchen", "Polizei", "Landeswarnzentrale", "Gemeinde", "Rotes Kreuz", "Straßenmeisterei")
+MEASURES = ("Lage erkunden", "Sandsäcke bereitstellen", "Bevölkerung informieren", "Straße sperren",
+            "Kräfte nachfordern", "Pumpen verlegen", "Rückmeldung einholen", "Verpflegung organisieren")
+TASK_TYPES = ("Auftrag", "Lagemeldung", "Information", "Rückfrage")
+VEHICLE_TYPES = (("TLFA 4000", 9), ("RLFA 2000", 9), ("KLF", 6), ("MTF", 9), ("KDOF", 3), ("LFB", 9))
+STATUS = ("Neu", "In Bearbeitung", "Erledigt")
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+# ---------------------------------------------------------------------- Hilfen
+
+def fmt_lage(ts):
+    return datetime.datetime.fromtimestamp(ts, TIMEZONE).strftime("%d.%m.%Y  %H:%M:%S")
+
+
+def fmt_protocol(ts):
+    return datetime.datetime.fromtimestamp(ts, TIMEZONE).strftime("%d.%m.%Y, %H:%M:%S")
+
+
+def iso(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc) \
+        .isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def short_id(rng, n=8):
+    return "".join(ALPHABET[i] for i in rng.integers(len(ALPHABET), size=n))
+
+
+def pick(rng, seq, cum=None):
+    """Ein Element aus seq; cum = kumulierte Gewichte. Deutlich schneller als rng.choice je Aufruf."""
+    if cum is None:
+        return seq[int(rng.integers(len(seq)))]
+    return seq[int(np.searchsorted(cum, rng.random() * cum[-1], side="right"))]
+
+
+def new_uuid(rng):
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
+
+
+class CsvOut:
+    """EINFO-CSV wie server/utils/protocolCsv.mjs: BOM, Semikolon, CRLF, mehrzeilige Felder gequotet."""
+
+    def __init__(self, path, header):
+        self.fh = open(path, "w", encoding="utf-8", newline="")
+        self.fh.write("\ufeff")
+        self.writer = csv.writer(self.fh, delimiter=";", lineterminator="\r\n")
+        self.writer.writerow(header)
+        self.rows = 0
+
+    def row(self, values):
+        self.writer.writerow([v.replace("\r\n", "\n").replace("\n", "\r\n") if isinstance(v, str) and "\n" in v
+                              else ("" if v is None else v) for v in values])
+        self.rows += 1
+
+    def close(self):
+        self.fh.close()
+
+
+def merged(starts, expand):
+    """Ereignisse in Zeitreihenfolge: `starts` liefert Vorgaenge nach Startzeit,
+    expand(vorgang) deren Ereignisse (zeit, daten). Der Heap haelt nur offene Vorgaenge."""
+    heap, seq = [], itertools.count()
+    for item in starts:
+        begin = item[0]
+        while heap and heap[0][0] <= begin:
+            t, _, data = heapq.heappop(heap)
+            yield t, data
+        for t, data in expand(item):
+            heapq.heappush(heap, (t, next(seq), data))
+    while heap:
+        t, _, data = heapq.heappop(heap)
+        yield t, data
+
+
+def arrival_times(rng, n, start, duration):
+    """n Zeitpunkte mit Lageverlauf (Anstieg, Spitze nach ca. 1/3, Abklingen), sortiert."""
+    return start + np.sort(rng.beta(2.0, 3.5, n)) * duration
+
+
+class Places:
+    """Adressen mit Koordinaten aus dem Gemeinde-Korpus (address_store.iter_records)."""
+
+    def __init__(self, src_dir=address_store.GEMEINDE_DIR):
+        rows = [(rec.get("street") or "", rec.get("housenumber") or "", rec.get("postcode") or "",
+                 rec.get("place") or "", float(rec["lat"]), float(rec["lon"]))
+                for _, _, _, rec in address_store.iter_records(address_store.gemeinde_files(src_dir))
+                if rec.get("street") and rec.get("place") and rec.get("lat") is not None and rec.get("lon") is not None]
+        if not rows:
+            raise SystemExit(f"Keine Adressen in {src_dir}")
+        self.rows = rows
+        self.lat = np.array([r[4] for r in rows])
+        self.lon = np.array([r[5] for r in rows])
+        self.towns = sorted({r[3] for r in rows})
+
+    def __len__(self):
+        return len(self.rows)
+
+    def address(self, i):
+        street, hn, postcode, place, _, _ = self.rows[i]
+        return f"{street} {hn}".strip() + f", {postcode} {place}".rstrip() + ", Österreich"
+
+    def town_centre(self, town):
+        sel = np.array([r[3] == town for r in self.rows])
+        return float(self.lat[sel].mean()), float(self.lon[sel].mean())
+
+
+# ---------------------------------------------------------------------- Einheiten
+
+def make_units(rng, places, n):
+    """Fahrzeuge (conf/vehicles.json) und Feuerwehrhaeuser (group_locations.json)."""
+    towns = list(rng.choice(places.towns, size=min(len(places.towns), max(1, n // 3)), replace=False))
+    stations = {f"FF {t}": dict(zip(("lat", "lon"), places.town_centre(t))) for t in towns}
+    groups = list(stations)
+    vehicles = []
+    for i in range(n):
+        label, crew = VEHICLE_TYPES[i % len(VEHICLE_TYPES)]
+        group = groups[i % len(groups)]
+        vehicles.append({"id": f"{label.replace(' ', '-')}-{i + 1}", "label": label, "ort": group, "mannschaft": crew})
+    return vehicles, stations
+
+
+# ---------------------------------------------------------------------- Einsaetze
+
+def write_incidents(out, rng, places, vehicles, n, start, end, user="EinsatzInfo"):
+    """board.json und Lage_log.csv. -> Anzahl Log-Zeilen."""
+    types = list(INCIDENTS)
+    type_cum = np.cumsum(INCIDENT_WEIGHTS)
+    end_ts = end
+
+    def starts():
+        for i, t in enumerate(arrival_times(rng, n, start, end - start)):
+            yield float(t), i
+
+    tmp = {key: open(os.path.join(out, f".board.{key}.tmp"), "w", encoding="utf-8") for key, _ in COLUMNS}
+    counts = dict.fromkeys(tmp, 0)
+
+    def expand(item):
+        t0, i = item
+        typ = pick(rng, types, type_cum)
+        content = pick(rng, INCIDENTS[typ])
+        p = int(rng.integers(len(places)))
+        ort = places.address(p)
+        card = {"id": short_id(rng), "content": content, "createdAt": iso(t0), "statusSince": iso(t0),
+                "assignedVehicles": [], "everVehicles": [], "everVehicleLabels": {}, "everPersonnel": 0,
+                "ort": ort, "typ": typ, "externalId": "", "alerted": "", "humanId": f"E-{i + 1}",
+                "latitude": places.lat[p], "longitude": places.lon[p], "location": ort, "description": content,
+                "timestamp": None, "isArea": False, "areaCardId": None, "areaColor": None}
+        base = [card["humanId"], content]
+        events = [(t0, base + ["Einsatz erstellt", "Neu", "", "", ort, card["id"]])]
+        column = "neu"
+        if rng.random() < 0.9:
+            t = t0 + rng.exponential(600) + 30
+            picked = rng.choice(len(vehicles), size=int(rng.integers(1, 4)), replace=False)
+            labels = []
+            for k, v in enumerate(picked):
+                veh = vehicles[int(v)]
+                label = f"{veh['label']} ({veh['ort']})"
+                labels.append(label)
+                if t + k < end_ts:
+                    card["assignedVehicles"].append(veh["id"])
+                    card["everVehicles"].append(veh["id"])
+                    card["everVehicleLabels"][veh["id"]] = {"label": veh["label"], "ort": veh["ort"]}
+                    card["everPersonnel"] += veh["mannschaft"]
+                events.append((t + k, base + ["Einheit zugewiesen", "", "", label, "", card["id"]]))
+            events.append((t + len(picked), base + ["Status gewechselt", "Neu", "In Bearbeitung", "",
+                                                     "durch Zuweisung", card["id"]]))
+            if t + len(picked) < end_ts:
+                column, card["statusSince"] = "in-bearbeitung", iso(t + len(picked))
+            if rng.random() < 0.2:
+                tp = t + rng.exponential(900)
+                events.append((tp, base + ["Personenzahl geändert", "", "", "",
+                                           f"{card['everPersonnel']}→{card['everPersonnel'] + 3}", card["id"]]))
+                if tp < end_ts:
+                    card["everPersonnel"] += 3
+            done = t + len(picked) + rng.lognormal(np.log(5400), 0.7)
+            if rng.random() < 0.85:
+                for k, label in enumerate(labels):
+                    events.append((done - len(labels) + k, base + ["Einheit entfernt", "", "", label, "", card["id"]]))
+                events.append((done, base + ["Status gewechselt", "In Bearbeitung", "Erledigt", "", "", card["id"]]))
+                if done < end_ts:
+                    column, card["statusSince"], card["assignedVehicles"] = "erledigt", iso(done), []
+        for key, value in (("latitude", card["latitude"]), ("longitude", card["longitude"])):
+            card[key] = float(value)
+        fh = tmp[column]
+        fh.write(("," if counts[column] else "") + json.dumps(card, ensure_ascii=False))
+        counts[column] += 1
+        return [(t, row) for t, row in events if t < end_ts]
+
+    log = CsvOut(os.path.join(out, "Lage_log.csv"), LAGE_HEADER)
+    for t, row in merged(starts(), expand):
+        log.row([fmt_lage(t), user] + row)
+    log.close()
+
+    with open(os.path.join(out, "board.json"), "w", encoding="utf-8") as fh:
+        fh.write('{"columns": {')
+        for k, (key, name) in enumerate(COLUMNS):
+            tmp[key].close()
+            fh.write(("," if k else "") + json.dumps(key) + ': {"name": ' + json.dumps(name) + ', "items": [')
+            with open(tmp[key].name, "r", encoding="utf-8") as part:
+                shutil.copyfileobj(part, fh)
+            os.remove(tmp[key].name)
+            fh.write("]}")
+        fh.write("}}")
+    return log.rows
+
+
+# ---------------------------------------------------------------------- Protokoll
+
+def mail_text(rng, places):
+    town = places.rows[int(rng.integers(len(places)))][3]
+    level = pick(rng, ("Gelb", "Orange", "Rot"))
+    return (f"Warnung für: Bezirk Feldkirchen\n\nUnwetterwarnung; Warnstufe {level}\n\n"
+            f"Gemeinde {town}: Pegel steigend, \"Hochwasser\" erwartet.\n"
+            f"Bitte Rückmeldung an die Einsatzleitung; Lage wird laufend beurteilt.\n\n"
+            f"Mit freundlichen Grüßen\nLandeswarnzentrale")
+
+
+def write_protocol(out, rng, places, rows, start, end):
+    """protocol.csv mit bis zu `rows` Zeilen (Anlage plus Nachtraege je Eintrag) vor `end`."""
+    channels, weights = zip(*CHANNELS)
+    channel_cum = np.cumsum(weights)
+    mean_gap = (end - start) / max(rows / 2.4, 1)
+
+    def starts():
+        t = start
+        for nr in itertools.count(1):
+            t += rng.exponential(mean_gap)
+            if t >= end:
+                return
+            yield t, nr
+
+    def expand(item):
+        t0, nr = item
+        kanal = pick(rng, channels, channel_cum)
+        outgoing = kanal != "MAIL" and rng.random() < 0.45
+        recipients = [ROLES[i] for i in rng.permutation(len(ROLES))[:int(rng.integers(1, 3))]]
+        if rng.random() < 0.3:
+            recipients.append(pick(rng, EXTERNAL))
+        info = mail_text(rng, places) if kanal == "MAIL" else \
+            f"{pick(rng, MEASURES)} in {places.address(int(rng.integers(len(places))))}"
+        user = "MAIL-AUTO" if kanal == "MAIL" else pick(rng, ROLES)
+        local = datetime.datetime.fromtimestamp(t0, TIMEZONE)
+        row = ["create", nr, "", "", local.strftime("%Y-%m-%d"), local.strftime("%H:%M"), user,
+               "" if outgoing else "x", "x" if outgoing else "", kanal,
+               (f"An: {recipients[-1]}" if outgoing else f"Von {pick(rng, EXTERNAL)}"), info, "",
+               pick(rng, INFO_TYPES), ", ".join(recipients), ""] + [""] * 15 + ["", new_uuid(rng)]
+        events = [(t0, list(row))]
+        t = t0
+        external = any(r not in ROLES for r in recipients)
+        measures = 0
+        for _ in range(int(rng.poisson(1.4))):
+            t += rng.exponential(1200) + 5
+            row[0] = "update"
+            choice = rng.random()
+            if choice < 0.5 and measures < 5:
+                base = 16 + 3 * measures
+                row[base], row[base + 1] = pick(rng, MEASURES), pick(rng, ROLES)
+                measures += 1
+            elif choice < 0.8 and measures:
+                row[16 + 3 * int(rng.integers(measures)) + 2] = "x"
+            else:
+                row[3] = "x"                               # gedruckt
+            if outgoing and external and not row[31] and rng.random() < 0.5:
+                row[31] = pick(rng, ROLES)                 # BESTÄTIGT_DURCH bleibt ab dann gesetzt
+            events.append((t, list(row)))
+        return [(t, row) for t, row in events if t < end]
+
+    log = CsvOut(os.path.join(out, "protocol.csv"), PROTOCOL_HEADER)
+    for t, row in merged(starts(), expand):
+        if log.rows >= rows:
+            break
+        log.row([fmt_protocol(t)] + row)
+    log.close()
+    return log.rows
+
+
+# ---------------------------------------------------------------------- Aufgaben
+
+def write_tasks(out, rng, role, n, start, end):
+    """Aufg_board_<Rolle>.json und Aufg_log_<Rolle>.csv. -> Anzahl Log-Zeilen."""
+    log = CsvOut(os.path.join(out, f"Aufg_log_{role}.csv"), AUFG_HEADER)
+    board = open(os.path.join(out, f"Aufg_board_{role}.json"), "w", encoding="utf-8")
+    board.write('{"items": [')
+    written = 0
+
+    def starts():
+        for i, t in enumerate(arrival_times(rng, n, start, end - start)):
+            yield float(t), i
+
+    def expand(item):
+        nonlocal written
+        t0, i = item
+        typ, title = pick(rng, TASK_TYPES), f"{pick(rng, MEASURES)} ({role}-{i + 1})"
+        task_id = f"t-{int(t0 * 1000)}-{short_id(rng, 4)}"
+        events = [(t0, ["Angelegt", "", "Neu"])]
+        status, updated = "Neu", t0
+        t = t0
+        for nxt in STATUS[1:]:
+            if rng.random() > 0.8:
+                break
+            t += rng.exponential(1800) + 10
+            if t >= end:
+                break
+            events.append((t, ["Status geändert", status, nxt]))
+            status, updated = nxt, t
+        item = {"id": task_id, "clientId": None, "title": title, "type": typ, "responsible": role, "desc": "",
+                "status": status, "dueAt": iso(t0 + 3600), "createdAt": int(t0 * 1000),
+                "updatedAt": int(updated * 1000), "kind": "task", "meta": {"source": "synth"},
+                "createdBy": role, "relatedIncidentId": None, "incidentTitle": None,
+                "linkedProtocolNrs": [], "linkedProtocols": []}
+        board.write(("," if written else "") + json.dumps(item, ensure_ascii=False))
+        written += 1
+        return [(t, (action, src, dst, title, typ, task_id)) for t, (action, src, dst) in events]
+
+    for t, (action, src, dst, title, typ, task_id) in merged(starts(), expand):
+        log.row([fmt_lage(t), role, role, action, title, typ, role, src, dst, "", "", task_id])
+    board.write("]}")
+    board.close()
+    log.close()
+    return log.rows
+
+
+# ---------------------------------------------------------------------- GPS
+
+def write_gps(out, rng, vehicles, stations, places, start, end, interval=15):
+    """Fahrten zwischen Feuerwehrhaus und zufaelligen Adressen, ein Fix je Takt und Einheit."""
+    n = len(vehicles)
+    home = np.array([[stations[v["ort"]]["lat"], stations[v["ort"]]["lon"]] for v in vehicles])
+    pos = home.copy()
+    target = home.copy()
+    wait = rng.exponential(3600, n)
+    speed_deg = 50 / 3.6 * interval / 111_000               # ~50 km/h je Takt in Grad
+    names = [f"{v['label']} {v['ort']}" for v in vehicles]
+    names = [name if names.index(name) == i else f"{name} {i + 1}" for i, name in enumerate(names)]
+    ids = np.arange(n) + 83_000_000
+    fixes = 0
+    with open(os.path.join(out, "vehicles_gps.history.jsonl"), "w", encoding="utf-8") as fh:
+        t = start
+        while t < end:
+            wait -= interval
+            idle = wait > 0
+            delta = target - pos
+            dist = np.hypot(delta[:, 0], delta[:, 1])
+            arrived = ~idle & (dist < speed_deg)
+            pos[arrived] = target[arrived]
+            # am Ziel: Aufenthalt, dann neues Ziel (Einsatzort oder zurueck ins Feuerwehrhaus)
+            if arrived.any():
+                k = np.flatnonzero(arrived)
+                wait[k] = rng.exponential(1800, len(k))
+                back = rng.random(len(k)) < 0.4
+                picks = rng.integers(len(places), size=len(k))
+                target[k] = np.where(back[:, None], home[k], np.stack([places.lat[picks], places.lon[picks]], 1))
+            moving = ~idle & ~arrived
+            step = np.where(dist > 0, speed_deg / np.maximum(dist, 1e-12), 0)[:, None]
+            pos[moving] += (delta * step)[moving]
+            jitter = rng.normal(0, 0.00002, (n, 2))
+            acc = rng.integers(5, 30, n)
+            stamp = iso(t)
+            for i in range(n):
+                fh.write(json.dumps({"name": vehicles[i]["label"], "realname": names[i], "id": int(ids[i]),
+                                     "lat": round(float(pos[i, 0] + jitter[i, 0]), 7),
+                                     "lng": round(float(pos[i, 1] + jitter[i, 1]), 7),
+                                     "accuracy": int(acc[i]), "created": stamp}, ensure_ascii=False) + "\n")
+            fixes += n
+            ids += n
+            t += interval
+    last = [{"name": vehicles[i]["label"], "subline": "", "realname": names[i], "color": "#0066ff",
+             "id": int(ids[i] - n), "code": 99, "lat": round(float(pos[i, 0]), 7), "lng": round(float(pos[i, 1]), 7),
+             "accuracy": 15, "userId": 900 + i, "alertId": None, "created": iso(t - interval)} for i in range(n)]
+    with open(os.path.join(out, "vehicles_gps.json"), "w", encoding="utf-8") as fh:
+        json.dump(last, fh, ensure_ascii=False, indent=2)
+    return fixes
+
+
+# ---------------------------------------------------------------------- Ablauf
+
+def generate(out, seed=1, incidents=10000, protocol_rows=1_000_000, tasks=1000, units=60, hours=48,
+             start="2026-02-04T06:00", gps_interval=15, src_dir=address_store.GEMEINDE_DIR):
+    os.makedirs(os.path.join(out, "conf"), exist_ok=True)
+    begin = datetime.datetime.fromisoformat(start).replace(tzinfo=TIMEZONE).timestamp()
+    end = begin + hours * 3600
+    # je Datei ein eigener Zufallsstrom: gleiche Ergebnisse auch bei Teilaenderungen der Parameter
+    streams = iter(np.random.SeedSequence(seed).spawn(16))
+    rng = lambda: np.random.default_rng(next(streams))
+
+    def step(label, fn, *args):
+        started = time.perf_counter()
+        n = fn(*args)
+        print(f"  ✓ {label}: {n} ({time.perf_counter() - started:.1f} s)")
+        return n
+
+    places = Places(src_dir)
+    vehicles, stations = make_units(rng(), places, units)
+    with open(os.path.join(out, "conf", "vehicles.json"), "w", encoding="utf-8") as fh:
+        json.dump(vehicles, fh, ensure_ascii=False, indent=2)
+    with open(os.path.join(out, "group_locations.json"), "w", encoding="utf-8") as fh:
+        json.dump(stations, fh, ensure_ascii=False, indent=2)
+    with open(os.path.join(out, "conf", "types.json"), "w", encoding="utf-8") as fh:
+        json.dump(list(INCIDENTS), fh, ensure_ascii=False, indent=2)
+    print(f"  ✓ {len(places)} Adressen, {len(vehicles)} Fahrzeuge in {len(stations)} Feuerwehren")
+
+    step("Lage_log.csv-Zeilen", write_incidents, out, rng(), places, vehicles, incidents, begin, end)
+    step("protocol.csv-Zeilen", write_protocol, out, rng(), places, protocol_rows, begin, end)
+    for role in ROLES:
+        step(f"Aufg_log_{role}.csv-Zeilen", write_tasks, out, rng(), role, tasks, begin, end)
+    if units and gps_interval:
+        step("GPS-Fixes", write_gps, out, rng(), vehicles, stations, places, begin, end, gps_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetische EINFO-Daten fuer Last- und Skalierungstests")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--incidents", type=int, default=10000)
+    parser.add_argument("--protocol-rows", type=int, default=1_000_000)
+    parser.add_argument("--tasks", type=int, default=1000, help="Aufgaben je Rolle")
+    parser.add_argument("--units", type=int, default=60)
+    parser.add_argument("--hours", type=float, default=48)
+    parser.add_argument("--start", default="2026-02-04T06:00", help="Beginn (Ortszeit)")
+    parser.add_argument("--gps-interval", type=int, default=15, help="Sekunden; 0 = keine GPS-Daten")
+    parser.add_argument("--src", default=address_store.GEMEINDE_DIR)
+    args = parser.parse_args()
+
+    print(f"Generiere synthetische Daten in {args.out} ...")
+    started = time.perf_counter()
+    generate(args.out, args.seed, args.incidents, args.protocol_rows, args.tasks, args.units, args.hours,
+             args.start, args.gps_interval, args.src)
+    print(f"Fertig ({time.perf_counter() - started:.1f} s).")
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Quantisierter Vektorindex fuer die Knowledge-Chunks (knowledge_chunks.jsonl).
+
+  - Vektoren als int8 mit Skalierung je Zeile (oder float16), per mmap geoeffnet
+    (Dateiformat wie address_store.write_sections, MAGIC "EINFOVEC").
+  - Zeilen sind nach IVF-Listen sortiert (sphaerisches k-Means): eine Anfrage
+    bewertet nur die `nprobe` naechsten Listen als zusammenhaengende Slices.
+    Ohne nprobe bzw. bei kleinem Vorfilter wird exakt (blockweise) gesucht.
+  - Top-k per Matrixprodukt und argpartition, mehrere Anfragen je Block gemeinsam.
+  - Vorfilter nach Dokument, Gemeinde oder doc_type.
+  - HashingEmbedder: deterministische lokale Einbettung (Woerter + Zeichen-n-Gramme,
+    crc32-Hashing mit Vorzeichen), ohne Modellserver.
+
+Aufruf:  python3 scripts/vector_index.py [--chunks DATEI] [--out DATEI] [--dtype int8|float16]
+                                        [--query TEXT] [--bench N]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+import address_store
+from address_store import StringTable, _Interner, read_sections, write_sections
+from gemeinde_dedup import UMLAUTS
+from knowledge_chunker import OUT_PATH as CHUNKS_PATH
+
+INDEX_PATH = os.path.join(address_store.INDEX_DIR, "knowledge.vec")
+MAGIC = b"EINFOVEC"
+VERSION = 1
+
+DIM = 512
+NGRAM = 4
+BLOCK_ROWS = 16384
+EXACT_LIMIT = 20000         # Vorfilter mit weniger Zeilen -> exakte Suche
+KMEANS_ITER = 8
+KMEANS_SAMPLE = 50000
+WORD = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Deterministische Einbettung: Woerter und Zeichen-n-Gramme, per crc32 auf `dim` Spalten gehasht."""
+
+    def __init__(self, dim=DIM, ngram=NGRAM):
+        self.dim = dim
+        self.ngram = ngram
+        self._memo = {}
+
+    def params(self):
+        return {"kind": "hashing", "dim": self.dim, "ngram": self.ngram}
+
+    def _word(self, word):
+        hit = self._memo.get(word)
+        if hit is not None:
+            return hit
+        feats = ["w:" + word]
+        if len(word) > self.ngram:
+            padded = f"<{word}>"
+            feats += [padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)]
+        hashes = np.array([zlib.crc32(f.encode("utf-8")) for f in feats], dtype=np.uint32)
+        cols = (hashes % self.dim).astype(np.int64)
+        vals = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+        vals[0] *= 2.0                      # ganzes Wort staerker als einzelne n-Gramme
+        if len(self._memo) > 500000:
+            self._memo.clear()
+        hit = self._memo[word] = (cols, vals)
+        return hit
+
+    def embed(self, texts):
+        """(n, dim) float32, L2-normiert, log-gedaempfte Haeufigkeiten."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = WORD.findall((text or "").lower().translate(UMLAUTS))
+            if not words:
+                continue
+            parts = [self._word(w) for w in words]
+            np.add.at(out[row], np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
+        np.copyto(out, np.sign(out) * np.log1p(np.abs(out)))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+def quantise(vectors, dtype="int8"):
+    """-> (gespeicherte Matrix, Skalierung je Zeile). float16 hat Skalierung 1."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(vectors / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def kmeans(vectors, lists, iterations=KMEANS_ITER, seed=0):
+    """Sphaerisches k-Means auf einer Stichprobe -> (lists, dim) Zentroide."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=lists) == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def _chunk_rows(path):
+    """(offset, laenge, record) je Zeile der Chunk-JSONL."""
+    with open(path, "rb") as fh:
+        offset = 0
+        for raw in fh:
+            if raw.strip():
+                yield offset, len(raw), json.loads(raw)
+            offset += len(raw)
+
+
+def build_index(chunks_path=CHUNKS_PATH, out_path=INDEX_PATH, dtype="int8", embedder=None, lists=None,
+                batch=2048):
+    """Bettet alle Chunks ein, quantisiert und schreibt den Index. Gibt die Anzahl Zeilen zurueck."""
+    embedder = embedder or HashingEmbedder()
+    doc_ids, docs, municipalities, doc_types = _Interner(), _Interner(), _Interner(), _Interner()
+    codes = {"doc_id": [], "doc": [], "municipality": [], "doc_type": []}
+    offsets, lengths, parts, texts = [], [], [], []
+
+    def flush():
+        if texts:
+            parts.append(embedder.embed(texts))
+            texts.clear()
+
+    for offset, length, rec in _chunk_rows(chunks_path):
+        address = rec.get("address") if isinstance(rec.get("address"), dict) else {}
+        codes["doc_id"].append(doc_ids(rec.get("doc_id")))
+        codes["doc"].append(docs(rec.get("file") or rec.get("source")))
+        codes["municipality"].append(municipalities(address.get("municipality")))
+        codes["doc_type"].append(doc_types(rec.get("doc_type")))
+        offsets.append(offset)
+        lengths.append(length)
+        texts.append(f"{rec.get('title') or ''}\n{rec.get('content') or ''}")
+        if len(texts) >= batch:
+            flush()
+    flush()
+    vectors = np.concatenate(parts) if parts else np.zeros((0, embedder.dim), dtype=np.float32)
+
+    # IVF: Zeilen nach naechstem Zentroid sortieren, Listen als [start, ende) ueber list_offsets
+    n = len(vectors)
+    lists = lists if lists is not None else (int(np.sqrt(n)) if n >= 4096 else 0)
+    if lists:
+        centroids = kmeans(vectors, lists)
+        assign = np.concatenate([np.argmax(vectors[i:i + BLOCK_ROWS] @ centroids.T, axis=1)
+                                 for i in range(0, n, BLOCK_ROWS)])
+        order = np.argsort(assign, kind="stable")
+        list_offsets = np.searchsorted(assign[order], np.arange(lists + 1)).astype(np.int64)
+    else:
+        centroids = np.zeros((0, embedder.dim), dtype=np.float32)
+        order = np.arange(n)
+        list_offsets = np.zeros(1, dtype=np.int64)
+
+    stored, scale = quantise(vectors[order], dtype)
+    columns = {
+        "vectors": stored,
+        "scale": scale,
+        "centroids": centroids,
+        "list_offsets": list_offsets,
+        "offset": np.asarray(offsets, dtype=np.uint64)[order],
+        "length": np.asarray(lengths, dtype=np.uint32)[order],
+    }
+    for name, interner in (("doc_id", doc_ids), ("doc", docs), ("municipality", municipalities),
+                           ("doc_type", doc_types)):
+        columns[name] = np.asarray(codes[name], dtype=np.uint32)[order]
+        columns[name + ".offsets"], blob = interner.encode()
+        columns[name + ".blob"] = np.frombuffer(blob, dtype=np.uint8)
+
+    write_sections(out_path, columns, {
+        "count": n,
+        "dtype": dtype,
+        "embedder": embedder.params(),
+        "chunks": os.path.relpath(chunks_path, os.path.dirname(os.path.abspath(out_path))),
+    }, magic=MAGIC, version=VERSION)
+    return n
+
+
+class VectorIndex:
+    """Lesezugriff auf den Vektorindex; Vektoren und Spalten sind mmap-Views."""
+
+    FILTERS = ("doc", "municipality", "doc_type")
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.meta, self.columns = read_sections(path, MAGIC)
+        self.vectors = self.columns["vectors"]
+        self.scale = self.columns["scale"]
+        self.centroids = self.columns["centroids"]
+        self.list_offsets = self.columns["list_offsets"]
+        self.strings = {f: StringTable(self.columns[f + ".offsets"], self.columns[f + ".blob"])
+                        for f in ("doc_id",) + self.FILTERS}
+        params = self.meta["embedder"]
+        self.embedder = HashingEmbedder(params["dim"], params["ngram"])
+        base = os.path.dirname(os.path.abspath(path))
+        self.chunks_path = os.path.normpath(os.path.join(base, self.meta["chunks"]))
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def _scores(self, rows, queries):
+        """(len(rows), m) Skalarprodukte; rows ist ein slice oder ein Indexarray."""
+        block = self.vectors[rows].astype(np.float32)
+        return (block @ queries.T) * self.scale[rows][:, None]
+
+    def _filter_rows(self, filters):
+        """Zeilenindizes, die alle Filter erfuellen (None = kein Filter)."""
+        mask = None
+        for field in self.FILTERS:
+            values = filters.get(field)
+            if values is None:
+                continue
+            values = [values] if isinstance(values, str) else values
+            wanted = [c for c in (self.strings[field].find(v) for v in values) if c >= 0]
+            hit = np.isin(self.columns[field], wanted)
+            mask = hit if mask is None else mask & hit
+        return None if mask is None else np.flatnonzero(mask)
+
+    @staticmethod
+    def _merge(best_rows, best_scores, rows, scores, k):
+        """Laufendes Top-k je Anfrage (Spalten von scores) um einen Block erweitern."""
+        rows = np.broadcast_to(np.asarray(rows)[:, None], scores.shape)
+        all_rows = np.concatenate([best_rows, rows.T], axis=1)
+        all_scores = np.concatenate([best_scores, scores.T], axis=1)
+        if all_scores.shape[1] > k:
+            top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+            all_rows = np.take_along_axis(all_rows, top, axis=1)
+            all_scores = np.take_along_axis(all_scores, top, axis=1)
+        return all_rows, all_scores
+
+    def search_vectors(self, queries, k=10, nprobe=8, **filters):
+        """Top-k je Anfragevektor -> Liste von [(zeile, score)] absteigend.
+
+        nprobe=None sucht exakt. Filter: doc=, municipality=, doc_type= (Wert oder Liste) gelten in
+        jedem Pfad; enthalten die nprobe Listen weniger als k passende Zeilen, wird nprobe erweitert.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        m = len(queries)
+        best_rows = np.zeros((m, 0), dtype=np.int64)
+        best_scores = np.zeros((m, 0), dtype=np.float32)
+        rows = self._filter_rows(filters)
+
+        if rows is not None and (len(rows) <= EXACT_LIMIT or nprobe is None or not len(self.centroids)):
+            for i in range(0, len(rows), BLOCK_ROWS):
+                sel = rows[i:i + BLOCK_ROWS]
+                best_rows, best_scores = self._merge(best_rows, best_scores, sel, self._scores(sel, queries), k)
+        elif nprobe is None or not len(self.centroids):
+            for i in range(0, len(self), BLOCK_ROWS):
+                sel = slice(i, min(i + BLOCK_ROWS, len(self)))
+                best_rows, best_scores = self._merge(best_rows, best_scores, np.arange(sel.start, sel.stop),
+                                                     self._scores(sel, queries), k)
+        else:
+            allowed = None
+            if rows is not None:
+                allowed = np.zeros(len(self), dtype=bool)
+                allowed[rows] = True
+            wanted = min(k, len(self) if rows is None else len(rows))
+            results = []
+            for q, order in zip(queries, np.argsort(-(queries @ self.centroids.T), axis=1)):
+                # nprobe verdoppeln, bis die geprobten Listen k passende Zeilen enthalten
+                probe = min(nprobe, len(order))
+                while True:
+                    cand = np.concatenate([np.arange(self.list_offsets[c], self.list_offsets[c + 1])
+                                           for c in order[:probe]])
+                    if allowed is not None:
+                        cand = cand[allowed[cand]]
+                    if len(cand) >= wanted or probe == len(order):
+                        break
+                    probe = min(probe * 2, len(order))
+                r, s = self._merge(best_rows[:1], best_scores[:1], cand, self._scores(cand, q[None, :]), k)
+                results.append((r[0], s[0]))
+            best_rows = [r for r, _ in results]
+            best_scores = [s for _, s in results]
+
+        out = []
+        for r, s in zip(best_rows, best_scores):
+            order = np.argsort(-s)
+            out.append([(int(r[i]), float(s[i])) for i in order])
+        return out
+
+    def search(self, texts, k=10, nprobe=8, **filters):
+        """Wie search_vectors, aber mit Texten (HashingEmbedder)."""
+        texts = [texts] if isinstance(texts, str) else texts
+        return self.search_vectors(self.embedder.embed(texts), k, nprobe, **filters)
+
+    def doc_id(self, row):
+        return self.strings["doc_id"][int(self.columns["doc_id"][row])]
+
+    def record(self, row):
+        """Chunk-Record aus knowledge_chunks.jsonl (liest genau eine Zeile)."""
+        with open(self.chunks_path, "rb") as fh:
+            fh.seek(int(self.columns["offset"][row]))
+            return json.loads(fh.read(int(self.columns["length"][row])))
+
+
+def open_index(path=INDEX_PATH):
+    return VectorIndex(path)
+
+
+def benchmark(n, dim=DIM, queries=50, k=10, nprobe=8, dtype="int8", seed=0):
+    """Synthetischer Index mit n Zeilen -> (ms je Anfrage IVF, ms je Anfrage exakt, recall@k)."""
+    import tempfile
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(256, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 256, n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    lists = int(np.sqrt(n))
+    centroids = kmeans(vectors, lists)
+    assign = np.argmax(vectors @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable")
+    stored, scale = quantise(vectors[order], dtype)
+    zeros = np.zeros(n, dtype=np.uint32)
+    empty_offsets, empty_blob = _Interner().encode()
+    columns = {"vectors": stored, "scale": scale, "centroids": centroids,
+               "list_offsets": np.searchsorted(assign[order], np.arange(lists + 1)).astype(np.int64),
+               "offset": zeros.astype(np.uint64), "length": zeros}
+    for name in ("doc_id",) + VectorIndex.FILTERS:
+        columns[name] = zeros
+        columns[name + ".offsets"], columns[name + ".blob"] = empty_offsets, np.frombuffer(empty_blob, np.uint8)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.vec")
+        write_sections(path, columns, {"count": n, "dtype": dtype, "embedder": {"dim": dim, "ngram": NGRAM},
+                                       "chunks": ""}, magic=MAGIC, version=VERSION)
+        index = VectorIndex(path)
+        q = vectors[rng.choice(n, queries)] + 0.1 * rng.normal(size=(queries, dim)).astype(np.float32)
+        q /= np.linalg.norm(q, axis=1, keepdims=True)
+        started = time.perf_counter()
+        approx = [index.search_vectors(v, k, nprobe)[0] for v in q]
+        ivf_ms = (time.perf_counter() - started) * 1000 / queries
+        started = time.perf_counter()
+        exact = index.search_vectors(q, k, None)
+        exact_ms = (time.perf_counter() - started) * 1000 / queries
+        recall = np.mean([len({r for r, _ in a} & {r for r, _ in e}) / k for a, e in zip(approx, exact)])
+        del index
+    return ivf_ms, exact_ms, recall
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantisierten Vektorindex fuer Knowledge-Chunks bauen")
+    parser.add_argument("--chunks", default=CHUNKS_PATH)
+    parser.add_argument("--out", default=INDEX_PATH)
+    parser.add_argument("--dtype", choices=("int8", "float16"), default="int8")
+    parser.add_argument("--query", default=None)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--bench", type=int, default=0, help="synthetischer Benchmark mit N Zeilen")
+    args = parser.parse_args()
+
+    if args.bench:
+        ivf_ms, exact_ms, recall = benchmark(args.bench, dtype=args.dtype)
+        print(f"  ✓ {args.bench} Zeilen: IVF {ivf_ms:.2f} ms/Anfrage (recall@10 {recall:.2f}), "
+              f"exakt {exact_ms:.2f} ms/Anfrage")
+    else:
+        if not os.path.exists(args.chunks):
+            import knowledge_chunker
+            knowledge_chunker.chunk_all(out_path=args.chunks)
+        print("Generiere Vektorindex ...")
+        started = time.perf_counter()
+        n = build_index(args.chunks, args.out, args.dtype)
+        print(f"  ✓ {args.out}: {n} Chunks, {os.path.getsize(args.out) / 1e6:.1f} MB "
+              f"({time.perf_counter() - started:.2f} s)")
+        if args.query:
+            index = open_index(args.out)
+            started = time.perf_counter()
+            hits = index.search(args.query, args.k)[0]
+            print(f"  Anfrage \"{args.query}\" ({(time.perf_counter() - started) * 1000:.1f} ms):")
+            for row, score in hits:
+                rec = index.record(row)
+                print(f"    {score:.3f}  {rec.get('title')}")
+    print("Fertig.")